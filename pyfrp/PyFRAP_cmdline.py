@@ -1,74 +1,98 @@
+"""PyFRAP command line.
+
+Runs the FRAP pipeline (indexing, image analysis, simulation, pinning and fitting) headlessly over
+embryo files or image folders, see :py:mod:`pyfrp.modules.pyfrp_batch_module`.
+
+Example:
+
+>>> python PyFRAP_cmdline.py -f emb1.emb -f emb2.emb -p 2 --summary results.csv
+>>> python PyFRAP_cmdline.py -f data/embryo1/ -f data/embryo2/ -T template.emb -o results/ --stages analysis,simulation,pin,fit
+
+"""
+
 import sys
+import os
 import argparse
 
+from pyfrp.modules import pyfrp_batch_module
+from pyfrp.modules.pyfrp_term_module import *
+
+def parseFlagVal(s,dtype=str):
+	
+	"""Parses option of the form ``flag,value`` into tuple ``(bool,value)``."""
 
-# Create parser
-parser = argparse.ArgumentParser(description='PyFRAP command line.')
+	flag,val=(s.split(',',1)+[""])[:2]
+	if val=="":
+		return bool(int(flag)),None
+	return bool(int(flag)),dtype(val)
 
-parser.add_argument('-f','--fIn', dest='fIn',action='append',help='Input file names. Can be either embryo files or paths to image data. Note that all inputs should be of the same type.')
+def getParser():
 
-# Options for project creation
+	"""Returns argument parser of PyFRAP command line."""
 
-# Options for image analysis
-parser.add_argument('-G','--gaussian', dest='gaussian', action='const_store',help='Perform gaussian blur. Specified as tuple flag,sigma',default="0,5")
-parser.add_argument('-M','--median', dest='median', action='const_store',help='Perform median filter. Specified as tuple flag,radius',default="0,2")
-parser.add_argument('-F','--flatten', dest='flatten', action='const_store',help='Perform flattening. Specified as tuple flag,pathToFlattenData',default="0,")
-parser.add_argument('-B','--bkgd', dest='bkgd', action='const_store',help='Perform background subtraction. Specified as tuple flag,pathToBkgdData',default="0,")
-parser.add_argument('-N','--norm', dest='norm', action='const_store',help='Perform normalization. Specified as tuple flag,pathToPreData',default="0,")
+	# Create parser
+	parser = argparse.ArgumentParser(description='PyFRAP command line.')
 
-# Options for meshing
+	parser.add_argument('-f','--fIn', dest='fIn',action='append',required=True,help='Input file names. Can be either embryo files or paths to image data. Can be given multiple times.')
+	parser.add_argument('-T','--template', dest='template',help='Embryo file used as template for image folders.',default=None)
+	parser.add_argument('-o','--outDir', dest='outDir',help='Output folder. If not given, embryo files are overwritten and embryos of image folders are saved next to the folder.',default=None)
 
+	# Options for running
+	parser.add_argument('--stages', dest='stages',help='Comma separated stages to run out of '+','.join(pyfrp_batch_module.stages)+'.',default=','.join(pyfrp_batch_module.stages))
+	parser.add_argument('--force', dest='force',action='store_true',help='Run stages even if they are up to date.')
+	parser.add_argument('-p','--processes', dest='processes',type=int,help='Number of worker processes. Defaults to number of CPUs.',default=None)
+	parser.add_argument('--summary', dest='summary',help='Summary file (.csv or .json) for fit results and stage timings.',default=None)
+	parser.add_argument('--copyMeshFiles', dest='copyMeshFiles',action='store_true',help='Copy meshfiles to destination of output files.')
+	parser.add_argument('--debug', dest='debug',action='store_true',help='Print debugging messages.')
 
+	# Options for image analysis
+	parser.add_argument('-G','--gaussian', dest='gaussian',type=lambda s: parseFlagVal(s,float),help='Perform gaussian blur. Specified as tuple flag,sigma',default=None)
+	parser.add_argument('-M','--median', dest='median',type=lambda s: parseFlagVal(s,float),help='Perform median filter. Specified as tuple flag,radius',default=None)
+	parser.add_argument('-F','--flatten', dest='flatten',type=parseFlagVal,help='Perform flattening. Specified as tuple flag,pathToFlattenData',default=None)
+	parser.add_argument('-B','--bkgd', dest='bkgd',type=parseFlagVal,help='Perform background subtraction. Specified as tuple flag,pathToBkgdData',default=None)
+	parser.add_argument('-N','--norm', dest='norm',type=parseFlagVal,help='Perform normalization. Specified as tuple flag,pathToPreData',default=None)
 
-# Options for simulations
-parser.add_argument('--IC', dest='IC', action='const_store',help='Choose initial conditions',default=4)
-parser.add_argument('-t','--tsteps', dest='tsteps', action='const_store',help='Number of simulations timesteps',default=3000)
-parser.add_argument('-s','--stepping', dest='stepping', action='const_store',help='Time stepping (0=linear,1=log)',default=1)
-parser.add_argument('--IC', dest='IC', action='const_store',help='Choose initial conditions',default=4)
+	# Options for simulations
+	parser.add_argument('--IC', dest='IC',type=int,help='Choose initial conditions',default=None)
+	parser.add_argument('-t','--tsteps', dest='tsteps',type=int,help='Number of simulations timesteps',default=None)
+	parser.add_argument('-s','--stepping', dest='stepping',type=int,choices=[0,1],help='Time stepping (0=linear,1=log)',default=1)
+	parser.add_argument('--maxD', dest='maxD',type=float,help='Maximum expected diffusion coefficient in px^2/s, used to optimize simulation time vector.',default=None)
 
-# Options for fitting
+	# Options for pinning
+	parser.add_argument('--bkgdName', dest='bkgdName',help='Name of ROI used for background computation.',default='Bleached Square')
+	parser.add_argument('--normName', dest='normName',help='Name of ROI used for norming computation.',default='Slice')
 
+	return parser
 
+def main(argv=None):
 
+	"""Runs PyFRAP command line. Returns number of failed inputs."""
 
+	args = getParser().parse_args(argv)
 
+	stages=[stage.strip() for stage in args.stages.split(',') if stage.strip()]
+	for stage in stages:
+		if stage not in pyfrp_batch_module.stages:
+			printError("Unknown stage "+stage+". Choose from "+','.join(pyfrp_batch_module.stages)+".")
+			return len(args.fIn)
 
+	overrides={'gaussian':args.gaussian,'median':args.median,'flatten':args.flatten,'bkgd':args.bkgd,'norm':args.norm,
+		'ICmode':args.IC,'stepsSim':args.tsteps}
 
+	results=pyfrp_batch_module.runBatch(args.fIn,outDir=args.outDir,template=args.template,overrides=overrides,workers=args.processes,
+		fnSummary=args.summary,copyMeshFiles=args.copyMeshFiles,runStages=stages,force=args.force,maxDExpPx=args.maxD,
+		timeScale=['lin','log'][args.stepping],bkgdName=args.bkgdName,normName=args.normName,debug=args.debug)
 
-args = parser.parse_args()
+	failed=[res for res in results if res['error']]
 
+	for res in results:
+		print res['name'], ", ".join(stage+": "+res['status'][stage] for stage in pyfrp_batch_module.stages), "FAILED"*bool(res['error'])
 
-print args
+	if failed:
+		printWarning(str(len(failed))+" of "+str(len(results))+" inputs failed.")
 
-# Choose what kind of data is given and what to do with it.
-#inputTypes=[]
-#for inp in args.fIn:
-	#if os.path.isdir(inp):
-		#fns=os.listdir(inp)
-		
-		
-		
-		#for f in fns:
-			#if os.path.isdir(os.path.join(inp,f)):
-				#pass
-			#else:
-				#path,ext=os.path.splitext(inp)
-				
-				#if ext in ['.czi','.lsm','.tif','']
-				
-				
-	#else:
-		#path,ext=os.path.splitext(inp)
-		
-		#if ext=='.emb':
-			#inputTypes.append('embryo')
-		#elif ext=='.mol':
-			#inputTypes.append('molecule')
-		#else:
-			#printWarning("Unknown input type " + inp)
-			
-			
-		
-		
+	return len(failed)
 
+if __name__ == '__main__':
 
+	sys.exit(main())
@@ -25,18 +25,15 @@ from . import subclasses
 
 #PyFRAP GUI classes
 
-#Only import if not RTD or not selected. RTD is currently having problems 
-#with importing GUI classes. Will need to have fix for this 
-#at some point
+#GUI classes are only imported once the GUI is launched, so PyFRAP can 
+#be imported without PyQT/VTK and on machines without display
 
-if os.environ.get('READTHEDOCS', None) == 'True':
-	pass
-else:
-	#from . import gui
-	from .gui.pyfrp_app import main
+def main():
 	
+	"""Launches PyFRAP GUI, see :py:func:`pyfrp.gui.pyfrp_app.main`."""
 	
-		
+	from .gui.pyfrp_app import main
+	return main()
 	
 __version__ = '1.1'
 __author__ = u"Alexander Blaessle"
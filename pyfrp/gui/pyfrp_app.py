@@ -1301,11 +1301,8 @@ class pyfrp(QtGui.QMainWindow):
 		self.lastopen=os.path.dirname(str(fnLoad))
 		self.appendRecent(fnLoad)
 		
-		#Load molecule object
-		self.currMolecule=pyfrp_IO_module.loadFromPickle(fnLoad)
-		
-		#Update Version
-		self.currMolecule.updateVersion()
+		#Load molecule object and update version
+		self.currMolecule=pyfrp_IO_module.loadMolecule(str(fnLoad))
 		
 		#Add molecule to list of molecules
 		self.molecules.append(self.currMolecule)
@@ -1394,7 +1391,7 @@ class pyfrp(QtGui.QMainWindow):
 		fnLoad=QtGui.QFileDialog.getOpenFileName(self, 'Open file', self.lastopen,"*.emb",)
 		
 		#Load and add to molecule
-		newEmbryo=pyfrp_misc_module.loadFromPickle(fnLoad)
+		newEmbryo=pyfrp_IO_module.loadEmbryo(str(fnLoad))
 		self.currMolecule.addEmbryo(newEmbryo)
 		
 		#Append to object bar
@@ -76,8 +76,10 @@ class vtkSimVisualizer(QtGui.QMainWindow):
 			printWarning("Embryo does not have saved simulation. Rerun simulation with saveSim=True.")
 			return
 			
-		# To numpy array 
-		self.embryo.simulation.vals=np.array(self.embryo.simulation.vals)
+		# To numpy array, values written to an on-disk store are read lazily
+		if isinstance(self.embryo.simulation.vals,list):
+			self.embryo.simulation.vals=np.array(self.embryo.simulation.vals)
+		self.valsMax=max(np.max(val) for val in self.embryo.simulation.vals)
 		
 		# Frame
 		self.frame = QtGui.QFrame()
@@ -168,7 +170,7 @@ class vtkSimVisualizer(QtGui.QMainWindow):
 		"""
 		
 		# Convert to right cmap
-		vals=self.embryo.simulation.vals[idx]/self.embryo.simulation.vals.max()
+		vals=np.asarray(self.embryo.simulation.vals[idx])/self.valsMax
 		vals=255*self.cm(vals)
 		vals=vals[:,:3]
 
@@ -355,8 +357,10 @@ class vtkSimVisualizerCutter(QtGui.QMainWindow):
 		if self.embryo.geometry.dim==2:
 			printError("vtkSimVisualizerCutter does only work and make sense for 3D geometries. Use vtkSimVisualizer instead.")
 		
-		# To numpy array 
-		self.embryo.simulation.vals=np.array(self.embryo.simulation.vals)
+		# To numpy array, values written to an on-disk store are read lazily
+		if isinstance(self.embryo.simulation.vals,list):
+			self.embryo.simulation.vals=np.array(self.embryo.simulation.vals)
+		self.valsMax=max(np.max(val) for val in self.embryo.simulation.vals)
 		
 		# Frame
 		self.frame = QtGui.QFrame()
@@ -546,7 +550,7 @@ class vtkSimVisualizerCutter(QtGui.QMainWindow):
 		"""
 		
 		# Convert to right cmap
-		vals=self.embryo.simulation.vals[idx]/self.embryo.simulation.vals.max()
+		vals=np.asarray(self.embryo.simulation.vals[idx])/self.valsMax
 		vals=255*self.cm(vals)
 		vals=vals[:,:3]
 
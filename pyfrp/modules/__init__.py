@@ -18,6 +18,7 @@ if platform.system() in ["Darwin"]:
 	matplotlib.use('qt4agg')
 
 #Basic PyFRAP modules
+from . import pyfrp_lazy_module
 from . import pyfrp_term_module
 from . import pyfrp_IO_module 
 from . import pyfrp_misc_module
@@ -35,6 +36,7 @@ from . import pyfrp_idx_module
 from . import pyfrp_geometry_module
 from . import pyfrp_gmsh_geometry
 from . import pyfrp_openscad_module
+from . import pyfrp_batch_module
 
 #Obsolete/Not-integrated modules  
 #from . import pyfrp_zstack_module
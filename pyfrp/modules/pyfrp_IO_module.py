@@ -26,7 +26,12 @@
 
 """Input/Output module for PyFRAP toolbox. 
 
-Handles saving/loading PyFRAP projects into pickled files and the memory handling that comes with it.
+Handles saving/loading PyFRAP projects into pickled files or container files and the memory handling that comes with it.
+
+Container files are zip archives holding a ``metadata.json`` that describes all objects and their attributes, and
+a compressed ``.npy`` member per large numeric array, such as ROI indices, data and simulation vectors, 
+IC images and the solution history. When loading a container, these arrays are only read once the attribute 
+is accessed, see :py:func:`loadFromContainer`.
 """
 
 #===========================================================================================================================================================================
@@ -40,6 +45,15 @@ import sys
 import os
 import csv
 import shutil
+import glob
+import json
+import zipfile
+import io
+import importlib
+import types
+import weakref
+
+import numpy as np
 
 from pyfrp.modules import pyfrp_misc_module
 from pyfrp.modules import pyfrp_gmsh_IO_module
@@ -49,6 +63,13 @@ from pyfrp.modules.pyfrp_term_module import *
 #Module Functions
 #===========================================================================================================================================================================
 
+containerFormat="pyfrp-container"
+containerVersion=1
+fnContainerMetadata="metadata.json"
+
+#All container readers alive, so they can be redirected once their container is overwritten
+containerReaders=weakref.WeakSet()
+
 def saveToPickle(obj,fn=None):
 	
 	"""Saves obj into pickled format.
@@ -64,6 +85,8 @@ def saveToPickle(obj,fn=None):
 	"""
 	
 	cleanUp()
+	loadAllLazyAttrs(obj)
+	
         if fn==None:
                 if hasattr(obj,"name"):
                         fn=obj.name+".pk"
@@ -102,9 +125,275 @@ def loadFromPickle(fn):
         
         return loadedFile
 
+def saveToContainer(obj,fn=None,minArraySize=64):
+	
+	"""Saves obj into container file.
+	
+	All PyFRAP objects reachable from ``obj`` are written into the container's ``metadata.json`` together with 
+	their attributes. Numeric arrays and lists with at least ``minArraySize`` entries and lists of equally shaped 
+	arrays, such as ``simulation.vals``, are written into separate compressed ``.npy`` members. FiPy meshes imported 
+	from Gmsh are written as their vertex coordinates, face vertex and cell face IDs and rebuilt by 
+	:py:func:`pyfrp.modules.pyfrp_gmsh_IO_module.meshFromMshArrays` when loading. Other values that cannot 
+	be expressed in JSON are pickled into separate members.
+	
+	Attributes of ``obj`` that have not been loaded yet from another container are copied over without loading them.
+	If ``fn`` is replaced, readers still referring to it are redirected to the new file, see :py:func:`containerReader.redirect`.
+	
+	.. note:: If ``fn==None``, will try to save to ``obj.name``, otherwise unnamed.pfc
+	
+	Args:
+		obj (object): Object to save.
+	
+	Keyword Args:
+		fn (str): Output file name.	
+		minArraySize (int): Minimum number of entries of arrays and lists saved as separate members.
+	
+	Returns: 
+		str: Output filename.
+	
+	"""
+	
+	cleanUp()
+	
+	if fn==None:
+		if hasattr(obj,"name"):
+			fn=obj.name+".pfc"
+		else:
+			fn="unnamed"+".pfc"
+	
+	fnTemp=fn+".tmp"
+	with zipfile.ZipFile(fnTemp,'w',zipfile.ZIP_DEFLATED,allowZip64=True) as zf:
+		writer=containerWriter(zf,minArraySize=minArraySize)
+		writer.write(obj)
+	
+	#Readers still referring to fn need to let go of it before it can be replaced
+	readers=[reader for reader in list(containerReaders) if reader.fn==os.path.abspath(fn)]
+	for reader in readers:
+		reader.detach(writer.copied)
+		
+	if os.path.isfile(fn):
+		os.remove(fn)
+	os.rename(fnTemp,fn)
+	
+	for reader in readers:
+		reader.redirect(writer.copied)
+	
+	return fn
+
+def loadFromContainer(fn,lazy=True):
+	
+	"""Loads obj from container file.
+	
+	If ``lazy=True``, attributes saved as separate members, for example indices, data and simulation vectors, 
+	are only read from the container once they are accessed, see also :py:func:`getLazyAttr`. 
+	
+	.. note:: The container file is kept open as long as there are attributes left to load. If it is
+	   overwritten by :py:func:`saveToContainer`, attributes left to load are read from the new file instead.
+	
+	Args:
+		fn (str): Filename.	
+	
+	Keyword Args:
+		lazy (bool): Load arrays on access.
+	
+	Returns: 
+		object: Loaded object.
+	
+	"""
+	
+	cleanUp()
+	
+	#Same as for pickled files, classes might have been saved with the module name of the subclasses folder
+	sys.path.append(pyfrp_misc_module.getSubclassesDir()+'/')
+	
+	return containerReader(fn).read(lazy=lazy)
+
+def isContainerFile(fn):
+	
+	"""Checks if ``fn`` is a container file written by :py:func:`saveToContainer`.
+	
+	Args:
+		fn (str): Filename.	
+	
+	Returns: 
+		bool: True if container file.
+	
+	"""
+	
+	if not zipfile.is_zipfile(fn):
+		return False
+	
+	with zipfile.ZipFile(fn,'r') as zf:
+		return fnContainerMetadata in zf.namelist()
+	
+def loadFromFile(fn):
+	
+	"""Loads obj from either container or pickled file.
+	
+	Args:
+		fn (str): Filename.	
+	
+	Returns: 
+		object: Loaded object.
+	
+	"""
+	
+	if isContainerFile(fn):
+		return loadFromContainer(fn)
+	return loadFromPickle(fn)
+
+def getLazyAttr(obj,name):
+	
+	"""Loads attribute ``name`` of ``obj`` that was not loaded yet from its container file.
+	
+	Classes supporting lazy loading call this function in their ``__getattr__`` method, that is, it 
+	is only called if ``obj`` does not possess ``name`` yet. Once loaded, the attribute is set 
+	and stays in memory.
+	
+	Args:
+		obj (object): Object restored from container.
+		name (str): Attribute name.
+	
+	Raises:
+		AttributeError: If ``obj`` has no attribute ``name`` left to load.
+	
+	Returns: 
+		object: Attribute value.
+	
+	"""
+	
+	lazyAttrs=obj.__dict__.get('lazyAttrs')
+	
+	if not lazyAttrs or name not in lazyAttrs:
+		raise AttributeError("'"+obj.__class__.__name__+"' object has no attribute '"+name+"'")
+	
+	reader,val=lazyAttrs[name]
+	val=reader.readMember(val)
+	
+	del lazyAttrs[name]
+	if len(lazyAttrs)==0:
+		del obj.__dict__['lazyAttrs']
+		
+	setattr(obj,name,val)
+	
+	return val
+
+def getAttrNames(obj):
+	
+	"""Returns names of all attributes of ``obj``, including the ones not loaded yet from its container file.
+	
+	Args:
+		obj (object): Some object.
+	
+	Returns: 
+		list: List of attribute names.
+	
+	"""
+	
+	lazyAttrs=vars(obj).get('lazyAttrs') or {}
+	
+	return [name for name in vars(obj) if name!='lazyAttrs']+list(lazyAttrs)
+
+def loadLazyAttrs(obj):
+	
+	"""Loads all attributes of ``obj`` not loaded yet from its container file.
+	
+	Args:
+		obj (object): Some object.
+	
+	"""
+	
+	for name in list(vars(obj).get('lazyAttrs') or []):
+		getattr(obj,name)
+		
+def loadAllLazyAttrs(obj):
+	
+	"""Loads all attributes not loaded yet of ``obj`` and of all PyFRAP objects reachable from it.
+	
+	Args:
+		obj (object): Some object.
+	
+	"""
+	
+	stack=[obj]
+	visited=set()
+	
+	while len(stack)>0:
+		val=stack.pop()
+		
+		if isinstance(val,(list,tuple,dict)) or isPyFRAPObject(val):
+			if id(val) in visited:
+				continue
+			visited.add(id(val))
+		
+		if isinstance(val,(list,tuple)):
+			stack.extend(val)
+		elif isinstance(val,dict):
+			stack.extend(val.values())
+		elif isPyFRAPObject(val):
+			loadLazyAttrs(val)
+			stack.extend(vars(val).values())
+	
+def getMemberNames(val):
+	
+	"""Returns names of all container members ``val`` refers to.
+	
+	Args:
+		val (dict): Reference to member or to members of a mesh.
+	
+	Returns: 
+		list: List of member names.
+	
+	"""
+	
+	if "__mesh__" in val:
+		return [v["__member__"] for v in val["__mesh__"].values()]
+	return [val["__member__"]]
+
+def isGmshMesh(val):
+	
+	"""Checks if ``val`` is a FiPy mesh imported from Gmsh that can be rebuilt by 
+	:py:func:`pyfrp.modules.pyfrp_gmsh_IO_module.meshFromMshArrays`.
+	
+	Args:
+		val (object): Some value.
+	
+	Returns: 
+		bool: True if Gmsh mesh.
+	
+	"""
+	
+	if not type(val).__module__.startswith('fipy.meshes'):
+		return False
+	
+	from fipy.meshes.gmshMesh import Gmsh2D, Gmsh2DIn3DSpace, Gmsh3D
+	from fipy.meshes.representations.meshRepresentation import _MeshRepresentation
+	
+	if isinstance(val,Gmsh2DIn3DSpace) or not isinstance(val,(Gmsh2D,Gmsh3D)):
+		return False
+	
+	return type(val.representation)==_MeshRepresentation
+
+def isPyFRAPObject(val):
+	
+	"""Checks if ``val`` is an instance of a class defined in PyFRAP.
+	
+	Args:
+		val (object): Some value.
+	
+	Returns: 
+		bool: True if PyFRAP object.
+	
+	"""
+	
+	if not hasattr(val,'__dict__') or isinstance(val,(type,types.ClassType,types.ModuleType,types.FunctionType,types.MethodType)):
+		return False
+	
+	return val.__class__.__module__.split('.')[0].startswith('pyfrp')
+
 def loadMolecule(fn,update=True):
 	
-	"""Loads molecule object from pickle file
+	"""Loads molecule object from pickle or container file
 	and brings it up-to-date.
 	
 	Args:
@@ -118,16 +407,19 @@ def loadMolecule(fn,update=True):
 	
 	"""
 	
-	mol=loadFromPickle(fn)
+	mol=loadFromFile(fn)
 	if update:
-		mol.update_version()
+		mol.updateVersion()
 	return mol
 
 def loadEmbryo(fn,update=True):
 	
-	"""Loads embryo object from pickle file
+	"""Loads embryo object from pickle or container file
 	and brings it up-to-date.
 	
+	If simulation values are kept in a solution store that was saved next to the embryo file, the
+	store is looked up next to ``fn``, so embryo files can be moved together with their store.
+	
 	Args:
 		fn (str): Filename.	
 	
@@ -139,9 +431,15 @@ def loadEmbryo(fn,update=True):
 	
 	"""
 	
-	emb=loadFromPickle(fn)
+	emb=loadFromFile(fn)
 	if update:
-		emb.update_version()
+		emb.updateVersion()
+	
+	#Resolve solution store relative to where the file is now
+	emb.fnSave=os.path.abspath(fn)
+	if emb.simulation!=None:
+		emb.simulation.relocateValsStore(copy=False)
+	
 	return emb
 
 def cleanUp():
@@ -355,6 +653,756 @@ def readCSV(fn,hasHeader=True,delimiter=',',dtype=str):
 			else:
 				rows.append(pyfrp_misc_module.listToDtype(row,dtype))
 			
-	return header,rows	
-	
+	return header,rows
+
+#===========================================================================================================================================================================
+#Classes
+#===========================================================================================================================================================================
 
+class solutionStore(object):
+	
+	"""Chunked, compressed on-disk storage of a solution history.
+	
+	Solutions are appended one timepoint at a time and written to ``fn`` in chunks of ``chunkSize``
+	timepoints, each chunk being a compressed ``.npz`` file. Only the current chunk is held in memory.
+	Reading works like indexing a list, that is ``store[i]`` returns the solution at the ``i``-th timepoint
+	and ``len(store)`` the number of timepoints stored. When reading, the last chunk read is cached, so 
+	reading timepoints sequentially only loads each chunk once.
+	
+	When pickled, only the path and the layout of the store are saved, making it possible to reference
+	large solution histories from an embryo file.
+	
+	Args:
+		fn (str): Path to folder the chunks are stored in.
+		nCells (int): Number of values per timepoint.
+	
+	Keyword Args:
+		chunkSize (int): Number of timepoints per chunk.
+		dtype (str): Datatype values are stored with, for example ``float32`` to halve storage.
+		clear (bool): Remove chunks already in ``fn``.
+			
+	"""
+	
+	def __init__(self,fn,nCells,chunkSize=50,dtype="float64",clear=True):
+		
+		self.fn=os.path.abspath(fn)
+		self.nCells=int(nCells)
+		self.chunkSize=max(int(chunkSize),1)
+		self.dtype=np.dtype(dtype).name
+		self.nVals=0
+		
+		self.buffer=[]
+		self.cache=(None,None)
+		
+		if not os.path.isdir(self.fn):
+			os.makedirs(self.fn)
+		
+		if clear:
+			self.truncate(0)
+		
+	def __getstate__(self):
+		
+		"""Flushes store and returns attributes without buffer and cache."""
+		
+		self.flush()
+		
+		state=dict(self.__dict__)
+		state['buffer']=[]
+		state['cache']=(None,None)
+		
+		return state
+	
+	def __len__(self):
+		
+		return self.nVals
+	
+	def __getitem__(self,idx):
+		
+		if isinstance(idx,slice):
+			return np.array([self[i] for i in range(*idx.indices(self.nVals))])
+		
+		idx=int(idx)
+		if idx<0:
+			idx=idx+self.nVals
+		if idx<0 or idx>=self.nVals:
+			raise IndexError("solutionStore index out of range")
+		
+		chunk,row=divmod(idx,self.chunkSize)
+		
+		if chunk==self.nVals//self.chunkSize:
+			return self.getBuffer()[row]
+		
+		return self.readChunk(chunk)[row]
+	
+	def __iter__(self):
+		
+		for i in range(self.nVals):
+			yield self[i]
+		
+	def getChunkFn(self,chunk):
+		
+		"""Returns path to file of chunk with index ``chunk``.
+		
+		Args:
+			chunk (int): Chunk index.
+		
+		Returns:
+			str: Path to chunk file.
+		
+		"""
+		
+		return os.path.join(self.fn,"chunk_%06d.npz"%chunk)
+		
+	def readChunk(self,chunk):
+		
+		"""Reads chunk from disk or returns it from cache.
+		
+		Args:
+			chunk (int): Chunk index.
+		
+		Returns:
+			numpy.ndarray: Values of chunk.
+		
+		"""
+		
+		if self.cache[0]!=chunk:
+			with np.load(self.getChunkFn(chunk)) as data:
+				self.cache=(chunk,data['vals'])
+		
+		return self.cache[1]
+		
+	def getBuffer(self):
+		
+		"""Returns values of current, incomplete chunk.
+		
+		Reads them from disk if store was just unpickled.
+		
+		Returns:
+			list: Values of current chunk.
+		
+		"""
+		
+		n=self.nVals%self.chunkSize
+		if len(self.buffer)!=n:
+			self.buffer=list(self.readChunk(self.nVals//self.chunkSize)[:n])
+			
+		return self.buffer
+		
+	def append(self,val):
+		
+		"""Appends solution of next timepoint.
+		
+		Writes current chunk to disk once it is full.
+		
+		Args:
+			val (numpy.ndarray): Solution.
+		
+		"""
+		
+		val=np.asarray(val).astype(self.dtype).ravel()
+		if len(val)!=self.nCells:
+			raise ValueError("Expected "+str(self.nCells)+" values, got "+str(len(val)))
+		
+		self.getBuffer().append(val)
+		self.nVals=self.nVals+1
+		
+		if len(self.buffer)==self.chunkSize:
+			self.flush()
+			self.buffer=[]
+	
+	def flush(self):
+		
+		"""Writes current, possibly incomplete chunk to disk."""
+		
+		if len(self.buffer)==0:
+			return
+		
+		chunk=(self.nVals-1)//self.chunkSize
+		
+		fnTemp=self.getChunkFn(chunk)+".tmp"
+		with open(fnTemp,'wb') as f:
+			np.savez_compressed(f,vals=np.array(self.buffer))
+		
+		if os.path.isfile(self.getChunkFn(chunk)):
+			os.remove(self.getChunkFn(chunk))
+		os.rename(fnTemp,self.getChunkFn(chunk))
+		
+		if self.cache[0]==chunk:
+			self.cache=(None,None)
+		
+	def truncate(self,n):
+		
+		"""Truncates store to first ``n`` timepoints and removes chunks not needed anymore.
+		
+		Args:
+			n (int): Number of timepoints to keep.
+		
+		"""
+		
+		self.flush()
+		
+		nChunks=n//self.chunkSize
+		
+		if n%self.chunkSize>0:
+			self.buffer=list(self.readChunk(nChunks)[:n%self.chunkSize])
+			nChunks=nChunks+1
+		else:
+			self.buffer=[]
+		
+		self.nVals=n
+		self.cache=(None,None)
+		
+		for fn in glob.glob(os.path.join(self.fn,"chunk_*.npz*")):
+			if fn.endswith(".tmp") or int(os.path.basename(fn)[6:12])>=nChunks:
+				os.remove(fn)
+	
+	def toArray(self):
+		
+		"""Returns all stored solutions as single array.
+		
+		Returns:
+			numpy.ndarray: Solutions.
+		
+		"""
+		
+		return self[:]
+		
+	def remove(self):
+		
+		"""Removes store from disk."""
+		
+		self.truncate(0)
+		if os.path.isdir(self.fn):
+			shutil.rmtree(self.fn)
+		
+class containerWriter(object):
+	
+	"""Writes PyFRAP objects into container file opened for writing, see :py:func:`saveToContainer`.
+	
+	Objects are written into a flat list, other objects referring to them via their index in this list, such
+	that objects referenced multiple times, for example ROIs referenced by fits, are only written once. 
+	
+	Args:
+		zf (zipfile.ZipFile): Zip file opened for writing.
+		
+	Keyword Args:
+		minArraySize (int): Minimum number of entries of arrays and lists saved as separate members.
+				
+	"""
+	
+	def __init__(self,zf,minArraySize=64):
+		
+		self.zf=zf
+		self.minArraySize=minArraySize
+		
+		self.objects=[]
+		self.objectIdxs={}
+		self.written=[]
+		self.copied={}
+		self.nMembers=0
+		
+	def write(self,obj):
+		
+		"""Writes ``obj`` and all objects reachable from it into container.
+		
+		Args:
+			obj (object): Object to write.
+		
+		"""
+		
+		root=self.encode(obj)
+		
+		metadata={"format":containerFormat,"version":containerVersion,"root":root,"objects":self.objects}
+		self.zf.writestr(fnContainerMetadata,json.dumps(metadata,indent=1,sort_keys=True))
+		
+	def encode(self,val):
+		
+		"""Encodes value into JSON compatible value, writing arrays into separate members.
+		
+		Args:
+			val (object): Value to encode.
+		
+		Returns:
+			object: Encoded value.
+		
+		"""
+		
+		if isinstance(val,np.generic):
+			if isinstance(val.item(),(bool,int,long,float,basestring)):
+				return {"__scalar__":val.item(),"dtype":val.dtype.str}
+		elif val is None or isinstance(val,(bool,int,long,float,unicode)):
+			return val
+		elif isinstance(val,str):
+			try:
+				val.decode('utf-8')
+				return val
+			except UnicodeDecodeError:
+				pass
+		elif isinstance(val,np.ndarray):
+			if val.dtype==object:
+				return {"__objarray__":[self.encode(v) for v in val.ravel()],"shape":list(val.shape)}
+			if val.size>=self.minArraySize or val.dtype.kind not in 'biuf':
+				return self.addArray(val,"array")
+			return {"__ndarray__":val.tolist(),"dtype":val.dtype.str,"shape":list(val.shape)}
+		elif isinstance(val,list):
+			arr,kind=self.getListArray(val)
+			if arr is not None:
+				return self.addArray(arr,kind)
+			return [self.encode(v) for v in val]
+		elif isinstance(val,tuple):
+			return {"__tuple__":[self.encode(v) for v in val]}
+		elif isinstance(val,dict):
+			if all(isinstance(k,basestring) and not k.startswith("__") for k in val):
+				return dict((k,self.encode(v)) for k,v in val.items())
+			return {"__dict__":[[self.encode(k),self.encode(v)] for k,v in val.items()]}
+		elif isPyFRAPObject(val):
+			return self.addObject(val)
+		elif isGmshMesh(val):
+			return self.addMesh(val)
+		
+		return self.addPickle(val)
+	
+	def getListArray(self,val):
+		
+		"""Converts list into array if it is worth being written into a separate member.
+		
+		This is the case for lists of at least ``minArraySize`` numbers of the same kind and lists 
+		of equally shaped numeric arrays with at least ``minArraySize`` entries in total.
+		
+		Args:
+			val (list): Some list.
+		
+		Returns:
+			tuple: Tuple containing:
+			
+				* arr (numpy.ndarray): Array or ``None`` if list should be written into metadata.
+				* kind (str): Either ``list`` or ``arraylist``.
+		
+		"""
+		
+		if len(val)==0:
+			return None,None
+		
+		if isinstance(val[0],np.ndarray):
+			first=val[0]
+			if first.dtype.kind in 'biuf' and first.size*len(val)>=self.minArraySize:
+				if all(isinstance(v,np.ndarray) and v.shape==first.shape and v.dtype==first.dtype for v in val):
+					return np.array(val),"arraylist"
+			return None,None
+		
+		if len(val)<self.minArraySize:
+			return None,None
+		
+		if all(isinstance(v,(int,long,np.integer)) and not isinstance(v,bool) for v in val) or all(isinstance(v,(float,np.floating)) for v in val):
+			arr=np.array(val)
+			if arr.dtype.kind in 'iuf':
+				return arr,"list"
+			
+		return None,None
+	
+	def addObject(self,obj):
+		
+		"""Adds PyFRAP object to list of objects, if not already added.
+		
+		Attributes of ``obj`` not loaded yet from another container are copied without loading them.
+		
+		Args:
+			obj (object): PyFRAP object.
+		
+		Returns:
+			dict: Reference to object.
+		
+		"""
+		
+		if id(obj) not in self.objectIdxs:
+			
+			#Register object before encoding its attributes, since they might refer back to it
+			self.objectIdxs[id(obj)]=len(self.objects)
+			self.written.append(obj)
+			entry={"class":obj.__class__.__module__+"."+obj.__class__.__name__,"attrs":{}}
+			self.objects.append(entry)
+			
+			if hasattr(obj,'__getstate__'):
+				state=obj.__getstate__()
+			else:
+				state=dict(vars(obj))
+			
+			lazyAttrs=state.pop('lazyAttrs',None) or {}
+			
+			for name,val in state.items():
+				entry["attrs"][name]=self.encode(val)
+			for name,(reader,val) in lazyAttrs.items():
+				entry["attrs"][name]=self.copyMember(reader,val)
+				
+		return {"__ref__":self.objectIdxs[id(obj)]}
+	
+	def copyMember(self,reader,val):
+		
+		"""Copies member from another container without loading it.
+		
+		Copied members are recorded in ``copied``, mapping reader and member name to the new member name.
+		
+		Args:
+			reader (containerReader): Reader of other container.
+			val (dict): Reference to member in other container.
+		
+		Returns:
+			dict: Reference to new member.
+		
+		"""
+		
+		if "__mesh__" in val:
+			return {"__mesh__":dict((k,self.copyMember(reader,v)) for k,v in val["__mesh__"].items()),"dim":val["dim"]}
+		
+		ref=self.addMember(reader.readRaw(val["__member__"]),val["kind"])
+		self.copied[(reader,val["__member__"])]=ref["__member__"]
+		
+		return ref
+	
+	def addMesh(self,mesh):
+		
+		"""Writes arrays describing FiPy mesh into separate ``.npy`` members.
+		
+		Masked entries of ID arrays are filled with ``-1``.
+		
+		Args:
+			mesh (fipy.Gmsh3D): FiPy mesh.
+		
+		Returns:
+			dict: Reference to members.
+		
+		"""
+		
+		state=mesh.__getstate__()
+		arrays={"vertexCoords":np.asarray(state['vertexCoords']),
+			"faceVertexIDs":np.ma.filled(state['faceVertexIDs'],-1),
+			"cellFaceIDs":np.ma.filled(state['cellFaceIDs'],-1)}
+		
+		if getattr(mesh,'_orderedCellVertexIDs_data',None) is not None:
+			arrays["cellVertexIDs"]=np.ma.filled(mesh._orderedCellVertexIDs_data,-1)
+			
+		return {"__mesh__":dict((k,self.addArray(v,"array")) for k,v in arrays.items()),"dim":mesh.dim}
+	
+	def addArray(self,arr,kind):
+		
+		"""Writes array into separate ``.npy`` member.
+		
+		Args:
+			arr (numpy.ndarray): Array.
+			kind (str): How array is converted back when reading, either ``array``, ``list`` or ``arraylist``.
+		
+		Returns:
+			dict: Reference to member.
+		
+		"""
+		
+		buf=io.BytesIO()
+		np.lib.format.write_array(buf,arr,allow_pickle=False)
+		
+		return self.addMember(buf.getvalue(),kind)
+	
+	def addPickle(self,val):
+		
+		"""Pickles value into separate member.
+		
+		.. note:: If ``val`` cannot be pickled, will write ``None`` instead.
+		
+		Args:
+			val (object): Value.
+		
+		Returns:
+			dict: Reference to member.
+		
+		"""
+		
+		try:
+			data=pickle.dumps(val,pickle.HIGHEST_PROTOCOL)
+		except Exception:
+			printWarning("containerWriter: Cannot save value of type "+type(val).__name__+", will save None instead.")
+			return None
+		
+		return self.addMember(data,"pickle")
+	
+	def addMember(self,data,kind):
+		
+		"""Writes data into new member.
+		
+		Args:
+			data (str): Data.
+			kind (str): Kind of member, either ``array``, ``list``, ``arraylist`` or ``pickle``.
+		
+		Returns:
+			dict: Reference to member.
+		
+		"""
+		
+		fn="arrays/%06d.%s"%(self.nMembers,["npy","pk"][kind=="pickle"])
+		self.nMembers=self.nMembers+1
+		
+		self.zf.writestr(fn,data)
+		
+		return {"__member__":fn,"kind":kind}
+	
+class containerReader(object):
+	
+	"""Reads PyFRAP objects from container file, see :py:func:`loadFromContainer`.
+	
+	All attributes not loaded yet refer to the reader. The reader keeps the container opened as long as needed. If the 
+	file is overwritten by :py:func:`saveToContainer`, the reader is redirected to the members copied into the new file 
+	and keeps the remaining members left to load in memory. When pickled, the file is reopened once needed and an 
+	``IOError`` is raised if it changed in the meantime.
+	
+	Args:
+		fn (str): Path to container file.
+				
+	"""
+	
+	def __init__(self,fn):
+		
+		self.fn=os.path.abspath(fn)
+		self.stamp=self.getStamp()
+		self.zf=None
+		
+		self.pending=set()
+		self.memberMap={}
+		self.memberCache={}
+		
+		containerReaders.add(self)
+		
+	def __getstate__(self):
+		
+		"""Returns attributes without file handle."""
+		
+		state=dict(self.__dict__)
+		state['zf']=None
+		
+		return state
+	
+	def __setstate__(self,state):
+		
+		"""Restores attributes and registers reader."""
+		
+		self.__dict__.update(state)
+		self.__dict__.setdefault('pending',set())
+		self.__dict__.setdefault('memberMap',{})
+		self.__dict__.setdefault('memberCache',{})
+		
+		containerReaders.add(self)
+		
+	def close(self):
+		
+		"""Closes container file."""
+		
+		if self.zf!=None:
+			self.zf.close()
+			self.zf=None
+	
+	def detach(self,copied):
+		
+		"""Lets go of container file, so it can be replaced.
+		
+		Members left to load that have not been copied into the new file are kept in memory.
+		
+		Args:
+			copied (dict): Copied members, see :py:func:`containerWriter.copyMember`.
+		
+		"""
+		
+		for member in self.pending:
+			if (self,member) not in copied and member not in self.memberCache:
+				self.memberCache[member]=self.readRaw(member)
+		
+		self.close()
+		
+	def redirect(self,copied):
+		
+		"""Redirects reader to new container file after it replaced the old one.
+		
+		Args:
+			copied (dict): Copied members, see :py:func:`containerWriter.copyMember`.
+		
+		"""
+		
+		self.memberMap=dict((member,copied[(self,member)]) for member in self.pending if (self,member) in copied)
+		self.stamp=self.getStamp()
+		
+	def getStamp(self):
+		
+		"""Returns size and modification time of container file."""
+		
+		stat=os.stat(self.fn)
+		return [stat.st_size,stat.st_mtime]
+	
+	def getZipFile(self):
+		
+		"""Returns opened container file.
+		
+		Raises:
+			IOError: If container changed since it was loaded.
+		
+		Returns:
+			zipfile.ZipFile: Container.
+		
+		"""
+		
+		if self.zf==None:
+			if self.getStamp()!=self.stamp:
+				raise IOError("Container "+self.fn+" changed since it was loaded.")
+			self.zf=zipfile.ZipFile(self.fn,'r',allowZip64=True)
+			
+		return self.zf
+	
+	def readRaw(self,fn):
+		
+		"""Returns raw data of member ``fn``."""
+		
+		if fn in self.memberCache:
+			return self.memberCache[fn]
+		
+		return self.getZipFile().read(self.memberMap.get(fn,fn))
+	
+	def readMember(self,val):
+		
+		"""Reads member and converts it back into value.
+		
+		Args:
+			val (dict): Reference to member.
+		
+		Returns:
+			object: Value.
+		
+		"""
+		
+		if "__mesh__" in val:
+			arrays=dict((str(k),self.readMember(v)) for k,v in val["__mesh__"].items())
+			return pyfrp_gmsh_IO_module.meshFromMshArrays(arrays,dim=val["dim"])
+		
+		data=self.readRaw(val["__member__"])
+		
+		self.pending.discard(val["__member__"])
+		self.memberMap.pop(val["__member__"],None)
+		self.memberCache.pop(val["__member__"],None)
+		
+		if val["kind"]=="pickle":
+			return pickle.loads(data)
+		
+		arr=np.lib.format.read_array(io.BytesIO(data),allow_pickle=False)
+		
+		if val["kind"]=="list":
+			return arr.tolist()
+		elif val["kind"]=="arraylist":
+			return list(arr)
+		return arr
+	
+	def read(self,lazy=True):
+		
+		"""Reads all objects from container.
+		
+		Keyword Args:
+			lazy (bool): Load members on access.
+		
+		Returns:
+			object: Object saved into container.
+		
+		"""
+		
+		metadata=json.loads(self.readRaw(fnContainerMetadata))
+		
+		if metadata.get("format")!=containerFormat:
+			raise IOError(self.fn+" is not a PyFRAP container.")
+		if metadata["version"]>containerVersion:
+			printWarning("Container "+self.fn+" was written by a newer version of PyFRAP.")
+		
+		#Create all objects first, since attributes might refer to any of them
+		objects=[self.createObject(str(entry["class"])) for entry in metadata["objects"]]
+		
+		for obj,entry in zip(objects,metadata["objects"]):
+			
+			state={}
+			lazyAttrs={}
+			
+			for name,val in entry["attrs"].items():
+				if lazy and isinstance(val,dict) and ("__member__" in val or "__mesh__" in val) and hasattr(obj.__class__,'__getattr__'):
+					lazyAttrs[str(name)]=(self,val)
+					self.pending.update(getMemberNames(val))
+				else:
+					state[str(name)]=self.decode(val,objects)
+			
+			if len(lazyAttrs)>0:
+				state['lazyAttrs']=lazyAttrs
+				
+			if hasattr(obj,'__setstate__'):
+				obj.__setstate__(state)
+			else:
+				obj.__dict__.update(state)
+		
+		return self.decode(metadata["root"],objects)
+	
+	def createObject(self,name):
+		
+		"""Creates instance of class ``name`` without initializing it.
+		
+		Args:
+			name (str): Full class name, including module.
+		
+		Raises:
+			IOError: If class is not part of PyFRAP.
+			
+		Returns:
+			object: New object.
+		
+		"""
+		
+		module,name=name.rsplit('.',1)
+		
+		if not module.split('.')[0].startswith('pyfrp'):
+			raise IOError("Container "+self.fn+" refers to class "+name+" in "+module+", which is not part of PyFRAP.")
+		
+		cls=getattr(importlib.import_module(module),name)
+		
+		if isinstance(cls,types.ClassType):
+			return types.InstanceType(cls)
+		return cls.__new__(cls)
+		
+	def decode(self,val,objects):
+		
+		"""Decodes value encoded by :py:func:`containerWriter.encode`.
+		
+		Args:
+			val (object): Encoded value.
+			objects (list): List of objects in container.
+		
+		Returns:
+			object: Decoded value.
+		
+		"""
+		
+		if isinstance(val,list):
+			return [self.decode(v,objects) for v in val]
+		elif isinstance(val,unicode):
+			try:
+				return str(val)
+			except UnicodeEncodeError:
+				return val
+		elif not isinstance(val,dict):
+			return val
+		
+		if "__ref__" in val:
+			return objects[val["__ref__"]]
+		elif "__member__" in val or "__mesh__" in val:
+			return self.readMember(val)
+		elif "__tuple__" in val:
+			return tuple(self.decode(val["__tuple__"],objects))
+		elif "__dict__" in val:
+			return dict((self.decode(k,objects),self.decode(v,objects)) for k,v in val["__dict__"])
+		elif "__scalar__" in val:
+			return np.dtype(str(val["dtype"])).type(val["__scalar__"])
+		elif "__ndarray__" in val:
+			return np.array(val["__ndarray__"],dtype=str(val["dtype"])).reshape(val["shape"])
+		elif "__objarray__" in val:
+			arr=np.empty(len(val["__objarray__"]),dtype=object)
+			for i,v in enumerate(val["__objarray__"]):
+				arr[i]=self.decode(v,objects)
+			return arr.reshape(val["shape"])
+		
+		return dict((self.decode(k,objects),self.decode(v,objects)) for k,v in val.items())
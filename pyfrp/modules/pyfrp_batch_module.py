@@ -0,0 +1,462 @@
+#=====================================================================================================================================
+#Copyright
+#=====================================================================================================================================
+
+#Copyright (C) 2014 Alexander Blaessle, Patrick Mueller and the Friedrich Miescher Laboratory of the Max Planck Society
+#This software is distributed under the terms of the GNU General Public License.
+
+#This file is part of PyFRAP.
+
+#PyFRAP is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+#===========================================================================================================================================================================
+#Module Description
+#===========================================================================================================================================================================
+
+"""Batch module for PyFRAP toolbox. 
+
+Runs the FRAP pipeline of :py:func:`pyfrp.subclasses.pyfrp_embryo.embryo.quickAnalysis`, that is the stages
+
+	* ``idxs``: ROI indexing.
+	* ``analysis``: Image analysis.
+	* ``simulation``: Simulation.
+	* ``pin``: Pinning of data and simulation vectors.
+	* ``fit``: Fitting.
+	
+headlessly over many embryo files or image folders in a pool of worker processes. Stages whose inputs have not 
+changed are skipped and only changed ROIs are recomputed, see :py:func:`pyfrp.subclasses.pyfrp_embryo.embryo.runStage`. Fit results and timings of each stage can be written to a CSV or JSON summary.
+This module is used by the command line interface ``PyFRAP_cmdline.py``.
+
+"""
+
+#===========================================================================================================================================================================
+#Improting necessary modules
+#===========================================================================================================================================================================
+
+#Numpy
+import numpy as np
+
+#Misc
+import os
+import time
+import json
+import csv
+import traceback
+import multiprocessing
+
+#PyFRAP modules
+import pyfrp_IO_module
+from pyfrp_term_module import *
+
+#===========================================================================================================================================================================
+#Module Functions
+#===========================================================================================================================================================================
+
+#Pipeline stages in order of execution
+stages=["idxs","analysis","simulation","pin","fit"]
+
+def getStagesUpToDate(emb,bkgdName='Bleached Square',normName='Slice'):
+	
+	"""Checks for each stage of the pipeline if its results in embryo are up to date.
+	
+	A stage is up to date if none of the ROIs (or fits) is outdated, that is, if the inputs of the stage 
+	have not changed since it was last run and all results are present, 
+	see :py:func:`pyfrp.subclasses.pyfrp_embryo.embryo.getOutdated`.
+	
+	Args:
+		emb (pyfrp.subclasses.pyfrp_embryo.embryo): Embryo.
+		
+	Keyword Args:
+		bkgdName (str): Name of ROI used for background computation.
+		normName (str): Name of ROI used for norming computation.
+		
+	Returns:
+		dict: Dictionary with stages as keys and ``True`` if stage is up to date.
+	
+	"""
+	
+	upToDate={}
+	for stage in stages:
+		upToDate[stage]=len(emb.getOutdated(stage,bkgdName=bkgdName,normName=normName))==0
+	
+	return upToDate
+	
+def runEmbryoStages(emb,runStages=None,force=False,maxDExpPx=None,timeScale='log',bkgdName='Bleached Square',normName='Slice',
+	showProgress=False,debug=False):
+	
+	"""Runs stages of FRAP pipeline on embryo, skipping stages that are up to date.
+	
+	Does the same as :py:func:`pyfrp.subclasses.pyfrp_embryo.embryo.quickAnalysis`, but only runs the stages 
+	selected in ``runStages``. Each stage is run via :py:func:`pyfrp.subclasses.pyfrp_embryo.embryo.runStage`, 
+	hence skipped if its inputs have not changed, and only recomputed for the changed ROIs otherwise.
+	
+	Args:
+		emb (pyfrp.subclasses.pyfrp_embryo.embryo): Embryo.
+		
+	Keyword Args:
+		runStages (list): Stages to run, see :py:data:`stages`. If ``None``, runs all stages.
+		force (bool): Run selected stages even if they are up to date.
+		maxDExpPx (float): Maximum expected diffusion coefficient.
+		timeScale (str): Linear (``'lin'``) or logarithmic (``'log'``) time scaling.
+		bkgdName (str): Name of ROI used for background computation.
+		normName (str): Name of ROI used for norming computation.
+		showProgress (bool): Show progress.
+		debug (bool): Print debugging messages.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* status (dict): ``ran``, ``partial`` (only some ROIs or fits were recomputed), ``skipped`` or ``off`` for each stage.
+			* timings (dict): Runtime of each stage in seconds.
+			
+	"""
+	
+	if runStages==None:
+		runStages=stages
+	
+	status={}
+	timings={}
+	
+	for stage in stages:
+		
+		timings[stage]=0.
+		
+		if stage not in runStages:
+			status[stage]="off"
+			continue
+		
+		startTime=time.time()
+		recomputed=emb.runStage(stage,force=force,maxDExpPx=maxDExpPx,timeScale=timeScale,bkgdName=bkgdName,normName=normName,
+			showProgress=showProgress,debug=debug)
+		timings[stage]=time.time()-startTime
+		
+		if len(recomputed)==0:
+			status[stage]="skipped"
+		elif len(recomputed)<len(emb.fits if stage=="fit" else emb.ROIs):
+			status[stage]="partial"
+		else:
+			status[stage]="ran"
+		
+	return status,timings
+
+def applyOverrides(emb,overrides):
+	
+	"""Applies settings given via ``overrides`` to embryo.
+	
+	Possible keys are:
+	
+		* ``gaussian``, ``median``, ``flatten``, ``bkgd``, ``norm``: Tuple ``(flag,value)`` turning
+		  the image processing step on/off and setting its sigma/radius/file path.
+		* ``ICmode``: Initial condition mode of simulation.
+		* ``stepsSim``: Number of simulation timesteps.
+	
+	Settings that are ``None`` are left unchanged. Stages affected by changed settings are rerun 
+	by :py:func:`runEmbryoStages`, since their fingerprints change.
+	
+	Args:
+		emb (pyfrp.subclasses.pyfrp_embryo.embryo): Embryo.
+		overrides (dict): Settings to apply.
+		
+	Returns:
+		pyfrp.subclasses.pyfrp_embryo.embryo: Updated embryo.
+	
+	"""
+	
+	if emb.analysis!=None:
+		setters={'gaussian':(emb.analysis.setGaussianSigma,emb.analysis.setGaussian),
+			'median':(emb.analysis.setMedianRadius,emb.analysis.setMedian),
+			'flatten':(emb.analysis.setFnFlatten,emb.analysis.setFlatten),
+			'bkgd':(emb.analysis.setFnBkgd,emb.analysis.setBkgd),
+			'norm':(emb.analysis.setFnPre,emb.analysis.setNorm)}
+		
+		for key in setters.keys():
+			if overrides.get(key)!=None:
+				flag,val=overrides[key]
+				if flag and val not in [None,""]:
+					setters[key][0](val)
+				setters[key][1](bool(flag))
+		
+	if emb.simulation!=None:
+		
+		if overrides.get('ICmode')!=None and overrides['ICmode']!=emb.simulation.ICmode:
+			emb.simulation.setICMode(overrides['ICmode'])
+		
+		if overrides.get('stepsSim')!=None and overrides['stepsSim']!=emb.simulation.stepsSim:
+			emb.simulation.setTimesteps(overrides['stepsSim'])
+	
+	return emb
+
+def loadBatchInput(fn,template=None):
+	
+	"""Loads embryo for batch input ``fn``.
+	
+	If ``fn`` is an embryo file, loads it. If ``fn`` is a folder of images, loads ``template``
+	and lets it point to the images in ``fn``. The embryo gets named after the folder and all its 
+	results are reset, so that all stages are rerun.
+	
+	Args:
+		fn (str): Path to embryo file or image folder.
+		
+	Keyword Args:
+		template (str): Path to embryo file used as template for image folders.
+		
+	Returns:
+		pyfrp.subclasses.pyfrp_embryo.embryo: Embryo.
+	
+	"""
+	
+	if not os.path.isdir(fn):
+		return pyfrp_IO_module.loadEmbryo(fn)
+	
+	if template==None:
+		raise ValueError("Need template embryo file to process image folder "+fn)
+	
+	emb=pyfrp_IO_module.loadEmbryo(template)
+	emb.setName(os.path.basename(os.path.normpath(fn)))
+	emb.setDataFolder(os.path.normpath(fn)+"/")
+	emb.simulation.ICimg=None
+	
+	for r in emb.ROIs:
+		r.dataVec=[]
+		r.dataVecPinned=[]
+		r.resetSimVec()
+		r.simVecPinned=[]
+	
+	return emb
+
+def getBatchOutputFn(fn,outDir=None):
+	
+	"""Returns path the embryo processed from batch input ``fn`` is saved to.
+	
+	If ``outDir=None``, embryo files are overwritten and embryos of image folders are saved 
+	next to the folder.
+	
+	Args:
+		fn (str): Path to embryo file or image folder.
+		
+	Keyword Args:
+		outDir (str): Output folder.
+		
+	Returns:
+		str: Path to output embryo file.
+	
+	"""
+	
+	fn=os.path.normpath(fn)
+	
+	if os.path.isdir(fn):
+		fnOut=fn+".emb"
+	else:
+		fnOut=fn
+		
+	if outDir!=None:
+		fnOut=os.path.join(outDir,os.path.basename(fnOut))
+	
+	return fnOut
+
+def runBatchJob(job):
+	
+	"""Runs FRAP pipeline for a single batch input.
+	
+	If the output file of the job is newer than its input (and template), the output is
+	loaded instead of the input, so that an interrupted batch continues where it stopped. 
+	The embryo is only saved if at least one stage ran.
+	
+	``job`` is a dictionary with keys
+	
+		* ``fn``: Input embryo file or image folder.
+		* ``fnOut``: Output embryo file, see :py:func:`getBatchOutputFn`.
+		* ``template``: Template embryo file for image folders.
+		* ``overrides``: Settings passed to :py:func:`applyOverrides`.
+		* ``kwargs``: Keyword arguments passed to :py:func:`runEmbryoStages`.
+		* ``copyMeshFiles``: Copy meshfiles to destination of output file.
+	
+	Args:
+		job (dict): Job.
+		
+	Returns:
+		dict: Result with keys ``name``, ``input``, ``output``, ``status``, ``timings``, 
+		``fits`` (list of :py:func:`pyfrp.subclasses.pyfrp_fit.fit.resultsToDict`) and ``error``.
+	
+	"""
+	
+	result={'name':os.path.splitext(os.path.basename(job['fnOut']))[0],'input':job['fn'],'output':job['fnOut'],
+		'status':dict((stage,"off") for stage in stages),'timings':{},'fits':[],'error':""}
+	
+	stage="load"
+	try:
+		startTime=time.time()
+		
+		fnIn=job['fn']
+		inputs=[fnIn]
+		if os.path.isdir(fnIn) and job.get('template')!=None:
+			inputs.append(job['template'])
+		
+		#Continue from output if it is newer than inputs
+		if os.path.isfile(job['fnOut']) and not job['kwargs'].get('force',False):
+			if os.path.getmtime(job['fnOut'])>=max(os.path.getmtime(fn) for fn in inputs):
+				fnIn=job['fnOut']
+		
+		emb=loadBatchInput(fnIn,template=job.get('template'))
+		result['name']=emb.name
+		
+		applyOverrides(emb,job.get('overrides',{}))
+		result['timings']['load']=time.time()-startTime
+		
+		stage="run"
+		status,timings=runEmbryoStages(emb,**job['kwargs'])
+		result['status'].update(status)
+		result['timings'].update(timings)
+		
+		stage="save"
+		startTime=time.time()
+		if "ran" in status.values() or "partial" in status.values() or fnIn!=job['fnOut']:
+			emb.save(fn=job['fnOut'],copyMeshFiles=job.get('copyMeshFiles',False))
+		result['timings']['save']=time.time()-startTime
+		
+		for fit in emb.fits:
+			res=fit.resultsToDict()
+			res['fit']=fit.name
+			result['fits'].append(res)
+	
+	except Exception:
+		result['error']=stage+": "+traceback.format_exc()
+		printError("Batch job "+job['fn']+" failed in stage "+stage+".")
+	
+	return result
+
+def runBatch(fns,outDir=None,template=None,overrides={},workers=None,fnSummary=None,copyMeshFiles=False,**kwargs):
+	
+	"""Runs FRAP pipeline over list of embryo files and image folders in a pool of worker processes.
+	
+	See :py:func:`runBatchJob` and :py:func:`runEmbryoStages` for details. Each worker process handles 
+	one embryo at a time and is replaced after each embryo, so memory is released between embryos.
+	
+	.. note:: If ``workers=1``, embryos are processed one after the other in the current process.
+	
+	Args:
+		fns (list): List of embryo files or image folders.
+		
+	Keyword Args:
+		outDir (str): Output folder, see :py:func:`getBatchOutputFn`.
+		template (str): Path to embryo file used as template for image folders.
+		overrides (dict): Settings applied to all embryos, see :py:func:`applyOverrides`.
+		workers (int): Number of worker processes. If ``None``, uses the number of CPUs.
+		fnSummary (str): Path to summary file, see :py:func:`writeBatchSummary`.
+		copyMeshFiles (bool): Copy meshfiles to destination of output files.
+		kwargs (dict): Keyword arguments passed to :py:func:`runEmbryoStages`.
+	
+	Returns:
+		list: List of results, see :py:func:`runBatchJob`.
+	
+	"""
+	
+	if outDir!=None and not os.path.isdir(outDir):
+		os.makedirs(outDir)
+	
+	jobs=[]
+	for fn in fns:
+		jobs.append({'fn':fn,'fnOut':getBatchOutputFn(fn,outDir=outDir),'template':template,'overrides':overrides,
+			'kwargs':kwargs,'copyMeshFiles':copyMeshFiles})
+		
+	if workers==1 or len(jobs)<2:
+		results=map(runBatchJob,jobs)
+	else:
+		pool=multiprocessing.Pool(processes=workers,maxtasksperchild=1)
+		try:
+			results=pool.map(runBatchJob,jobs,chunksize=1)
+		finally:
+			pool.close()
+			pool.join()
+	
+	if fnSummary!=None:
+		writeBatchSummary(results,fnSummary)
+	
+	return results
+
+def toJSONType(obj):
+	
+	"""Converts numpy types in ``obj`` recursively into types that can be serialized to JSON.
+	
+	Objects that are neither numbers, strings, lists nor dictionaries are converted to strings.
+	
+	Args:
+		obj (object): Object to convert.
+		
+	Returns:
+		object: Converted object.
+	
+	"""
+	
+	if isinstance(obj,dict):
+		return dict((str(key),toJSONType(val)) for key,val in obj.items())
+	if isinstance(obj,(list,tuple,np.ndarray)):
+		return [toJSONType(val) for val in obj]
+	if isinstance(obj,np.generic):
+		return obj.item()
+	if obj==None or isinstance(obj,(bool,int,long,float,basestring)):
+		return obj
+	return str(obj)
+
+def writeBatchSummary(results,fn):
+	
+	"""Writes summary of batch results to file.
+	
+	If ``fn`` ends on ``.json``, writes results as they are. Otherwise writes a CSV table 
+	with one row per embryo and fit, containing the stage states and timings together 
+	with the fit results.
+	
+	Args:
+		results (list): List of results, see :py:func:`runBatchJob`.
+		fn (str): Path to summary file.
+		
+	Returns:
+		str: Path to summary file.
+	
+	"""
+	
+	results=toJSONType(results)
+	
+	if os.path.splitext(fn)[1].lower()==".json":
+		with open(fn,'w') as f:
+			json.dump(results,f,indent=1,sort_keys=True)
+		return fn
+	
+	header=["name","input","output","error"]+["status "+stage for stage in stages]+["time "+stage for stage in ["load"]+stages+["save"]]
+	fitKeys=[]
+	
+	rows=[]
+	for res in results:
+		row={"name":res['name'],"input":res['input'],"output":res['output'],"error":res['error'].strip().split("\n")[-1]}
+		for stage in stages:
+			row["status "+stage]=res['status'].get(stage,"")
+		for stage,t in res['timings'].items():
+			row["time "+stage]=t
+		
+		for fitRes in res['fits'] or [{}]:
+			fitRow=dict(row)
+			for key,val in fitRes.items():
+				if key not in fitKeys:
+					fitKeys.append(key)
+				fitRow[key]=val
+			rows.append(fitRow)
+	
+	header=header+sorted(fitKeys)
+	with open(fn,'wb') as f:
+		fcsv=csv.writer(f,delimiter=',')
+		fcsv.writerow(header)
+		for row in rows:
+			fcsv.writerow([row.get(key,"") for key in header])
+	
+	return fn
@@ -36,12 +36,16 @@
 #Improting necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp_lazy_module import lazyImport
+
 #Misc
 import sys
+import random
+import multiprocessing
 
 #Numpy/Scipy
 import numpy as np
-from fipy import *
 from scipy import interpolate
 import scipy.optimize as sciopt
 
@@ -49,12 +53,16 @@ import scipy.optimize as sciopt
 import pyfrp_stats_module
 import pyfrp_plot_module 
 import pyfrp_optimization_module 
+import pyfrp_misc_module
 
 from pyfrp_term_module import *
 
 
 #matplotlib
-import matplotlib.pyplot as plt
+plt=lazyImport("matplotlib.pyplot")
+
+#Counter for objective function calls, reset by FRAPFitting
+iterations=0
 
 #===========================================================================================================================================================================
 #Module Functions
@@ -91,24 +99,29 @@ def FRAPFitting(fit,debug=False,ax=None):
 	#Building bounds
 	bnds=fit.getBounds()
 	
+	#Precomputing stacked data/simulation arrays
+	arrays=getFitArrays(fit)
+	
 	#------------------------------------------------------------------------------------------------------------------------------------------------------------------
 	#Calling optimization algorithms
 	#------------------------------------------------------------------------------------------------------------------------------------------------------------------
 	
 	#Calling optimizers
 	if fit.optMeth=='brute':
-		res=optimize.brute(FRAPObjFunc, bnds,args=(fit,debug,ax,False), full_output=bool(debug),finish=optimize.fmin)
+		xGrid,nGrid=getBruteGridMin(fit,arrays=arrays)
+		iterations=iterations+nGrid
+		res=sciopt.fmin(FRAPObjFunc,xGrid,args=(fit,debug,ax,False,arrays),disp=bool(debug),full_output=True)
 		
 	elif fit.optMeth=='Constrained Nelder-Mead':
 		LBs, UBs = pyfrp_optimization_module.buildBoundLists(fit)
 		x0=pyfrp_optimization_module.transformX0(x0,LBs,UBs)
-		res=sciopt.fmin(pyfrp_optimization_module.constrObjFunc,x0,args=(fit,debug,ax,False),ftol=fit.optTol,maxiter=fit.maxfun,disp=bool(debug),full_output=True)
+		res=sciopt.fmin(pyfrp_optimization_module.constrObjFunc,x0,args=(fit,debug,ax,False,arrays),ftol=fit.optTol,maxiter=fit.maxfun,disp=bool(debug),full_output=True)
 	
 	elif fit.optMeth=='Anneal':
 		random.seed(555)
-		res=sciopt.minimize(FRAPObjFunc, x0,args=(fit,debug,ax,False), method='Anneal')
+		res=sciopt.minimize(FRAPObjFunc, x0,args=(fit,debug,ax,False,arrays), method='Anneal')
 	else:
-		res=sciopt.minimize(FRAPObjFunc,x0,args=(fit,debug,ax,False),method=fit.optMeth,tol=fit.optTol,options={'maxiter': fit.maxfun, 'disp': bool(debug)})
+		res=sciopt.minimize(FRAPObjFunc,x0,args=(fit,debug,ax,False,arrays),method=fit.optMeth,tol=fit.optTol,options={'maxiter': fit.maxfun, 'disp': bool(debug)})
 	
 	#------------------------------------------------------------------------------------------------------------------------------------------------------------------
 	#Run for one last time to get final fit
@@ -117,13 +130,13 @@ def FRAPFitting(fit,debug=False,ax=None):
 	if fit.optMeth=='Constrained Nelder-Mead':
 		LBs, UBs = pyfrp_optimization_module.buildBoundLists(fit)
 		resNew=pyfrp_optimization_module.xTransform(res[0],LBs,UBs)
-		fit=FRAPObjFunc(resNew,fit,debug,ax,True)
+		fit=FRAPObjFunc(resNew,fit,debug,ax,True,arrays=arrays)
 		
 	elif fit.optMeth=='brute':
-		fit=FRAPObjFunc(res[0],fit,debug,ax,True)
+		fit=FRAPObjFunc(res[0],fit,debug,ax,True,arrays=arrays)
 		
 	else:	
-		fit=FRAPObjFunc(res.x,fit,debug,ax,True)
+		fit=FRAPObjFunc(res.x,fit,debug,ax,True,arrays=arrays)
 	
 	#------------------------------------------------------------------------------------------------------------------------------------------------------------------
 	#Saving results in fit object
@@ -291,6 +304,37 @@ def interpolateSolution(tvecData,tvecScaled,yvec):
 	yvecScaled=fscal(tvecData)
 	return yvecScaled
 
+def interpolateSolutions(tvecData,tvecScaled,yvecs):
+
+	"""Interpolates stacked scaled simulation vectors onto data time vector.
+	
+	Does the same as :py:func:`interpolateSolution` for all rows of ``yvecs`` at once,
+	only computing the interpolation weights a single time.
+	
+	.. note:: Raises ``ValueError`` if ``tvecData`` is not within the range of ``tvecScaled``, 
+	   just like ``scipy.interpolate.interp1d`` does.
+	
+	Args:
+		tvecData (numpy.ndarray): Data time vector.
+		tvecScaled (numpy.ndarray): Increasing scaled simulation time vector.
+		yvecs (numpy.ndarray): Simulation values, one row per ROI.
+			
+	Returns:
+		numpy.ndarray: Scaled simulation vectors, one row per ROI.
+	"""
+	
+	if tvecData.min()<tvecScaled[0] or tvecData.max()>tvecScaled[-1]:
+		raise ValueError("A value in tvecData is outside the interpolation range.")
+	
+	idx=np.clip(np.searchsorted(tvecScaled,tvecData),1,len(tvecScaled)-1)
+	
+	tLow=tvecScaled[idx-1]
+	w=(tvecData-tLow)/(tvecScaled[idx]-tLow)
+	
+	yLow=yvecs[:,idx-1]
+	
+	return yLow+w*(yvecs[:,idx]-yLow)
+
 def getTvecCutIndex(tvec,tCut):
 	
 	"""Finds last index of time vector before time vector
@@ -322,6 +366,77 @@ def cutTvec(tvec,tCutIndex):
 
 	return tvec[:tCutIndex]
 
+def getFitArrays(fit):
+	
+	"""Collects time vectors and stacked data and simulation vectors needed 
+	for fitting.
+	
+	Picks pinned or unpinned vectors of all ROIs in ``fit.ROIsFitted`` depending on ``fit.fitPinned``
+	and cuts them at ``fit.cutOffT`` if ``fit.fitCutOffT`` is selected. Since none of this 
+	depends on the parameters fitted, this only needs to be done once per fit, see :py:func:`FRAPFitting`.
+	
+	Args:
+		fit (pyfrp.subclasses.pyfrp_fit): Fit object.
+	
+	Returns:
+		tuple: Tuple containing:
+			
+			* tvecSim (numpy.ndarray): Simulation time vector.
+			* tvecData (numpy.ndarray): Data time vector.
+			* simVecs (numpy.ndarray): Simulation vectors, one row per ROI.
+			* dataVecs (numpy.ndarray): Data vectors, one row per ROI.
+	
+	"""
+	
+	tvecSim=np.asarray(fit.embryo.simulation.tvecSim,dtype=float)
+	tvecData=np.asarray(fit.embryo.tvecData,dtype=float)
+	
+	if fit.fitPinned:
+		simVecs=[r.simVecPinned for r in fit.ROIsFitted]
+		dataVecs=[r.dataVecPinned for r in fit.ROIsFitted]
+	else:
+		simVecs=[r.simVec for r in fit.ROIsFitted]
+		dataVecs=[r.dataVec for r in fit.ROIsFitted]
+	
+	simVecs=np.asarray(simVecs,dtype=float).reshape(len(fit.ROIsFitted),-1)
+	dataVecs=np.asarray(dataVecs,dtype=float).reshape(len(fit.ROIsFitted),-1)
+	
+	#If cutOff option is given, need to find time point and corresponding steps of cutOff
+	if fit.fitCutOffT:
+		fit.cutOffStepData=getTvecCutIndex(tvecData,fit.cutOffT)
+		fit.cutOffStepSim=getTvecCutIndex(tvecSim,fit.cutOffT)
+		
+		tvecSim=tvecSim[:fit.cutOffStepSim]
+		tvecData=tvecData[:fit.cutOffStepData]
+		simVecs=simVecs[:,:fit.cutOffStepSim]
+		dataVecs=dataVecs[:,:fit.cutOffStepData]
+		
+	return tvecSim,tvecData,simVecs,dataVecs
+
+def scaleSimVecs(tvecSim,D,Dnew,tvecData,simVecs):
+	
+	"""Scales stacked simulation vectors by D/Dnew and interpolates them
+	onto the data time vector.
+	
+	Args:
+		tvecSim (numpy.ndarray): Simulation time vector.
+		D (float): Diffusion rate used for simulation.
+		Dnew (float): Scaling diffusion rate.
+		tvecData (numpy.ndarray): Data time vector.
+		simVecs (numpy.ndarray): Simulation vectors, one row per ROI.
+	
+	Returns:
+		tuple: Tuple containing:
+			
+			* tvecScaled (numpy.ndarray): Scaled time vector.
+			* scaledSimVecs (numpy.ndarray): Scaled simulation vectors, one row per ROI.
+	
+	"""
+	
+	tvecScaled=scaleTime(tvecSim,D,Dnew)
+	
+	return tvecScaled,interpolateSolutions(tvecData,tvecScaled,simVecs)
+
 def scaleROIs(fit,Dnew):
 	
 	"""Scales all simulation vectors of all ROIs defined in 
@@ -342,76 +457,45 @@ def scaleROIs(fit,Dnew):
 	
 	"""
 	
-	scaledSimVecs=[]
-	dataVecs=[]
-		
-	#Rescaling the time series by D/Dnew
-	tvecScaled=scaleTime(fit.embryo.simulation.tvecSim,fit.embryo.simulation.D,Dnew)
+	tvecSim,tvecData,simVecs,dataVecs=getFitArrays(fit)
 	
-	tvecData=fit.embryo.tvecData
+	tvecScaled,scaledSimVecs=scaleSimVecs(tvecSim,fit.embryo.simulation.D,Dnew,tvecData,simVecs)
 	
-	#If cutOff option is given, need to find time point and corresponding steps of cutOff
-	if fit.fitCutOffT:
-		fit.cutOffStepData=getTvecCutIndex(fit.embryo.tvecData,fit.cutOffT)
-		fit.cutOffStepSim=getTvecCutIndex(fit.embryo.simulation.tvecSim,fit.cutOffT)
-		tvecScaled=scaleTime(fit.embryo.simulation.tvecSim[:fit.cutOffStepSim],fit.embryo.simulation.D,Dnew)
-		tvecData=np.array(fit.embryo.tvecData[:fit.cutOffStepData])
-		
-	#Interpolating new solution		
-	for r in fit.ROIsFitted:
-		if fit.fitPinned:
-			if fit.fitCutOffT:
-				scaledSimVecs.append(np.array(interpolateSolution(fit.embryo.tvecData,tvecScaled,r.simVecPinned[:fit.cutOffStepSim])))
-				dataVecs.append(np.array(r.dataVecPinned[:fit.cutOffStepData]))
-			else:
-				scaledSimVecs.append(np.array(interpolateSolution(fit.embryo.tvecData,tvecScaled,r.simVecPinned)))
-				dataVecs.append(np.array(r.dataVecPinned))
-		else:
-			if fit.fitCutOffT:
-				scaledSimVecs.append(interpolateSolution(np.array(fit.embryo.tvecData,tvecScaled,r.simVec[:fit.cutOffStepSim])))
-				dataVecs.append(np.array(r.dataVec[:fit.cutOffStepData]))
-			else:
-				scaledSimVecs.append(np.array(interpolateSolution(fit.embryo.tvecData,tvecScaled,r.simVec)))
-				dataVecs.append(np.array(r.dataVec))
-	
-	return fit,tvecScaled,tvecData,scaledSimVecs,dataVecs
+	return fit,tvecScaled,tvecData,list(scaledSimVecs),list(dataVecs)
 
 def addKineticsToSolution(scaledSimVecs,tvec,prod,degr):
 	
 	"""Adds reaction kinetics to simulation solution.
 	
 	Args:
-		scaledSimVecs (list): List of scaled simulation vectors by ROI.
+		scaledSimVecs (numpy.ndarray): Scaled simulation vectors, one row per ROI.
 		tvec (numpy.ndarray): Data time vector.
 		prod (float): Production rate.
 		degr (float): Degredation rate.
 	
 	Returns:
-		(list): List of rescaled simulation vectors by ROI.
+		numpy.ndarray: Rescaled simulation vectors, one row per ROI.
 
 	"""
 	
-	rescaledSimVecs=[]
+	scaledSimVecs=np.asarray(scaledSimVecs)
 	
-	for scaledSimVec in scaledSimVecs:
+	#Both production and degredation
+	if prod>0 and degr>0:
+		decay=np.exp(-degr*tvec)
+		rescaledSimVecs=scaledSimVecs*decay-(prod/degr)*decay+(prod/degr)
 	
-		#Both production and degredation
-		if prod>0 and degr>0:
-			rescaledSimVec=scaledSimVec*np.exp(-degr*tvec)-(prod/degr)*np.exp(-degr*tvec)+(prod/degr)
-		
-		#Just production
-		elif prod>0 and degr<=0:
-			rescaledSimVec=scaledSimVec+prod*tvec
-			
-		#Just degradation
-		elif prod<=0 and degr>0:
-			rescaledSimVec=scaledSimVec*np.exp(-degr*tvec)
-		
-		#Neither production nor degradation
-		else:
-			rescaledSimVec=scaledSimVec
+	#Just production
+	elif prod>0 and degr<=0:
+		rescaledSimVecs=scaledSimVecs+prod*tvec
 		
-		rescaledSimVecs.append(rescaledSimVec)
+	#Just degradation
+	elif prod<=0 and degr>0:
+		rescaledSimVecs=scaledSimVecs*np.exp(-degr*tvec)
+	
+	#Neither production nor degradation
+	else:
+		rescaledSimVecs=scaledSimVecs
 		
 	return rescaledSimVecs	
 
@@ -450,7 +534,7 @@ def computeEquFactors(dataVec,simVec):
 	more than 3fold (>3), and that the immobile fraction cannot be more than 90% (< 0.1)
 	"""
 	
-	equFacts[np.where((equFacts>3.) + (equFacts<0.1))[0]]=1.
+	equFacts[(equFacts>3.) + (equFacts<0.1)]=1.
 	
 	return equFacts
 
@@ -478,31 +562,24 @@ def findMinEquFacts(dataVecs,simVecs):
 		
 	"""
 	
-	equFacts=[]
+	dataVecs=np.asarray(dataVecs)
+	simVecs=np.asarray(simVecs)
 	
-	#Compute Equalization factors
-	for i in range(len(dataVecs)):
-		equFacts.append(computeEquFactors(dataVecs[i],simVecs[i]))
+	#Compute Equalization factors, one row per ROI
+	equFacts=computeEquFactors(dataVecs,simVecs)
 	
-	#Compute SSD for all ROIs used for fitting for all equalization factors
-	SSDs=[]
-	for j in range(len(equFacts[0])):
-		ssds=[]
-		for i in range(len(equFacts)):	
-			equSimVec=simVecs[i]/equFacts[i][j]
-			ssds.append(pyfrp_stats_module.computeSSD(dataVecs[i],equSimVec))
-			
-		SSDs.append(sum(ssds))
+	#Compute SSD for all ROIs used for fitting for all equalization factors.
+	#Per ROI, sum((d-s/e)**2) = sum(d**2) - 2/e*sum(d*s) + 1/e**2*sum(s**2)
+	dd=(dataVecs**2).sum(axis=1)[:,None]
+	ds=(dataVecs*simVecs).sum(axis=1)[:,None]
+	ss=(simVecs**2).sum(axis=1)[:,None]
 	
-	#Compute Final Equalization Factor (the one that minimizes SSD)
-	equFactFinalIdx=SSDs.index(min(SSDs))
+	SSDs=(dd-2*ds/equFacts+ss/equFacts**2).sum(axis=0)
 	
-	#Append optimal equalization factors 
-	equFactsFinal=[]
-	for i,vec in enumerate(simVecs):
-		equFactsFinal.append(equFacts[i][equFactFinalIdx])
+	#Compute Final Equalization Factor (the one that minimizes SSD)
+	equFactFinalIdx=np.argmin(SSDs)
 	
-	return equFactsFinal
+	return list(equFacts[:,equFactFinalIdx])
 	
 def equalize(dataVecs,simVecs,equFacts,fromVecs=False):
 	
@@ -515,8 +592,8 @@ def equalize(dataVecs,simVecs,equFacts,fromVecs=False):
 	simulation and data vector.
 	
 	Args:
-		simVecs (list): List of scaled simulation vectors by ROI.
-		dataVecs (list): List of data vectors by ROI.
+		simVecs (numpy.ndarray): Scaled simulation vectors, one row per ROI.
+		dataVecs (numpy.ndarray): Data vectors, one row per ROI.
 		equFacts (list): List of equalization factors.
 		
 	Keyword Args:
@@ -525,23 +602,20 @@ def equalize(dataVecs,simVecs,equFacts,fromVecs=False):
 	Returns:
 		tuple: Tuple containing:
 		
-			* equSimVecs (list): List of equalized simulation vectors.
+			* equSimVecs (numpy.ndarray): Equalized simulation vectors, one row per ROI.
 			* equFacts (list): List of (optimal) equalization factors by ROI.
 	"""
 	
-	equSimVecs=[]
-	
 	#Compute possible equalization factors from ratio between data and simulation
 	if fromVecs:
 		equFacts=findMinEquFacts(dataVecs,simVecs)
 	
 	#Return equalized simulation vectors
-	for i,vec in enumerate(simVecs):
-		equSimVecs.append(vec/equFacts[i])
+	equSimVecs=np.asarray(simVecs)/np.asarray(equFacts,dtype=float).reshape(-1,1)
 		
 	return equSimVecs,equFacts
 	
-def FRAPObjFunc(x,fit,debug,ax,returnFit):
+def FRAPObjFunc(x,fit,debug,ax,returnFit,arrays=None):
 	
 	"""Objective function for fitting FRAP experiments.
 	
@@ -550,7 +624,7 @@ def FRAPObjFunc(x,fit,debug,ax,returnFit):
 		* Checks input using :py:func:`pyfrp.modules.pyfrp_fit_module.checkInput` .
 		* Assigns input variables using :py:func:`pyfrp.modules.pyfrp_fit_module.assignInputVariables` .
 		* Adjust kinetic scales using :py:func:`pyfrp.modules.pyfrp_fit_module.downscaleKinetics` .
-		* Scales simulation vector using :py:func:`pyfrp.modules.pyfrp_fit_module.scaleROIs` .
+		* Scales simulation vectors using :py:func:`pyfrp.modules.pyfrp_fit_module.scaleSimVecs` .
 		* Adds reaction kinetics using using :py:func:`pyfrp.modules.pyfrp_fit_module.addKineticsToSolution` .
 		* Equalizes simulation vector using :py:func:`pyfrp.modules.pyfrp_fit_module.equalize` .
 		* Computes and returns SSD.
@@ -562,6 +636,9 @@ def FRAPObjFunc(x,fit,debug,ax,returnFit):
 		ax (matplotlib.axes): Axes to display plots in.
 		returnFit (bool): Return fit instead of SSD.
 	
+	Keyword Args:
+		arrays (tuple): Precomputed arrays returned by :py:func:`getFitArrays`. Will be computed if not given.
+	
 	Returns:
 		 float: SSD of fit. Except ``returnFit==True``, then will return fit itself. 
 
@@ -585,9 +662,14 @@ def FRAPObjFunc(x,fit,debug,ax,returnFit):
 		print "------------------------------------------"
 		print "Dnew=",Dnew, "prod=", prod, "degr=", degr, "equFacts", equFacts
 	
+	#Get stacked data/simulation vectors
+	if arrays==None:
+		arrays=getFitArrays(fit)
+	tvecSim,tvecData,simVecs,dataVecs=arrays
+	
 	#Scale simulation vectors
 	try:
-		fit,tvecScaled,tvecData,scaledSimVecs,dataVecs = scaleROIs(fit,Dnew)
+		tvecScaled,scaledSimVecs = scaleSimVecs(tvecSim,fit.embryo.simulation.D,Dnew,tvecData,simVecs)
 	except ValueError:
 		if debug:
 			printWarning("Scaling failed with Dnew = " + str(Dnew))
@@ -606,14 +688,11 @@ def FRAPObjFunc(x,fit,debug,ax,returnFit):
 		fit.equFacts=equFacts
 		
 	#Compute final SSD
-	ssds=[]
-	for i in range(len(dataVecs)):
-		ssds.append(pyfrp_stats_module.computeSSD(dataVecs[i],scaledSimVecs[i]))
-	SSD=sum(ssds)
+	SSD=pyfrp_stats_module.computeSSD(dataVecs,scaledSimVecs)
 	
 	#Write final fitting vectors in ROI objects
-	fit.fittedVecs=scaledSimVecs
-	fit.dataVecsFitted=dataVecs
+	fit.fittedVecs=list(scaledSimVecs)
+	fit.dataVecsFitted=list(dataVecs)
 	
 	#Live-Plot
 	if debug:
@@ -646,6 +725,185 @@ def FRAPObjFunc(x,fit,debug,ax,returnFit):
 	else:
 		return SSD
 
+def getBruteGridMin(fit,arrays=None):
+	
+	"""Returns grid point with minimal SSD, used as starting point for ``optMeth='brute'``.
+	
+	Evaluates the SSD on a grid spanned by the bounds of diffusion rate (step 1) and, if fitted, production 
+	and degradation rate (step 10) via :py:func:`computeSSDGrid`. Equalization factors are kept at their 
+	initial guess and only varied when :py:func:`FRAPFitting` polishes the result with ``scipy.optimize.fmin``.
+	
+	Args:
+		fit (pyfrp.subclasses.pyfrp_fit): Fit object.
+		
+	Keyword Args:
+		arrays (tuple): Precomputed arrays returned by :py:func:`getFitArrays`. Will be computed if not given.
+	
+	Returns:
+		tuple: Tuple containing:
+		
+			* x (list): Input vector of objective function at grid minimum.
+			* n (int): Number of grid points evaluated.
+		
+	"""
+	
+	Ds=np.arange(fit.LBD,max(fit.UBD,fit.LBD+1),1.)
+	prods=np.arange(fit.LBProd,max(fit.UBProd,fit.LBProd+10),10.) if fit.fitProd else None
+	degrs=np.arange(fit.LBDegr,max(fit.UBDegr,fit.LBDegr+10),10.) if fit.fitDegr else None
+	
+	SSDs=computeSSDGrid(fit,Ds,prods=prods,degrs=degrs,arrays=arrays)
+	i,j,k=np.unravel_index(np.argmin(SSDs),SSDs.shape)
+	
+	x0=fit.getX0()
+	x=[Ds[i]]
+	if fit.fitProd:
+		x.append(prods[j])
+	if fit.fitDegr:
+		x.append(degrs[k])
+	x=x+list(x0[len(x):])
+	
+	return x,SSDs.size
+
+def computeSSDGrid(fit,Ds,prods=None,degrs=None,equFacts=None,arrays=None,workers=1,chunkSize=50):
+	
+	"""Computes SSD of fit for a whole grid of parameter values at once.
+	
+	Evaluates the same SSD as :py:func:`FRAPObjFunc` for every combination of ``Ds``, ``prods``
+	and ``degrs``, but does this in batched numpy operations over all grid points instead of calling
+	the objective function once per point. The grid is processed in chunks of ``chunkSize``
+	diffusion rates, which can optionally be distributed over a pool of ``workers`` processes, see 
+	:py:func:`computeSSDGridChunk`.
+	
+	Production and degradation rates are given in the same units as in ``fit.x0``, that is, they are 
+	still divided by ``fit.kineticTimeScale``. If not given, will use the values from ``fit.x0``.
+	If ``fit.equOn`` and no ``equFacts`` are given, will use the equalization factors stored in ``fit.x0``.
+	
+	.. note:: Grid points for which the scaled simulation does not cover the data time vector
+	   have SSD ``inf``. As in :py:func:`FRAPObjFunc`, grid points with negative fitted values
+	   get ``2*fit.SSD`` instead, see :py:func:`checkInput`.
+	
+	Args:
+		fit (pyfrp.subclasses.pyfrp_fit): Fit object.
+		Ds (numpy.ndarray): Diffusion rates.
+		
+	Keyword Args:
+		prods (numpy.ndarray): Production rates.
+		degrs (numpy.ndarray): Degradation rates.
+		equFacts (list): Equalization factors.
+		arrays (tuple): Precomputed arrays returned by :py:func:`getFitArrays`. Will be computed if not given.
+		workers (int): Number of worker processes. If ``None``, uses the number of CPUs.
+		chunkSize (int): Number of diffusion rates evaluated per chunk.
+	
+	Returns:
+		numpy.ndarray: SSD surface of shape ``(len(Ds),len(prods),len(degrs))``.
+		
+	"""
+	
+	if arrays is None:
+		arrays=getFitArrays(fit)
+	
+	if prods is None:
+		prods=[fit.x0[1]]
+	if degrs is None:
+		degrs=[fit.x0[2]]
+	if equFacts is None:
+		if fit.equOn:
+			equFacts=list(fit.x0[3:])
+		else:
+			equFacts=[]
+	
+	Ds=np.asarray(Ds,dtype=float).ravel()
+	prods=np.asarray(prods,dtype=float).ravel()
+	degrs=np.asarray(degrs,dtype=float).ravel()
+	
+	#Grid points that FRAPObjFunc would reject in checkInput
+	outOfBounds=(Ds<0)[:,None,None]|((prods<0)&fit.fitProd)[None,:,None]|((degrs<0)&fit.fitDegr)[None,None,:]
+	xEqu=equFacts if fit.equOn else list(fit.x0[3:])
+	if len(xEqu)>0 and min(xEqu)<0:
+		outOfBounds=outOfBounds|True
+	
+	prods=prods/fit.kineticTimeScale
+	degrs=degrs/fit.kineticTimeScale
+	
+	chunks=[]
+	for i in range(0,len(Ds),chunkSize):
+		chunks.append((arrays,fit.embryo.simulation.D,Ds[i:i+chunkSize],prods,degrs,equFacts))
+	
+	if workers==1 or len(chunks)<2:
+		SSDs=map(computeSSDGridChunk,chunks)
+	else:
+		pool=multiprocessing.Pool(processes=workers)
+		try:
+			SSDs=pool.map(computeSSDGridChunk,chunks)
+		finally:
+			pool.close()
+			pool.join()
+	
+	SSDs=np.concatenate(SSDs,axis=0)
+	SSDs[np.broadcast_to(outOfBounds,SSDs.shape)]=2*fit.SSD
+	
+	return SSDs
+
+def computeSSDGridChunk(args):
+	
+	"""Computes SSD surface for a chunk of diffusion rates.
+	
+	Worker function of :py:func:`computeSSDGrid`. Takes a single tuple so it 
+	can be handed to ``multiprocessing.Pool.map``.
+	
+	Instead of scaling the simulation time vector for each diffusion rate, maps the data
+	time vector back onto the simulation time vector, so all diffusion rates are interpolated
+	in a single pass. Reaction kinetics are added following :py:func:`addKineticsToSolution`.
+	
+	Args:
+		args (tuple): Tuple containing:
+		
+			* arrays (tuple): Arrays returned by :py:func:`getFitArrays`.
+			* D (float): Diffusion rate used for simulation.
+			* Ds (numpy.ndarray): Diffusion rates.
+			* prods (numpy.ndarray): Production rates, already downscaled.
+			* degrs (numpy.ndarray): Degradation rates, already downscaled.
+			* equFacts (list): Equalization factors.
+		
+	Returns:
+		numpy.ndarray: SSD surface of shape ``(len(Ds),len(prods),len(degrs))``.
+	
+	"""
+	
+	arrays,D,Ds,prods,degrs,equFacts=args
+	tvecSim,tvecData,simVecs,dataVecs=arrays
+	
+	#Data time points in simulation time for each D
+	tq=np.outer(Ds/D,tvecData)
+	inRange=(tq.min(axis=1)>=tvecSim[0]) & (tq.max(axis=1)<=tvecSim[-1])
+	
+	#Interpolate all ROIs for all D, giving shape (nROIs,nD,nT)
+	idx=np.clip(np.searchsorted(tvecSim,tq),1,len(tvecSim)-1)
+	tLow=tvecSim[idx-1]
+	w=(tq-tLow)/(tvecSim[idx]-tLow)
+	
+	yLow=simVecs[:,idx-1]
+	scaledSimVecs=yLow+w*(simVecs[:,idx]-yLow)
+	
+	#Kinetics for all prod/degr combinations, giving shape (nProd,nDegr,nT)
+	prods=np.maximum(prods,0)[:,None,None]
+	degrs=degrs[None,:,None]
+	
+	decay=np.where(degrs>0,np.exp(-np.maximum(degrs,0)*tvecData),1.)
+	offset=np.where(degrs>0,prods/np.where(degrs>0,degrs,1.)*(1-decay),prods*tvecData)
+	
+	#Combine into shape (nROIs,nD,nProd,nDegr,nT)
+	scaledSimVecs=scaledSimVecs[:,:,None,None,:]*decay+offset
+	
+	#Equalize
+	if len(equFacts)>0:
+		scaledSimVecs=scaledSimVecs/np.asarray(equFacts,dtype=float).reshape(-1,1,1,1,1)
+	
+	SSDs=((dataVecs[:,None,None,None,:]-scaledSimVecs)**2).sum(axis=4).sum(axis=0)
+	SSDs[~inRange]=np.inf
+	
+	return SSDs
+
 def computePinVals(vec,useMin=False,useMax=False,bkgdVal=None,debug=False):
 	
 	"""Computes pinning values of vector.
@@ -782,14 +1040,107 @@ def pinConc(vec,bkgdVal,normVal,axes=None,debug=False,tvec=None,color='b'):
 		
 	return vecPinned
 
-def computeFitLikelihoodProfiles(fit,epsPerc=0.1,steps=100,debug=False):
+def computeObjFuncValues(fit,xs,workers=1,debug=False):
+	
+	"""Evaluates objective function :py:func:`FRAPObjFunc` for a list of input vectors.
+	
+	Evaluation is done on a stripped copy of the fit (see :py:func:`pyfrp.subclasses.pyfrp_fit.fit.getStrippedCopy`),
+	so ``fit`` itself is not altered. Input vectors can optionally be distributed over a pool of 
+	``workers`` processes, see :py:func:`computeObjFuncChunk`.
+	
+	Args:
+		fit (pyfrp.subclasses.pyfrp_fit.fit): Fit object.
+		xs (list): List of input vectors.
+		
+	Keyword Args:
+		workers (int): Number of worker processes. If ``None``, uses the number of CPUs.
+		debug (bool): Show debugging messages
+		
+	Returns:
+		list: Corresponding SSDs.
+	
+	"""
+	
+	fitStripped=fit.getStrippedCopy()
+	
+	if workers==1 or len(xs)<2:
+		return computeObjFuncChunk((fitStripped,xs,debug))
+	
+	nChunks=workers
+	if nChunks==None:
+		nChunks=multiprocessing.cpu_count()
+	chunkSize=int(np.ceil(len(xs)/float(nChunks)))
+	
+	chunks=[]
+	for i in range(0,len(xs),chunkSize):
+		chunks.append((fitStripped,xs[i:i+chunkSize],debug))
+	
+	pool=multiprocessing.Pool(processes=workers)
+	try:
+		SSDs=pool.map(computeObjFuncChunk,chunks)
+	finally:
+		pool.close()
+		pool.join()
+	
+	return sum(SSDs,[])
+
+def computeObjFuncChunk(args):
+	
+	"""Evaluates objective function for a chunk of input vectors.
+	
+	Worker function of :py:func:`computeObjFuncValues`. Takes a single tuple so it 
+	can be handed to ``multiprocessing.Pool.map``.
+	
+	Args:
+		args (tuple): Tuple containing stripped fit, list of input vectors and debugging flag.
+	
+	Returns:
+		list: Corresponding SSDs.
+	
+	"""
+	
+	fit,xs,debug=args
+	arrays=getFitArrays(fit)
+	
+	SSDs=[]
+	for x in xs:
+		SSDs.append(FRAPObjFunc(x,fit,debug,None,False,arrays=arrays))
+	
+	return SSDs
+
+def getLikelihoodProfileVector(xOpt,idx,steps=100,epsPerc=0.1):
+	
+	"""Returns values of parameter with index idx used for its likelihood profile.
+	
+	Args:
+		xOpt (list): Vector with optimal parameters.
+		idx (int): Index of parameter in xOpt of which profile is calculated.
+		
+	Keyword Args:
+		epsPerc (float): Percentage of variation.
+		steps (int): Number of values around optimal parameter value.
+	
+	Returns:
+		numpy.ndarray: Array with varied parameter.
+	
+	"""
+	
+	return np.linspace((1-epsPerc)*xOpt[idx],(1+epsPerc)*xOpt[idx],steps)
+
+def computeFitLikelihoodProfiles(fit,epsPerc=0.1,steps=100,debug=False,workers=1,fromGrid=False):
 	
 	"""Computes likelihood profile of all parameters fitted in fit.
 	
 	.. warning:: Since we don't yet fit the loglikelihood function, we only compute the 
 	   SSD. Even though the SSD is proportional to the loglikelihood, it should be used
 	   carefully.
-		   
+	
+	All profile points of all parameters are evaluated in one go via :py:func:`computeObjFuncValues`,
+	optionally distributed over a pool of ``workers`` processes. ``fit`` itself is not altered.
+	
+	If ``fromGrid=True``, profiles of D, production and degradation rate are computed in batch via
+	:py:func:`computeSSDGrid` instead.
+	
 	See also :py:func:`pyfrp.modules.pyfrp_fit_module.computeLikehoodProfile`.
 	
 	Args:
@@ -799,6 +1150,8 @@ def computeFitLikelihoodProfiles(fit,epsPerc=0.1,steps=100,debug=False):
 		epsPerc (float): Percentage of variation.
 		steps (int): Number of values around optimal parameter value.
 		debug (bool): Show debugging messages
+		workers (int): Number of worker processes. If ``None``, uses the number of CPUs.
+		fromGrid (bool): Use batched SSD grid for kinetic parameters.
 	
 	Returns:
 		tuple: Tuple containing:
@@ -813,16 +1166,88 @@ def computeFitLikelihoodProfiles(fit,epsPerc=0.1,steps=100,debug=False):
 	names=fit.getFittedParameterNames()
 	
 	xvaryVec=[]
-	SSDsVec=[]
+	SSDsVec=[None]*len(x)
 	
+	#Number of kinetic parameters in x, that is D, (prod), (degr)
+	nKin=1+int(fit.fitProd)+int(fit.fitDegr)
+	
+	xs=[]
 	for i in range(len(x)):
-		xvary,SSDs=computeLikelihoodProfile(x,fit,i,epsPerc=epsPerc,steps=steps,debug=debug)
+		xvary=getLikelihoodProfileVector(x,i,steps=steps,epsPerc=epsPerc)
 		xvaryVec.append(xvary)
-		SSDsVec.append(SSDs)
+		
+		if fromGrid and i<nKin:
+			SSDsVec[i]=computeLikelihoodProfileFromGrid(x,fit,i,xvary)
+		else:
+			xs=xs+getLikelihoodProfileInputs(x,i,xvary)
+	
+	#Evaluate all remaining profile points at once and sort them back in
+	SSDs=computeObjFuncValues(fit,xs,workers=workers,debug=debug)
+	
+	for i in range(len(x)):
+		if SSDsVec[i]==None:
+			SSDsVec[i]=SSDs[:len(xvaryVec[i])]
+			SSDs=SSDs[len(xvaryVec[i]):]
 		
 	return names,xvaryVec,SSDsVec
+
+def getLikelihoodProfileInputs(xOpt,idx,xvary):
+	
+	"""Returns input vectors of objective function for likelihood profile
+	of parameter with index idx.
+	
+	Args:
+		xOpt (list): Vector with optimal parameters.
+		idx (int): Index of parameter in xOpt of which profile is calculated.
+		xvary (numpy.ndarray): Array with varied parameter.
+	
+	Returns:
+		list: List of input vectors.
+	
+	"""
 	
-def computeLikelihoodProfile(xOpt,fit,idx,steps=100,epsPerc=0.1,debug=False):
+	xs=[]
+	for xv in xvary:
+		x=list(xOpt)
+		x[idx]=xv
+		xs.append(x)
+	return xs
+
+def computeLikelihoodProfileFromGrid(xOpt,fit,idx,xvary):
+	
+	"""Computes likelihood profile of D, production or degradation rate via :py:func:`computeSSDGrid`.
+	
+	Points where scaling fails get the same SSD as in :py:func:`FRAPObjFunc`.
+	
+	Args:
+		xOpt (list): Vector with optimal parameters.
+		fit (pyfrp.subclasses.pyfrp_fit.fit): Fit object.
+		idx (int): Index of parameter in xOpt of which profile is calculated.
+		xvary (numpy.ndarray): Array with varied parameter.
+	
+	Returns:
+		list: Corresponding SSDs.
+	
+	"""
+	
+	Dnew,prod,degr,equFacts = assignInputVariables(xOpt,fit)
+	
+	grid=[[Dnew],[prod],[degr]]
+	
+	#Find which kinetic parameter idx refers to
+	kinIdx=[0]
+	if fit.fitProd:
+		kinIdx.append(1)
+	if fit.fitDegr:
+		kinIdx.append(2)
+	grid[kinIdx[idx]]=xvary
+	
+	SSDs=computeSSDGrid(fit,grid[0],prods=grid[1],degrs=grid[2],equFacts=list(equFacts)).ravel()
+	SSDs[np.isinf(SSDs)]=100000000
+	
+	return list(SSDs)
+	
+def computeLikelihoodProfile(xOpt,fit,idx,steps=100,epsPerc=0.1,debug=False,workers=1):
 	
 	"""Computes likelihood profile of parameter with index idx of fit.
 	
@@ -839,6 +1264,7 @@ def computeLikelihoodProfile(xOpt,fit,idx,steps=100,epsPerc=0.1,debug=False):
 		epsPerc (float): Percentage of variation.
 		steps (int): Number of values around optimal parameter value.
 		debug (bool): Show debugging messages
+		workers (int): Number of worker processes. If ``None``, uses the number of CPUs.
 		
 	Returns:
 		tuple: Tuple containing:
@@ -848,20 +1274,13 @@ def computeLikelihoodProfile(xOpt,fit,idx,steps=100,epsPerc=0.1,debug=False):
 	
 	"""
 	
-	xvary=np.linspace((1-epsPerc)*xOpt[idx],(1+epsPerc)*xOpt[idx],steps)
+	xvary=getLikelihoodProfileVector(xOpt,idx,steps=steps,epsPerc=epsPerc)
 	
-	SSDs=[]
-	
-	for xv in xvary:
-		
-		x=list(xOpt)
-		x[idx]=xv
-		
-		SSDs.append(FRAPObjFunc(x,fit,debug,None,False))
+	SSDs=computeObjFuncValues(fit,getLikelihoodProfileInputs(xOpt,idx,xvary),workers=workers,debug=debug)
 	
 	return xvary, SSDs
 	
-def plotFitLikehoodProfiles(fit,epsPerc=0.1,steps=100,debug=False,axes=None):
+def plotFitLikehoodProfiles(fit,epsPerc=0.1,steps=100,debug=False,axes=None,workers=1,fromGrid=False):
 	
 	"""Computes and plots likelihood profile of all parameters fitted in fit.
 	
@@ -872,21 +1291,22 @@ def plotFitLikehoodProfiles(fit,epsPerc=0.1,steps=100,debug=False,axes=None):
 	See also :py:func:`pyfrp.modules.pyfrp_fit_module.computeFitLikehoodProfiles`.
 	
 	Args:
-		xOpt (list): Vector with optimal parameters.
 		fit (pyfrp.subclasses.pyfrp_fit.fit): Fit object.
-		idx (int): Index of parameter in xOpt of which profile is calculated.
 		
 	Keyword Args:
 		epsPerc (float): Percentage of variation.
 		steps (int): Number of values around optimal parameter value.
 		debug (bool): Show debugging messages
+		axes (list): List of matplotlib.axes to plot in.
+		workers (int): Number of worker processes. If ``None``, uses the number of CPUs.
+		fromGrid (bool): Use batched SSD grid for kinetic parameters.
 		
 	Returns:
 		list: List of matplotlib.axes objects used for plotting.
 	
 	"""
 	
-	names,xvaryVec,SSDs=computeFitLikelihoodProfiles(fit,epsPerc=0.1,steps=100,debug=False)
+	names,xvaryVec,SSDs=computeFitLikelihoodProfiles(fit,epsPerc=epsPerc,steps=steps,debug=debug,workers=workers,fromGrid=fromGrid)
 	xOpt=fit.resultsToVec()
 	
 	if axes==None:
@@ -897,8 +1317,103 @@ def plotFitLikehoodProfiles(fit,epsPerc=0.1,steps=100,debug=False,axes=None):
 	
 	
 	return axes
+
+def getFitResults(fit):
+	
+	"""Extracts everything a fit run produces into a dictionary.
+	
+	Args:
+		fit (pyfrp.subclasses.pyfrp_fit.fit): Fit object.
 		
+	Returns:
+		dict: Dictionary of result attributes.
+	
+	"""
+	
+	attr=["DOptMu","DOptPx","prodOpt","degrOpt","SSD","success","iterations","fcalls",
+	"equFacts","fittedVecs","dataVecsFitted","tvecFit","Rsq","MeanRsq","RsqByROI",
+	"x0","cutOffStepSim","cutOffStepData","trackedParms","trackedFits"]
+	
+	return pyfrp_misc_module.objAttr2Dict(fit,attr=attr)
 
+def setFitResults(fit,results):
+	
+	"""Writes results extracted by :py:func:`getFitResults` back into fit object.
+	
+	Args:
+		fit (pyfrp.subclasses.pyfrp_fit.fit): Fit object.
+		results (dict): Dictionary of result attributes.
+		
+	Returns:
+		pyfrp.subclasses.pyfrp_fit.fit: Updated fit object.
+	
+	"""
+	
+	for item in results:
+		setattr(fit,item,results[item])
+	
+	return fit
 
+def runStrippedFit(args):
+	
+	"""Runs a stripped fit and returns its results.
+	
+	Worker function of :py:func:`runFitsParallel`. Takes a single tuple
+	so it can be handed to ``multiprocessing.Pool.map``.
+	
+	Args:
+		args (tuple): Tuple containing stripped fit and debugging flag.
+		
+	Returns:
+		dict: Dictionary of result attributes, see :py:func:`getFitResults`.
+	
+	"""
+	
+	fit,debug=args
+	fit.run(debug=debug)
+	
+	return getFitResults(fit)
 
-	
\ No newline at end of file
+def runFitsParallel(fits,workers=None,debug=False):
+	
+	"""Runs a list of fits in a pool of worker processes.
+	
+	Each worker only receives a stripped copy of its fit (see :py:func:`pyfrp.subclasses.pyfrp_fit.fit.getStrippedCopy`),
+	holding the fit settings together with the data and simulation vectors of the fitted ROIs. Once done, 
+	the results are written back into the original fit objects.
+	
+	.. note:: If ``workers=1``, fits are simply run one after the other in the current process.
+	
+	Args:
+		fits (list): List of fit objects.
+		
+	Keyword Args:
+		workers (int): Number of worker processes. If ``None``, uses the number of CPUs.
+		debug (bool): Print debugging messages.
+		
+	Returns:
+		list: List of fit objects.
+	
+	"""
+	
+	if workers==1 or len(fits)<2:
+		for fit in fits:
+			fit.run(debug=debug)
+		return fits
+	
+	stripped=[(fit.getStrippedCopy(),debug) for fit in fits]
+	
+	pool=multiprocessing.Pool(processes=workers)
+	try:
+		results=pool.map(runStrippedFit,stripped)
+	finally:
+		pool.close()
+		pool.join()
+	
+	for fit,res in zip(fits,results):
+		setFitResults(fit,res)
+		
+		if debug:
+			print "Fit ", fit.name, " finished with SSD = ", fit.SSD
+		
+	return fits
@@ -32,6 +32,7 @@
 	* Update parameters in .geo files.
 	* Add/Remove some geometric entities.
 	* Add/update box fields to allow refinement of certain ROIs in mesh.
+	* Read .msh files into FiPy meshes.
 
 This module together with pyfrp.pyfrp_gmsh_geometry and pyfrp.pyfrp_gmsh_module works partially as a python gmsh wrapper, however is incomplete.
 If you want to know more about gmsh, go to http://gmsh.info/doc/texinfo/gmsh.html .
@@ -42,6 +43,9 @@ If you want to know more about gmsh, go to http://gmsh.info/doc/texinfo/gmsh.htm
 #Importing necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp_lazy_module import lazyImport
+
 #Numpy (use indirect import here, so convertMathExpr relates to numpy functions automatically when translating)
 from numpy import *
 
@@ -56,8 +60,9 @@ from pyfrp_term_module import *
 import shutil
 from tempfile import mkstemp
 import os
+import struct
 
-from stl import mesh as meshstl
+meshstl=lazyImport("stl.mesh")
 
                    
 #===========================================================================================================================================================================
@@ -474,6 +479,10 @@ def readStlFile(fn,domain=None,volSizePx=20.):
 	
 	If no domain is given, will create new one
 	
+	Vertices are merged if their coordinates agree up to ``domain.coordDecimals`` decimals.
+	Vertices and edges are deduplicated over the whole triangle array at once, thus import 
+	scales linearly with the number of triangles. 
+	
 	Args:
 		fn (str): Path to stl file.
 		
@@ -486,55 +495,537 @@ def readStlFile(fn,domain=None,volSizePx=20.):
 	
 	"""
 	
-	
-	
 	#Load file
-	mesh=meshstl.Mesh.from_file(fn,speedups=False)
+	mesh=meshstl.Mesh.from_file(fn)
 	
 	#New domain
 	if domain==None:
 		domain=pyfrp_gmsh_geometry.domain()
 	
-	#Loop through all surface triangles
-	for triang in mesh.data:
+	#Find unique vertices over all triangle corners
+	corners=mesh.vectors.reshape(-1,3)
+	idxFirst,inverse=pyfrp_misc_module.uniqueRowsInOrder(np.round(corners.astype(float),domain.coordDecimals)+0.)
+	vertices=addStlVertices(domain,corners[idxFirst],volSizePx)
+	triangs=inverse.reshape(-1,3)
+	
+	#Find unique edges, each triangle has edges (0,1),(1,2),(2,0)
+	pairs=triangs[:,[0,1,1,2,2,0]].reshape(-1,2)
+	idxFirst,inverse=pyfrp_misc_module.uniqueRowsInOrder(np.sort(pairs,axis=1))
+	edges=addStlLines(domain,vertices,pairs[idxFirst])
+	
+	#Orientation of each triangle edge relative to its line
+	orientations=np.where(pairs[:,0]==pairs[idxFirst[inverse],0],1,-1).reshape(-1,3)
+	edgeIdx=inverse.reshape(-1,3)
+	
+	#Normals
+	normals=mesh.normals/np.sqrt((mesh.normals**2).sum(axis=1))[:,None]
+	
+	addStlSurfaces(domain,edges,edgeIdx,orientations,triangs,normals)
+	
+	return domain
+
+def addStlVertices(domain,coords,volSizePx):
+	
+	"""Adds vertices read from stl file to domain.
+	
+	Reuses vertices of the domain that already exist at the same coordinate.
+	
+	Args:
+		domain (pyfrp.modules.pyfrp_gmsh_geometry.domain): A domain object.
+		coords (numpy.ndarray): Unique vertex coordinates.
+		volSizePx (float): Mesh density assigned at vertices.
 		
-		#Loop through all vertices of triangle
-		vertices=[]
-		edges=[]
-		for i,x in enumerate(triang[1]):
+	Returns:
+		list: List of vertices, one for each coordinate.
+	
+	"""
+	
+	existing=len(domain.vertices)>0
+	newId=domain.incrementID(domain.vertices)
+	
+	vertices=[]
+	newVertices=[]
+	for x in coords:
+		
+		if existing:
+			v=domain.getVertexByX(x)[0]
+			if v!=False:
+				vertices.append(v)
+				continue
+		
+		v=pyfrp_gmsh_geometry.vertex(domain,x,newId,volSize=volSizePx)
+		newId=newId+1
+		
+		vertices.append(v)
+		newVertices.append(v)
+	
+	domain.vertices.extend(newVertices)
+	
+	return vertices
+
+def addStlLines(domain,vertices,pairs):
+	
+	"""Adds lines read from stl file to domain.
+	
+	Reuses edges of the domain that already connect the same vertices.
+	
+	Args:
+		domain (pyfrp.modules.pyfrp_gmsh_geometry.domain): A domain object.
+		vertices (list): List of vertices.
+		pairs (numpy.ndarray): Indices of start and end vertex of each unique line.
+		
+	Returns:
+		list: List of edges, one for each pair.
+	
+	"""
+	
+	existing=len(domain.edges)>0
+	newId=domain.incrementID(domain.edges)
+	
+	edges=[]
+	newLines=[]
+	for i,j in pairs:
+		
+		if existing:
+			e=domain.getEdgeByVertices(vertices[i],vertices[j])[0]
+			if e!=False:
+				edges.append(e)
+				continue
 			
-			#Create vertex if it doesn't exist yet
-			v,ind=domain.getVertexByX(x)
-			if v==False:
-				v=domain.addVertex(x,volSize=volSizePx)
-			vertices.append(v)
+		e=pyfrp_gmsh_geometry.line(domain,vertices[i],vertices[j],newId)
+		newId=newId+1
+		
+		edges.append(e)
+		newLines.append(e)
+	
+	domain.lines.extend(newLines)
+	domain.edges.extend(newLines)
+	
+	return edges
+
+def addStlSurfaces(domain,edges,edgeIdx,orientations,triangs,normals):
+	
+	"""Adds line loops and ruled surfaces for triangles read from stl file to domain.
+	
+	Each line loop starts with the triangle's first edge in forward orientation and then
+	follows the edges in the direction of that edge, just like 
+	:py:func:`pyfrp.modules.pyfrp_gmsh_geometry.lineLoop.fix` would arrange them.
+	
+	Args:
+		domain (pyfrp.modules.pyfrp_gmsh_geometry.domain): A domain object.
+		edges (list): List of edges.
+		edgeIdx (numpy.ndarray): Indices of edges of each triangle.
+		orientations (numpy.ndarray): Orientations of edges of each triangle.
+		triangs (numpy.ndarray): Indices of vertices of each triangle.
+		normals (numpy.ndarray): Normal vector of each triangle.
+		
+	Returns:
+		list: List of new ruled surfaces.
+	
+	"""
+	
+	#Flip triangles whose first edge runs backwards
+	flip=orientations[:,0]==-1
+	edgeIdxLoop=np.where(flip[:,None],edgeIdx[:,[0,2,1]],edgeIdx)
+	orientationsLoop=np.where(flip[:,None],-orientations[:,[0,2,1]],orientations)
+	
+	#Degenerate triangles need to be fixed one by one
+	degenerate=(triangs[:,0]==triangs[:,1])|(triangs[:,1]==triangs[:,2])|(triangs[:,2]==triangs[:,0])
+	
+	loopId=domain.incrementID(domain.lineLoops)
+	surfaceId=domain.incrementID(domain.ruledSurfaces)
+	
+	loops=[]
+	for i in range(len(edgeIdx)):
+		
+		loop=pyfrp_gmsh_geometry.lineLoop(domain,[],loopId+i)
+		
+		if degenerate[i]:
+			loop.edges=[edges[k] for k in edgeIdx[i]]
+			loop.orientations=[1,1,1]
+			loop.fix()
+		else:	
+			loop.edges=[edges[k] for k in edgeIdxLoop[i]]
+			loop.orientations=list(orientationsLoop[i])
+		
+		loops.append(loop)
+	
+	domain.lineLoops.extend(loops)
+	
+	surfaces=[]
+	for i,loop in enumerate(loops):
+		
+		surface=pyfrp_gmsh_geometry.ruledSurface(domain,loop.Id,surfaceId+i)
+		surface.normal=normals[i]
+		
+		surfaces.append(surface)
+	
+	domain.ruledSurfaces.extend(surfaces)
+	
+	return surfaces
+
+#Number of nodes of each Gmsh element type
+mshNodesPerElement={1:2,2:3,3:4,4:4,5:8,6:6,7:5,8:3,9:6,10:9,11:10,12:27,13:18,14:14,15:1,16:8,17:20,18:15,19:13,
+		20:9,21:10,22:12,23:15,24:15,25:21,26:4,27:5,28:6,29:20,30:35,31:56}
+
+#Gmsh element types that FiPy treats as cells, per dimension
+mshCellTypes={2:[2,3,9,10,16,20,21,22,23,24,25],3:[4,5,6,7,11,12,13,14,17,18,19,29,30,31]}
+
+#Cell types supported by readMshFile, given as (faceLength,facesPerCell)
+mshRegularCells={2:{2:(2,3),3:(2,4)},3:{4:(3,4)}}
+
+def readMshSection(data,title):
+	
+	"""Returns content of section ``title`` of .msh file.
+	
+	Args:
+		data (str): Content of .msh file.
+		title (str): Section title, for example ``Nodes``.
+		
+	Returns:
+		str: Content between ``$title`` and ``$Endtitle``.
+		
+	"""
+	
+	start=data.find("$"+title)
+	if start==-1:
+		return None
+	start=data.index("\n",start)+1
+	end=data.index("$End"+title,start)
+	
+	return data[start:end]
+
+def countTokensPerLine(data):
+	
+	"""Counts whitespace separated tokens in each line of ``data``.
+	
+	Args:
+		data (str): Text.
+		
+	Returns:
+		numpy.ndarray: Number of tokens of each non-empty line.
+		
+	"""
+	
+	chars=np.frombuffer(data,dtype=np.uint8)
+	isSpace=(chars==32)|(chars==9)|(chars==10)|(chars==13)
+	
+	#Tokens start where a non-space follows a space
+	starts=~isSpace
+	starts[1:]=starts[1:]&isSpace[:-1]
+	
+	lineIdx=np.cumsum(chars==10)[starts]
+	counts=np.bincount(lineIdx)
+	
+	return counts[counts>0]
+
+def parseMshNodes(section,binary):
+	
+	"""Parses ``$Nodes`` section of .msh file (version 2).
+	
+	Args:
+		section (str): Content of section.
+		binary (bool): File is binary.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* nodeIDs (numpy.ndarray): Gmsh node IDs.
+			* coords (numpy.ndarray): Node coordinates of shape ``(n,3)``.
+		
+	"""
+	
+	header,body=section.split("\n",1)
+	n=int(header)
+	
+	if binary:
+		nodes=np.frombuffer(body,dtype=np.dtype([('id','<i4'),('x','<f8',(3,))]),count=n)
+		return nodes['id'].astype(int),nodes['x'].copy()
+	
+	nodes=np.fromstring(body,sep=' ').reshape(n,4)
+	return nodes[:,0].astype(int),nodes[:,1:]
+
+def parseMshElements(section,binary,cellTypes):
+	
+	"""Parses ``$Elements`` section of .msh file (version 2) and 
+	returns all cells.
+	
+	Returns ``None`` if the cells are not all of the same type.
+	
+	Args:
+		section (str): Content of section.
+		binary (bool): File is binary.
+		cellTypes (list): Element types considered to be cells.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* typ (int): Element type of cells.
+			* cellNodes (numpy.ndarray): Gmsh node IDs of each cell.
+		
+	"""
+	
+	header,body=section.split("\n",1)
+	n=int(header)
+	
+	blocks=[]
+	
+	if binary:
+		
+		#Binary elements come in blocks of same type
+		offset=0
+		read=0
+		while read<n:
+			typ,num,nTags=struct.unpack('<3i',body[offset:offset+12])
+			offset=offset+12
+			length=1+nTags+mshNodesPerElement[typ]
 			
-			#Create edge if non-existent
-			if i>0:	
-				edge,ind=domain.getEdgeByVertices(vertices[i-1],vertices[i])
-				if edge==False:
-					edges.append(domain.addLine(vertices[i-1],vertices[i]))
-				else:
-					edges.append(edge)
-					
-			if i==len(triang[1])-1:
-				edge,ind=domain.getEdgeByVertices(vertices[i],vertices[0])
-				if edge==False:	
-					edges.append(domain.addLine(vertices[i],vertices[0]))
-				else:
-					edges.append(edge)
+			if typ in cellTypes:
+				records=np.frombuffer(body,dtype='<i4',count=num*length,offset=offset).reshape(num,length)
+				blocks.append((typ,records[:,1+nTags:]))
 			
-		#Add line loop	
-		loop=domain.addLineLoop(edgeIDs=pyfrp_misc_module.objAttrToList(edges,"Id"))
-		loop.fix()
+			offset=offset+4*num*length
+			read=read+num
+	
+	else:
 		
-		#Add surface
-		surface=domain.addRuledSurface(lineLoopID=loop.Id)
-		surface.normal=triang[0]/np.linalg.norm(triang[0])
+		#Find start of each element record
+		ints=np.fromstring(body,dtype=int,sep=' ')
+		counts=countTokensPerLine(body)[:n]
+		starts=np.concatenate(([0],np.cumsum(counts)[:-1]))
 		
-	return domain		
-				
+		types=ints[starts+1]
+		nTags=ints[starts+2]
+		
+		for typ in np.unique(types):
+			if typ in cellTypes:
+				nodeStarts=starts[types==typ]+3+nTags[types==typ]
+				blocks.append((typ,ints[nodeStarts[:,None]+np.arange(mshNodesPerElement[typ])]))
+	
+	if len(set([typ for typ,nodes in blocks]))!=1:
+		return None
+	
+	return blocks[0][0],np.concatenate([nodes for typ,nodes in blocks]).astype(int)
+
+def parseMshFile(fn,dim=3):
+	
+	"""Parses Gmsh .msh file (version 2, ASCII or binary) into the arrays
+	needed to construct a FiPy mesh.
+	
+	Vertices, faces and cells are numbered exactly like ``fipy.GmshImporter3D`` 
+	(or ``fipy.GmshImporter2D``) would number them.
+	
+	Only meshes consisting of a single type of linear simplex cells (tetrahedra in 3D, triangles or 
+	quadrangles in 2D) are supported. Returns ``None`` otherwise.
+	
+	Args:
+		fn (str): Path to .msh file.
+		
+	Keyword Args:
+		dim (int): Dimension of mesh.
+		
+	Returns:
+		dict: Dictionary containing ``vertexCoords``, ``faceVertexIDs``, ``cellFaceIDs`` and ``cellVertexIDs``.
+		
+	"""
+	
+	with open(fn,'rb') as f:
+		data=f.read()
+	
+	meta=readMshSection(data,"MeshFormat")
+	if meta==None:
+		return None
+	
+	version,fileType,dataSize=meta.split()[:3]
+	if not version.startswith("2"):
+		return None
+	binary=int(fileType)==1
+	
+	#Parse sections
+	nodeIDs,coords=parseMshNodes(readMshSection(data,"Nodes"),binary)
+	elements=parseMshElements(readMshSection(data,"Elements"),binary,mshCellTypes[dim])
+	
+	if elements==None or elements[0] not in mshRegularCells[dim]:
+		return None
+	typ,cellNodes=elements
+	faceLength,facesPerCell=mshRegularCells[dim][typ]
+	
+	#Only keep nodes used by cells, sorted by Gmsh ID
+	usedIDs=np.unique(cellNodes)
+	order=np.argsort(nodeIDs)
+	vertexCoords=coords[order[np.searchsorted(nodeIDs[order],usedIDs)],:dim].T.copy()
+	cellVertexIDs=np.searchsorted(usedIDs,cellNodes)
+	
+	#Faces of each cell, face i consists of vertices i,...,i+faceLength-1
+	k=cellVertexIDs.shape[1]
+	faceIdx=(np.arange(facesPerCell)[:,None]+np.arange(faceLength)[None,:])%k
+	faces=cellVertexIDs[:,faceIdx].reshape(-1,faceLength)
+	
+	#Unique faces in order of first appearance
+	idxFirst,inverse=pyfrp_misc_module.uniqueRowsInOrder(np.sort(faces,axis=1))
+	
+	arrays={}
+	arrays['vertexCoords']=vertexCoords
+	arrays['faceVertexIDs']=faces[idxFirst].T[::-1].copy()
+	arrays['cellFaceIDs']=inverse.reshape(-1,facesPerCell).T.copy()
+	arrays['cellVertexIDs']=cellVertexIDs.T.copy()
+	
+	return arrays
+
+def meshFromMshArrays(arrays,dim=3):
+	
+	"""Constructs FiPy mesh from arrays returned by :py:func:`parseMshFile`.
+	
+	Mesh is set up the same way as a ``fipy.GmshImporter3D`` restored from a pickle file.
+	
+	Args:
+		arrays (dict): Mesh arrays, ``cellVertexIDs`` is optional.
+		
+	Keyword Args:
+		dim (int): Dimension of mesh.
+		
+	Returns:
+		fipy.GmshImporter3D: FiPy mesh.
+		
+	"""
+	
+	import fipy
+	from fipy.meshes.representations.meshRepresentation import _MeshRepresentation
+	
+	if dim==3:
+		cls=fipy.GmshImporter3D
+	else:
+		cls=fipy.GmshImporter2D
+	
+	mesh=cls.__new__(cls)
+	mesh.__setstate__(dict(vertexCoords=arrays['vertexCoords'],faceVertexIDs=arrays['faceVertexIDs'],cellFaceIDs=arrays['cellFaceIDs'],
+			_RepresentationClass=_MeshRepresentation))
+	if 'cellVertexIDs' in arrays:
+		mesh._orderedCellVertexIDs_data=np.ma.masked_equal(arrays['cellVertexIDs'],-1)
+	
+	return mesh
+
+def getMshSidecarFn(fn):
+	
+	"""Returns path of .npz sidecar of .msh file.
+	
+	Args:
+		fn (str): Path to .msh file.
+		
+	Returns:
+		str: Path to sidecar.
+		
+	"""
+	
+	return fn+".npz"
+
+def saveMshSidecar(fn,arrays,dim=3):
+	
+	"""Saves arrays parsed from .msh file into .npz sidecar.
+	
+	Stores size and modification time of the .msh file, so outdated sidecars 
+	are detected by :py:func:`loadMshSidecar`.
+	
+	Args:
+		fn (str): Path to .msh file.
+		arrays (dict): Mesh arrays, see :py:func:`parseMshFile`.
+		
+	Keyword Args:
+		dim (int): Dimension of mesh.
+		
+	Returns:
+		str: Path to sidecar.
+		
+	"""
+	
+	fnSidecar=getMshSidecarFn(fn)
+	stat=os.stat(fn)
+	
+	#Store indices compactly
+	compact={}
+	for key,val in arrays.items():
+		if key!='vertexCoords' and val.size>0 and val.max()<2**31:
+			val=val.astype(np.int32)
+		compact[key]=val
+	
+	try:
+		with open(fnSidecar,'wb') as f:
+			np.savez(f,source=np.array([stat.st_size,stat.st_mtime,dim]),**compact)
+	except IOError:
+		printWarning("Could not write sidecar " + fnSidecar + " .")
+	
+	return fnSidecar
+
+def loadMshSidecar(fn,dim=3):
+	
+	"""Loads arrays of .msh file from .npz sidecar.
+	
+	Returns ``None`` if there is no sidecar or if it is outdated.
+	
+	Args:
+		fn (str): Path to .msh file.
+		
+	Keyword Args:
+		dim (int): Dimension of mesh.
+		
+	Returns:
+		dict: Mesh arrays, see :py:func:`parseMshFile`.
+		
+	"""
+	
+	fnSidecar=getMshSidecarFn(fn)
+	if not os.path.isfile(fnSidecar):
+		return None
+	
+	stat=os.stat(fn)
+	
+	try:
+		with np.load(fnSidecar) as f:
+			if list(f['source'])!=[stat.st_size,stat.st_mtime,dim]:
+				return None
+			arrays={}
+			for key in ['vertexCoords','faceVertexIDs','cellFaceIDs','cellVertexIDs']:
+				arrays[key]=f[key]
+				if key!='vertexCoords':
+					arrays[key]=arrays[key].astype(int)
+	except (IOError,KeyError,ValueError):
+		return None
+	
+	return arrays
+	
+def readMshFile(fn,dim=3,sidecar=False):
+	
+	"""Reads Gmsh .msh file into FiPy mesh without using ``fipy.GmshImporter3D``.
+	
+	If ``sidecar=True``, will load parsed arrays from the .npz sidecar of ``fn`` if it 
+	is up-to-date, and otherwise write one after parsing.
+	
+	Returns ``None`` if mesh is not supported by :py:func:`parseMshFile`.
+	
+	Args:
+		fn (str): Path to .msh file.
+		
+	Keyword Args:
+		dim (int): Dimension of mesh.
+		sidecar (bool): Use .npz sidecar.
+		
+	Returns:
+		fipy.GmshImporter3D: FiPy mesh.
+		
+	"""
+	
+	arrays=None
+	if sidecar:
+		arrays=loadMshSidecar(fn,dim=dim)
+	
+	if arrays==None:
+		arrays=parseMshFile(fn,dim=dim)
+		if arrays==None:
+			return None
+		if sidecar:
+			saveMshSidecar(fn,arrays,dim=dim)
 	
+	return meshFromMshArrays(arrays,dim=dim)
 
 def updateParmGeoFile(fn,name,val):
 	
@@ -49,6 +49,9 @@ If you want to know more about gmsh, go to http://gmsh.info/doc/texinfo/gmsh.htm
 #Importing necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp_lazy_module import lazyImport
+
 #Numpy/Scipy
 import numpy as np
 
@@ -66,7 +69,7 @@ import pyfrp_IO_module
 import pyfrp_vtk_module
 
 #Matplotlib
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+art3d=lazyImport("mpl_toolkits.mplot3d.art3d")
 
 import copy as cpy
 
@@ -93,9 +96,13 @@ class domain:
 		annXOffset (float): Offset of annotations in x-direction.
 		annYOffset (float): Offset of annotations in y-direction.
 		annZOffset (float): Offset of annotations in z-direction.
+		lookupIndices (dict): Lookup indices of elements, see :py:func:`getIndex`.
 			
 	"""
 	
+	#Number of decimals coordinates are rounded to when looking up vertices by coordinate.
+	coordDecimals=10
+	
 	def __init__(self):
 		
 		
@@ -117,6 +124,9 @@ class domain:
 		self.annYOffset=3.
 		self.annZOffset=3.
 		
+		#Lookup indices, rebuilt on demand
+		self.lookupIndices={}
+		
 	def addVertex(self,x,Id=None,volSize=None,checkExist=False):
 		
 		"""Adds new :py:class:`pyfrp.modules.pyfrp_gmsh_geometry.vertex` instance
@@ -142,14 +152,14 @@ class domain:
 		"""
 		
 		if checkExist:
-			for v in self.vertices:
-				if (v.x==x).all():
-					return v
+			v=self.getVertexByX(x)[0]
+			if v!=False:
+				return v
 		
 		newId=self.getNewId(self.vertices,Id)
 		
 		v=vertex(self,x,newId,volSize=volSize)
-		self.vertices.append(v)	
+		self.appendElement("vertices",v)
 		
 		return v
 	
@@ -173,8 +183,8 @@ class domain:
 		newId=self.getNewId(self.edges,Id)
 		
 		e=line(self,v1,v2,newId)
-		self.lines.append(e)
-		self.edges.append(e)
+		self.appendElement("lines",e)
+		self.appendElement("edges",e)
 		
 		return e
 	
@@ -200,8 +210,8 @@ class domain:
 		newId=self.getNewId(self.edges,Id)
 			
 		a=arc(self,vstart,vcenter,vend,newId)
-		self.arcs.append(a)
-		self.edges.append(a)
+		self.appendElement("arcs",a)
+		self.appendElement("edges",a)
 		
 		return a
 	
@@ -224,8 +234,8 @@ class domain:
 		newId=self.getNewId(self.edges,Id)
 		
 		e=bSpline(self,vertices,newId)
-		self.bSplines.append(e)
-		self.edges.append(e)
+		self.appendElement("bSplines",e)
+		self.appendElement("edges",e)
 		
 		return e
 	
@@ -912,11 +922,11 @@ class domain:
 		
 		if b:
 			if obj.typ==0:
-				self.lines.append(obj)
+				self.appendElement("lines",obj)
 			if obj.typ==1:
-				self.arcs.append(obj)
+				self.appendElement("arcs",obj)
 			if obj.typ==2:
-				self.bSpline.append(obj)
+				self.appendElement("bSplines",obj)
 				
 		return l
 	
@@ -1087,7 +1097,7 @@ class domain:
 			e=obj
 			
 		e.domain=self
-		getattr(self,element).append(e)
+		self.appendElement(element,e)
 		
 		return getattr(self,element)
 	
@@ -1168,8 +1178,13 @@ class domain:
 		
 		"""
 		
-		IdList=pyfrp_misc_module.objAttrToList(objList,'Id')
-		if Id in IdList:
+		element=self.getElementListName(objList)
+		if element!=None:
+			exists=self.lookupElement("Id",element,Id)[0]!=False
+		else:
+			exists=Id in pyfrp_misc_module.objAttrToList(objList,'Id')
+		
+		if exists:
 			if debug:
 				printWarning("Object with Id " + str(Id) + " already exists.")
 			return True
@@ -1216,8 +1231,12 @@ class domain:
 		if len(objList)==0:
 			newId=1
 		else:
-			IdList=pyfrp_misc_module.objAttrToList(objList,'Id')
-			newId=max(IdList)+1		
+			element=self.getElementListName(objList)
+			if element!=None:
+				newId=self.getIndex("Id",element)[3]+1
+			else:
+				IdList=pyfrp_misc_module.objAttrToList(objList,'Id')
+				newId=max(IdList)+1		
 		return newId
 		
 	def getEdgeById(self,ID):
@@ -1237,10 +1256,7 @@ class domain:
 		
 		"""
 		
-		for i,e in enumerate(self.edges):
-			if e.Id==ID:
-				return e,i
-		return False,False
+		return self.lookupElement("Id","edges",ID)
 	
 	def getEdgeByVertices(self,v1,v2):
 		
@@ -1260,12 +1276,7 @@ class domain:
 		
 		"""
 		
-		for i,e in enumerate(self.edges):
-			vertices=[e.getFirstVertex(1),e.getLastVertex(1)]
-		
-			if v1 in vertices and v2 in vertices:
-				return e,i
-		return False,False	
+		return self.lookupElement("vertices","edges",self.getVertexPairKey(v1,v2))
 		
 	
 	def getLineLoopById(self,ID):
@@ -1285,11 +1296,7 @@ class domain:
 		
 		"""
 		
-		for i,l in enumerate(self.lineLoops):
-			if l.Id==ID:
-				return l,i
-	
-		return False,False
+		return self.lookupElement("Id","lineLoops",ID)
 	
 	def getRuledSurfaceById(self,ID):
 		
@@ -1308,10 +1315,7 @@ class domain:
 		
 		"""
 		
-		for i,l in enumerate(self.ruledSurfaces):
-			if l.Id==ID:
-				return l,i
-		return False,False
+		return self.lookupElement("Id","ruledSurfaces",ID)
 	
 	def getSurfaceLoopById(self,ID):
 		
@@ -1330,10 +1334,7 @@ class domain:
 		
 		"""
 		
-		for i,l in enumerate(self.surfaceLoops):
-			if l.Id==ID:
-				return l,i
-		return False,False
+		return self.lookupElement("Id","surfaceLoops",ID)
 	
 	def getVolumeById(self,ID):
 		
@@ -1352,10 +1353,7 @@ class domain:
 		
 		"""
 		
-		for i,l in enumerate(self.volumes):
-			if l.Id==ID:
-				return l,i
-		return False,False
+		return self.lookupElement("Id","volumes",ID)
 	
 	def getFieldById(self,ID):
 		
@@ -1374,10 +1372,7 @@ class domain:
 		
 		"""
 		
-		for i,f in enumerate(self.fields):
-			if f.Id==ID:
-				return f,i
-		return False,False
+		return self.lookupElement("Id","fields",ID)
 	
 	def getVertexById(self,ID):
 		
@@ -1396,15 +1391,15 @@ class domain:
 		
 		"""
 		
-		for i,v in enumerate(self.vertices):
-			if v.Id==ID:
-				return v,i
-		return False,False
+		return self.lookupElement("Id","vertices",ID)
 	
 	def getVertexByX(self,x):
 		
 		"""Returns vertex at coordinate ``x``.
 		
+		Coordinates are compared after rounding to ``coordDecimals`` decimals, 
+		see also :py:func:`getCoordKey`.
+		
 		Returns ``(False,False)`` if vertex cannot be found.
 		
 		Args:
@@ -1418,9 +1413,287 @@ class domain:
 		
 		"""
 		
-		for i,v in enumerate(self.vertices):
-			if (np.array(x)==v.x).sum()==len(v.x):
-				return v,i
+		return self.lookupElement("x","vertices",self.getCoordKey(x))
+
+	def __getstate__(self):
+		
+		"""Returns state of domain used for pickling and copying.
+		
+		Lookup indices refer to the domain's element objects and are thus not stored,
+		they get rebuilt on demand.
+		
+		Returns:
+			dict: State of domain.
+		
+		"""
+		
+		state=dict(self.__dict__)
+		state.pop('lookupIndices',None)
+		return state
+	
+	def getLookupIndices(self):
+		
+		"""Returns dictionary of lookup indices of domain.
+		
+		Creates it if domain does not have one yet, for example if it was loaded from
+		a pickle file.
+		
+		Returns:
+			dict: Lookup indices.
+		
+		"""
+		
+		if not hasattr(self,'lookupIndices'):
+			self.lookupIndices={}
+		return self.lookupIndices
+	
+	def getElementListName(self,objList):
+		
+		"""Returns name of element list of domain that is ``objList``.
+		
+		Returns ``None`` if ``objList`` is not one of the domain's lists.
+		
+		Args:
+			objList (list): List of objects, for example ``edges``.
+		
+		Returns:
+			str: Name of element list.
+		
+		"""
+		
+		for element in ["vertices","edges","lines","arcs","bSplines","lineLoops","ruledSurfaces","surfaceLoops","volumes","fields"]:
+			if getattr(self,element) is objList:
+				return element
+		return None
+	
+	def getCoordKey(self,x):
+		
+		"""Returns key of coordinate ``x`` in vertex coordinate index.
+		
+		Coordinate is rounded to ``coordDecimals`` decimals.
+		
+		Args:
+			x (numpy.ndarray): Coordinate.
+		
+		Returns:
+			tuple: Rounded coordinate.
+		
+		"""
+		
+		return tuple(np.round(np.asarray(x,dtype=float),self.coordDecimals)+0.)
+	
+	def getVertexPairKey(self,v1,v2):
+		
+		"""Returns key of vertex pair in edge index.
+		
+		Key does not depend on order of ``v1`` and ``v2``. Vertices are keyed by their ID, 
+		thus the index is dropped whenever vertex IDs change, see :py:func:`gmshElement.setID`.
+		
+		Args:
+			v1 (pyfrp.modules.pyfrp_gmsh_geometry.vertex): Vertex 1.
+			v2 (pyfrp.modules.pyfrp_gmsh_geometry.vertex): Vertex 2.
+		
+		Returns:
+			tuple: Sorted pair of vertex IDs.
+		
+		"""
+		
+		return tuple(sorted([v1.Id,v2.Id]))
+	
+	def getIndexKey(self,kind,obj):
+		
+		"""Returns key of element ``obj`` in lookup index of type ``kind``.
+		
+		Possible values for ``kind`` are:
+		
+			* Id: ID of element.
+			* x: Rounded coordinate of vertex, see :py:func:`getCoordKey`.
+			* vertices: Start and end vertex of edge, see :py:func:`getVertexPairKey`.
+		
+		Args:
+			kind (str): Type of index.
+			obj (pyfrp.modules.pyfrp_gmsh_geometry.gmshElement): Element.
+		
+		Returns:
+			object: Key.
+		
+		"""
+		
+		if kind=="Id":
+			return obj.Id
+		if kind=="x":
+			return self.getCoordKey(obj.x)
+		if kind=="vertices":
+			return self.getVertexPairKey(obj.getFirstVertex(1),obj.getLastVertex(1))
+		
+		printError("Unknown index type " + str(kind) + ".")
+		return None
+	
+	def buildIndex(self,kind,element):
+		
+		"""Builds lookup index of type ``kind`` for element list ``element``.
+		
+		Index is stored as list containing:
+		
+			* The indexed element list.
+			* The length of the element list when it was last indexed.
+			* A dictionary mapping keys onto tuples ``(obj,i)``.
+			* The maximum ID in element list (only for ``kind='Id'``).
+			* The ``id`` of each element in the element list when it was last indexed.
+		
+		If multiple elements have the same key, the first one is indexed.
+		
+		See also :py:func:`getIndexKey`.
+		
+		Args:
+			kind (str): Type of index.
+			element (str): Name of element list.
+		
+		Returns:
+			list: Index.
+		
+		"""
+		
+		lst=getattr(self,element)
+		
+		lookup={}
+		for i,obj in enumerate(lst):
+			key=self.getIndexKey(kind,obj)
+			if key not in lookup:
+				lookup[key]=(obj,i)
+		
+		maxId=None
+		if kind=="Id" and len(lst)>0:
+			maxId=max(lookup.keys())
+		
+		idx=[lst,len(lst),lookup,maxId,map(id,lst)]
+		self.getLookupIndices()[(kind,element)]=idx
+		
+		return idx
+	
+	def getIndex(self,kind,element):
+		
+		"""Returns lookup index of type ``kind`` for element list ``element``.
+		
+		Rebuilds index if element list has been replaced or changed its length
+		since it was last indexed.
+		
+		See also :py:func:`buildIndex`.
+		
+		Args:
+			kind (str): Type of index.
+			element (str): Name of element list.
+		
+		Returns:
+			list: Index.
+		
+		"""
+		
+		lst=getattr(self,element)
+		idx=self.getLookupIndices().get((kind,element))
+		
+		if idx is None or idx[0] is not lst or idx[1]!=len(lst):
+			idx=self.buildIndex(kind,element)
+		
+		return idx
+	
+	def dropIndices(self,kind=None,element=None):
+		
+		"""Drops lookup indices, forcing them to be rebuilt on next lookup.
+		
+		If ``kind`` or ``element`` is given, only drops indices matching them.
+		
+		Keyword Args:
+			kind (str): Type of index.
+			element (str): Name of element list.
+		
+		"""
+		
+		indices=self.getLookupIndices()
+		for k,e in list(indices.keys()):
+			if kind in [None,k] and element in [None,e]:
+				indices.pop((k,e))
+	
+	def appendElement(self,element,obj):
+		
+		"""Appends element ``obj`` to element list ``element`` and updates
+		lookup indices of that list.
+		
+		Args:
+			element (str): Name of element list.
+			obj (pyfrp.modules.pyfrp_gmsh_geometry.gmshElement): Element to append.
+		
+		Returns:
+			list: Updated element list.
+		
+		"""
+		
+		lst=getattr(self,element)
+		lst.append(obj)
+		
+		for (kind,e),idx in self.getLookupIndices().items():
+		
+			if e!=element:
+				continue
+		
+			#Only update indices that were up to date before appending
+			if idx[0] is lst and idx[1]==len(lst)-1:
+				key=self.getIndexKey(kind,obj)
+				if key not in idx[2]:
+					idx[2][key]=(obj,idx[1])
+				if kind=="Id":
+					idx[3]=obj.Id if idx[3]==None else max(idx[3],obj.Id)
+				idx[1]=len(lst)
+				idx[4].append(id(obj))
+		
+		return lst
+	
+	def lookupElement(self,kind,element,key):
+		
+		"""Looks up element with key ``key`` in lookup index of type ``kind``.
+		
+		Returns ``(False,False)`` if element cannot be found.
+		
+		.. note:: If the element found does not match ``key`` anymore or has moved inside
+		   the element list, the index is rebuilt and the lookup is repeated. The same happens
+		   if ``key`` cannot be found and elements of the list have been replaced directly since 
+		   it was last indexed. Keys of elements changed by reassigning ``Id``, ``x`` or the vertices 
+		   of edges drop the index, see :py:func:`gmshElement.__setattr__`, changing coordinates in-place does not.
+		
+		See also :py:func:`getIndex`.
+		
+		Args:
+			kind (str): Type of index.
+			element (str): Name of element list.
+			key (object): Key to look up.
+		
+		Returns:
+			tuple: Tuple containing:
+		
+				* obj (pyfrp.modules.pyfrp_gmsh_geometry.gmshElement): Element.
+				* i (int): Position in element list.
+		
+		"""
+		
+		lst=getattr(self,element)
+		idx=self.getIndex(kind,element)
+		
+		for rebuilt in [False,True]:
+		
+			if rebuilt:
+				idx=self.buildIndex(kind,element)
+		
+			if key not in idx[2]:
+				
+				#Only trust a miss if the list still holds the elements indexed
+				if rebuilt or idx[4]==map(id,lst):
+					return False,False
+				continue
+		
+			obj,i=idx[2][key]
+			if i<len(lst) and lst[i] is obj and self.getIndexKey(kind,obj)==key:
+				return obj,i
+		
 		return False,False
 		
 	def draw(self,ax=None,color='k',ann=None,drawSurfaces=False,surfaceColor='b',alpha=0.2,backend='mpl',asSphere=True,size=5,annElements=[True,True,True],linewidth=1):
@@ -1542,7 +1815,7 @@ class domain:
 		newId=self.getNewId(self.lineLoops,Id)
 		
 		l=lineLoop(self,edgeIDs,newId)
-		self.lineLoops.append(l)
+		self.appendElement("lineLoops",l)
 		
 		return l
 	
@@ -1589,7 +1862,7 @@ class domain:
 		newId=self.getNewId(self.surfaceLoops,Id)
 		
 		l=surfaceLoop(self,surfaceIDs,newId)
-		self.surfaceLoops.append(l)
+		self.appendElement("surfaceLoops",l)
 		
 		return l
 	
@@ -1609,7 +1882,7 @@ class domain:
 		newId=self.getNewId(self.ruledSurfaces,Id)
 		
 		l=ruledSurface(self,lineLoopID,newId)
-		self.ruledSurfaces.append(l)
+		self.appendElement("ruledSurfaces",l)
 		
 		return l
 	
@@ -1629,7 +1902,7 @@ class domain:
 		newId=self.getNewId(self.volumes,Id)
 		
 		l=volume(self,surfaceLoopID,newId)
-		self.volumes.append(l)
+		self.appendElement("volumes",l)
 		
 		return l
 	
@@ -1652,7 +1925,7 @@ class domain:
 		
 		newId=self.getNewId(self.fields,Id)
 		l=boxField(self,newId,volSizeIn=volSizeIn,volSizeOut=volSizeOut,xRange=xRange,yRange=yRange,zRange=zRange)
-		self.fields.append(l)
+		self.appendElement("fields",l)
 		
 		return l
 	
@@ -1677,7 +1950,7 @@ class domain:
 			
 		newId=self.getNewId(self.fields,Id)
 		l=thresholdField(self,newId,IField=IField,LcMin=LcMin,LcMax=LcMax,DistMin=DistMin,DistMax=DistMax)
-		self.fields.append(l)
+		self.appendElement("fields",l)
 		
 		return l
 	
@@ -1696,7 +1969,7 @@ class domain:
 			
 		newId=self.getNewId(self.fields,Id)
 		l=attractorField(self,newId,NodesList=NodesList)
-		self.fields.append(l)
+		self.appendElement("fields",l)
 		
 		return l
 	
@@ -1715,7 +1988,7 @@ class domain:
 			
 		newId=self.getNewId(self.fields,Id)
 		l=minField(self,newId,FieldsList=FieldsList)
-		self.fields.append(l)
+		self.appendElement("fields",l)
 		
 		return l
 	
@@ -1742,7 +2015,7 @@ class domain:
 		
 		newId=self.getNewId(self.fields,Id)
 		l=boundaryLayerField(self,newId,AnisoMax=AnisoMax,hwall_n=hwall_n,hwall_t=hwall_t,ratio=ratio,thickness=thickness,hfar=hfar,IntersectMetrics=IntersectMetrics,Quads=Quads)
-		self.fields.append(l)
+		self.appendElement("fields",l)
 		
 		return l
 	
@@ -1849,6 +2122,10 @@ class domain:
 		
 		for e in getattr(self,element):		
 			e.Id=e.Id+offset
+		
+		self.dropIndices(kind="Id")
+		if element=="vertices":
+			self.dropIndices(kind="vertices")
 	
 	def setDomainGlobally(self):
 		
@@ -2220,19 +2497,27 @@ class domain:
 			
 		"""
 		
-		# Loop through edges
-		for i,v in enumerate(self.vertices):
-			for j in range(i+1,len(self.vertices)):
+		maxId=max([0]+pyfrp_misc_module.objAttrToList(self.vertices,'Id'))
+		
+		# Group vertices by ID in a single pass
+		byId={}
+		vertices=[]
+		for v in self.vertices:
+			
+			# Check if same ID
+			if v.Id in byId:
 				
-				# Check if same ID
-				if self.vertices[j].Id==self.vertices[i].Id:
-					
-					# Check if same start/end vertex
-					if pyfrp_misc_module.compareVectors(self.vertices[j].x,self.vertices[i].x):			
-						self.vertices.remove(self.vertices[j])
-					else:
-						newId=self.getNewId(self.vertices,None)
-						self.vertices[j].setID(newId)
+				# Check if same coordinate
+				if any([pyfrp_misc_module.compareVectors(v.x,w.x) for w in byId[v.Id]]):
+					continue
+				else:
+					maxId=maxId+1
+					v.setID(maxId)
+			
+			byId.setdefault(v.Id,[]).append(v)
+			vertices.append(v)
+		
+		self.vertices[:]=vertices
 		
 		return self.vertices
 		
@@ -2249,33 +2534,56 @@ class domain:
 			
 		"""
 		
-		edgeIDs=pyfrp_misc_module.objAttrToList(self.edges,'Id')
-		print edgeIDs
-		# Loop through edges
-		for i,e in enumerate(self.edges):
-			for j in range(i+1,len(self.edges)):
-				print i,j,self.edges[i].Id,self.edges[j].Id
-				# Check if same ID
-				if self.edges[j].Id==self.edges[i].Id:
-					
-					print "same id",self.edges[j].Id 
-					
-					# Check if same start/end vertex
-					if (self.edges[j].getFirstVertex()==self.edges[i].getFirstVertex()) and (self.edges[j].getLastVertex()==self.edges[i].getLastVertex()):			
-						self.edges[j].delete(debug=debug)
-					else:
-						newId=self.getNewId(self.edges,None)
-						self.edges[j].setID(newId)
+		maxId=max([0]+pyfrp_misc_module.objAttrToList(self.edges,'Id'))
+		
+		# Group edges by ID in a single pass
+		byId={}
+		for e in list(self.edges):
+			
+			# Check if same ID
+			if e.Id in byId:
+				
+				# Check if same start/end vertex
+				if any([(e.getFirstVertex(1)==f.getFirstVertex(1)) and (e.getLastVertex(1)==f.getLastVertex(1)) for f in byId[e.Id]]):
+					if e.delete(debug=debug):
+						continue
+				else:
+					maxId=maxId+1
+					e.setID(maxId)
+			
+			byId.setdefault(e.Id,[]).append(e)
 		
 		return self.edges
 	
 
 class gmshElement(object):
 	
+	#Attributes lookup indices of the domain are keyed by, mapped onto the index types, see domain.getIndexKey
+	indexAttrs={"Id":["Id"],"x":["x"],"v1":["vertices"],"v2":["vertices"],"vstart":["vertices"],"vend":["vertices"],"vertices":["vertices"]}
+	
 	def __init__(self,domain,Id):
 		
 		self.domain=domain
 		self.Id=Id
+	
+	def __setattr__(self,name,val):
+		
+		"""Sets attribute and drops lookup indices of domain that are keyed by it.
+		
+		Indices are only dropped if an existing attribute is replaced, not if it is set
+		for the first time, for example when creating the element.
+		"""
+		
+		changed=name in gmshElement.indexAttrs and name in self.__dict__ and self.__dict__[name] is not val
+		
+		object.__setattr__(self,name,val)
+		
+		if changed and self.__dict__.get('domain')!=None:
+			kinds=gmshElement.indexAttrs[name]
+			if name=="Id" and isinstance(self,vertex):
+				kinds=kinds+["vertices"]
+			for kind in kinds:
+				self.domain.dropIndices(kind=kind)
 		
 	def getID(self):
 		
@@ -2301,6 +2609,12 @@ class gmshElement(object):
 		"""
 		
 		self.Id=Id
+		
+		if self.domain!=None:
+			self.domain.dropIndices(kind="Id")
+			if isinstance(self,vertex):
+				self.domain.dropIndices(kind="vertices")
+		
 		return self.Id
 		
 	def getCopy(self):
@@ -2600,6 +2914,10 @@ class vertex(gmshElement):
 		"""
 		
 		self.x=x
+		
+		if self.domain!=None:
+			self.domain.dropIndices(kind="x")
+			
 		return self.x
 	
 	def writeToFile(self,f):
@@ -4497,7 +4815,7 @@ class ruledSurface(gmshElement):
 		
 		#Rotate back
 		for v in vertices:
-			v.x=np.dot(v.x,rmat.T)
+			v.setX(np.dot(v.x,rmat.T))
 			
 		return True,surfacesCreated
 		
@@ -4809,7 +5127,7 @@ class ruledSurface(gmshElement):
 		coordsNew.append(list(coords))	
 		
 		#Add collection
-		coll=Poly3DCollection(coordsNew,alpha=alpha)
+		coll=art3d.Poly3DCollection(coordsNew,alpha=alpha)
 		coll.set_facecolor(color)
 		ax.add_collection3d(coll)
 		
@@ -4867,7 +5185,7 @@ class ruledSurface(gmshElement):
 		
 		# Rotate
 		for v in self.getVertices():
-			v.x=np.dot(v.x,rmat)
+			v.setX(np.dot(v.x,rmat))
 			
 		return rmat	
 			
@@ -29,6 +29,8 @@
 	* Functions for updating parameters in standard .geo files.
 	* Mesh refinement.
 	* Running Gmsh
+	* Running multiple Gmsh processes in parallel
+	* Caching generated meshes
 
 This module together with pyfrp.pyfrp_gmsh_geometry and pyfrp.pyfrp_gmsh_IO_module works partially as a python gmsh wrapper, however is incomplete.
 If you want to know more about gmsh, go to http://gmsh.info/doc/texinfo/gmsh.html .
@@ -50,11 +52,22 @@ import subprocess
 import time
 import shlex
 import platform
+import hashlib
+import pickle
+from tempfile import mkdtemp
+import multiprocessing
 
 #PyFRAP
 import pyfrp_gmsh_IO_module
 import pyfrp_misc_module
+import pyfrp_IO_module
 from pyfrp_term_module import *
+
+#Maximum size of mesh cache in bytes, see evictMeshCache
+meshCacheMaxSize=2**30
+
+#Directory of mesh cache, see getMeshCacheDir
+meshCacheDir=None
            
 #===========================================================================================================================================================================
 #Module Functions
@@ -340,6 +353,51 @@ def runGmsh(fn,fnOut=None,debug=False,redirect=False,fnStout=None,fnSterr=None,v
 	if fnSterr==None:
 		fnSterr=pyfrp_misc_module.getMeshfilesDir()+'gmshLogs/gmsh.sterr'
 		
+	args,fnOut=getGmshArgs(fn,fnOut=fnOut,debug=debug,volSizeMax=volSizeMax,dim=dim)
+	
+	#redirect stdout and stderr if selected
+	if redirect:
+		stoutFile = open(fnStout,'wb')
+		sterrFile = open(fnSterr,'wb')
+	else:	
+		stoutFile = None
+		sterrFile = None
+		
+	#Call gmsh via subprocess and wait till its done
+	try:
+		p = subprocess.Popen(args,stdout=stoutFile,stderr=sterrFile)
+		p.wait()
+	except:
+		printError("Gmsh is not running properly, something is wrong.")
+	
+	#Fix path to make sure that it exists and is consistent with OS
+	fnOut=pyfrp_misc_module.fixPath(fnOut)
+	
+	return fnOut
+
+def getGmshArgs(fn,fnOut=None,debug=False,volSizeMax=None,dim=3):
+	
+	"""Returns argument list for running Gmsh on .geo file.
+	
+	See also :py:func:`runGmsh`.
+	
+	Args:
+		fn (str): Filepath.
+		
+	Keyword Args:
+		fnOut (str): Output filepath.
+		debug (bool): Print debugging messages.
+		volSizeMax (float): Maximum allowed mesh element size.
+		dim (int): Dimension of mesh.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* args (list): Argument list for ``subprocess.Popen``.
+			* fnOut (str): Path to mesh file.
+		
+	"""
+	
 	v=5*int(debug)
 	
 	#POpen needs to have paths with `/` as seperator, so we need to change in the case of 
@@ -371,25 +429,439 @@ def runGmsh(fn,fnOut=None,debug=False,redirect=False,fnStout=None,fnSterr=None,v
 	#Split command in list for subprocess
 	args = shlex.split(cmd)
 	
-	#redirect stdout and stderr if selected
-	if redirect:
-		stoutFile = open(fnStout,'wb')
-		sterrFile = open(fnSterr,'wb')
-	else:	
-		stoutFile = None
-		sterrFile = None
+	return args,fnOut
+
+def getGmshLogFns(name,fnOut=None):
+	
+	"""Returns paths of stout/sterr log files of Gmsh run called ``name``.
+	
+	Log files are placed in ``meshfiles/gmshLogs/``. If ``fnOut`` is given, the basename of the 
+	output file is added to the log filenames, so that runs with the same name do not overwrite 
+	each other's logs.
+	
+	Args:
+		name (str): Name of Gmsh run.
 		
-	#Call gmsh via subprocess and wait till its done
+	Keyword Args:
+		fnOut (str): Output filepath of Gmsh run.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* fnStout (str): Path to stout log.
+			* fnSterr (str): Path to sterr log.
+		
+	"""
+	
+	if fnOut!=None:
+		name=name+"_"+os.path.splitext(os.path.basename(fnOut))[0]
+	
+	name="".join([c if c.isalnum() or c in "-_." else "_" for c in name])
+	fnLogs=pyfrp_misc_module.getMeshfilesDir()+'gmshLogs/'
+	
+	return fnLogs+name+'.stout',fnLogs+name+'.sterr'
+
+def getAvailableMemory():
+	
+	"""Returns available memory in bytes.
+	
+	.. note:: Reads ``/proc/meminfo``, hence only works on Linux. Returns ``None`` 
+	   if available memory cannot be determined.
+	
+	Returns:
+		int: Available memory in bytes.
+		
+	"""
+	
 	try:
-		p = subprocess.Popen(args,stdout=stoutFile,stderr=sterrFile)
-		p.wait()
-	except:
-		printError("Gmsh is not running properly, something is wrong.")
+		with open('/proc/meminfo','r') as f:
+			for line in f:
+				if line.startswith('MemAvailable:'):
+					return int(line.split()[1])*1024
+	except IOError:
+		pass
+	
+	return None
+
+def getMaxGmshProcs(memPerProc=None):
 	
-	#Fix path to make sure that it exists and is consistent with OS
-	fnOut=pyfrp_misc_module.fixPath(fnOut)
+	"""Returns maximum number of Gmsh processes that should run in parallel.
 	
-	return fnOut
+	Number of processes is limited by the number of CPUs and, if ``memPerProc`` is given
+	and available memory can be determined, by available memory divided by ``memPerProc``.
+	
+	Keyword Args:
+		memPerProc (int): Expected memory needed per Gmsh process in bytes.
+		
+	Returns:
+		int: Number of processes.
+		
+	"""
+	
+	nProcs=multiprocessing.cpu_count()
+	
+	if memPerProc!=None:
+		mem=getAvailableMemory()
+		if mem!=None:
+			nProcs=min(nProcs,int(mem/memPerProc))
+	
+	return max(nProcs,1)
+
+def runGmshQueue(jobs,nProcs=None,memPerProc=None,debug=False,callback=None):
+	
+	"""Runs Gmsh on multiple .geo files in parallel subprocesses.
+	
+	Each job is a dictionary with the keys
+	
+		* ``fn``: Path to .geo file.
+		* ``fnOut``: Output filepath (optional).
+		* ``volSizeMax``: Maximum allowed mesh element size (optional).
+		* ``dim``: Dimension of mesh (optional).
+		* ``name``: Name of job, used for log files and progress messages.
+	
+	The stout/sterr of each job is written into its own log files, named after the job and its output file, 
+	see :py:func:`getGmshLogFns`. 
+	
+	If given, ``callback`` is called as ``callback(job,returnCode,nDone,nJobs)`` every time a job 
+	has finished. Otherwise progress is printed.
+	
+	.. note:: If ``nProcs=None``, will use :py:func:`getMaxGmshProcs` to determine the number of processes.
+	
+	Args:
+		jobs (list): List of job dictionaries.
+		
+	Keyword Args:
+		nProcs (int): Maximum number of Gmsh processes running at the same time.
+		memPerProc (int): Expected memory needed per Gmsh process in bytes.
+		debug (bool): Print debugging messages.
+		callback (function): Function called when job has finished.
+		
+	Returns:
+		list: Return codes of all jobs.
+		
+	"""
+	
+	if nProcs==None:
+		nProcs=getMaxGmshProcs(memPerProc=memPerProc)
+	
+	fnLogs=pyfrp_misc_module.getMeshfilesDir()+'gmshLogs/'
+	if not os.path.isdir(fnLogs):
+		pyfrp_misc_module.mkdir(fnLogs)
+	
+	returnCodes=[None]*len(jobs)
+	queue=range(len(jobs))
+	running={}
+	nDone=0
+	
+	while len(queue)>0 or len(running)>0:
+		
+		#Start new processes
+		while len(queue)>0 and len(running)<nProcs:
+			i=queue.pop(0)
+			job=jobs[i]
+			
+			args,job['fnOut']=getGmshArgs(job['fn'],fnOut=job.get('fnOut',None),debug=debug,volSizeMax=job.get('volSizeMax',None),dim=job.get('dim',3))
+			fnStout,fnSterr=getGmshLogFns(job['name'],fnOut=job['fnOut'])
+			logs=[open(fnStout,'wb'),open(fnSterr,'wb')]
+			
+			try:
+				p=subprocess.Popen(args,stdout=logs[0],stderr=logs[1])
+			except OSError:
+				printError("Gmsh is not running properly, something is wrong.")
+				p=None
+			
+			running[i]=(p,logs)
+		
+		#Check for finished processes
+		time.sleep(0.05)
+		for i in running.keys():
+			p,logs=running[i]
+			
+			if p!=None:
+				returnCode=p.poll()
+				if returnCode==None:
+					continue
+			else:
+				returnCode=-1
+			
+			for log in logs:
+				log.close()
+			running.pop(i)
+			
+			jobs[i]['fnOut']=pyfrp_misc_module.fixPath(jobs[i]['fnOut'])
+			returnCodes[i]=returnCode
+			nDone=nDone+1
+			
+			if callback!=None:
+				callback(jobs[i],returnCode,nDone,len(jobs))
+			else:
+				print "Gmsh finished " + jobs[i]['name'] + " with return code " + str(returnCode) + " (" + str(nDone) + "/" + str(len(jobs)) + ")."
+			
+	return returnCodes
+
+def getMeshCacheDir(fnCache=None):
+	
+	"""Returns directory of mesh cache, creates it if necessary.
+	
+	Returns ``None`` if directory cannot be created, in which case the cache is not used.
+	
+	.. note:: If ``fnCache=None``, will use ``meshCacheDir``. If this is not set either, will use
+	   ``pyfrp/meshCache/`` in the user's cache directory, that is ``$XDG_CACHE_HOME`` or ``~/.cache``.
+	
+	Keyword Args:
+		fnCache (str): Path to cache directory.
+		
+	Returns:
+		str: Path to cache directory.
+		
+	"""
+	
+	if fnCache==None:
+		fnCache=meshCacheDir
+	if fnCache==None:
+		fnCache=os.environ.get('XDG_CACHE_HOME','') or os.path.join(os.path.expanduser('~'),'.cache')
+		fnCache=os.path.join(fnCache,'pyfrp','meshCache')
+	
+	fnCache=pyfrp_misc_module.slashToFn(fnCache)
+	
+	if not os.path.isdir(fnCache):
+		try:
+			os.makedirs(fnCache)
+		except OSError:
+			if not os.path.isdir(fnCache):
+				printWarning("Cannot create mesh cache directory " + fnCache + ". Will not use mesh cache.")
+				return None
+	
+	return fnCache
+
+def getMeshCacheKey(fn,*parms):
+	
+	"""Returns key of file ``fn`` in mesh cache.
+	
+	Key is the SHA1 hash of the content of ``fn`` and all additional parameters ``parms``, 
+	for example ``volSizeMax`` or the mesh's dimension.
+	
+	.. note:: Files included by ``fn`` are not considered.
+	
+	Args:
+		fn (str): Path to .geo or .msh file.
+		parms (list): Further parameters that determine the mesh.
+		
+	Returns:
+		str: Cache key.
+		
+	"""
+	
+	h=hashlib.sha1()
+	
+	with open(fn,'rb') as f:
+		for chunk in iter(lambda: f.read(2**20),b''):
+			h.update(chunk)
+	
+	h.update(repr(parms))
+	
+	return h.hexdigest()
+
+def getGeoCacheKey(fn,volSizeMax=None,dim=3):
+	
+	"""Returns key of mesh generated by :py:func:`runGmsh` in mesh cache.
+	
+	Key depends on the content of the .geo file, the mesh parameters and the Gmsh binary used.
+	
+	Args:
+		fn (str): Path to .geo file.
+		
+	Keyword Args:
+		volSizeMax (float): Maximum allowed mesh element size.
+		dim (int): Dimension of mesh.
+		
+	Returns:
+		str: Cache key.
+		
+	"""
+	
+	return getMeshCacheKey(fn,"geo",volSizeMax,dim,getGmshBin())
+
+def loadMeshCache(key,fnOut=None,fnCache=None):
+	
+	"""Loads mesh from mesh cache.
+	
+	If ``fnOut`` is given, copies cached .msh file to ``fnOut``. Marks entry as recently used.
+	
+	Returns ``(None,None,None)`` if there is no complete entry for ``key`` or if the entry cannot be read.
+	
+	Args:
+		key (str): Cache key.
+		
+	Keyword Args:
+		fnOut (str): Output filepath for meshfile.
+		fnCache (str): Path to cache directory.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* mesh (fipy.GmshImporter3D): Gmsh mesh object.
+			* cellCenters (numpy.ndarray): Cell centers of mesh.
+			* cellVolumes (numpy.ndarray): Cell volumes of mesh.
+		
+	"""
+	
+	fnCache=getMeshCacheDir(fnCache=fnCache)
+	if fnCache==None:
+		return None,None,None
+	
+	fnEntry=fnCache+key+'/'
+	
+	if not os.path.isfile(fnEntry+'mesh.pk'):
+		return None,None,None
+	
+	if fnOut!=None and not os.path.isfile(fnEntry+'mesh.msh'):
+		return None,None,None
+	
+	try:
+		mesh=pyfrp_IO_module.loadFromPickle(fnEntry+'mesh.pk')
+		with np.load(fnEntry+'cells.npz') as cells:
+			cellCenters=cells['cellCenters']
+			cellVolumes=cells['cellVolumes']
+		if fnOut!=None:
+			shutil.copyfile(fnEntry+'mesh.msh',fnOut)
+	except (IOError,OSError,EOFError,KeyError,ValueError,AttributeError,ImportError,pickle.UnpicklingError):
+		printWarning("Could not load mesh cache entry " + key + ". Will not use mesh cache.")
+		return None,None,None
+		
+	#Mark as recently used
+	try:
+		os.utime(fnEntry,None)
+	except OSError:
+		pass
+	
+	return mesh,cellCenters,cellVolumes
+
+def storeMeshCache(key,mesh,fnMsh=None,fnCache=None,maxSize=None):
+	
+	"""Stores mesh in mesh cache.
+	
+	Stores mesh together with its cell centers and volumes, and, if given, the .msh file ``fnMsh``.
+	Entries are written to a temporary directory first and then moved in place, so concurrent 
+	writers never produce incomplete entries. Afterwards runs :py:func:`evictMeshCache`.
+	
+	Returns ``None`` if the entry cannot be written, for example if the cache directory is not writable.
+	
+	Args:
+		key (str): Cache key.
+		mesh (fipy.GmshImporter3D): Gmsh mesh object.
+		
+	Keyword Args:
+		fnMsh (str): Path to .msh file.
+		fnCache (str): Path to cache directory.
+		maxSize (int): Maximum size of cache in bytes.
+		
+	Returns:
+		str: Path to cache entry.
+		
+	"""
+	
+	fnCache=getMeshCacheDir(fnCache=fnCache)
+	if fnCache==None:
+		return None
+	
+	fnEntry=fnCache+key+'/'
+	
+	if os.path.isdir(fnEntry):
+		return fnEntry
+	
+	try:
+		fnTemp=mkdtemp(dir=fnCache,prefix='.tmp_')
+		
+		try:
+			if fnMsh!=None:
+				shutil.copyfile(fnMsh,fnTemp+'/mesh.msh')
+			
+			np.savez(fnTemp+'/cells.npz',cellCenters=np.asarray(mesh.cellCenters),cellVolumes=np.asarray(mesh.cellVolumes))
+			pyfrp_IO_module.saveToPickle(mesh,fn=fnTemp+'/mesh.pk')
+			
+			try:
+				os.rename(fnTemp,fnEntry)
+			except OSError:
+				#Some other process might have stored the same entry in the meantime
+				if not os.path.isdir(fnEntry):
+					raise
+		finally:
+			if os.path.isdir(fnTemp):
+				shutil.rmtree(fnTemp,ignore_errors=True)
+		
+		evictMeshCache(fnCache=fnCache,maxSize=maxSize,keep=[key])
+	
+	except (IOError,OSError) as e:
+		printWarning("Could not store mesh in mesh cache: " + str(e) + ". Will not use mesh cache.")
+		return None
+	
+	return fnEntry
+	
+def evictMeshCache(fnCache=None,maxSize=None,keep=[]):
+	
+	"""Removes least recently used entries from mesh cache until it is 
+	smaller than ``maxSize``.
+	
+	.. note:: If ``maxSize=None``, will use ``meshCacheMaxSize``.
+	
+	Keyword Args:
+		fnCache (str): Path to cache directory.
+		maxSize (int): Maximum size of cache in bytes.
+		keep (list): Keys of entries that should not be removed.
+	
+	Returns:
+		list: Keys of removed entries.
+		
+	"""
+	
+	if maxSize==None:
+		maxSize=meshCacheMaxSize
+	
+	fnCache=getMeshCacheDir(fnCache=fnCache)
+	if fnCache==None:
+		return []
+	
+	#Collect size and last usage of entries
+	entries=[]
+	total=0
+	for key in os.listdir(fnCache):
+		fnEntry=fnCache+key
+		if key.startswith('.') or not os.path.isdir(fnEntry):
+			continue
+		try:
+			size=sum([os.path.getsize(os.path.join(fnEntry,f)) for f in os.listdir(fnEntry)])
+			entries.append((os.path.getmtime(fnEntry),key,size))
+		except OSError:
+			continue
+		total=total+size
+	
+	#Remove oldest entries first
+	removed=[]
+	for mtime,key,size in sorted(entries):
+		if total<=maxSize:
+			break
+		if key in keep:
+			continue
+		shutil.rmtree(fnCache+key,ignore_errors=True)
+		total=total-size
+		removed.append(key)
+	
+	return removed
+
+def clearMeshCache(fnCache=None):
+	
+	"""Removes all entries from mesh cache.
+	
+	Keyword Args:
+		fnCache (str): Path to cache directory.
+		
+	Returns:
+		list: Keys of removed entries.
+	
+	"""
+	
+	return evictMeshCache(fnCache=fnCache,maxSize=-1)
 
 def getGmshBin(fnPath=None):
 	
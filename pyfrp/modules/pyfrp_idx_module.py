@@ -47,13 +47,16 @@ of *check* functions that help to figure out if a list of coordinates is inside
 #Improting necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp_lazy_module import lazyImport
+
 #numpy/Scipy
 import numpy as np
 
 #Plotting
-from matplotlib import cm
-import matplotlib.pyplot as plt
-import matplotlib.patches as ptc
+cm=lazyImport("matplotlib.cm")
+plt=lazyImport("matplotlib.pyplot")
+ptc=lazyImport("matplotlib.patches")
 
 #Misc
 import os, os.path
@@ -73,6 +76,59 @@ import pyfrp_plot_module as pyfrp_plt
 #Module Functions
 #===========================================================================================================================================================================
 
+def getPxGrid(res):
+	
+	"""Returns pixel coordinates of image as broadcastable grid vectors.
+	
+	Pixel ``[i,j]`` is assigned the coordinates ``(i+1,j+1)``. ``x`` is returned as 
+	column vector and ``y`` as row vector, so that any of the *check* functions 
+	returns a ``res x res`` mask when applied to them.
+	
+	Args:
+		res (int): Resolution of image (e.g. 512).
+		
+	Returns:
+		tuple: Tuple containing:
+			
+			* x (numpy.ndarray): x-coordinates of shape ``(res,1)``.
+			* y (numpy.ndarray): y-coordinates of shape ``(1,res)``.
+	
+	"""
+	
+	x=np.arange(1,int(res)+1,dtype=float)
+	
+	return x[:,np.newaxis],x[np.newaxis,:]
+
+def getIdxImgFromMask(mask,title="",debug=False):
+	
+	"""Returns image indices of all pixels that are ``True`` in ``mask``.
+	
+	Indices are returned in the same order as when looping through all pixels
+	row by row.
+	
+	Args:
+		mask (numpy.ndarray): Boolean image mask.
+	
+	Keyword Args:
+		title (str): Title of debugging plot.
+		debug (bool): Show debugging plot.
+		
+	Returns:
+		tuple: Tuple containing:
+			
+			* indX (numpy.ndarray): Indices in x-direction.
+			* indY (numpy.ndarray): Indices in y-direction.
+			
+	"""
+	
+	if debug:
+		fig,axes = pyfrp_plt.makeSubplot([1,1],titles=[title],sup="Image index debugging output")
+		axes[0].contourf(mask)
+	
+	indX,indY=np.where(mask)
+	
+	return indX,indY
+
 def getCircleIdxImg(center,radius,res,debug=False):
 		
 	"""Returns all indices of image that lie within given circle.
@@ -88,35 +144,14 @@ def getCircleIdxImg(center,radius,res,debug=False):
 	Returns:
 		tuple: Tuple containing:
 			
-			* ind_circ_x (list): List of indices inside circle in x-direction.
-			* ind_circ_y (list): List of indices inside circle in y-direction.
+			* ind_circ_x (numpy.ndarray): Indices inside circle in x-direction.
+			* ind_circ_y (numpy.ndarray): Indices inside circle in y-direction.
 
 	"""
 		
-	#Empty index vectors
-	ind_circ_x=[]
-	ind_circ_y=[]
-	
-	if debug:
-		ind_slice_debug=np.zeros((res,res))
-	
-	#Go through all pixels
-	for i in range(int(res)):
-		for j in range(int(res)):
-			
-			#Check if in circle
-			if checkInsideCircle(i+1,j+1,center,radius):
-				ind_circ_x.append(i)
-				ind_circ_y.append(j)
-				if debug:
-					ind_circ_debug[i,j]=1
+	x,y=getPxGrid(res)
 	
-	if debug:
-		#Create figure
-		fig,axes = pyfrp_plt.make_subplot([1,1],titles=["Circle"],sup="getCircleIdxImg debugging output")
-		axes[0].contourf(ind_circ_debug)
-		
-	return ind_circ_x,ind_circ_y
+	return getIdxImgFromMask(checkInsideCircle(x,y,center,radius),title="Circle",debug=debug)
 
 def getRectangleIdxImg(offset,sidelengthX,sidelengthY,res,debug=False):
 	
@@ -136,33 +171,14 @@ def getRectangleIdxImg(offset,sidelengthX,sidelengthY,res,debug=False):
 	Returns:
 		tuple: Tuple containing:
 			
-			* indX (list): List of indices inside rectangle in x-direction.
-			* indY (list): List of indices inside rectangle in y-direction.
+			* indX (numpy.ndarray): Indices inside rectangle in x-direction.
+			* indY (numpy.ndarray): Indices inside rectangle in y-direction.
 
 	"""
 	
-	indX=[]
-	indY=[]
+	x,y=getPxGrid(res)
 	
-	#Go through all pixels
-	for i in range(int(res)):
-		for j in range(int(res)):
-			
-			#Check if in square
-			if checkInsideRectangle(i+1,j+1,offset,sidelengthX,sidelengthY):
-				indX.append(i)
-				indY.append(j)
-				
-				if debug:
-					indDebug[i,j]=1
-					
-	if debug:
-		#Create figure
-		fig,axes = pyfrp_plt.make_subplot([1,1],titles=["Rectangle"],sup="getRectangleIdxImg debugging output")
-		axes[0].contourf(ind_circ_debug)			
-		
-	return indX,indY	
-
+	return getIdxImgFromMask(checkInsideRectangle(x,y,offset,sidelengthX,sidelengthY),title="Rectangle",debug=debug)	
 
 def getSquareIdxImg(offset,sidelength,res,debug=False):
 	
@@ -181,34 +197,14 @@ def getSquareIdxImg(offset,sidelength,res,debug=False):
 	Returns:
 		tuple: Tuple containing:
 			
-			* indX (list): List of indices inside square in x-direction.
-			* indY (list): List of indices inside square in y-direction.
+			* indX (numpy.ndarray): Indices inside square in x-direction.
+			* indY (numpy.ndarray): Indices inside square in y-direction.
 
 	"""
 	
+	x,y=getPxGrid(res)
 	
-	indX=[]
-	indY=[]
-	
-	#Go through all pixels
-	for i in range(int(res)):
-		for j in range(int(res)):
-			
-			#Check if in square
-			if checkInsideSquare(i+1,j+1,offset,sidelength):
-				indX.append(i)
-				indY.append(j)
-				
-				if debug:
-					indDebug[i,j]=1
-					
-	if debug:
-		
-		#Create figure
-		fig,axes = pyfrp_plt.make_subplot([1,1],titles=["Square"],sup="getSquareIdxImg debugging output")
-		axes[0].contourf(ind_circ_debug)			
-		
-	return indX,indY
+	return getIdxImgFromMask(checkInsideSquare(x,y,offset,sidelength),title="Square",debug=debug)
 
 def getAllIdxImg(res,debug=False):
 	
@@ -223,35 +219,12 @@ def getAllIdxImg(res,debug=False):
 	Returns:
 		tuple: Tuple containing:
 			
-			* indX (list): List of indices inside image in x-direction.
-			* indY (list): List of indices inside image in y-direction.
+			* indX (numpy.ndarray): Indices inside image in x-direction.
+			* indY (numpy.ndarray): Indices inside image in y-direction.
 
 	"""
 	
-	#Empty index vectors
-	indX=[]
-	indY=[]
-	
-	if debug:
-		indDebug=zeros((res,res))
-	
-	#Go through all pixels
-	for i in range(int(res)):
-		for j in range(int(res)):
-			
-			#Check if in circle
-			indX.append(i)
-			indY.append(j)
-			if debug:
-				indDebug[i,j]=1
-				
-	if debug:
-		
-		#Create figure
-		fig,axes = pyfrp_plt.make_subplot([1,1],titles=["slice"],sup="getAllIdxImg debugging output")
-		axes[0].contourf(indDebug)
-		
-	return indX,indY
+	return getIdxImgFromMask(np.ones((int(res),int(res)),dtype=bool),title="slice",debug=debug)
 
 def getPolyIdxImg(corners,res,debug=False):
 	
@@ -267,75 +240,122 @@ def getPolyIdxImg(corners,res,debug=False):
 	Returns:
 		tuple: Tuple containing:
 			
-			* indX (list): List of indices inside polygon in x-direction.
-			* indY (list): List of indices inside polygon in y-direction.
+			* indX (numpy.ndarray): Indices inside polygon in x-direction.
+			* indY (numpy.ndarray): Indices inside polygon in y-direction.
 
 	"""
 	
-	#Convert to np array if necessary
-	corners=np.asarray(corners)
+	x,y=getPxGrid(res)
+	x,y=np.broadcast_arrays(x,y)
+	
+	return getIdxImgFromMask(checkInsidePolyVec(x,y,corners),title="Polygon",debug=debug)
+		
+def getCellCenterArrays(mesh):
+	
+	"""Returns cell centers of mesh as numpy arrays.
+	
+	If ``mesh`` is a :py:class:`pyfrp.subclasses.pyfrp_mesh.mesh`, will use its cached cell center arrays,
+	see also :py:func:`pyfrp.subclasses.pyfrp_mesh.mesh.getCellCenterArrays`.
+	
+	Args:
+		mesh (pyfrp.subclasses.pyfrp_mesh.mesh): Mesh.
 	
-	#Define polygonial patch
-	poly = ptc.Polygon(corners,edgecolor='r',facecolor=(1,0,0,.2),)
+	Returns:
+		tuple: Tuple containing:
+			
+			* x (numpy.ndarray): x-coordinates of cells.
+			* y (numpy.ndarray): y-coordinates of cells.
+			* z (numpy.ndarray): z-coordinates of cells.
 	
-	#Create grid
-	x_int=np.arange(1,res+1,1)
-	y_int=np.arange(1,res+1,1)
-	g = np.meshgrid(x_int, y_int)
+	"""
 	
-	#Zip them into coordinate tuples
-	coords = list(zip(*(c.flat for c in g)))
+	if hasattr(mesh,'getCellCenterArrays'):
+		return mesh.getCellCenterArrays()
 	
-	#Check which point is inside
-	pts = np.vstack([p for p in coords if poly.contains_point(p, radius=0)])
+	x,y,z=mesh.getCellCenters()
+	return np.asarray(x),np.asarray(y),np.asarray(z)
 
-	indX,indY= pts[0,:],pts[1,:]
+def getSlabIdxMesh(mesh,zmin="-inf",zmax="inf"):
 	
-	return indX,indY
-		
-def getCircleIdxMesh(center,radius,mesh,zmin="-inf",zmax="inf",debug=False):
+	"""Returns all indices of mesh that lie between ``zmin`` and ``zmax``.
 	
-	"""Returns all indices of mesh that lie within given circle and between ``zmin`` and
-	``zmax``.
+	If ``mesh`` is a :py:class:`pyfrp.subclasses.pyfrp_mesh.mesh`, will use its z-sorted index, 
+	see also :py:func:`pyfrp.subclasses.pyfrp_mesh.mesh.getSlabIdx`. Otherwise falls back to 
+	:py:func:`getSliceIdxMesh`.
 	
 	Args:
-		center (numpy.ndarray): Center of circle.
-		radius (float): Radius of circle.
 		mesh (pyfrp.subclasses.pyfrp_mesh.mesh): Mesh.
 		
 	Keyword Args:
 		zmin (float): Minimal z-coordinate.
 		zmax (float): Maximal z-coordinate.
-		debug (bool): Print debugging messages.
 		
 	Returns:
-		list: List of mesh indices inside circle. 
-		
+		numpy.ndarray: Sorted array of mesh indices.
+	
 	"""
 	
 	#Checking that zmin/zmax are converted into numpy floats
 	zmin=pyfrp_misc.translateNPFloat(zmin)
 	zmax=pyfrp_misc.translateNPFloat(zmax)
 	
-	#Grabbing cellCenters of mesh
-	x,y,z=mesh.getCellCenters()
+	if hasattr(mesh,'getSlabIdx'):
+		return mesh.getSlabIdx(zmin,zmax)
 	
-	#Convert into complex numbers
-	c=np.array([np.complex(xc,yc) for xc,yc in zip(x,y)])
-	centerC=np.complex(center[0],center[1])
+	return getSliceIdxMesh(getCellCenterArrays(mesh)[2],zmin,zmax)
+	
+def getIdxMeshByMask(mesh,maskFct,zmin="-inf",zmax="inf"):
+	
+	"""Returns all indices of mesh for which ``maskFct`` is ``True`` and that lie 
+	between ``zmin`` and ``zmax``.
+	
+	First finds all cells inside the z-slab, using the z-sorted index of ``mesh`` if available 
+	(see :py:func:`pyfrp.subclasses.pyfrp_mesh.mesh.getSlabIdx`), then evaluates ``maskFct(x,y)``
+	only on the cell centers inside the slab.
+	
+	Args:
+		mesh (pyfrp.subclasses.pyfrp_mesh.mesh): Mesh.
+		maskFct (function): Function returning boolean mask for coordinate arrays ``x,y``.
+		
+	Keyword Args:
+		zmin (float): Minimal z-coordinate.
+		zmax (float): Maximal z-coordinate.
+		
+	Returns:
+		numpy.ndarray: Sorted array of mesh indices.
+	
+	"""
+	
+	x,y,z=getCellCenterArrays(mesh)
 	
-	#Get indices in Circle
-	indCircle=np.where(np.abs(c-centerC)<radius)[0]
-
 	#Get indices in Slice
-	indSlice=getSliceIdxMesh(z,zmin,zmax)
+	indSlice=getSlabIdxMesh(mesh,zmin=zmin,zmax=zmax)
 	
-
-	#Get matches indices
-	indFinal=pyfrp_misc.matchVals(indSlice,indCircle)
+	mask=np.asarray(maskFct(x[indSlice],y[indSlice]),dtype=bool)
 	
-	return indFinal
+	return indSlice[mask]
 
+def getCircleIdxMesh(center,radius,mesh,zmin="-inf",zmax="inf",debug=False):
+	
+	"""Returns all indices of mesh that lie within given circle and between ``zmin`` and
+	``zmax``.
+	
+	Args:
+		center (numpy.ndarray): Center of circle.
+		radius (float): Radius of circle.
+		mesh (pyfrp.subclasses.pyfrp_mesh.mesh): Mesh.
+		
+	Keyword Args:
+		zmin (float): Minimal z-coordinate.
+		zmax (float): Maximal z-coordinate.
+		debug (bool): Print debugging messages.
+		
+	Returns:
+		numpy.ndarray: Mesh indices inside circle. 
+		
+	"""
+	
+	return getIdxMeshByMask(mesh,lambda x,y: checkInsideCircle(x,y,center,radius),zmin=zmin,zmax=zmax)
 
 def getSliceIdxMesh(z,zmin,zmax,debug=False):
 	
@@ -377,27 +397,11 @@ def getRectangleIdxMesh(sidelengthX,sidelengthY,offset,mesh,zmin="-inf",zmax="in
 		debug (bool): Print debugging messages.
 		
 	Returns:
-		list: List of mesh indices inside rectangle. 
+		numpy.ndarray: Mesh indices inside rectangle. 
 		
 	"""
 	
-	#Checking that zmin/zmax are converted into numpy floats
-	zmin=pyfrp_misc.translateNPFloat(zmin)
-	zmax=pyfrp_misc.translateNPFloat(zmax)
-	
-	#Grabbing cellCenters of mesh
-	x,y,z=mesh.getCellCenters()
-	
-	#Getting indices
-	indSquare=np.where((offset[0]<x) & (x<offset[0]+sidelengthX) & (offset[1]<y) & (y<offset[1]+sidelengthY))[0]
-	
-	#Get indices in Slice
-	indSlice=getSliceIdxMesh(z,zmin,zmax)
-	
-	#Get matches indices
-	indFinal=pyfrp_misc.matchVals(indSlice,indSquare)
-	
-	return indFinal
+	return getIdxMeshByMask(mesh,lambda x,y: (offset[0]<x) & (x<offset[0]+sidelengthX) & (offset[1]<y) & (y<offset[1]+sidelengthY),zmin=zmin,zmax=zmax)
 
 def getSquareIdxMesh(sidelength,offset,mesh,zmin="-inf",zmax="inf",debug=False):
 	
@@ -417,27 +421,11 @@ def getSquareIdxMesh(sidelength,offset,mesh,zmin="-inf",zmax="inf",debug=False):
 		debug (bool): Print debugging messages.
 		
 	Returns:
-		list: List of mesh indices inside square. 
+		numpy.ndarray: Mesh indices inside square. 
 		
 	"""
 	
-	#Checking that zmin/zmax are converted into numpy floats
-	zmin=pyfrp_misc.translateNPFloat(zmin)
-	zmax=pyfrp_misc.translateNPFloat(zmax)
-	
-	#Grabbing cellCenters of mesh
-	x,y,z=mesh.getCellCenters()
-	
-	#Getting indices
-	indSquare=np.where((offset[0]<x) & (x<offset[0]+sidelength) & (offset[1]<y) & (y<offset[1]+sidelength))[0]
-	
-	#Get indices in Slice
-	indSlice=getSliceIdxMesh(z,zmin,zmax)
-	
-	#Get matches indices
-	indFinal=pyfrp_misc.matchVals(indSlice,indSquare)
-	
-	return indFinal
+	return getRectangleIdxMesh(sidelength,sidelength,offset,mesh,zmin=zmin,zmax=zmax,debug=debug)
 
 def getPolyIdxMesh(corners,mesh,zmin="-inf",zmax="inf",debug=False):
 	
@@ -454,32 +442,11 @@ def getPolyIdxMesh(corners,mesh,zmin="-inf",zmax="inf",debug=False):
 		debug (bool): Print debugging messages.
 		
 	Returns:
-		list: List of mesh indices inside polygon. 
+		numpy.ndarray: Mesh indices inside polygon. 
 		
 	"""
 	
-	#Checking that zmin/zmax are converted into numpy floats
-	zmin=pyfrp_misc.translateNPFloat(zmin)
-	zmax=pyfrp_misc.translateNPFloat(zmax)
-	
-	#Grabbing cellCenters of mesh
-	x,y,z=mesh.getCellCenters()
-	
-	#Bookkeeping list
-	indPoly=[]
-	
-	#Loop through coordinates and check if inside
-	for i in range(len(x)):
-		if checkInsidePoly(x[i],y[i],corners):
-			indPoly.append(i)
-	
-	#Get indices in Slice
-	indSlice=getSliceIdxMesh(z,zmin,zmax)
-	
-	#Get matches indices
-	indFinal=pyfrp_misc.matchVals(indSlice,indPoly)
-		
-	return indFinal	
+	return getIdxMeshByMask(mesh,lambda x,y: checkInsidePolyVec(x,y,corners),zmin=zmin,zmax=zmax)
 		
 def checkInsideCircle(x,y,center,radius):
 	
@@ -567,31 +534,53 @@ def checkInsideImg(x,y,res,offset=[0,0]):
 
 def checkInsidePolyVec(x,y,poly):	
 	
-	"""Checks if coordinate (x,y) is inside polyogn, checks first if vector or just value.
+	"""Checks if coordinates (x,y) are inside polygon.
+	
+	Vectorized version of :py:func:`checkInsidePoly`, using the same ray-casting 
+	rule, but looping over the edges of the polygon instead of the coordinates.
 	
 	.. note:: If ``x`` and ``y`` are ``float``, will return ``bool``, otherwise
-	   ``numpy.ndarray`` of booleans.
+	   ``numpy.ndarray`` of booleans of the same shape as ``x``.
 	      
 	Args:
-		poly (list): List of (x,y)-coordinates of corners.
 		x (numpy.ndarray): Array of x-coordinates.
 		y (numpy.ndarray): Array of y-coordinates.
+		poly (list): List of (x,y)-coordinates of corners.
 			
 	Returns:
-		bool: True if inside, otherwise False.
+		numpy.ndarray: True if inside, otherwise False.
 			
 	"""
 	
-	try:
-		len(x)
-	except TypeError:
-		return checkInsidePoly(x,y,poly)
+	x=np.asarray(x,dtype=float)
+	y=np.asarray(y,dtype=float)
+	
+	poly=np.asarray(poly,dtype=float)
+	n=len(poly)
+	
+	inside=np.zeros(x.shape,dtype=bool)
 	
-	vec=[]
-	for i in range(len(x)):
-		vec.append(checkInsidePoly(x[i],y[i],poly))
-	     
-	return vec
+	for i in range(n):
+		
+		p1x,p1y=poly[i]
+		p2x,p2y=poly[(i+1) % n]
+		
+		#Edges parallel to x-axis never toggle
+		if p1y==p2y:
+			continue
+		
+		crosses=(y>min(p1y,p2y)) & (y<=max(p1y,p2y)) & (x<=max(p1x,p2x))
+		
+		if p1x!=p2x:
+			xinters=(y-p1y)*(p2x-p1x)/(p2y-p1y)+p1x
+			crosses=crosses & (x<=xinters)
+		
+		inside=inside ^ crosses
+	
+	if inside.ndim==0:
+		return bool(inside)
+	
+	return inside
 
 def checkInsidePoly(x,y,poly):
 	
@@ -40,23 +40,34 @@ image manipulation and reading functions used by PyFRAP. Mainly focuses on:
 #Improting necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp_lazy_module import lazyImport
+
 #numpy
 import numpy as np
+import scipy.sparse as sparse
 
 #Plotting
-from matplotlib import cm
-import matplotlib.pyplot as plt
-import matplotlib.patches as ptc
+cm=lazyImport("matplotlib.cm")
+plt=lazyImport("matplotlib.pyplot")
+ptc=lazyImport("matplotlib.patches")
 
 #Misc
 import sys
 import time
 import os
 import platform
+import copy
+import collections
+
+#Threading/Multiprocessing
+import threading
+import Queue
+import multiprocessing
 
 #Bioformats
 #import javabridge
-import bioformats
+bioformats=lazyImport("bioformats")
 
 #PyFRAP modules
 import pyfrp_misc_module
@@ -65,28 +76,19 @@ import pyfrp_idx_module
 from pyfrp_term_module import *
 
 #Image processing
-import skimage
-import skimage.morphology
-import skimage.io
-#skimageVersion=skimage.__version__
-try:
-	if int(skimage.__version__.split('.')[1])<11:
-		import skimage.filter as skifilt
-	else:
-		import skimage.filters  as skifilt
-except:
-	import skimage.filters as skifilt
-try:	
-	import scipy.signal as spsig
-except:
-	printWarning("Cannot import scipy.signal. Will not be able to do spsig.gaussian")
+skimage=lazyImport("skimage")
+skifilt=lazyImport("skimage.filters","skimage.filter")
+spsig=lazyImport("scipy.signal")
+
+#Multi-page TIFF
+tifffile=lazyImport("tifffile","skimage.external.tifffile")
 
                     
 #===========================================================================================================================================================================
 #Module Functions
 #===========================================================================================================================================================================
 
-def analyzeDataset(analysis,signal=None,embCount=None,debug=False,debugAll=False,showProgress=True):
+def analyzeDataset(analysis,signal=None,embCount=None,debug=False,debugAll=False,showProgress=True,prefetch=4,workers=1,blockSize=16,ROIs=None):
 	
 	"""Main dataset analysis function doing the following steps.
 	
@@ -95,6 +97,20 @@ def analyzeDataset(analysis,signal=None,embCount=None,debug=False,debugAll=False
 	* Loops through images, processing images and computing mean concentraions per ROI.
 	* Showing final debugging plots if selected.
 	
+	Images are streamed via :py:func:`iterDatasetImgs`, which reads up to ``prefetch`` images ahead 
+	in a background thread, so reading and processing overlap. If ``workers>1``, images are 
+	processed in a pool of worker processes via :py:func:`analyzeImgWorker`, keeping the order of frames.
+	
+	Mean concentrations of all ROIs and the rim are read out via a sparse matrix computed once 
+	by :py:func:`computeReadoutMatrix`. If images are processed in the current process, the readout 
+	is done for blocks of ``blockSize`` images at once, see :py:func:`iterReadoutBlocks`.
+	
+	If a list of ``ROIs`` is given, only the data vectors of these ROIs are recomputed, for example if 
+	only they have changed. The rim concentration is still computed from all ROIs of the embryo, while
+	``ICimg`` and ``concRim`` are left untouched.
+	
+	.. note:: If ``debugAll`` is selected, images are always processed and read out one by one in the current process.
+	
 	Args:
 		analysis (pyfrp.subclasses.pyfrp_analysis):  Object containing all necessary information for analysis.
 		
@@ -104,11 +120,19 @@ def analyzeDataset(analysis,signal=None,embCount=None,debug=False,debugAll=False
 		debug (bool): Print final debugging messages and show debugging plots.
 		debugAll (bool): Print debugging messages and show debugging plots of each step.
 		showProgress (bool): Print out progress.
+		prefetch (int): Number of images read ahead. If ``0``, reads images synchronously.
+		workers (int): Number of worker processes processing images. If ``None``, uses the number of CPUs.
+		blockSize (int): Number of images read out at once.
+		ROIs (list): List of ROIs to analyze. If ``None``, analyzes all ROIs.
 		
 	Returns:
 		pyfrp.subclasses.pyfrp_analysis: Performed analysis.
 	"""
 	
+	allROIs=ROIs==None
+	if allROIs:
+		ROIs=analysis.embryo.ROIs
+	
 	if debug or signal==None:
 		print "~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~"
 		print "Starting analyzing dataset " + analysis.embryo.name
@@ -118,7 +142,7 @@ def analyzeDataset(analysis,signal=None,embCount=None,debug=False,debugAll=False
 		print "~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~"
 	
 	#Set back all timeseries vectors
-	for r in analysis.embryo.ROIs:
+	for r in ROIs:
 		r.resetDataVec()
 	
 	#Compute flattening mask if needed
@@ -143,41 +167,59 @@ def analyzeDataset(analysis,signal=None,embCount=None,debug=False,debugAll=False
 	#Loop through images and compute concentrations
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 	
-	for i in range(len(analysis.embryo.fileList)):
-		
-		#Compose filename
-		fnImg=str(analysis.embryo.getDataFolder()+'/'+analysis.embryo.getFileList()[i])
-			
-		#Reading in image
-		img=loadImg(fnImg,analysis.embryo.dataEnc)
-		
-		#Check if skimage reads in image as 2D array, if not grab channel of image with maximum range
-		if len(np.shape(img))>2:
-			img,ind_max=getMaxRangeChannel(img,debug=debugAll)
+	#Open dataset only once
+	stack,nImgs,shape=openDataset(analysis)
+	
+	if nImgs==0:
+		printWarning("Dataset of embryo " + analysis.embryo.name + " does not contain any images.")
+		return analysis
+	
+	#Frames of stacks come in their stored dtype and are only converted where needed
+	if stack is not None:
+		dataEnc=analysis.embryo.dataEnc
+	else:
+		dataEnc=None
+	
+	imgs=iterDatasetImgs(analysis,prefetch=prefetch,stack=stack,nImgs=nImgs)
+	
+	if debugAll:
+		results=(analyzeImg(img,analysis.process,flatteningMask,bkgdMask,preMask,analysis.dataOffset,analysis.embryo.ROIs,analysis.addRimImg,debug=debugAll,dataEnc=dataEnc) for img in imgs)
+		readROIs=analysis.embryo.ROIs
+	else:
 		
-		#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-		#Process image / Get image ready for readout
-		#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-
-		#Process Image
-		img = processImg(img,analysis.process,flatteningMask,bkgdMask,preMask,analysis.dataOffset,debug=debugAll)
+		#Readout matrix for ROIs and rim
+		readout=computeReadoutMatrix(ROIs,shape,rimROIs=analysis.embryo.ROIs)
+		readROIs=ROIs
 		
-		#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-		#Compute concentrations
-		#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+		if workers==1:
+			imgs=(prepareImg(img,analysis.process,flatteningMask,bkgdMask,preMask,analysis.dataOffset,dataEnc=dataEnc) for img in imgs)
+			if len(analysis.process.keys())>0:
+				results=iterReadoutBlocks(imgs,readout,ROIs,analysis.addRimImg,blockSize=blockSize)
+			else:
+				results=iterReadoutBlocks(imgs,readout,ROIs,analysis.addRimImg,blockSize=blockSize,dataEnc=dataEnc)
+		else:
+			state=(analysis.process,flatteningMask,bkgdMask,preMask,analysis.dataOffset,getStrippedROIs(ROIs),analysis.addRimImg,False,readout,dataEnc)
+			if workers==None:
+				workers=multiprocessing.cpu_count()
+			pool=multiprocessing.Pool(processes=workers,initializer=initImgWorker,initargs=(state,))
+			results=imapOrdered(pool,analyzeImgWorker,enumerate(imgs),max(prefetch,1)*workers)
+	
+	for i,(img,concRim,concs) in enumerate(results):
 		
-		#Get rim concentrations
-		concRim=getRimConc(analysis.embryo.ROIs,img,debug=debugAll)
-			
-		#Get concentrations in all ROIs
-		for r in analysis.embryo.ROIs:
-			r.dataVec.append(meanExtConc(r.imgIdxX,r.imgIdxY,img,concRim,r.numExt,analysis.addRimImg,debug=debugAll))
+		#Write concentrations of ROIs
+		for r,conc in zip(readROIs,concs):
+			if allROIs or r in ROIs:
+				r.dataVec.append(conc)
 		
 		#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 		#Save first image and its concRim for simulation
 		#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 		
-		if i==0:
+		if i==0 and allROIs:
+			
+			if dataEnc!=None and len(analysis.process.keys())==0:
+				img=convImg(img,dataEnc)
+			img=np.asarray(img,dtype='float')
 			
 			if analysis.embryo.simulation!=None:
 				if 'quad' in analysis.process.keys():
@@ -192,7 +234,7 @@ def analyzeDataset(analysis,signal=None,embCount=None,debug=False,debugAll=False
 		#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 		
 		if showProgress:
-			currPerc=int(100*i/float(len(analysis.embryo.fileList)))
+			currPerc=int(100*i/float(nImgs))
 			
 			if signal==None:
 				sys.stdout.write("\r%d%%" %currPerc)  
@@ -202,6 +244,7 @@ def analyzeDataset(analysis,signal=None,embCount=None,debug=False,debugAll=False
 					signal.emit(currPerc)
 				else:
 					signal.emit(currPerc,embCount)
+	
 	print
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 	#Final debugging plots
@@ -224,6 +267,449 @@ def analyzeDataset(analysis,signal=None,embCount=None,debug=False,debugAll=False
 	
 	return analysis
 
+def loadDatasetImg(analysis,i,stack=None):
+	
+	"""Loads i-th image of dataset of analysis.
+	
+	If ``stack`` is given, returns a view of the i-th frame of the stack in its stored dtype, without 
+	reading or converting the whole frame. :py:func:`analyzeDataset` then converts only the pixels read out via 
+	:py:func:`convImg` using ``embryo.dataEnc``, just like single image files are converted by :py:func:`loadImg`.
+	
+	Args:
+		analysis (pyfrp.subclasses.pyfrp_analysis): Analysis object.
+		i (int): Index of image.
+	
+	Keyword Args:
+		stack (numpy.ndarray): Memory mapped image stack, see :py:func:`loadImgStack`.
+	
+	Returns:
+		numpy.ndarray: Loaded image.
+	"""
+	
+	if stack is not None:
+		return stack[i]
+	
+	fnImg=str(analysis.embryo.getDataFolder()+'/'+analysis.embryo.getFileList()[i])
+	
+	return loadImg(fnImg,analysis.embryo.dataEnc)
+
+def iterDatasetImgs(analysis,prefetch=4,stack=None,nImgs=None):
+	
+	"""Generator yielding all images of the dataset of analysis in order.
+	
+	Images are loaded via :py:func:`loadDatasetImg` by a background thread, which stays 
+	at most ``prefetch`` images ahead of the consumer. Errors raised while reading
+	are raised again by the generator.
+	
+	Args:
+		analysis (pyfrp.subclasses.pyfrp_analysis): Analysis object.
+	
+	Keyword Args:
+		prefetch (int): Number of images read ahead. If ``0``, reads images synchronously.
+		stack (numpy.ndarray): Image stack already opened via :py:func:`openDataset`.
+		nImgs (int): Number of images of dataset.
+	
+	Returns:
+		generator: Generator of images.
+	"""
+	
+	if stack is None and analysis.embryo.usesDataStack():
+		stack=analysis.embryo.getDataStack()
+	if nImgs==None:
+		nImgs=analysis.embryo.getNDataImgs(stack=stack)
+	
+	if prefetch<1:
+		for i in range(nImgs):
+			yield loadDatasetImg(analysis,i,stack=stack)
+		return
+	
+	queue=Queue.Queue(maxsize=prefetch)
+	stop=threading.Event()
+	
+	def put(item):
+		while not stop.is_set():
+			try:
+				queue.put(item,timeout=0.1)
+				return True
+			except Queue.Full:
+				pass
+		return False
+	
+	def read():
+		try:
+			for i in range(nImgs):
+				if not put((loadDatasetImg(analysis,i,stack=stack),None)):
+					return
+		except Exception:
+			put((None,sys.exc_info()))
+			
+	thread=threading.Thread(target=read)
+	thread.daemon=True
+	thread.start()
+	
+	try:
+		for i in range(nImgs):
+			img,excInfo=queue.get()
+			if excInfo!=None:
+				raise excInfo[0],excInfo[1],excInfo[2]
+			yield img
+	finally:
+		stop.set()
+		thread.join()
+
+def prepareImg(img,process,flatteningMask,bkgdMask,preMask,dataOffset,debug=False,dataEnc=None):
+	
+	"""Gets a single image of a dataset ready for readout.
+	
+	Selects the channel with maximum range of multichannel images and processes the image
+	via :py:func:`processImg`.
+	
+	If no processing steps are selected, the image is returned in its stored dtype, such that 
+	only the pixels read out need to be converted, see :py:func:`readoutImgs`. Otherwise, the whole image
+	is converted to float first, using :py:func:`convImg` if ``dataEnc`` is given.
+	
+	Args:
+		img (numpy.ndarray): Input image.
+		process (dict): Dictionary defining what to do. See also pyfrp.subclasses.pyfrp_analysis .
+		flatteningMask (np.ndarray): Flattening mask.
+		bkgdMask (numpy.ndarray): Background mask.
+		preMask (numpy.ndarray): Preimage mask.
+		dataOffset (float): Offset used for norming.
+		
+	Keyword Args:
+		debug (bool): Print debugging messages and show debugging plots.
+		dataEnc (str): Encoding of image, for example ``uint16``.
+		
+	Returns:
+		numpy.ndarray: Processed image.
+	"""
+	
+	#Check if skimage reads in image as 2D array, if not grab channel of image with maximum range
+	if len(np.shape(img))>2:
+		img,ind_max=getMaxRangeChannel(img,debug=debug)
+	
+	#Only convert whole image if it needs to be processed, otherwise readoutImgs converts the pixels it reads
+	if len(process.keys())>0:
+		if dataEnc!=None:
+			img=convImg(img,dataEnc)
+		img=np.asarray(img,dtype='float')
+	
+	#Process Image
+	return processImg(img,process,flatteningMask,bkgdMask,preMask,dataOffset,debug=debug)
+
+def analyzeImg(img,process,flatteningMask,bkgdMask,preMask,dataOffset,ROIs,addRimImg,debug=False,readout=None,dataEnc=None):
+	
+	"""Processes a single image of a dataset and computes mean concentrations of all ROIs.
+	
+	If ``readout`` is given, concentrations are computed via :py:func:`readoutImgs`, otherwise
+	via :py:func:`getRimConc` and :py:func:`meanExtConc`.
+	
+	Args:
+		img (numpy.ndarray): Input image.
+		process (dict): Dictionary defining what to do. See also pyfrp.subclasses.pyfrp_analysis .
+		flatteningMask (np.ndarray): Flattening mask.
+		bkgdMask (numpy.ndarray): Background mask.
+		preMask (numpy.ndarray): Preimage mask.
+		dataOffset (float): Offset used for norming.
+		ROIs (list): List of pyfrp.subclasses.pyfrp_ROI objects.
+		addRimImg (bool): Add rim concentration.
+		
+	Keyword Args:
+		debug (bool): Print debugging messages and show debugging plots.
+		readout (tuple): Readout matrix returned by :py:func:`computeReadoutMatrix`.
+		dataEnc (str): Encoding of image, see :py:func:`prepareImg`.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* img (numpy.ndarray): Processed image.
+			* concRim (float): Rim concentration.
+			* concs (list): Mean concentration by ROI.
+	"""
+	
+	img=prepareImg(img,process,flatteningMask,bkgdMask,preMask,dataOffset,debug=debug,dataEnc=dataEnc)
+	
+	#Processed images have already been converted
+	if len(process.keys())>0:
+		dataEnc=None
+	
+	if readout!=None:
+		concRims,concs=readoutImgs([img],readout,ROIs,addRimImg,dataEnc=dataEnc)
+		return img,concRims[0],list(concs[0])
+	
+	if dataEnc!=None:
+		img=convImg(img,dataEnc)
+	
+	#Get rim concentrations
+	concRim=getRimConc(ROIs,img,debug=debug)
+	
+	#Get concentrations in all ROIs
+	concs=[]
+	for r in ROIs:
+		concs.append(meanExtConc(r.imgIdxX,r.imgIdxY,img,concRim,r.numExt,addRimImg,debug=debug))
+		
+	return img,concRim,concs
+
+def getDatasetImgShape(analysis,stack=None):
+	
+	"""Returns shape of the images of the dataset of analysis.
+	
+	Args:
+		analysis (pyfrp.subclasses.pyfrp_analysis): Analysis object.
+	
+	Keyword Args:
+		stack (numpy.ndarray): Image stack already opened via :py:func:`openDataset`.
+		
+	Returns:
+		tuple: Number of pixels along both image axes.
+	"""
+	
+	if stack is None and analysis.embryo.usesDataStack():
+		stack=analysis.embryo.getDataStack()
+	
+	if stack is not None:
+		return stack.shape[1:3]
+	return np.shape(loadDatasetImg(analysis,0))[:2]
+
+def openDataset(analysis):
+	
+	"""Opens dataset of analysis once, such that it can be passed on to :py:func:`iterDatasetImgs` 
+	and :py:func:`getDatasetImgShape`.
+	
+	Args:
+		analysis (pyfrp.subclasses.pyfrp_analysis): Analysis object.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* stack (numpy.ndarray): Memory mapped image stack or ``None`` if dataset consists of single image files.
+			* nImgs (int): Number of images.
+			* shape (tuple): Number of pixels along both image axes.
+	"""
+	
+	if analysis.embryo.usesDataStack():
+		stack=analysis.embryo.getDataStack()
+	else:
+		stack=None
+	
+	nImgs=analysis.embryo.getNDataImgs(stack=stack)
+	
+	if nImgs==0:
+		return stack,nImgs,None
+	
+	return stack,nImgs,getDatasetImgShape(analysis,stack=stack)
+
+def computeReadoutMatrix(ROIs,shape,rimROIs=None):
+	
+	"""Computes sparse matrix reading out pixel sums of all ROIs and the rim from an image.
+	
+	Pixel indices of all ROIs are translated into flat indices once. Only pixels used by
+	any ROI are kept, given by ``pxIdx``. Row ``i`` of the matrix then sums up the pixels of 
+	the i-th ROI, including repeated indices, while the last row sums up all pixels 
+	of ROIs with ``useForRim`` flag on, excluding repeated ones, just as :py:func:`getRimConc` does.
+	
+	Args:
+		ROIs (list): List of pyfrp.subclasses.pyfrp_ROI objects.
+		shape (tuple): Image shape.
+		
+	Keyword Args:
+		rimROIs (list): List of pyfrp.subclasses.pyfrp_ROI objects used for the rim. If ``None``, uses ``ROIs``.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* pxIdx (numpy.ndarray): Flat indices of pixels used.
+			* R (scipy.sparse.csr_matrix): Readout matrix of shape ``(len(ROIs)+1,len(pxIdx))``.
+	"""
+	
+	if rimROIs==None:
+		rimROIs=ROIs
+	
+	flatIdxs=[]
+	for r in ROIs:
+		flatIdxs.append(np.asarray(r.imgIdxX,dtype=int)*shape[1]+np.asarray(r.imgIdxY,dtype=int))
+	
+	#Rim pixels, removing doubles
+	rimIdxs=[np.asarray(r.imgIdxX,dtype=int)*shape[1]+np.asarray(r.imgIdxY,dtype=int) for r in rimROIs if r.useForRim]
+	flatIdxs.append(np.unique(np.concatenate(rimIdxs+[np.zeros(0,dtype=int)])))
+	
+	rows=np.concatenate([i*np.ones(len(idx),dtype=int) for i,idx in enumerate(flatIdxs)])
+	pxIdx,cols=np.unique(np.concatenate(flatIdxs),return_inverse=True)
+	
+	R=sparse.coo_matrix((np.ones(len(rows)),(rows,cols)),shape=(len(flatIdxs),len(pxIdx))).tocsr()
+	
+	return pxIdx,R
+
+def readoutImgs(imgs,readout,ROIs,addRimImg,dataEnc=None):
+	
+	"""Computes rim concentrations and mean concentrations of all ROIs for a block of images.
+	
+	Gathers the pixels used by the readout matrix into a (images x pixels) block
+	and computes all pixel sums with a single matrix product. Concentrations
+	are then computed as in :py:func:`getRimConc` and :py:func:`meanExtConc`.
+	
+	If ``dataEnc`` is given, images are expected in their stored dtype and only the gathered pixels are
+	converted via :py:func:`convImg`.
+	
+	Args:
+		imgs (list): List of images.
+		readout (tuple): Readout matrix returned by :py:func:`computeReadoutMatrix`.
+		ROIs (list): List of pyfrp.subclasses.pyfrp_ROI objects.
+		addRimImg (bool): Add rim concentration.
+	
+	Keyword Args:
+		dataEnc (str): Encoding of images, for example ``uint16``.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* concRims (numpy.ndarray): Rim concentration by image.
+			* concs (numpy.ndarray): Mean concentrations of shape ``(len(imgs),len(ROIs))``.
+	"""
+	
+	pxIdx,R=readout
+	
+	block=np.empty((len(imgs),len(pxIdx)))
+	for i,img in enumerate(imgs):
+		px=np.asarray(img).reshape(-1)[pxIdx]
+		if dataEnc!=None:
+			px=convImg(px,dataEnc)
+		block[i]=px
+	
+	sums=R.dot(block.T)
+	
+	concRims=sums[-1]/R.getrow(R.shape[0]-1).sum()
+	
+	concs=np.empty((len(imgs),len(ROIs)))
+	for i,r in enumerate(ROIs):
+		if addRimImg:
+			concs[:,i]=(sums[i]+r.numExt*concRims)/float(len(r.imgIdxX)+r.numExt)
+		else:
+			concs[:,i]=sums[i]/float(len(r.imgIdxX))
+			
+	return concRims,concs
+
+def iterReadoutBlocks(imgs,readout,ROIs,addRimImg,blockSize=16,dataEnc=None):
+	
+	"""Generator reading out images in blocks via :py:func:`readoutImgs`.
+	
+	Args:
+		imgs (iterable): Processed images.
+		readout (tuple): Readout matrix returned by :py:func:`computeReadoutMatrix`.
+		ROIs (list): List of pyfrp.subclasses.pyfrp_ROI objects.
+		addRimImg (bool): Add rim concentration.
+		
+	Keyword Args:
+		blockSize (int): Number of images read out at once.
+		dataEnc (str): Encoding of images, see :py:func:`readoutImgs`.
+		
+	Returns:
+		generator: Generator of tuples containing image, rim concentration and list of mean concentrations by ROI.
+	"""
+	
+	block=[]
+	for img in imgs:
+		block.append(img)
+		
+		if len(block)==blockSize:
+			concRims,concs=readoutImgs(block,readout,ROIs,addRimImg,dataEnc=dataEnc)
+			for i in range(len(block)):
+				yield block[i],concRims[i],list(concs[i])
+			block=[]
+	
+	if len(block)>0:
+		concRims,concs=readoutImgs(block,readout,ROIs,addRimImg,dataEnc=dataEnc)
+		for i in range(len(block)):
+			yield block[i],concRims[i],list(concs[i])
+
+def getStrippedROIs(ROIs):
+	
+	"""Returns copies of ROIs that are detached from their embryo, so they can 
+	be sent to worker processes.
+	
+	Args:
+		ROIs (list): List of pyfrp.subclasses.pyfrp_ROI objects.
+		
+	Returns:
+		list: List of stripped ROI copies.
+	"""
+	
+	stripped=[]
+	for r in ROIs:
+		rStripped=copy.copy(r)
+		rStripped.embryo=None
+		stripped.append(rStripped)
+	return stripped
+
+def initImgWorker(state):
+	
+	"""Initializes worker process used by :py:func:`analyzeDataset`.
+	
+	Stores everything needed by :py:func:`analyzeImgWorker` once per worker,
+	so it does not have to be sent with every image.
+	
+	Args:
+		state (tuple): Arguments of :py:func:`analyzeImg` following ``img``.
+	"""
+	
+	global imgWorkerState
+	imgWorkerState=state
+
+def analyzeImgWorker(args):
+	
+	"""Worker function analyzing a single image via :py:func:`analyzeImg`.
+	
+	Only returns the processed image for the first frame, since it is only needed 
+	for the initial conditions of the simulation.
+	
+	Args:
+		args (tuple): Tuple containing index and image.
+		
+	Returns:
+		tuple: Same as :py:func:`analyzeImg`.
+	"""
+	
+	i,img=args
+	img,concRim,concs=analyzeImg(img,*imgWorkerState)
+	
+	if i>0:
+		img=None
+	
+	return img,concRim,concs
+
+def imapOrdered(pool,fct,iterable,window):
+	
+	"""Maps function over iterable in pool, yielding results in order.
+	
+	In contrast to ``multiprocessing.Pool.imap``, only consumes as many items
+	from ``iterable`` as there are at most ``window`` pending tasks.
+	
+	.. note:: Terminates ``pool`` once all results are yielded or the generator is closed.
+	
+	Args:
+		pool (multiprocessing.Pool): Worker pool.
+		fct (function): Function to map.
+		iterable (iterable): Input items.
+		window (int): Maximum number of pending tasks.
+		
+	Returns:
+		generator: Generator of results.
+	"""
+	
+	pending=collections.deque()
+	
+	try:
+		for item in iterable:
+			pending.append(pool.apply_async(fct,(item,)))
+			if len(pending)>=window:
+				yield pending.popleft().get()
+		
+		while len(pending)>0:
+			yield pending.popleft().get()
+	finally:
+		pool.terminate()
+		pool.join()
+
 def convSkio2NP(img):
 	
 	"""Returns mean concentration over given indices. 
@@ -361,10 +847,10 @@ def meanConc(idxX,idxY,vals,debug=False):
 	if debug:
 		print "======= mean_conc debugging output ======="
 		print "len(idxX)", len(idxX)
-		print "vals.min(), vals.max(), mean(vals)",vals.min(), vals.max(), mean(vals)
-		print "vals[idxX,idxY].min(), vals[idxX,idxY].max(), mean(vals[idxX,idxY]) ",vals[idxX,idxY].min(), vals[idxX,idxY].max(), mean(vals[idxX,idxY])
+		print "vals.min(), vals.max(), np.mean(vals)",vals.min(), vals.max(), np.mean(vals)
+		print "vals[idxX,idxY].min(), vals[idxX,idxY].max(), np.mean(vals[idxX,idxY]) ",vals[idxX,idxY].min(), vals[idxX,idxY].max(), np.mean(vals[idxX,idxY])
 		
-	return np.mean(vals[idxX,idxY])
+	return np.mean(vals[idxX,idxY],dtype='float')
 
 def meanExtConc(idxX,idxY,img,concRim,numExt,addRimImg,debug=False):
 	
@@ -386,7 +872,7 @@ def meanExtConc(idxX,idxY,img,concRim,numExt,addRimImg,debug=False):
 	"""
 	
 	#Adding up concentrations of all selected indices (can't use mean conc since addRimImg could be True)
-	concSum=img[idxX,idxY].sum()
+	concSum=img[idxX,idxY].sum(dtype='float')
 	concNum=len(idxX)
 	
 	#Check if I want to add rim
@@ -687,7 +1173,26 @@ def loadImg(fn,enc,dtype='float'):
 	"""
 	
 	#Load image
-	img = skimage.io.imread(fn).astype(enc)
+	img = skimage.io.imread(fn)
+	
+	return convImg(img,enc,dtype=dtype)
+
+def convImg(img,enc,dtype='float'):
+	
+	"""Converts image to encoding enc and returns it with given dtype.
+
+	Args:
+		img (numpy.ndarray): Image.
+		enc (str): Image encoding, e.g. 'uint16'.
+			
+	Keyword Args:
+		dtype (str): Datatype of pixels of returned image.
+	
+	Returns:
+		numpy.ndarray: Converted image.
+	"""
+	
+	img=img.astype(enc)
 	
 	#Getting img values
 	img=img.real
@@ -695,6 +1200,45 @@ def loadImg(fn,enc,dtype='float'):
 	
 	return img
 
+def loadImgStack(fn):
+	
+	"""Opens image stack as memory map.
+	
+	Supports ``.npy`` files and multi-page TIFFs, with one frame per entry along the first axis. 
+	Frames can then be sliced without reading the whole stack into memory.
+	
+	.. note:: Compressed or non-contiguous TIFFs cannot be mapped directly. ``tifffile`` then 
+	   copies them into a temporary memory mapped file, or, if not supported by the installed
+	   ``tifffile`` version, they are read wholesale.
+	
+	Args:
+		fn (str): Path to stack.
+	
+	Returns:
+		numpy.ndarray: Image stack of shape ``(nFrames,resY,resX)``.
+	"""
+	
+	if os.path.splitext(fn)[1].lower()=='.npy':
+		stack=np.load(fn,mmap_mode='r')
+	else:
+		try:
+			stack=tifffile.memmap(fn,mode='r')
+		except (AttributeError,ValueError):
+			tif=tifffile.TiffFile(fn)
+			try:
+				stack=tif.asarray(memmap=True)
+			except TypeError:
+				printWarning("Cannot memory map "+fn+". Will read it into memory.")
+				stack=tif.asarray()
+			finally:
+				tif.close()
+	
+	#Single frame stack
+	if stack.ndim==2:
+		stack=stack[None]
+	
+	return stack
+
 def saveImg(img,fn,enc="uint16",scale=True,maxVal=None):
 	
 	"""Saves image as tif file.
@@ -1009,20 +1553,15 @@ def processImg(img,processDic,flatteningMask,bkgdMask,preMask,dataOffset=1.,axes
 	
 	if debug or axes!=None:
 		
-		#Build title
-		
-		###NOTE: need to change stuff here
-		
-		var=['quad_red','flip_before_process','norm_by_pre','gaussian']
-		dic=pyfrp_misc_module.vars2dict(var,dict(locals()))
-		title=pyfrp_misc_module.dict2string(dic,newline=True)
+		#Build title from processing options
+		title=pyfrp_misc_module.dict2string(processDic,newline=True)
 		
 		if axes==None:
 			
 			#Create figure
 			fig,axes = pyfrp_plot_module.makeSubplot([2,1],titles=title,sup="processImg debugging output")
 		
-		show_img_and_hist(img,axes=axes[0:2],title=[title,''])
+		showImgAndHist(img,axes=axes[0:2],title=[title,''])
 		
 	return img
 
@@ -34,8 +34,10 @@
 #Importing necessary modules
 #===========================================================================================================================================================================
 
-
+#Numpy/Scipy
+import numpy as np
 from numpy import linalg as LA
+import scipy.sparse as sparse
 
 #===========================================================================================================================================================================
 #Module Functions
@@ -63,6 +65,69 @@ def getAvgConc(val,cvs,ind):
 	else:
 		return 0.
 
+def computeAvgConcMatrix(cvs,inds):
+	
+	"""Builds sparse matrix that integrates simulation result over multiple sets of indices at once.
+	
+	Row ``i`` of the matrix contains the cell volumes of all cells in ``inds[i]``, normalized by their sum. 
+	Thus, ``A.dot(val)`` returns the same values as calling :py:func:`getAvgConc` for each index set separately.
+	Empty index sets result in an empty row and thus in a concentration of ``0.``.
+	
+	Args:
+		cvs (numpy.ndarray): Array containing cell volumes.
+		inds (list): List of index lists.
+	
+	Returns:
+		scipy.sparse.csr_matrix: Averaging matrix of shape ``(len(inds),len(cvs))``.
+	
+	"""
+	
+	cvs=np.asarray(cvs,dtype=float)
+	
+	rows=[]
+	cols=[]
+	weights=[]
+	
+	for i,ind in enumerate(inds):
+		
+		ind=np.asarray(ind,dtype=int)
+		if len(ind)==0:
+			continue
+		
+		w=cvs[ind]
+		
+		rows.append(i*np.ones(len(ind),dtype=int))
+		cols.append(ind)
+		weights.append(w/w.sum())
+	
+	if len(rows)==0:
+		return sparse.csr_matrix((len(inds),len(cvs)))
+	
+	#Note: Duplicate indices are summed up, which is consistent with getAvgConc
+	A=sparse.coo_matrix((np.concatenate(weights),(np.concatenate(rows),np.concatenate(cols))),shape=(len(inds),len(cvs)))
+	
+	return A.tocsr()
+
+def getAvgConcs(val,A):
+	
+	"""Integrates simulation result over all index sets of averaging matrix ``A``.
+	
+	See also :py:func:`computeAvgConcMatrix`.
+	
+	Args:
+		val (fipy.CellVariable): PDE solution variable.
+		A (scipy.sparse.csr_matrix): Averaging matrix.
+	
+	Returns:
+		numpy.ndarray: Integration results.
+	
+	"""
+	
+	if hasattr(val,'value'):
+		val=val.value
+	
+	return A.dot(np.asarray(val))
+
 def calcTetSidelengths(point0,point1,point2,point3):
 
 	"""Calculates sidelengths of tetrahedron given by 4 points.
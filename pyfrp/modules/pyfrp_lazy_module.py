@@ -0,0 +1,153 @@
+#=====================================================================================================================================
+#Copyright
+#=====================================================================================================================================
+
+#Copyright (C) 2014 Alexander Blaessle, Patrick Mueller and the Friedrich Miescher Laboratory of the Max Planck Society
+#This software is distributed under the terms of the GNU General Public License.
+
+#This file is part of PyFRAP.
+
+#PyFRAP is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+#===========================================================================================================================================================================
+#Module Description
+#===========================================================================================================================================================================
+
+"""Lazy import module for PyFRAP toolbox. 
+
+Provides module proxies that only import heavy or optional dependencies, such as FiPy, matplotlib, 
+VTK or PyQt, once they are used for the first time. This keeps importing PyFRAP fast and makes it 
+possible to use its compute modules on machines without a display or GUI libraries installed.
+
+Example:
+
+>>> plt=lazyImport("matplotlib.pyplot")
+>>> plt.figure()
+
+only imports ``matplotlib.pyplot`` when ``plt.figure`` is accessed.
+
+"""
+
+#===========================================================================================================================================================================
+#Improting necessary modules
+#===========================================================================================================================================================================
+
+import importlib
+
+#===========================================================================================================================================================================
+#Module Functions
+#===========================================================================================================================================================================
+
+def lazyImport(name,*fallbacks):
+	
+	"""Returns proxy of module that is imported on first attribute access.
+	
+	See also :py:class:`lazyModule`.
+	
+	Args:
+		name (str): Name of module.
+		fallbacks (str): Names of modules to try if ``name`` cannot be imported.
+	
+	Returns:
+		pyfrp.modules.pyfrp_lazy_module.lazyModule: Module proxy.
+	
+	"""
+	
+	return lazyModule(name,fallbacks=fallbacks)
+
+def isLoaded(module):
+	
+	"""Checks if module proxy has already imported its module.
+	
+	Args:
+		module (pyfrp.modules.pyfrp_lazy_module.lazyModule): Module proxy.
+		
+	Returns:
+		bool: True if imported.
+		
+	"""
+	
+	return module.__dict__['_module'] is not None
+
+#===========================================================================================================================================================================
+#Classes
+#===========================================================================================================================================================================
+
+class lazyModule(object):
+	
+	"""Proxy of a module that is only imported once one of its attributes is accessed.
+	
+	If ``name`` cannot be imported, the modules in ``fallbacks`` are tried in order, and the
+	``ImportError`` of the last one is raised if none can be imported. Attributes not found 
+	in the module are imported as submodules, so that for example ``lazyImport("skimage").morphology`` 
+	works without importing ``skimage.morphology`` explicitly.
+	
+	Args:
+		name (str): Name of module.
+		
+	Keyword Args:
+		fallbacks (list): Names of modules to try if ``name`` cannot be imported.
+	
+	"""
+	
+	def __init__(self,name,fallbacks=[]):
+		
+		self.__dict__['_name']=name
+		self.__dict__['_fallbacks']=list(fallbacks)
+		self.__dict__['_module']=None
+		
+	def __getattr__(self,attr):
+		
+		module=self.load()
+		
+		try:
+			return getattr(module,attr)
+		except AttributeError:
+			if attr.startswith('__'):
+				raise
+			try:
+				return importlib.import_module(module.__name__+"."+attr)
+			except ImportError:
+				raise AttributeError("'module' object "+module.__name__+" has no attribute '"+attr+"'")
+	
+	def __setattr__(self,attr,val):
+		
+		setattr(self.load(),attr,val)
+		
+	def __repr__(self):
+		
+		if self._module is None:
+			return "<lazy module '"+self._name+"' (not imported)>"
+		return repr(self._module)
+	
+	def load(self):
+		
+		"""Imports module if not done yet.
+		
+		Returns:
+			module: Imported module.
+		
+		"""
+		
+		if self._module is None:
+			names=[self._name]+self._fallbacks
+			for i,name in enumerate(names):
+				try:
+					self.__dict__['_module']=importlib.import_module(name)
+					break
+				except ImportError:
+					if i==len(names)-1:
+						raise
+		
+		return self._module
@@ -58,6 +58,7 @@ import inspect
 import platform
 import shutil
 import glob
+import hashlib
 from tempfile import mkstemp
 
 #===========================================================================================================================================================================
@@ -695,6 +696,10 @@ def updateObj(objBlank,obj,debug=False):
 	#Going through all attributes blank object
 	for item in vars(objBlank):
 		
+		#Attributes not loaded yet from a container file are present, no need to load them
+		if item in (vars(obj).get('lazyAttrs') or {}):
+			continue
+		
 		if not hasattr(obj,str(item)):
 			setattr(obj, str(item), vars(objBlank)[str(item)])
 			
@@ -718,7 +723,37 @@ def remRepeatsList(l):
 	"""
 	
 	return list(set(l))
-	 		
+
+def uniqueRowsInOrder(arr):
+	
+	"""Finds unique rows of 2D array in order of their first appearance.
+	
+	Similar to ``numpy.unique(arr,axis=0)``, but keeps order of appearance
+	instead of sorting.
+	
+	Args:
+		arr (numpy.ndarray): 2D array.
+	
+	Returns:
+		tuple: Tuple containing:
+			
+			* idxFirst (numpy.ndarray): Index of first appearance of each unique row.
+			* inverse (numpy.ndarray): Index of unique row for each row of ``arr``.
+	
+	"""
+	
+	arr=np.ascontiguousarray(arr)
+	rows=arr.view(np.dtype((np.void,arr.dtype.itemsize*arr.shape[1]))).ravel()
+	
+	rowsUnique,idxFirst,inverse=np.unique(rows,return_index=True,return_inverse=True)
+	
+	#Relabel unique rows by first appearance
+	order=np.argsort(idxFirst,kind='mergesort')
+	rank=np.empty(len(order),dtype=int)
+	rank[order]=np.arange(len(order))
+	
+	return idxFirst[order],rank[inverse]
+
 def unzipLists(l):
 	
 	"""Unzips two zipped lists into seperate lists.
@@ -1802,4 +1837,179 @@ def listToDtype(row,dtype):
 	rowNew=[]
 	for r in row:
 		rowNew.append(dtype(r))
-	return rowNew		
\ No newline at end of file
+	return rowNew
+
+def searchPowerLaw(func,target,x0,exponent,y0=None,tol=0.1,maxIter=10,maxStep=4.,debug=False):
+	
+	r"""Searches for ``x`` such that :math:`y_{\mathrm{target}} \leq f(x) \leq (1+\mathrm{tol})y_{\mathrm{target}}`.
+	
+	Assumes that ``func`` is monotonic and approximately follows a power law
+	
+	.. math:: f(x) \approx c x^{\alpha},
+	
+	and thus performs a secant search in log-log space. The first step uses ``exponent`` as 
+	:math:`\alpha`, later steps use the slope between the last two evaluations. Once the solution
+	is bracketed, predictions outside of the bracket are replaced by bisection steps. Search also 
+	stops if the bracket becomes too narrow to change ``func`` by ``tol``.
+	
+	``func`` may return ``None`` if ``x`` is not admissible, for example because a mesh 
+	got too large. Such ``x`` are treated as if they overshot the target.
+	
+	.. note:: Steps are limited to a factor of ``maxStep`` in ``x``.
+	
+	Args:
+		func (function): Function to evaluate.
+		target (float): Target value.
+		x0 (float): Initial guess.
+		exponent (float): Estimated exponent of power law.
+		
+	Keyword Args:
+		y0 (float): Value of ``func(x0)``, if already known.
+		tol (float): Relative tolerance above ``target``.
+		maxIter (int): Maximum number of function evaluations.
+		maxStep (float): Maximum factor ``x`` is changed per step.
+		debug (bool): Print debugging messages.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* x (float): Best ``x`` found.
+			* y (float): Value of ``func(x)``.
+		
+	"""
+	
+	sign=np.sign(exponent)
+	
+	#Bracket in log space, uLow does not reach target, uHigh does or is not admissible
+	uLow=None
+	uHigh=None
+	
+	#Best admissible evaluations so far
+	best=None
+	closest=None
+	
+	u=np.log(x0)
+	y=y0
+	uPrev=None
+	vPrev=None
+	i=0
+	
+	while True:
+		
+		#Evaluate
+		if y==None:
+			if i>=maxIter:
+				break
+			y=func(np.exp(u))
+			i=i+1
+			
+			if debug:
+				print "Iteration ", i, ": x = ", np.exp(u), " y = ", y, " target = ", target
+				
+		#Update bracket
+		if y==None:
+			uHigh=u
+		elif y>=target:
+			uHigh=u
+			if best==None or y<best[1]:
+				best=(np.exp(u),y)
+			if y<=(1+tol)*target:
+				break
+		else:
+			uLow=u
+			if closest==None or y>closest[1]:
+				closest=(np.exp(u),y)
+		
+		#Stop if bracket is narrower than what changes y by tol
+		if uLow!=None and uHigh!=None and abs(uHigh-uLow)<np.log(1+tol)/abs(exponent):
+			break
+		
+		#Predict next step
+		if y==None or y<=0:
+			du=sign*np.log(2)*(1 if y!=None else -1)
+		else:
+			v=np.log(y)
+			du=(np.log((1+tol/2.)*target)-v)/exponent
+			if vPrev!=None and u!=uPrev:
+				slope=(v-vPrev)/(u-uPrev)
+				if np.sign(slope)==sign and np.isfinite(slope):
+					du=(np.log((1+tol/2.)*target)-v)/slope
+				elif v==vPrev:
+					#y did not change, take larger step
+					du=2*(u-uPrev)
+			uPrev,vPrev=u,v
+		
+		du=np.clip(du,-np.log(maxStep),np.log(maxStep))
+		uNew=u+du
+		
+		#Stay inside bracket
+		if uLow!=None and uHigh!=None and not min(uLow,uHigh)<uNew<max(uLow,uHigh):
+			uNew=(uLow+uHigh)/2.
+			
+		u=uNew
+		y=None
+		
+	if best!=None:
+		return best
+	if closest!=None:
+		return closest
+	return x0,y0
+
+def getFingerprint(*objs):
+	
+	"""Returns fingerprint of objects.
+	
+	The fingerprint is the MD5 hash of the content of the objects, built up by :py:func:`updateFingerprint`,
+	and only changes if the content of any of the objects changes. This is used to check if results
+	computed from the objects are still up to date.
+	
+	Args:
+		objs (list): Objects.
+		
+	Returns:
+		str: Fingerprint.
+	
+	"""
+	
+	h=hashlib.md5()
+	updateFingerprint(h,objs)
+	return h.hexdigest()
+
+def updateFingerprint(h,obj):
+	
+	"""Updates hash object with content of ``obj``.
+	
+	Numpy arrays are hashed by their datatype, shape and data. Lists, tuples and dictionaries
+	are hashed recursively, dictionaries ordered by their keys. Objects having a ``getFingerprint``
+	method are represented by their fingerprint. Everything else is hashed by its type and ``repr``.
+	
+	Args:
+		h (hashlib.md5): Hash object.
+		obj (object): Object.
+		
+	Returns:
+		hashlib.md5: Updated hash object.
+	
+	"""
+	
+	if isinstance(obj,np.ndarray):
+		h.update("array"+repr((obj.dtype.str,obj.shape)))
+		if obj.dtype==object:
+			updateFingerprint(h,list(obj.flat))
+		else:
+			h.update(np.ascontiguousarray(obj).tostring())
+	elif isinstance(obj,(list,tuple)):
+		h.update(type(obj).__name__+repr(len(obj)))
+		for item in obj:
+			updateFingerprint(h,item)
+	elif isinstance(obj,dict):
+		h.update("dict"+repr(len(obj)))
+		for key in sorted(obj.keys()):
+			updateFingerprint(h,key)
+			updateFingerprint(h,obj[key])
+	elif hasattr(obj,'getFingerprint'):
+		h.update(type(obj).__name__+obj.getFingerprint())
+	else:
+		h.update(type(obj).__name__+repr(obj))
+		
+	return h
@@ -31,6 +31,9 @@
 #Importing necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp_lazy_module import lazyImport
+
 #Numpy/Scipy
 import numpy as np
 
@@ -47,7 +50,7 @@ import pyfrp_geometry_module
 import pyfrp_IO_module
 
 #Matplotlib
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+art3d=lazyImport("mpl_toolkits.mplot3d.art3d")
 
 #OS
 import os
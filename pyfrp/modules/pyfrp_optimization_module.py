@@ -47,7 +47,7 @@ from pyfrp_term_module import *
 #Module Functions
 #===========================================================================================================================================================================
 
-def constrObjFunc(x,fit,debug,ax,returnFit):
+def constrObjFunc(x,fit,debug,ax,returnFit,arrays=None):
 	
 	"""Objective function when using Constrained Nelder-Mead.
 	
@@ -62,6 +62,9 @@ def constrObjFunc(x,fit,debug,ax,returnFit):
 		ax (matplotlib.axes): Axes to display plots in.
 		returnFit (bool): Return fit instead of SSD.
 	
+	Keyword Args:
+		arrays (tuple): Precomputed arrays returned by :py:func:`pyfrp.modules.pyfrp_fit_module.getFitArrays`.
+	
 	Returns:
 		 float: SSD of fit. Except ``returnFit==True``, then will return fit itself. 
 	"""
@@ -71,7 +74,7 @@ def constrObjFunc(x,fit,debug,ax,returnFit):
 	
 	x=xTransform(x,LBs,UBs)
 
-	ssd=pyfrp_fit_module.FRAPObjFunc(x,fit,debug,ax,returnFit)
+	ssd=pyfrp_fit_module.FRAPObjFunc(x,fit,debug,ax,returnFit,arrays=arrays)
 	
 	return ssd
 
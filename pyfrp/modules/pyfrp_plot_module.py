@@ -34,15 +34,18 @@ Contains functions and classes that are often used by PyFRAP toolbox and simplif
 #Importing necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp_lazy_module import lazyImport
+
 #numpy
 import numpy as np
 import scipy.interpolate
 
 #Plotting
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib import cm
-import matplotlib.pyplot as plt
-import matplotlib.patches as ptc
+mplot3d=lazyImport("mpl_toolkits.mplot3d")
+cm=lazyImport("matplotlib.cm")
+plt=lazyImport("matplotlib.pyplot")
+ptc=lazyImport("matplotlib.patches")
 
 #Misc
 import sys
@@ -468,6 +471,10 @@ def makeSubplot(size,titles=None,tight=False,sup=None,proj=None,fig=None,show=Tr
 	if proj==None:
 		proj=n_ax*[None]
 	
+	#3D projection is only registered once mplot3d is imported
+	if '3d' in proj:
+		mplot3d.load()
+	
 	#Creating figure
 	if fig==None:
 		fig=plt.figure()
@@ -36,20 +36,28 @@
 #Improting necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp_lazy_module import lazyImport
+
 #PDE Toolbox
-from fipy import *
+fipy=lazyImport("fipy")
 
 #Numpy/Scipy
 import numpy as np
 import scipy.interpolate as interp 
-import scipy.ndimage.interpolation as ndi
+ndi=lazyImport("scipy.ndimage.interpolation")
+import scipy.sparse as sparse
+import scipy.sparse.linalg as spla
 
 #matplotlib
-import matplotlib.pyplot as plt
+plt=lazyImport("matplotlib.pyplot")
 
 #Misc
 import time
 import sys
+import os
+import shutil
+import hashlib
 
 #PyFRAP Modules
 import pyfrp_plot_module 
@@ -57,12 +65,14 @@ import pyfrp_integration_module
 import pyfrp_misc_module
 from pyfrp_term_module import *
 import pyfrp_idx_module
+import pyfrp_fit_module
+import pyfrp_IO_module
 
 #===========================================================================================================================================================================
 #Module Functions
 #===========================================================================================================================================================================
 
-def simulateReactDiff(simulation,signal=None,embCount=None,showProgress=True,debug=False):
+def simulateReactDiff(simulation,signal=None,embCount=None,showProgress=True,debug=False,resume=False):
 	
 	r"""Simulates reaction diffusion equation goverining FRAP experiment.
 	
@@ -80,6 +90,27 @@ def simulateReactDiff(simulation,signal=None,embCount=None,showProgress=True,deb
 		* Applies initial conditions defined in ``simulation.ICmode``.
 		* Simulates FRAP experimment.
 	
+	.. note:: If ``simulation.solver`` is ``cachedLU`` or ``cachedPCG``, the discretized operator is only
+	   assembled once and the LU factorization (``cachedLU``) or the diagonal (Jacobi) preconditioner (``cachedPCG``) 
+	   of the system matrix is cached for each distinct timestep, see :py:func:`getDiffusionMatrix` and :py:func:`getCachedStepSolver`.
+	
+	.. note:: If ``simulation.solver=expm``, the semi-discrete equation is not stepped implicitly, but
+	   solved at the timepoints in ``tvecSim`` via :py:func:`expmSolutionIter`. Only works if ``tvecSim`` is
+	   strictly increasing.
+	
+	.. note:: If ``simulation.checkpointInterval>0``, the solution, the current timepoint index and the 
+	   ``simVecs`` of all ROIs are written to ``simulation.getCheckpointFn()`` every ``checkpointInterval`` steps,
+	   see :py:func:`saveCheckpoint`. If ``resume=True``, the simulation continues from this checkpoint if it 
+	   matches the simulation settings, see :py:func:`loadCheckpoint`. Once the simulation is finished, the 
+	   checkpoint is removed if it was written during this run or the run resumed from it. If ``saveSim`` is on but no store is set via 
+	   :py:func:`pyfrp.subclasses.pyfrp_simulation.simulation.setValsStore`, solutions are written to a temporary 
+	   store next to the checkpoint while simulating, so checkpoints only need to record its length.
+	
+	.. note:: If ``simulation.saveSim`` is on and a path is set via 
+	   :py:func:`pyfrp.subclasses.pyfrp_simulation.simulation.setValsStore`, the solution history is written 
+	   incrementally to a chunked, compressed :py:class:`pyfrp.modules.pyfrp_IO_module.solutionStore` instead 
+	   of being kept in memory, see :py:func:`getValsStorage`.
+	
 	Args: 
 		simulation (pyfrp.subclasses.pyfrp_simulation.simulation): Simulation object.
 	
@@ -88,6 +119,7 @@ def simulateReactDiff(simulation,signal=None,embCount=None,showProgress=True,deb
 		embCount (int): Counter of counter process if multiple datasets are analyzed. 
 		debug (bool): Print final debugging messages and show debugging plots.
 		showProgress (bool): Show simulation progress. 
+		resume (bool): Resume from last checkpoint.
 		
 	Returns: 
 		pyfrp.subclasses.pyfrp_simulation.simulation: Updated simulation object.
@@ -101,9 +133,6 @@ def simulateReactDiff(simulation,signal=None,embCount=None,showProgress=True,deb
 	for r in simulation.embryo.ROIs:
 		r.resetSimVec()
 	
-	#Empty list to put simulation values in
-	vals=[]
-	
 	print "~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~"
 	print "Starting simulation"
 	print "~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~"
@@ -136,7 +165,7 @@ def simulateReactDiff(simulation,signal=None,embCount=None,showProgress=True,deb
 	
 	#Create solution variable
 	
-	phi = CellVariable(name = "solution variable",mesh = simulation.mesh.mesh,value = 0.) 
+	phi = fipy.CellVariable(name = "solution variable",mesh = simulation.mesh.mesh,value = 0.) 
 	
 
 	#Apply initial conditions
@@ -159,7 +188,7 @@ def simulateReactDiff(simulation,signal=None,embCount=None,showProgress=True,deb
 	simulation.IC=np.asarray(phi.value).copy()
 	
 	#Defining Type of equation
-	eq = TransientTerm() == DiffusionTerm(coeff=simulation.D)+simulation.prod-simulation.degr*phi
+	eq = fipy.TransientTerm() == fipy.DiffusionTerm(coeff=simulation.D)+simulation.prod-simulation.degr*phi
 
 	#Defining BCs
 	#Note: BCs are Neumann boundaries by default 
@@ -168,11 +197,47 @@ def simulateReactDiff(simulation,signal=None,embCount=None,showProgress=True,deb
 	#Calculating initial concentrations 
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 	
-	for r in simulation.embryo.ROIs:
-		r.getSimConc(phi,append=True)
+	#Averaging matrix for all ROIs, so we only need a single mat-vec per step
+	avgMatrix=simulation.getROIAvgMatrix()
 	
-	if simulation.saveSim:
-		vals.append(np.asarray(phi.value).copy())
+	#Load checkpoint if we resume
+	startStep=0
+	checkpointInterval=simulation.getCheckpointInterval()
+	fnCheckpoint=simulation.getCheckpointFn()
+	
+	checkpoint=None
+	if resume:
+		checkpoint=loadCheckpoint(simulation,fnCheckpoint,debug=debug)
+	
+	#List or on-disk store to put simulation values in. When checkpointing, values always go to a store,
+	#so checkpoints do not need to rewrite the whole history
+	fnValsTemp=None
+	if checkpointInterval>0 and simulation.saveSim and not simulation.getValsStoreFn():
+		fnValsTemp=fnCheckpoint+".vals"
+	
+	vals=getValsStorage(simulation,np.asarray(phi.value).size,clear=checkpoint==None,fn=fnValsTemp)
+	
+	#Only remove checkpoints that this run wrote or resumed from
+	ownsCheckpoint=checkpoint!=None
+	
+	if checkpoint==None:
+		appendSimConcs(simulation,phi,avgMatrix)
+		
+		if simulation.saveSim:
+			vals.append(np.asarray(phi.value).copy())
+	else:
+		startStep=checkpoint['step']
+		phi.setValue(checkpoint['c'])
+		for r,simVec in zip(simulation.embryo.ROIs,checkpoint['simVecs']):
+			r.simVec=list(simVec)
+		if simulation.saveSim:
+			if 'nVals' in checkpoint:
+				vals.truncate(int(checkpoint['nVals']))
+			else:
+				vals.truncate(0)
+				for val in checkpoint['vals']:
+					vals.append(val)
+		print "Resuming simulation from timepoint", startStep, "of", simulation.stepsSim
 	
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 	#Solving PDE
@@ -185,26 +250,38 @@ def simulateReactDiff(simulation,signal=None,embCount=None,showProgress=True,deb
 	stepTime=0
 	
 	#Choose solver
+	cached=simulation.solver in ["cachedLU","cachedPCG"]
 	if simulation.solver=="LU":
-		mySolver = LinearLUSolver(iterations=simulation.iterations, tolerance=simulation.tolerance)
+		mySolver = fipy.LinearLUSolver(iterations=simulation.iterations, tolerance=simulation.tolerance)
 	elif simulation.solver=="PCG":
-		mySolver = LinearPCGSolver(tolerance=simulation.tolerance,iterations=simulation.iterations)
-
-	for step in range(simulation.stepsSim-1):
+		mySolver = fipy.LinearPCGSolver(tolerance=simulation.tolerance,iterations=simulation.iterations)
+	elif cached:
+		diffMatrix=getDiffusionMatrix(simulation.mesh.mesh,simulation.D)
+		cellVolumes=np.asarray(simulation.mesh.mesh.cellVolumes)
+		stepSolvers={}
+	elif simulation.solver=="expm":
+		solution=expmSolutionIter(getDiffusionMatrix(simulation.mesh.mesh,simulation.D),np.asarray(simulation.mesh.mesh.cellVolumes),
+			np.asarray(phi.value).copy(),simulation.tvecSim[startStep:],prod=simulation.prod,degr=simulation.degr)
+	
+	for step in range(startStep,simulation.stepsSim-1):
 		
 		#Compute timestep duration 
 		timeStepDuration=simulation.tvecSim[step+1]-simulation.tvecSim[step]
 		
 		#Solve PDE in this Step
 		stepStart=time.clock()
-		eq.solve(var=phi,dt=timeStepDuration,solver=mySolver)
+		if cached:
+			phi.setValue(solveCachedStep(stepSolvers,diffMatrix,cellVolumes,np.asarray(phi.value),timeStepDuration,simulation))
+		elif simulation.solver=="expm":
+			phi.setValue(solution.next())
+		else:
+			eq.solve(var=phi,dt=timeStepDuration,solver=mySolver)
 		stepTime=stepTime+(time.clock()-stepStart)
 				
 		#Compute concentration
 		avgStart=time.clock()
 		
-		for r in simulation.embryo.ROIs:
-			r.getSimConc(phi,append=True)
+		appendSimConcs(simulation,phi,avgMatrix)
 		
 		avgTime=avgTime+(time.clock()-avgStart)
 		
@@ -212,6 +289,11 @@ def simulateReactDiff(simulation,signal=None,embCount=None,showProgress=True,deb
 		if simulation.saveSim:
 			vals.append(np.asarray(phi.value).copy())
 		
+		#Write checkpoint
+		if checkpointInterval>0 and (step+1)%checkpointInterval==0 and step<simulation.stepsSim-2:
+			saveCheckpoint(simulation,fnCheckpoint,step+1,np.asarray(phi.value),vals=vals,debug=debug)
+			ownsCheckpoint=True
+		
 		#Print Progress
 		if showProgress:
 			currPerc=int(100*step/float(simulation.stepsSim))
@@ -232,11 +314,288 @@ def simulateReactDiff(simulation,signal=None,embCount=None,showProgress=True,deb
 	
 	#Save to simulation object only
 	if simulation.saveSim:
-		simulation.vals=list(vals)
+		if isinstance(vals,pyfrp_IO_module.solutionStore) and fnValsTemp==None:
+			vals.flush()
+			simulation.vals=vals
+		else:
+			simulation.vals=list(vals)
+	
+	#Checkpoint not needed anymore, but leave checkpoints of other runs alone
+	if ownsCheckpoint and os.path.isfile(fnCheckpoint):
+		os.remove(fnCheckpoint)
+	if fnValsTemp!=None and not os.path.isfile(fnCheckpoint):
+		shutil.rmtree(fnValsTemp,ignore_errors=True)
 	
 	return simulation
 
-def rerunReactDiff(simulation,signal=None,embCount=None,showProgress=True,debug=False):
+def getDiffusionMatrix(mesh,D):
+	
+	r"""Assembles discretized diffusion operator of mesh as sparse matrix.
+	
+	For each interior face :math:`f` between cells :math:`i` and :math:`j`, the matrix
+	has entries :math:`K_{ii}=K_{jj}=-K_{ij}=-K_{ji}=D A_f/d_{ij}`, where :math:`A_f` is the face area
+	and :math:`d_{ij}` the distance between the cell centers. Exterior faces do not contribute, 
+	resulting in Neumann boundary conditions.
+	
+	The matrix is the same as the one assembled by FiPy for ``-DiffusionTerm(coeff=D)``, 
+	thus the system matrix of an implicit timestep of length ``dt`` is given by 
+	:math:`K+\mathrm{diag}(V/dt)`, with :math:`V` being the cell volumes.
+	
+	Args:
+		mesh (fipy.GmshImporter3D): FiPy mesh.
+		D (float): Diffusion coefficient.
+		
+	Returns:
+		scipy.sparse.csr_matrix: Diffusion matrix.
+	
+	"""
+	
+	faceCellIDs=np.ma.filled(mesh.faceCellIDs,-1)
+	inner=faceCellIDs[1]>=0
+	
+	i=faceCellIDs[0][inner]
+	j=faceCellIDs[1][inner]
+	c=D*np.asarray(mesh._faceAreas)[inner]/np.asarray(mesh._cellDistances)[inner]
+	
+	rows=np.concatenate([i,j,i,j])
+	cols=np.concatenate([i,j,j,i])
+	vals=np.concatenate([c,c,-c,-c])
+	
+	return sparse.coo_matrix((vals,(rows,cols)),shape=(mesh.numberOfCells,mesh.numberOfCells)).tocsr()
+
+def getCachedStepSolver(diffMatrix,cellVolumes,dt,solver="cachedLU",tolerance=1E-10,iterations=1000):
+	
+	r"""Returns function solving the linear system of an implicit timestep of length ``dt``.
+	
+	The system matrix is given by :math:`K+\mathrm{diag}(V/dt)`, see also :py:func:`getDiffusionMatrix`.
+	
+	If ``solver=cachedLU``, the matrix is factorized once using ``scipy.sparse.linalg.splu``, so each
+	step only needs forward/back substitution. If ``solver=cachedPCG``, the system is solved by 
+	``scipy.sparse.linalg.cg`` with a diagonal preconditioner, starting from the previous solution.
+	
+	.. note:: The LU factorization of large 3D meshes can require a lot of memory and is slow to 
+	   solve with, in this case ``cachedPCG`` should be used.
+	
+	Args:
+		diffMatrix (scipy.sparse.csr_matrix): Diffusion matrix.
+		cellVolumes (numpy.ndarray): Cell volumes.
+		dt (float): Timestep.
+		
+	Keyword Args:
+		solver (str): Solver (``cachedLU``/``cachedPCG``).
+		tolerance (float): Tolerance of PCG solver.
+		iterations (int): Maximum number of iterations of PCG solver.
+	
+	Returns:
+		function: Function taking right-hand side and initial guess, returning solution.
+	
+	"""
+	
+	A=(diffMatrix+sparse.diags(cellVolumes/dt)).tocsc()
+	
+	if solver=="cachedLU":
+		lu=spla.splu(A)
+		return lambda b,x0: lu.solve(b)
+	
+	elif solver=="cachedPCG":
+		diagInv=1./A.diagonal()
+		M=spla.LinearOperator(A.shape,lambda x: diagInv*x)
+		return lambda b,x0: spla.cg(A,b,x0=x0,tol=tolerance,maxiter=iterations,M=M)[0]
+	
+	printError("Unknown solver " + str(solver) + ".")
+	return None
+
+def solveCachedStep(stepSolvers,diffMatrix,cellVolumes,c,dt,simulation):
+	
+	"""Performs implicit timestep using cached step solvers.
+	
+	The right-hand side is assembled the same way as FiPy does for the equation 
+	``TransientTerm() == DiffusionTerm(coeff=D)+prod-degr*phi``, i.e. production and 
+	degradation are treated explicitly. 
+	
+	Step solvers are taken from ``stepSolvers``, a dictionary with timesteps as keys. Timesteps
+	that agree to 10 significant digits share a solver. If there is no solver for ``dt`` yet, it is created
+	via :py:func:`getCachedStepSolver`.
+	
+	Args:
+		stepSolvers (dict): Dictionary of step solvers.
+		diffMatrix (scipy.sparse.csr_matrix): Diffusion matrix.
+		cellVolumes (numpy.ndarray): Cell volumes.
+		c (numpy.ndarray): Concentrations at beginning of step.
+		dt (float): Timestep.
+		simulation (pyfrp.subclasses.pyfrp_simulation.simulation): Simulation object.
+		
+	Returns:
+		numpy.ndarray: Concentrations at end of step.
+	
+	"""
+	
+	key='%.10g'%dt
+	if key not in stepSolvers:
+		stepSolvers[key]=getCachedStepSolver(diffMatrix,cellVolumes,dt,solver=simulation.solver,tolerance=simulation.tolerance,iterations=simulation.iterations)
+		
+	b=cellVolumes*(c/dt+simulation.prod-simulation.degr*c)
+	
+	return stepSolvers[key](b,c)
+
+def expmSolutionIter(diffMatrix,cellVolumes,c0,tvec,prod=0.,degr=0.,tol=1E-8,maxIter=150,gamma=None,debug=False):
+	
+	r"""Iterates over solution of semi-discrete reaction-diffusion equation at timepoints ``tvec[1:]``.
+	
+	The semi-discrete equation 
+	
+	.. math:: V \frac{dc}{dt} = -K c + V(k_2 - k_1 c),
+	
+	with :math:`K` being the diffusion matrix (see :py:func:`getDiffusionMatrix`) and :math:`V` the cell volumes,
+	is solved by computing the pure diffusion solution :math:`\exp(-tV^{-1}K)c_0` and adding production and 
+	degradation analytically via :py:func:`pyfrp.modules.pyfrp_fit_module.addKineticsToSolution`. 
+	This is exact, since constant concentrations are not affected by diffusion.
+	
+	The matrix exponential is approximated in a single shift-and-invert Krylov space, see :py:func:`getSIKrylovBasis`,
+	which is valid for all timepoints at once. Thus arbitrary time vectors, for example log-spaced ones, 
+	cost the same number of linear solves.
+	
+	.. note:: If ``gamma=None``, uses :math:`\gamma=\sqrt{t_1 t_{\mathrm{end}}}/10`, where :math:`t_1` is the first 
+	   timepoint after ``tvec[0]``.
+	
+	Args:
+		diffMatrix (scipy.sparse.csr_matrix): Diffusion matrix.
+		cellVolumes (numpy.ndarray): Cell volumes.
+		c0 (numpy.ndarray): Initial concentrations at ``tvec[0]``.
+		tvec (numpy.ndarray): Time vector.
+		
+	Keyword Args:
+		prod (float): Production rate.
+		degr (float): Degradation rate.
+		tol (float): Relative tolerance of approximation.
+		maxIter (int): Maximum dimension of Krylov space.
+		gamma (float): Shift parameter.
+		debug (bool): Print debugging messages.
+		
+	Returns:
+		generator: Generator yielding concentrations.
+	
+	"""
+	
+	t=np.asarray(tvec[1:])-tvec[0]
+	
+	if gamma==None:
+		gamma=np.sqrt(t[0]*t[-1])/10.
+	
+	basis,coeffs=getSIKrylovBasis(diffMatrix,cellVolumes,c0,t,gamma,tol=tol,maxIter=maxIter,debug=debug)
+	
+	for i in range(len(t)):
+		yield pyfrp_fit_module.addKineticsToSolution(basis.dot(coeffs[:,i]),t[i],prod,degr)
+
+def getSIKrylovCoeffs(alphas,betas,t,gamma):
+	
+	r"""Returns coefficients of shift-and-invert Krylov approximation of :math:`\exp(-tS)y_0` for all ``t``.
+	
+	See also :py:func:`getSIKrylovBasis`.
+	
+	Args:
+		alphas (list): Diagonal of Lanczos tridiagonal matrix.
+		betas (list): Offdiagonal of Lanczos tridiagonal matrix.
+		t (numpy.ndarray): Timepoints.
+		gamma (float): Shift parameter.
+		
+	Returns:
+		numpy.ndarray: Coefficients, one column per timepoint.
+	
+	"""
+	
+	T=np.diag(alphas)+np.diag(betas[:len(alphas)-1],1)+np.diag(betas[:len(alphas)-1],-1)
+	mu,U=np.linalg.eigh(T)
+	
+	#Eigenvalues of S projected into Krylov space
+	lam=(1./np.maximum(mu,1E-300)-1.)/gamma
+	
+	return U.dot(U[0,:,None]*np.exp(-np.outer(np.maximum(lam,0),t)))
+
+def getSIKrylovBasis(diffMatrix,cellVolumes,c0,t,gamma,tol=1E-8,maxIter=150,debug=False):
+	
+	r"""Computes shift-and-invert Krylov approximation of pure diffusion solution.
+	
+	With :math:`y=V^{1/2}c`, the semi-discrete diffusion equation becomes :math:`dy/dt=-Sy` with the symmetric 
+	matrix :math:`S=V^{-1/2}KV^{-1/2}`. Performs Lanczos iterations on :math:`(I+\gamma S)^{-1}` starting from 
+	:math:`y_0`, which needs a single sparse LU factorization of :math:`V+\gamma K`. The Lanczos tridiagonal 
+	matrix :math:`T_m` then gives :math:`\exp(-tS)y_0 \approx \|y_0\| Q_m \exp(-t(T_m^{-1}-I)/\gamma)e_1`,
+	which converges quickly even for stiff problems, see van den Eshof and Hochbruck, SIAM J. Sci. Comput. 27 (2006).
+	
+	Iterations stop once the coefficients of all timepoints change less than ``tol`` relative to :math:`\|y_0\|`.
+	
+	Args:
+		diffMatrix (scipy.sparse.csr_matrix): Diffusion matrix.
+		cellVolumes (numpy.ndarray): Cell volumes.
+		c0 (numpy.ndarray): Initial concentrations.
+		t (numpy.ndarray): Timepoints.
+		gamma (float): Shift parameter.
+		
+	Keyword Args:
+		tol (float): Relative tolerance.
+		maxIter (int): Maximum dimension of Krylov space.
+		debug (bool): Print debugging messages.
+		
+	Returns:
+		tuple: Tuple containing:
+		
+			* basis (numpy.ndarray): Basis of Krylov space, transformed back into concentrations.
+			* coeffs (numpy.ndarray): Coefficients, one column per timepoint.
+		
+	"""
+	
+	sqrtV=np.sqrt(cellVolumes)
+	lu=spla.splu((sparse.diags(cellVolumes)+gamma*diffMatrix).tocsc())
+	
+	y0=sqrtV*np.asarray(c0,dtype=float)
+	beta0=np.linalg.norm(y0)
+	
+	if beta0==0:
+		return np.zeros((len(y0),1)),np.zeros((1,len(t)))
+	
+	Q=[y0/beta0]
+	alphas=[]
+	betas=[]
+	coeffs=None
+	
+	for j in range(maxIter):
+		
+		#Apply (I+gamma*S)^-1
+		w=sqrtV*lu.solve(sqrtV*Q[j])
+		alphas.append(np.dot(Q[j],w))
+		
+		#Full reorthogonalization
+		for k in range(2):
+			for q in Q:
+				w=w-np.dot(q,w)*q
+		betas.append(np.linalg.norm(w))
+		
+		#Check convergence
+		converged=betas[-1]<=1E-12
+		if converged or (j+1)%5==0 or j+1==maxIter:
+			coeffsNew=getSIKrylovCoeffs(alphas,betas,t,gamma)
+			if coeffs is not None:
+				diff=coeffsNew.copy()
+				diff[:coeffs.shape[0]]=diff[:coeffs.shape[0]]-coeffs
+				err=np.sqrt((diff**2).sum(axis=0)).max()
+				converged=converged or err<=tol
+				
+				if debug:
+					print "Krylov dimension ", j+1, " change ", err
+					
+			coeffs=coeffsNew
+			
+		if converged:
+			break
+		
+		Q.append(w/betas[-1])
+	
+	if not converged:
+		printWarning("Krylov approximation did not converge within " + str(maxIter) + " iterations.")
+	
+	return np.array(Q[:len(alphas)]).T*(beta0/sqrtV[:,None]),coeffs
+
+def rerunReactDiff(simulation,signal=None,embCount=None,showProgress=True,debug=False,ROIs=None):
 	
 	"""Reruns simulation by extracting values from ``simulation.vals``.
 	
@@ -245,7 +604,10 @@ def rerunReactDiff(simulation,signal=None,embCount=None,showProgress=True,debug=
 		* Resets ``simVecs`` of all ROIs.
 		* Extracts values per ROI from ``simulation.vals``.
 	
-	.. note:: Only works if simulation has been run before with ``saveSim`` enabled.
+	If a list of ``ROIs`` is given, only their ``simVecs`` are recomputed, for example if only they have changed.
+	
+	.. note:: Only works if simulation has been run before with ``saveSim`` enabled. If values were 
+	   written to a :py:class:`pyfrp.modules.pyfrp_IO_module.solutionStore`, they are read chunk by chunk.
 	
 	Args: 
 		simulation (pyfrp.subclasses.pyfrp_simulation.simulation): Simulation object.
@@ -255,6 +617,7 @@ def rerunReactDiff(simulation,signal=None,embCount=None,showProgress=True,debug=
 		embCount (int): Counter of counter process if multiple datasets are analyzed. 
 		debug (bool): Print final debugging messages and show debugging plots.
 		showProgress (bool): Show simulation progress. 
+		ROIs (list): List of ROIs to recompute. If ``None``, recomputes all ROIs.
 		
 	Returns: 
 		pyfrp.subclasses.pyfrp_simulation.simulation: Updated simulation object.
@@ -266,13 +629,18 @@ def rerunReactDiff(simulation,signal=None,embCount=None,showProgress=True,debug=
 		return simulation
 	
 	#Reset simulation vecs
-	for r in simulation.embryo.ROIs:
+	for r in simulation.embryo.ROIs if ROIs==None else ROIs:
 		r.resetSimVec()
 	
+	#Averaging matrix for ROIs
+	if ROIs==None:
+		avgMatrix=simulation.getROIAvgMatrix()
+	else:
+		avgMatrix=pyfrp_integration_module.computeAvgConcMatrix(simulation.mesh.mesh.getCellVolumes(),[r.meshIdx for r in ROIs])
+	
 	#Loop through vals
 	for i,val in enumerate(simulation.vals):
-		for r in simulation.embryo.ROIs:
-			r.getSimConc(val,append=True)
+		appendSimConcs(simulation,val,avgMatrix,ROIs=ROIs)
 		
 		#Print Progress
 		if showProgress:
@@ -290,6 +658,192 @@ def rerunReactDiff(simulation,signal=None,embCount=None,showProgress=True,debug=
 	return simulation	
 	
 
+def appendSimConcs(simulation,phi,avgMatrix,ROIs=None):
+	
+	"""Computes simulated concentrations of all ROIs and appends them to their ``simVec``.
+	
+	Does the same as calling :py:func:`pyfrp.subclasses.pyfrp_ROI.ROI.getSimConc` for each ROI,
+	but only needs a single sparse matrix-vector product. 
+	See also :py:func:`pyfrp.subclasses.pyfrp_simulation.simulation.getROIAvgMatrix`.
+	
+	Args: 
+		simulation (pyfrp.subclasses.pyfrp_simulation.simulation): Simulation object.
+		phi (fipy.CellVariable): PDE solution variable.
+		avgMatrix (scipy.sparse.csr_matrix): Averaging matrix.
+		
+	Keyword Args:
+		ROIs (list): List of ROIs the rows of ``avgMatrix`` belong to. If ``None``, uses all ROIs.
+		
+	Returns:
+		numpy.ndarray: Concentrations of all ROIs.
+	
+	"""
+	
+	if ROIs==None:
+		ROIs=simulation.embryo.ROIs
+	
+	concs=pyfrp_integration_module.getAvgConcs(phi,avgMatrix)
+	
+	for r,c in zip(ROIs,concs):
+		r.simVec.append(c)
+	
+	return concs
+
+def getValsStorage(simulation,nCells,clear=True,fn=None):
+	
+	"""Returns storage that simulation values are appended to if ``simulation.saveSim`` is on.
+	
+	If ``fn`` or ``simulation.getValsStoreFn()`` is set, returns a :py:class:`pyfrp.modules.pyfrp_IO_module.solutionStore`
+	writing values to disk in compressed chunks of ``simulation.valsChunkSize`` timepoints, 
+	otherwise an empty list.
+	
+	Args: 
+		simulation (pyfrp.subclasses.pyfrp_simulation.simulation): Simulation object.
+		nCells (int): Number of values per timepoint.
+		
+	Keyword Args:
+		clear (bool): Remove values already in store.
+		fn (str): Path of store, overrides ``simulation.getValsStoreFn()``.
+		
+	Returns:
+		list: Storage.
+	
+	"""
+	
+	if fn==None:
+		fn=simulation.getValsStoreFn()
+	
+	if simulation.saveSim and fn:
+		return pyfrp_IO_module.solutionStore(fn,nCells,chunkSize=simulation.valsChunkSize,
+			dtype=simulation.valsDtype,clear=clear)
+	
+	return []
+
+def getCheckpointKey(simulation):
+	
+	"""Returns key describing the state a simulation checkpoint is only valid for.
+	
+	Key consists of the checksums of ``simulation.IC`` and ``simulation.tvecSim``, 
+	the parameters of the simulation, its solver, where values are saved and the ROI averaging key, 
+	see :py:func:`pyfrp.subclasses.pyfrp_simulation.simulation.getROIAvgMatrixKey`.
+	
+	Args: 
+		simulation (pyfrp.subclasses.pyfrp_simulation.simulation): Simulation object.
+		
+	Returns:
+		str: Key.
+	
+	"""
+	
+	IC=np.ascontiguousarray(simulation.IC,dtype=np.float64)
+	tvec=np.ascontiguousarray(simulation.tvecSim,dtype=np.float64)
+	
+	key=(hashlib.md5(IC.tostring()).hexdigest(),hashlib.md5(tvec.tostring()).hexdigest(),
+		repr(float(simulation.D)),repr(float(simulation.prod)),repr(float(simulation.degr)),
+		simulation.solver,bool(simulation.saveSim),simulation.getValsStoreFn(),simulation.getROIAvgMatrixKey())
+	
+	return repr(key)
+
+def saveCheckpoint(simulation,fn,step,c,vals=None,debug=False):
+	
+	"""Writes checkpoint of a running simulation to a binary ``.npz`` file.
+	
+	Stores the solution ``c`` at timepoint ``simulation.tvecSim[step]``, ``step``, the 
+	partially filled ``simVec`` of all ROIs and the checkpoint key (see :py:func:`getCheckpointKey`).
+	If ``simulation.saveSim`` is on, also stores ``vals``. If ``vals`` is a 
+	:py:class:`pyfrp.modules.pyfrp_IO_module.solutionStore`, it is flushed and only its length is stored.
+	
+	The file is first written to a temporary file and then renamed, so that an interrupted 
+	write never corrupts the last valid checkpoint.
+	
+	Args: 
+		simulation (pyfrp.subclasses.pyfrp_simulation.simulation): Simulation object.
+		fn (str): Path to checkpoint file.
+		step (int): Index of current timepoint in ``simulation.tvecSim``.
+		c (numpy.ndarray): Current solution.
+		
+	Keyword Args:
+		vals (list): Saved solutions.
+		debug (bool): Print debugging messages.
+		
+	Returns:
+		str: Path to checkpoint file.
+	
+	"""
+	
+	data={}
+	data['key']=np.array(getCheckpointKey(simulation))
+	data['step']=np.array(step)
+	data['c']=np.asarray(c,dtype=np.float64)
+	data['simVecs']=np.array([r.simVec for r in simulation.embryo.ROIs],dtype=np.float64)
+	
+	if simulation.saveSim and isinstance(vals,pyfrp_IO_module.solutionStore):
+		vals.flush()
+		data['nVals']=np.array(len(vals))
+	elif simulation.saveSim and vals!=None:
+		data['vals']=np.asarray(vals,dtype=np.float64)
+	
+	fnTemp=fn+".tmp"
+	with open(fnTemp,'wb') as f:
+		np.savez(f,**data)
+	
+	try:
+		os.rename(fnTemp,fn)
+	except OSError:
+		#Windows does not allow overwriting with rename
+		os.remove(fn)
+		os.rename(fnTemp,fn)
+	
+	if debug:
+		print "Saved checkpoint at timepoint", step, "to", fn
+	
+	return fn
+
+def loadCheckpoint(simulation,fn,debug=False):
+	
+	"""Loads checkpoint of simulation written by :py:func:`saveCheckpoint`.
+	
+	Returns ``None`` if the file does not exist, cannot be read or was written for a 
+	different simulation setup, that is if its key does not match :py:func:`getCheckpointKey`.
+	
+	Returned dictionary has keys ``step``, ``c``, ``simVecs`` and, if ``simulation.saveSim`` is on,
+	``vals`` or ``nVals`` if values were written to a :py:class:`pyfrp.modules.pyfrp_IO_module.solutionStore`.
+	
+	Args: 
+		simulation (pyfrp.subclasses.pyfrp_simulation.simulation): Simulation object.
+		fn (str): Path to checkpoint file.
+		
+	Keyword Args:
+		debug (bool): Print debugging messages.
+		
+	Returns:
+		dict: Checkpoint.
+	
+	"""
+	
+	if not os.path.isfile(fn):
+		if debug:
+			printNote("No checkpoint found at "+fn+".")
+		return None
+	
+	try:
+		data=np.load(fn)
+		checkpoint={}
+		for name in data.files:
+			checkpoint[name]=data[name]
+		data.close()
+	except Exception:
+		printWarning("Could not read checkpoint "+fn+". Will start from the beginning.")
+		return None
+	
+	if str(checkpoint.get('key'))!=getCheckpointKey(simulation):
+		printWarning("Checkpoint "+fn+" does not match current simulation settings. Will start from the beginning.")
+		return None
+	
+	checkpoint['step']=int(checkpoint['step'])
+	
+	return checkpoint
+
 def applyROIBasedICs(phi,simulation):
 	
 	"""Applies ROI-based initial conditions.
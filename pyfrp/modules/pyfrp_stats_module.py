@@ -32,9 +32,12 @@ to assess overall measurement statistics.
 #Improting necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp_lazy_module import lazyImport
+
 #Numpy
 import numpy as np
-import scipy
+scipy=lazyImport("scipy")
 
 #===========================================================================================================================================================================
 #Module Functions
@@ -114,6 +117,8 @@ def computeSSD(data,x):
 	
 	.. math:: SSD = \sum\limits_i (x_i - d_i)^2
 	
+	If ``data`` and ``x`` are stacked arrays of series, returns the SSD summed over all series.
+	
 	Args:
 		x (numpy.ndarray) Fit series.
 		data (numpy.ndarray): Data series.
@@ -122,7 +127,7 @@ def computeSSD(data,x):
 		float: SSD.
 	"""
 	
-	return sum((data-x)**2)
+	return np.sum((np.asarray(data)-np.asarray(x))**2)
 
 def parameterStats(x):
 	
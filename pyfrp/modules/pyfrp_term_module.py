@@ -33,10 +33,14 @@ custom output inside a Python/bash terminal.
 #===========================================================================================================================================================================
 
 import colorama
-import PyQt4.QtGui as QtGui
 import numpy as np
 import inspect
 
+from pyfrp_lazy_module import lazyImport
+
+#PyQT, only imported when used
+QtGui=lazyImport("PyQt4.QtGui")
+
 #===========================================================================================================================================================================
 #Module Functions
 #===========================================================================================================================================================================
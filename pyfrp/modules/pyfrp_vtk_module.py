@@ -35,14 +35,16 @@ www.vtk.org and http://www.vtk.org/Wiki/VTK/Examples/Python .
 #Improting necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp_lazy_module import lazyImport
+
 #numpy
 import numpy as np
 import scipy.interpolate
 
 #Plotting
-import vtk
-import matplotlib
-
+vtk=lazyImport("vtk")
+matplotlib=lazyImport("matplotlib")
 #Misc
 import sys
 import os
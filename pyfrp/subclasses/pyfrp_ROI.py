@@ -42,11 +42,15 @@
 #Improting necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp.modules.pyfrp_lazy_module import lazyImport
+
 #Numpy/Scipy
 import numpy as np
 
 #PyFRAP Modules
 from pyfrp.modules import pyfrp_misc_module 
+from pyfrp.modules import pyfrp_IO_module
 from pyfrp.modules import pyfrp_idx_module
 from pyfrp.modules import pyfrp_plot_module
 from pyfrp.modules import pyfrp_img_module
@@ -59,8 +63,8 @@ from pyfrp.modules import pyfrp_openscad_module
 from pyfrp.modules.pyfrp_term_module import *
 
 #Plotting
-import matplotlib.pyplot as plt
-import matplotlib.patches as ptc
+plt=lazyImport("matplotlib.pyplot")
+ptc=lazyImport("matplotlib.patches")
 
 #Time 
 import time
@@ -73,8 +77,7 @@ import os
 import shutil
 
 #Solid/Opescad
-import solid
-import solid.utils
+solid=lazyImport("solid")
 
 #-------------------------------------------------------------------------------------------------------------------------------------------------------------------------
 #Main ROI class
@@ -116,6 +119,13 @@ class ROI(object):
 		#Rim concentration
 		self.useForRim=False
 	
+	def __getattr__(self,name):
+		
+		"""Loads attribute ``name`` if it has not been loaded yet from container file, 
+		see :py:func:`pyfrp.modules.pyfrp_IO_module.getLazyAttr`."""
+		
+		return pyfrp_IO_module.getLazyAttr(self,name)
+	
 	def setId(self,Id):
 		
 		"""Sets Id of ROI.
@@ -935,14 +945,12 @@ class ROI(object):
 		
 		"""
 		
-		x,y,z=self.embryo.simulation.mesh.getCellCenters()
+		x,y,z=self.embryo.simulation.mesh.getCellCenterArrays()
 		
-		x=np.asarray(x)[self.meshIdx]
-		y=np.asarray(y)[self.meshIdx]
+		self.meshIdx=np.asarray(self.meshIdx,dtype=int)
 		
-		ins=r.checkXYInside(x,y)
+		ins=r.checkXYInside(x[self.meshIdx],y[self.meshIdx])
 		
-		self.meshIdx=np.asarray(self.meshIdx)
 		self.meshIdx=self.meshIdx[np.where(ins)[0]]
 		
 		return self.meshIdx
@@ -1578,7 +1586,44 @@ class ROI(object):
 			if self in fit.ROIsFitted and len(self.getFittedVec(fit))>0:
 				fitted=True
 		return fitted
-	
+		
+	def isPinned(self):
+		
+		"""Checks if data and simulation vectors of ROI have been pinned.
+		
+		Returns:
+			bool: True if ROI has been pinned.
+		
+		"""
+		
+		if self.embryo.simulation!=None:
+			return len(self.embryo.tvecData)==len(self.dataVecPinned) and len(self.embryo.simulation.tvecSim)==len(self.simVecPinned)
+		return False
+		
+	def getFingerprint(self):
+		
+		"""Returns fingerprint of the geometry of ROI.
+		
+		Fingerprint covers all attributes defining the ROI, such as its type, z-extend,
+		``useForRim`` flag and the attributes of subclasses such as ``center`` or ``corners``. Name, color and
+		all indices and result vectors are not part of it, thus changing them does not
+		require to recompute the ROI. See also :py:func:`pyfrp.modules.pyfrp_misc_module.getFingerprint`.
+		
+		Returns:
+			str: Fingerprint.
+		
+		"""
+		
+		exclude=['name','color','embryo','imgIdxX','imgIdxY','extImgIdxX','extImgIdxY','meshIdx','imgMask','extMask','numExt',
+			'dataVec','simVec','dataVecPinned','simVecPinned']
+		
+		attrs={}
+		for key in pyfrp_IO_module.getAttrNames(self):
+			if key not in exclude:
+				attrs[key]=getattr(self,key)
+		
+		return pyfrp_misc_module.getFingerprint(type(self).__name__,attrs)
+		
 	def getInterpolationError(self):
 		
 		"""Prints out interpolation error for the volume of this ROI.
@@ -1785,6 +1830,70 @@ class ROI(object):
 				nNodesROIReq=nNodesROIReqNew
 			
 		return nNodes
+	
+	def searchRefineInMeshByField(self,nNodesReq,factor=3.,addZ=15.,tol=0.1,maxIter=10,nNodesMax='inf',debug=False,ROIReq=None,fnOut=None):
+		
+		"""Refines mesh inside ROI until a given number of nodes inside ROI is reached, 
+		predicting the required refinement factor from the measured node numbers.
+		
+		Unlike :py:func:`adaptRefineInMeshByField`, does not increase ``factor`` stepwise, but 
+		performs a secant search on the number of nodes, assuming that it scales 
+		approximately with :math:`factor^d`, see also :py:func:`pyfrp.modules.pyfrp_misc_module.searchPowerLaw`.
+		Between meshing runs, only the mesh indices of the ROI referred to by ``nNodesReq`` are recomputed.
+		
+		Search stops as soon as the number of nodes lies between ``nNodesReq`` and ``(1+tol)*nNodesReq``. 
+		Refinements resulting in more than ``nNodesMax`` nodes are rejected.
+		
+		.. note:: If ``ROIReq`` is given, will try to refine in ``self`` such that ``ROIReq`` has at least ``nNodesReq``
+		   mesh nodes. If it is not given, ``nNodesReq`` refers to the nodes in ``self``.
+		
+		Args:
+			nNodesReq (int): Desired number of nodes inside ROI.
+		
+		Keyword Args:
+			factor (float): Initial refinement factor.
+			addZ (float): Number of pixels added above and below ROI for box field.
+			tol (float): Relative tolerance above ``nNodesReq``.
+			maxIter (int): Maximum number of meshing runs.
+			nNodesMax (float): Maximum number of nodes allowed in ROI.
+			debug (bool): Print debugging messages.
+			ROIReq (pyfrp.subclasses.pyfrp_ROI.ROI): The ROI object that is referred to with nNodesReq.
+			fnOut (str): Path to output geo file.
+			
+		Returns:
+			int: Final number of nodes in ROI.
+			
+		"""
+		
+		#Convert nNodesMax if necessary
+		nNodesMax=pyfrp_misc_module.translateNPFloat(nNodesMax)
+		
+		if ROIReq==None:
+			ROIReq=self
+		
+		factors=[]
+		def getNNodes(f):
+			factors.append(f)
+			self.refineInMeshByField(factor=f,addZ=addZ,findIdxs=False,debug=False,run=True,fnOut=fnOut)
+			ROIReq.computeMeshIdx(ROIReq.embryo.simulation.mesh)
+			nNodes=len(ROIReq.meshIdx)
+			if nNodes>nNodesMax:
+				return None
+			return nNodes
+		
+		factor,nNodes=pyfrp_misc_module.searchPowerLaw(getNNodes,nNodesReq,factor,self.embryo.geometry.getDim(),
+			tol=tol,maxIter=maxIter,debug=debug)
+		
+		#Make sure mesh belongs to best factor
+		if len(factors)==0 or factors[-1]!=factor:
+			nNodes=getNNodes(factor)
+		
+		if debug:
+			print "Refinement factor ", factor, " gives ", nNodes, " nodes, required ", nNodesReq
+		
+		self.computeMeshIdx(self.embryo.simulation.mesh)
+		
+		return nNodes
 				
 	def printDetails(self):
 		
@@ -2351,7 +2460,7 @@ class radialROI(ROI):
 		"""
 		
 		
-		self.meshIdx=pyfrp_idx_module.getCircleIdxMesh(self.center,self.radius,radius,mesh,zmin=self.zmin,zmax=self.zmax)
+		self.meshIdx=pyfrp_idx_module.getCircleIdxMesh(self.center,self.radius,mesh,zmin=self.zmin,zmax=self.zmax)
 		return self.meshIdx	
 	
 	def showBoundary(self,color=None,linewidth=3,ax=None):
@@ -2553,7 +2662,7 @@ class sliceROI(ROI):
 		
 		"""Computes mesh indices of ROI.
 		
-		See also :py:func:`pyfrp.modules.pyfrp_idx_module.getSliceIdxMesh`.
+		See also :py:func:`pyfrp.modules.pyfrp_idx_module.getSlabIdxMesh`.
 		
 		Args:
 			mesh (fipy.GmshImporter3D): Fipy mesh object.
@@ -2563,8 +2672,7 @@ class sliceROI(ROI):
 				
 		"""
 		
-		x,y,z=mesh.getCellCenters()
-		self.meshIdx=pyfrp_idx_module.getSliceIdxMesh(z,self.zmin,self.zmax)
+		self.meshIdx=pyfrp_idx_module.getSlabIdxMesh(mesh,zmin=self.zmin,zmax=self.zmax)
 		return self.meshIdx
 	
 	def checkXYInside(self,x,y):
@@ -3434,7 +3542,7 @@ class rectangleSliceROI(rectangleROI,sliceROI):
 				
 		"""
 		
-		[self.imgIdxX,self.imgIdxY]=pyfrp_idx_module.getRectangleIdxImg(self.sidelengthX,self.sidelengthY,self.offset,self.embryo.dataResPx,debug=debug)
+		[self.imgIdxX,self.imgIdxY]=pyfrp_idx_module.getRectangleIdxImg(self.offset,self.sidelengthX,self.sidelengthY,self.embryo.dataResPx,debug=debug)
 		return self.imgIdxX,self.imgIdxY
 	
 	def computeMeshIdx(self,mesh):
@@ -3671,7 +3779,7 @@ class polyROI(ROI):
 		
 		"""Checks if coordinates are inside ROI.
 		
-		See also :py:func:`pyfrp.modules.pyfrp_idx_module.checkInsidePoly`.
+		See also :py:func:`pyfrp.modules.pyfrp_idx_module.checkInsidePolyVec`.
 		
 		Args:
 			x (np.ndarray): Array of x-coordinates.
@@ -3682,7 +3790,7 @@ class polyROI(ROI):
 		
 		"""
 		
-		return pyfrp_idx_module.checkInsidePoly(x,y,self.corners)
+		return pyfrp_idx_module.checkInsidePolyVec(x,y,self.corners)
 	
 	def computeXYExtend(self):
 		
@@ -3830,7 +3938,7 @@ class polySliceROI(polyROI,sliceROI):
 		
 		"""Checks if coordinates are inside ROI.
 		
-		See also :py:func:`pyfrp.modules.pyfrp_idx_module.checkInsidePoly`.
+		See also :py:func:`pyfrp.modules.pyfrp_idx_module.checkInsidePolyVec`.
 		
 		Args:
 			x (np.ndarray): Array of x-coordinates.
@@ -3841,7 +3949,7 @@ class polySliceROI(polyROI,sliceROI):
 		
 		"""
 		
-		return pyfrp_idx_module.checkInsidePoly(x,y,self.corners)
+		return pyfrp_idx_module.checkInsidePolyVec(x,y,self.corners)
 	
 	def computeXYExtend(self):
 		
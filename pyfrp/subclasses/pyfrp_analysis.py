@@ -31,6 +31,9 @@
 #Importing necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp.modules.pyfrp_lazy_module import lazyImport
+
 #Numpy/Scipy
 from numpy import *
 
@@ -40,10 +43,11 @@ import pickle
 #PyFRAP Modules
 from pyfrp.modules import pyfrp_img_module 
 from pyfrp.modules import pyfrp_misc_module
+from pyfrp.modules import pyfrp_IO_module
 from pyfrp.modules.pyfrp_term_module import *
 
 #matplotlib
-import matplotlib.pyplot as plt
+plt=lazyImport("matplotlib.pyplot")
 
 #===========================================================================================================================================================================
 #Module Classes
@@ -123,19 +127,32 @@ class analysis:
 		self.gaussianSigma=2
 		self.medianRadius=5
 		
-	def run(self,signal=None,embCount=None,debug=False,debugAll=False,showProgress=True):
+	def __getattr__(self,name):
+		
+		"""Loads attribute ``name`` if it has not been loaded yet from container file, 
+		see :py:func:`pyfrp.modules.pyfrp_IO_module.getLazyAttr`."""
+		
+		return pyfrp_IO_module.getLazyAttr(self,name)
+	
+	def run(self,signal=None,embCount=None,debug=False,debugAll=False,showProgress=True,prefetch=4,workers=1,blockSize=16,ROIs=None):
 		
 		"""Runs analysis by passing analysis object to :py:func:`pyfrp.modules.pyfrp_img_module.analyzeDataset`.
 		
 		Will first check if ROI indices are computed for all ROIs and if necessary compute them before starting 
 		data analysis.
 		
+		If ``ROIs`` are given, only their data vectors are recomputed.
+		
 		Keyword Args:
 			signal (PyQt4.QtCore.pyqtSignal): PyQT signal to send progress to GUI.
 			embCount (int): Counter of counter process if multiple datasets are analyzed. 
 			debug (bool): Print final debugging messages and show debugging plots.
 			debugAll (bool): Print debugging messages and show debugging plots of each step.
 			showProgress (bool): Print out progress.
+			prefetch (int): Number of images read ahead.
+			workers (int): Number of worker processes processing images.
+			blockSize (int): Number of images read out at once.
+			ROIs (list): List of ROIs to analyze. If ``None``, analyzes all ROIs.
 		
 		Returns:
 			pyfrp.subclasses.pyfrp_analysis.analysis: Updated analysis instance.
@@ -148,7 +165,7 @@ class analysis:
 		if not self.embryo.checkROIIdxs()[0]:
 			self.embryo.computeROIIdxs()
 			
-		self=pyfrp_img_module.analyzeDataset(self,signal=signal,embCount=embCount,debug=debug,debugAll=debugAll,showProgress=showProgress)
+		self=pyfrp_img_module.analyzeDataset(self,signal=signal,embCount=embCount,debug=debug,debugAll=debugAll,showProgress=showProgress,prefetch=prefetch,workers=workers,blockSize=blockSize,ROIs=ROIs)
 		return self
 	
 	def setGaussianSigma(self,s):
@@ -667,6 +684,22 @@ class analysis:
 		printDict(self.process)
 		return
 	
+	def getFingerprint(self):
+		
+		"""Returns fingerprint of analysis settings.
+		
+		Fingerprint covers the ``process`` dictionary and all other settings of the analysis, 
+		but not its results such as ``concRim`` or the computed masks. 
+		See also :py:func:`pyfrp.modules.pyfrp_misc_module.getFingerprint`.
+		
+		Returns:
+			str: Fingerprint.
+		
+		"""
+		
+		return pyfrp_misc_module.getFingerprint(self.process,self.addRimImg,self.fnPreimage,self.fnFlatten,self.fnBkgd,
+			self.nPre,self.nFlatten,self.nBkgd,self.dataOffset,self.gaussianSigma,self.medianRadius)
+	
 	def printAllAttr(self):
 		
 		"""Prints out all attributes of analysis object.""" 
@@ -31,6 +31,9 @@
 #Importing necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp.modules.pyfrp_lazy_module import lazyImport
+
 #Numpy/Scipy
 import numpy as np
 
@@ -51,7 +54,7 @@ import pyfrp_ROI
 import pyfrp_fit
 
 #matplotlib
-import matplotlib.pyplot as plt
+plt=lazyImport("matplotlib.pyplot")
 
 #Time 
 import time
@@ -105,6 +108,9 @@ class embryo:
 		self.fileList=[]
 		self.fnDatafolder=""
 		
+		#Image stack used instead of fileList if given
+		self.fnDataStack=""
+		
 		#Data time specifics
 		self.frameInterval=10
 		self.nFrames=300
@@ -149,7 +155,20 @@ class embryo:
 		
 		#Fitting 
 		self.fits=[]
+		
+		#Fingerprints of the inputs of each stage when it was last run, see getStageFingerprint
+		self.fingerprints={}
+		
+		#File embryo was last saved to or loaded from
+		self.fnSave=""
 
+	def __getattr__(self,name):
+		
+		"""Loads attribute ``name`` if it has not been loaded yet from container file, 
+		see :py:func:`pyfrp.modules.pyfrp_IO_module.getLazyAttr`."""
+		
+		return pyfrp_IO_module.getLazyAttr(self,name)
+	
 	def addFit(self,fit):
 		
 		"""Appends fit object to list of fits
@@ -197,16 +216,22 @@ class embryo:
 		return self.fits
 	
 		
-	def save(self,fn=None,copyMeshFiles=True,debug=False):
+	def save(self,fn=None,copyMeshFiles=True,debug=False,container=True):
 		
-		"""Saves embryo object to pickle file.
+		"""Saves embryo object to container file or pickle file.
 		
 		If ``fn=None`` will save to ``self.name.emb``.
 		
+		See also :py:func:`pyfrp.modules.pyfrp_IO_module.saveToContainer`.
+		
+		.. note:: If simulation values are kept in a solution store, the store is copied next to ``fn`` 
+		   if it is not there yet, see :py:func:`pyfrp.subclasses.pyfrp_simulation.simulation.relocateValsStore`.
+		
 		Keyword Args:
 			fn (str): Output filename.
 			copyMeshFiles (bool): Copy meshfiles to embryo file destination.
 			debug (bool): Print out debugging messages.
+			container (bool): Save to container file instead of pickle file.
 			
 		Returns:
 			str: Output filename.
@@ -228,7 +253,14 @@ class embryo:
 			fnNew=os.path.splitext((os.path.split(fn)[-1]))[0]
 			self.renameMeshFiles(fn=fnNew,debug=debug)
 		
-		pyfrp_IO_module.saveToPickle(self,fn=fn)
+		self.fnSave=os.path.abspath(fn)
+		if self.simulation!=None:
+			self.simulation.relocateValsStore()
+		
+		if container:
+			pyfrp_IO_module.saveToContainer(self,fn=fn)
+		else:
+			pyfrp_IO_module.saveToPickle(self,fn=fn)
 		
 		print "Saved "+  self.name+ " to " + fn
 		return fn
@@ -367,6 +399,19 @@ class embryo:
 		
 		return self.name
 	
+	def getFnSave(self):
+		
+		"""Returns path of file embryo was last saved to or loaded from.
+		
+		Returns ``""`` if embryo has not been saved yet.
+		
+		Returns:
+			str: Path to embryo file.
+		
+		"""
+		
+		return getattr(self,'fnSave',"")
+	
 	def setDataResMu(self,res):
 		
 		"""Sets resolution of data in :math:`\mu m`."""
@@ -1355,6 +1400,67 @@ class embryo:
 		
 		return self.fnDatafolder
 	
+	def setDataStack(self,fn):
+		
+		"""Sets image stack containing all recovery images.
+		
+		Stack can either be a multi-page TIFF or a ``.npy`` file with one frame per
+		entry along the first axis. If set, the stack is used instead of the files in ``fileList``
+		and read through a memory map, see :py:func:`pyfrp.modules.pyfrp_img_module.loadImgStack`.
+		
+		Will update number of frames to match the number of frames in stack. 
+		If ``fn=""``, will go back to using ``fileList``.
+		
+		Args:
+			fn (str): Path to image stack.
+		
+		Returns:
+			str: New image stack path.
+		
+		"""
+		
+		self.fnDataStack=fn
+		
+		if self.usesDataStack():
+			self.setNFrames(len(self.getDataStack()))
+			
+		return self.fnDataStack
+	
+	def getDataStack(self):
+		
+		"""Returns memory mapped image stack containing all recovery images.
+		
+		Returns:
+			numpy.ndarray: Image stack.
+		"""
+		
+		return pyfrp_img_module.loadImgStack(self.fnDataStack)
+	
+	def usesDataStack(self):
+		
+		"""Returns ``True`` if recovery images are read from an image stack rather than 
+		the files in ``fileList``."""
+		
+		#Embryos saved before image stacks were supported do not have fnDataStack
+		return getattr(self,'fnDataStack',"")!=""
+	
+	def getNDataImgs(self,stack=None):
+		
+		"""Returns number of recovery images, either in image stack or in ``fileList``.
+		
+		Keyword Args:
+			stack (numpy.ndarray): Image stack already opened via :py:func:`getDataStack`.
+			
+		Returns:
+			int: Number of images.
+		"""
+		
+		if stack is not None:
+			return len(stack)
+		if self.usesDataStack():
+			return len(self.getDataStack())
+		return len(self.fileList)
+	
 	def getGeometry(self):
 		
 		"""Returns embryo's geometry object.
@@ -1527,26 +1633,30 @@ class embryo:
 		self.analysis=pyfrp_analysis.analysis(self)
 		return self.analysis
 	
-	def computeROIIdxs(self,signal=None,debug=True):
+	def computeROIIdxs(self,signal=None,debug=True,ROIs=None):
 		
 		"""Computes image, extended and mesh indices of all ROIs in embryo's ``ROIs`` list.
 		
 		Keyword Args:
 			signal (PyQt4.QtCore.pyqtSignal): PyQT signal to send progress to GUI.
 			debug (bool): Print final debugging messages and show debugging plots.
+			ROIs (list): Only compute indices of these ROIs. If ``None``, computes indices of all ROIs.
 		
 		Returns:
 			list: Updated list of ROIs.
 		"""
 		
-		for i,r in enumerate(self.ROIs):
+		if ROIs==None:
+			ROIs=self.ROIs
+		
+		for i,r in enumerate(ROIs):
 			startInit=time.clock()
 			r.computeIdxs()
 			
 			if debug:
 				print r.name, time.clock()-startInit
 			if signal:
-				signal.emit(int(100.*i)/float(len(self.ROIs)))
+				signal.emit(int(100.*i)/float(len(ROIs)))
 			
 		return self.ROIs
 	
@@ -2150,7 +2260,7 @@ class embryo:
 		
 		return bkgdVal, normVal, bkgdValSim, normValSim
 		
-	def pinAllROIs(self,bkgdVal=None,normVal=None,bkgdValSim=None,normValSim=None,useMin=False,useMax=False,debug=False):
+	def pinAllROIs(self,bkgdVal=None,normVal=None,bkgdValSim=None,normValSim=None,useMin=False,useMax=False,debug=False,ROIs=None):
 		
 		"""Pins both simulation and data vectors of all ROIs.
 		
@@ -2166,6 +2276,7 @@ class embryo:
 			useMin (bool): Use minimum value for background computation.
 			useMax (bool): Use maximum value for norm value computation.
 			debug (bool): Print debugging messages.
+			ROIs (list): Only pin these ROIs. If ``None``, pins all ROIs.
 			
 		Returns:
 			list: Updated list of ROIs.
@@ -2177,7 +2288,10 @@ class embryo:
 		bkgdVal = pyfrp_misc_module.assignIfVal(bkgdVal,bkgdValTemp,None)
 		normVal = pyfrp_misc_module.assignIfVal(normVal,normValTemp,None)
 		
-		for r in self.ROIs:
+		if ROIs==None:
+			ROIs=self.ROIs
+		
+		for r in ROIs:
 			r.pinAllTS(bkgdVal=bkgdVal,normVal=normVal,bkgdValSim=bkgdValSim,normValSim=normValSim,debug=debug)
 		return self.ROIs	
 			
@@ -2271,7 +2385,225 @@ class embryo:
 				mesh=False
 		return img,mesh
 	
-	def quickAnalysis(self,maxDExpPx=None,timeScale='log',runIdxs=True,runAnalysis=True,runSimulation=True,runPin=True,runFit=True,bkgdName='Bleached Square',normName='Slice',useMin=False,useMax=False,sepSim=True,switchThresh=0.95):
+	def getStageFingerprint(self,stage,bkgdName='Bleached Square',normName='Slice'):
+		
+		"""Returns fingerprints of the inputs of a stage of the FRAP pipeline.
+		
+		The stages are ``idxs``, ``analysis``, ``simulation``, ``pin`` and ``fit``, see :py:meth:`quickAnalysis`. 
+		The fingerprint of a stage consists of a fingerprint of the inputs shared by all ROIs and a fingerprint
+		of each ROI, see :py:func:`pyfrp.subclasses.pyfrp_ROI.ROI.getFingerprint`. The shared fingerprint covers
+		
+			* ``idxs``: Image resolution, master ROI and mesh.
+			* ``analysis``: Image resolution, master ROI, analysis settings, data files and ROIs used for the rim concentration.
+			* ``simulation``: Shared fingerprints of ``idxs`` and ``analysis`` and simulation settings. If ``ICmode=0``, also all ROIs.
+			* ``pin``: Shared fingerprint of ``simulation``, data time vector and ROIs used for pinning.
+			* ``fit``: Shared fingerprint of ``pin``.
+		
+		Thus, if the shared inputs of a stage change, the stage and all following stages need to be recomputed for all ROIs,
+		while if only a ROI changes, only this ROI needs to be recomputed. For the ``fit`` stage, the 
+		fingerprint of each fit is returned instead, see :py:func:`pyfrp.subclasses.pyfrp_fit.fit.getFingerprint`.
+		
+		Args:
+			stage (str): Stage.
+			
+		Keyword Args:
+			bkgdName (str): Name of ROI used for background computation.
+			normName (str): Name of ROI used for norming computation.
+			
+		Returns:
+			tuple: Tuple containing:
+			
+				* shared (str): Fingerprint of the inputs shared by all ROIs.
+				* items (dict): Fingerprints by ROI Id or, for the ``fit`` stage, by fit name.
+		
+		"""
+		
+		masterROI=self.getMasterROI() if self.masterROIIdx!=None else None
+		
+		if stage=="idxs":
+			mesh=self.simulation.mesh if self.simulation!=None else None
+			shared=pyfrp_misc_module.getFingerprint(self.dataResPx,self.masterROIIdx,masterROI,mesh)
+		elif stage=="analysis":
+			rimROIs=[r for r in self.ROIs if r.useForRim]
+			shared=pyfrp_misc_module.getFingerprint(self.dataResPx,self.masterROIIdx,masterROI,self.analysis,self.fnDatafolder,
+				self.fileList,self.fnDataStack,self.dataEnc,rimROIs)
+		elif stage=="simulation":
+			ICROIs=self.ROIs if self.simulation!=None and self.simulation.ICmode==0 else []
+			shared=pyfrp_misc_module.getFingerprint(self.getStageFingerprint("idxs")[0],self.getStageFingerprint("analysis")[0],self.simulation,ICROIs)
+		elif stage=="pin":
+			pinROIs=[r for r in self.ROIs if r.name in [bkgdName,normName]]
+			shared=pyfrp_misc_module.getFingerprint(self.getStageFingerprint("simulation")[0],self.tvecData,bkgdName,normName,pinROIs)
+		elif stage=="fit":
+			shared=self.getStageFingerprint("pin",bkgdName=bkgdName,normName=normName)[0]
+			return shared,dict((fit.name,fit.getFingerprint()) for fit in self.fits)
+		else:
+			raise ValueError("Unknown stage "+stage)
+		
+		return shared,dict((r.Id,r.getFingerprint()) for r in self.ROIs)
+	
+	def setStageFingerprint(self,stage,items=None,bkgdName='Bleached Square',normName='Slice'):
+		
+		"""Stores fingerprint of the current inputs of a stage in ``fingerprints``, marking the stage as up to date.
+		
+		If ``items`` are given, only the fingerprints of these ROIs (or fits for the ``fit`` stage) are updated. 
+		If the shared inputs of the stage have changed, fingerprints of all other ROIs are dropped, since they 
+		would need to be recomputed too. See also :py:meth:`getStageFingerprint`.
+		
+		Args:
+			stage (str): Stage.
+			
+		Keyword Args:
+			items (list): List of ROIs or fits that have been recomputed. If ``None``, updates all.
+			bkgdName (str): Name of ROI used for background computation.
+			normName (str): Name of ROI used for norming computation.
+		
+		Returns:
+			tuple: Stored fingerprint.
+		
+		"""
+		
+		shared,current=self.getStageFingerprint(stage,bkgdName=bkgdName,normName=normName)
+		sharedStored,stored=self.fingerprints.get(stage,(None,{}))
+		
+		if items==None:
+			keys=current.keys()
+		else:
+			keys=[item.name if stage=="fit" else item.Id for item in items]
+		
+		fingerprints={}
+		if shared==sharedStored:
+			for key in stored.keys():
+				if key in current:
+					fingerprints[key]=stored[key]
+		for key in keys:
+			fingerprints[key]=current[key]
+			
+		self.fingerprints[stage]=(shared,fingerprints)
+		
+		return self.fingerprints[stage]
+		
+	def getOutdated(self,stage,bkgdName='Bleached Square',normName='Slice'):
+		
+		"""Returns ROIs whose results of a stage need to be recomputed.
+		
+		A ROI is outdated if the shared inputs of the stage or the ROI itself have changed since the stage 
+		was last run, or if its results are missing. For the ``fit`` stage, returns the outdated fits. 
+		See also :py:meth:`getStageFingerprint`.
+		
+		Args:
+			stage (str): Stage.
+			
+		Keyword Args:
+			bkgdName (str): Name of ROI used for background computation.
+			normName (str): Name of ROI used for norming computation.
+		
+		Returns:
+			list: List of outdated ROIs or fits.
+		
+		"""
+		
+		shared,current=self.getStageFingerprint(stage,bkgdName=bkgdName,normName=normName)
+		sharedStored,stored=self.fingerprints.get(stage,(None,{}))
+		
+		if stage=="fit":
+			items=[(fit,fit.name,fit.isFitted()) for fit in self.fits]
+		else:
+			done={"idxs":lambda r: len(r.imgIdxX)>0 and len(r.meshIdx)>0,
+				"analysis":lambda r: r.isAnalyzed(),
+				"simulation":lambda r: r.isSimulated(),
+				"pin":lambda r: r.isPinned()}[stage]
+			items=[(r,r.Id,done(r)) for r in self.ROIs]
+			
+		outdated=[]
+		for item,key,hasResults in items:
+			if shared!=sharedStored or stored.get(key)!=current[key] or not hasResults:
+				outdated.append(item)
+				
+		return outdated
+	
+	def runStage(self,stage,force=False,maxDExpPx=None,timeScale='log',bkgdName='Bleached Square',normName='Slice',showProgress=True,debug=False):
+		
+		"""Runs a stage of the FRAP pipeline, only recomputing outdated ROIs.
+		
+		Gets the outdated ROIs (or fits) via :py:meth:`getOutdated`. If all of them are outdated, runs the stage 
+		as :py:meth:`quickAnalysis` would, otherwise only recomputes the outdated ones:
+		
+			* ``idxs``: Only computes indices of the outdated ROIs.
+			* ``analysis``: Only computes data vectors of the outdated ROIs, see :py:func:`pyfrp.modules.pyfrp_img_module.analyzeDataset`.
+			* ``simulation``: Only extracts simulation vectors of the outdated ROIs from the saved simulation history, see 
+			  :py:func:`pyfrp.modules.pyfrp_sim_module.rerunReactDiff`. If the simulation was run without ``saveSim``, reruns
+			  the whole simulation.
+			* ``pin``: Only pins the outdated ROIs.
+			* ``fit``: Only runs the outdated fits.
+		
+		Afterwards, stores the fingerprint of the stage via :py:meth:`setStageFingerprint`.
+		
+		Args:
+			stage (str): Stage.
+			
+		Keyword Args:
+			force (bool): Recompute all ROIs, even if up to date.
+			maxDExpPx (float): Maximum expected diffusion coefficient, used to set simulation time vector.
+			timeScale (str): Linear (``'lin'``) or logarithmic (``'log'``) time scaling of simulation.
+			bkgdName (str): Name of ROI used for background computation.
+			normName (str): Name of ROI used for norming computation.
+			showProgress (bool): Show progress.
+			debug (bool): Print debugging messages.
+		
+		Returns:
+			list: List of recomputed ROIs or fits.
+		
+		"""
+		
+		if stage=="simulation":
+			if maxDExpPx!=None:
+				self.simulation.getOptTvecSim(maxDExpPx)
+			if timeScale=='log' and not self.simulation.isLogTimeScale():
+				self.simulation.toLogTimeScale()
+		
+		allItems=self.fits if stage=="fit" else self.ROIs
+		
+		if force:
+			outdated=list(allItems)
+		else:
+			outdated=self.getOutdated(stage,bkgdName=bkgdName,normName=normName)
+		
+		if len(outdated)==0:
+			if debug:
+				printNote("Stage "+stage+" of "+self.name+" is up to date.")
+			return outdated
+		
+		ROIs=None if len(outdated)==len(allItems) else outdated
+		
+		if debug and ROIs!=None:
+			printNote("Recomputing stage "+stage+" of "+self.name+" for "+", ".join(str(item.name) for item in outdated)+".")
+		
+		if stage=="idxs":
+			self.computeROIIdxs(ROIs=ROIs,debug=debug)
+		
+		elif stage=="analysis":
+			self.analysis.run(showProgress=showProgress,ROIs=ROIs)
+			
+		elif stage=="simulation":
+			if ROIs!=None and len(self.simulation.vals)==len(self.simulation.tvecSim):
+				self.simulation.rerun(showProgress=showProgress,ROIs=ROIs)
+			else:
+				outdated=list(self.ROIs)
+				self.simulation.run(showProgress=showProgress)
+		
+		elif stage=="pin":
+			bkgdVal,normVal,bkgdValSim,normValSim=self.computeIdealFRAPPinVals(debug=debug,useMin=False,useMax=False,switchThresh=0.95,bkgdName=bkgdName,normName=normName)
+			self.pinAllROIs(bkgdVal=bkgdVal,normVal=normVal,bkgdValSim=bkgdValSim,normValSim=normValSim,debug=False,ROIs=ROIs)
+			
+		elif stage=="fit":
+			for fit in outdated:
+				fit.run(debug=False)
+		
+		self.setStageFingerprint(stage,items=outdated,bkgdName=bkgdName,normName=normName)
+		
+		return outdated
+	
+	def quickAnalysis(self,maxDExpPx=None,timeScale='log',runIdxs=True,runAnalysis=True,runSimulation=True,runPin=True,runFit=True,bkgdName='Bleached Square',normName='Slice',useMin=False,useMax=False,sepSim=True,switchThresh=0.95,force=False):
 			
 		"""Performs complete FRAP analysis of embryo object including:
 		
@@ -2281,6 +2613,10 @@ class embryo:
 			* Running simulation through :py:meth:`pyfrp.subclasses.pyfrp_simulation.simulation.run` .
 			* Pin simulation and data timeseries using :py:meth:`computeIdealFRAPPinVals` and :py:meth:`pinAllROIs`.
 			* Run all fits in ``fits`` list by calling :py:meth:`pyfrp.subclasses.pyfrp_fit.fit.run`
+		
+		The simulation time vector is set up regardless of which stages are run.
+		Each stage is run via :py:meth:`runStage`, hence skipped if its inputs have not changed since it was last run, 
+		and only recomputed for the ROIs that have changed otherwise. Set ``force=True`` to rerun all stages completely.
 			
 		Keyword Args:
 			maxDExpPx (float): Maximum expected diffusion coefficient.
@@ -2295,37 +2631,21 @@ class embryo:
 			useMin (bool): Use minimum value for background computation.
 			useMax (bool): Use maximum value for norm value computation.
 			sepSim (bool): Use seperate pinning values for simulation vectors.
-			
+			force (bool): Rerun stages even if they are up to date.
 			
 		"""
 		
-		if runIdxs:
-			self.computeROIIdxs()
-		
-		#Image analysis
-		if runAnalysis:
-			self.analysis.run(showProgress=True)
-
-		#Simulation
+		#Set up simulation time vector, even if simulation is not run
 		if maxDExpPx!=None:
 			self.simulation.getOptTvecSim(maxDExpPx)
-		
-		if timeScale=='log':
+		if timeScale=='log' and not self.simulation.isLogTimeScale():
 			self.simulation.toLogTimeScale()
 		
-		if runSimulation:
-			self.simulation.run(showProgress=True)
-
-		#Pin Concentrations
-		if runPin:
-			bkgdVal,normVal,bkgdValSim,normValSim=self.computeIdealFRAPPinVals(debug=True,useMin=False,useMax=False,switchThresh=0.95,bkgdName=bkgdName,normName=normName)
-			self.pinAllROIs(bkgdVal=bkgdVal,normVal=normVal,bkgdValSim=bkgdValSim,normValSim=normValSim,debug=False)
-
-		#Run all fits
-		if runFit:
-			for fit in self.fits:
-				fit.run(debug=False)
-			
+		stages=[("idxs",runIdxs),("analysis",runAnalysis),("simulation",runSimulation),("pin",runPin),("fit",runFit)]
+		
+		for stage,run in stages:
+			if run:
+				self.runStage(stage,force=force,maxDExpPx=None,timeScale=timeScale,bkgdName=bkgdName,normName=normName,showProgress=True,debug=True)
 		
 	def clearAllAttributes(self):
 		
@@ -37,6 +37,7 @@ import numpy as np
 
 #PyFRAP Modules
 from pyfrp.modules import pyfrp_misc_module 
+from pyfrp.modules import pyfrp_IO_module
 from pyfrp.modules import pyfrp_plot_module
 from pyfrp.modules import pyfrp_fit_module
 from pyfrp.modules import pyfrp_stats_module
@@ -47,6 +48,9 @@ from pyfrp.modules.pyfrp_term_module import *
 #Time 
 import time
 
+#Misc
+import copy
+
 #===========================================================================================================================================================================
 #Class definitions
 #===========================================================================================================================================================================
@@ -176,6 +180,13 @@ class fit:
 		#Empty result dataseries
 		self.tvecFit=embryo.tvecData
 
+	def __getattr__(self,name):
+		
+		"""Loads attribute ``name`` if it has not been loaded yet from container file, 
+		see :py:func:`pyfrp.modules.pyfrp_IO_module.getLazyAttr`."""
+		
+		return pyfrp_IO_module.getLazyAttr(self,name)
+	
 	def addROI(self,r):
 		
 		"""Adds ROI to the list of fitted ROIs.
@@ -421,7 +432,7 @@ class fit:
 		
 		return self
 	
-	def runBruteInit(self,debug=False,ax=None,steps=5,x0Ds=[]):
+	def runBruteInit(self,debug=False,ax=None,steps=5,x0Ds=[],fromGrid=False):
 		
 		"""Runs fit for different initial guesses of the diffusion constant D, then
 		selects the one that actually yielded the minimal SSD.
@@ -436,11 +447,16 @@ class fit:
 		Will select the initial guess that yielded the minimal SSD and then rerun with this x0 again, making
 		sure that everything is updated in fit object.
 		
+		If ``fromGrid=True``, will not run a full fit for every initial guess, but only evaluate the SSD
+		at all initial guesses at once via :py:func:`computeSSDGrid` and then run a single fit starting from the 
+		initial guess with minimal SSD. This is much faster and allows for a lot more ``steps``.
+		
 		Keyword Args:
 			debug (bool): Print debugging messages.
 			ax (matplotlib.axes): Axes to show debugging plots in.
 			steps (int): How many initial guesses to generate.
 			x0Ds (list): Array with possible initial guesses for D.
+			fromGrid (bool): Select initial guess from SSD grid.
 		
 		Returns:
 			pyfrp.subclasses.pyfrp_fit.fit: ``self``.
@@ -449,17 +465,20 @@ class fit:
 		
 		if x0Ds==[]:
 			x0Ds=self.getBruteInitDArray(steps=steps)
-		SSDs=[]
 		
-		for x0D in x0Ds:
-			
-			if debug:
-				print "Trying x0(D) = ", x0D
-			
-			self.setX0D(x0D)
-			self=pyfrp_fit_module.FRAPFitting(self,debug=debug,ax=ax)
-			
-			SSDs.append(self.SSD)
+		if fromGrid:
+			SSDs=list(self.computeSSDGrid(x0Ds)[:,0,0])
+		else:
+			SSDs=[]
+			for x0D in x0Ds:
+				
+				if debug:
+					print "Trying x0(D) = ", x0D
+				
+				self.setX0D(x0D)
+				self=pyfrp_fit_module.FRAPFitting(self,debug=debug,ax=ax)
+				
+				SSDs.append(self.SSD)
 			
 		idxOpt=SSDs.index(min(SSDs))
 		
@@ -471,6 +490,27 @@ class fit:
 		
 		return self
 		
+	def computeSSDGrid(self,Ds,prods=None,degrs=None,workers=1):
+		
+		"""Computes SSD for a grid of parameter values.
+		
+		See also :py:func:`pyfrp.modules.pyfrp_fit_module.computeSSDGrid`.
+		
+		Args:
+			Ds (numpy.ndarray): Diffusion rates.
+		
+		Keyword Args:
+			prods (numpy.ndarray): Production rates. If ``None``, uses the one in ``x0``.
+			degrs (numpy.ndarray): Degradation rates. If ``None``, uses the one in ``x0``.
+			workers (int): Number of worker processes.
+		
+		Returns:
+			numpy.ndarray: SSD surface of shape ``(len(Ds),len(prods),len(degrs))``.
+		
+		"""
+		
+		return pyfrp_fit_module.computeSSDGrid(self,Ds,prods=prods,degrs=degrs,workers=workers)
+		
 	def getBruteInitDArray(self,steps=5):
 		
 		"""Generates array of different possibilities to be used as initial guess 
@@ -687,6 +727,23 @@ class fit:
 		
 		return self.DOptMu!=None
 		
+	def getFingerprint(self):
+		
+		"""Returns fingerprint of fit settings.
+		
+		Fingerprint covers the ROIs fitted (see :py:func:`pyfrp.subclasses.pyfrp_ROI.ROI.getFingerprint`), 
+		optimization settings, initial guess, bounds and cut-off options, but not the fit results.
+		See also :py:func:`pyfrp.modules.pyfrp_misc_module.getFingerprint`.
+		
+		Returns:
+			str: Fingerprint.
+		
+		"""
+		
+		return pyfrp_misc_module.getFingerprint(self.ROIsFitted,self.optMeth,self.maxfun,self.optTol,self.fitProd,self.fitDegr,
+			self.equOn,self.fitPinned,self.LBEqu,self.UBEqu,self.x0,self.LBProd,self.UBProd,self.LBDegr,self.UBDegr,self.LBD,self.UBD,
+			self.kineticTimeScale,self.bruteInitD,self.fitCutOffT,self.cutOffT)
+		
 	def setEqu(self,b):
 		
 		"""Turns on/off equalization.
@@ -1320,7 +1377,7 @@ class fit:
 		
 		return 1+int(self.getFitProd())+int(self.getFitDegr())+int(inclEqu)*int(self.getEqu())*len(self.equFacts)
 	
-	def plotLikehoodProfiles(self,epsPerc=0.1,steps=100,debug=False):
+	def plotLikehoodProfiles(self,epsPerc=0.1,steps=100,debug=False,workers=1,fromGrid=False):
 		
 		"""Plots likelihood profiles for all fitted parameters.
 		
@@ -1334,13 +1391,15 @@ class fit:
 			epsPerc (float): Percentage of variation.
 			steps (int): Number of values around optimal parameter value.
 			debug (bool): Show debugging messages
+			workers (int): Number of worker processes computing the profiles.
+			fromGrid (bool): Use batched SSD grid for kinetic parameters.
 		
 		Returns:
 			list: List of matplotlib.axes objects used for plotting.
 		
 		"""
 		
-		axes=pyfrp_fit_module.plotFitLikehoodProfiles(self,epsPerc=0.1,steps=100,debug=debug)
+		axes=pyfrp_fit_module.plotFitLikehoodProfiles(self,epsPerc=epsPerc,steps=steps,debug=debug,workers=workers,fromGrid=fromGrid)
 		
 		return axes
 	
@@ -1365,4 +1424,51 @@ class fit:
 				
 				
 		
-		
\ No newline at end of file
+		
+				
+	def getStrippedCopy(self):
+		
+		"""Returns a copy of the fit that only carries what is needed to run it.
+		
+		The copy is attached to a bare embryo that only knows the data and simulation time vectors,
+		the conversion factor and the diffusion coefficient used for the simulation. The 
+		ROIs of the copy only hold their data and simulation vectors. Thus, the copy is small
+		enough to be sent to a worker process, see also :py:func:`pyfrp.modules.pyfrp_fit_module.runFitsParallel`.
+		
+		Returns:
+			pyfrp.subclasses.pyfrp_fit.fit: Stripped fit.
+		
+		"""
+		
+		from pyfrp.subclasses import pyfrp_embryo
+		from pyfrp.subclasses import pyfrp_simulation
+		from pyfrp.subclasses import pyfrp_ROI
+		
+		#Bare embryo with time vectors
+		emb=pyfrp_embryo.embryo(self.embryo.name)
+		emb.nFrames=self.embryo.nFrames
+		emb.tStart=self.embryo.tStart
+		emb.tEnd=self.embryo.tEnd
+		emb.tvecData=self.embryo.tvecData
+		emb.convFact=self.embryo.convFact
+		
+		emb.simulation=pyfrp_simulation.simulation(emb)
+		emb.simulation.D=self.embryo.simulation.D
+		emb.simulation.stepsSim=self.embryo.simulation.stepsSim
+		emb.simulation.tvecSim=self.embryo.simulation.tvecSim
+		
+		#ROIs with data and simulation vectors only
+		for r in self.ROIsFitted:
+			rStripped=pyfrp_ROI.ROI(emb,r.name,r.Id,color=r.color)
+			rStripped.dataVec=r.dataVec
+			rStripped.simVec=r.simVec
+			rStripped.dataVecPinned=r.dataVecPinned
+			rStripped.simVecPinned=r.simVecPinned
+			emb.ROIs.append(rStripped)
+		
+		fitStripped=copy.copy(self)
+		fitStripped.embryo=emb
+		fitStripped.ROIsFitted=list(emb.ROIs)
+		fitStripped.x0=list(self.x0)
+		
+		return fitStripped
@@ -53,6 +53,9 @@ reducing the geometry to the first quadrant around the center.
 #Importing necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp.modules.pyfrp_lazy_module import lazyImport
+
 #Numpy/Scipy
 import numpy as np
 
@@ -61,6 +64,7 @@ from pyfrp.modules import pyfrp_gmsh_module
 from pyfrp.modules import pyfrp_gmsh_IO_module
 from pyfrp.modules import pyfrp_plot_module
 from pyfrp.modules import pyfrp_misc_module
+from pyfrp.modules import pyfrp_IO_module
 from pyfrp.modules.pyfrp_term_module import *
 
 #OS
@@ -68,8 +72,7 @@ import os,os.path
 import shutil
 
 #Solid/Opescad
-import solid
-import solid.utils
+solid=lazyImport("solid")
 
 #===========================================================================================================================================================================
 #Class definitions
@@ -107,6 +110,13 @@ class geometry(object):
 		
 		self.geoFileParameters={}
 	
+	def __getattr__(self,name):
+		
+		"""Loads attribute ``name`` if it has not been loaded yet from container file, 
+		see :py:func:`pyfrp.modules.pyfrp_IO_module.getLazyAttr`."""
+		
+		return pyfrp_IO_module.getLazyAttr(self,name)
+	
 	def getDim(self):
 		
 		"""Returns dimension of geometry.
@@ -31,6 +31,9 @@
 #Importing necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp.modules.pyfrp_lazy_module import lazyImport
+
 
 #PyFRAP
 from pyfrp.modules import pyfrp_gmsh_module
@@ -38,11 +41,12 @@ from pyfrp.modules import pyfrp_gmsh_IO_module
 from pyfrp.modules import pyfrp_integration_module
 from pyfrp.modules import pyfrp_plot_module
 from pyfrp.modules import pyfrp_misc_module
+from pyfrp.modules import pyfrp_IO_module
 from pyfrp.modules import pyfrp_gmsh_geometry
 from pyfrp.modules.pyfrp_term_module import *
 
 #FiPy
-import fipy
+fipy=lazyImport("fipy")
 
 #Numpy/Scipy
 import numpy as np
@@ -50,6 +54,7 @@ import numpy as np
 #Misc
 import os
 import os.path
+import shutil
 
 
 #===========================================================================================================================================================================
@@ -73,6 +78,8 @@ class mesh(object):
 		* ``mesh``: The actual mesh as a ``fipy.GmshImporter3D`` object.
 		* ``fromFile``: Flag that controls if mesh should be created from *.geo* file or not.
 		* ``volSizePx``: Mesh element size in px.
+		* ``useCache``: Flag that controls if meshes are looked up in/stored into the mesh cache, 
+		  see :py:func:`loadFromCache`. Off by default.
 	
 	Besides mesh storage and creation, the mesh class contains useful functions such as:
 		
@@ -90,8 +97,22 @@ class mesh(object):
 		#Naming/ID
 		self.simulation=simulation
 		self.mesh=None
+		
+		#Spatial index of cell centers, see buildCellCenterIndex
+		self.cellCenters=None
+		self.zOrder=None
+		self.zSorted=None
+		self.indexedMesh=None
+		
 		self.restoreDefaults()
 	
+	def __getattr__(self,name):
+		
+		"""Loads attribute ``name`` if it has not been loaded yet from container file, 
+		see :py:func:`pyfrp.modules.pyfrp_IO_module.getLazyAttr`."""
+		
+		return pyfrp_IO_module.getLazyAttr(self,name)
+	
 	def setVolSizePx(self,v,remesh=True,fnOut=None):
 		
 		"""Sets volSize of mesh in px.
@@ -150,6 +171,7 @@ class mesh(object):
 			* ``mesh.fromFile=True``
 			* ``mesh.volSizePx=20``
 			* ``mesh.fnMesh=""``
+			* ``mesh.useCache=False``
 	
 		"""
 		
@@ -160,6 +182,7 @@ class mesh(object):
 		self.fromFile=True
 		self.volSizePx=20.
 		self.fnMesh=""
+		self.useCache=False
 		
 	def genMesh(self,fnOut=None,debug=False):
 		
@@ -171,6 +194,10 @@ class mesh(object):
 		   gmsh directly on the file. If not, will try to run hard coded FiPy
 		   version for mesh generation via :py:func:`runFiPyMeshGenerator` .
 		
+		.. note:: If ``useCache=True``, will first look for a mesh generated from
+		   the same .geo file with the same ``volSizePx`` in the mesh cache, see also 
+		   :py:func:`pyfrp.modules.pyfrp_gmsh_module.getGeoCacheKey`.
+		
 		Keyword Args:
 			fnOut (str): Output filepath for meshfile.
 			debug (bool): Print debugging messages.
@@ -188,15 +215,94 @@ class mesh(object):
 		
 		if self.fromFile:
 			self.fnMesh=pyfrp_misc_module.fixPath(fnOut)
-		
+			
+			if self.getUseCache():
+				key=pyfrp_gmsh_module.getGeoCacheKey(self.simulation.embryo.geometry.fnGeo,volSizeMax=self.volSizePx,dim=dim)
+				if self.loadFromCache(key,fnOut=self.fnMesh):
+					return self.mesh
+			
 			pyfrp_gmsh_module.runGmsh(self.simulation.embryo.geometry.fnGeo,fnOut=fnOut,debug=debug,volSizeMax=self.volSizePx,dim=dim)
 			
-			self.importMeshFromFile(self.fnMesh)
+			self.importMeshFromFile(self.fnMesh,useCache=False)
+			
+			if self.getUseCache():
+				pyfrp_gmsh_module.storeMeshCache(key,self.mesh,fnMsh=self.fnMesh)
 		else:
 			self.runFiPyMeshGenerator(self.simulation.embryo.geometry.typ)
 
 		return self.mesh
 	
+	def getMeshJob(self,name,debug=False):
+		
+		"""Prepares mesh generation job that can be run by 
+		:py:func:`pyfrp.modules.pyfrp_gmsh_module.runGmshQueue`.
+		
+		Since .geo files are often shared between embryos, updates the .geo file with the parameters
+		of this embryo and copies it to ``fnGeo_name.geo``. The mesh will be written to ``fnGeo_name.msh``.
+		
+		.. note:: If ``useCache=True`` and the mesh is found in the mesh cache, will load it and return ``None``.
+		
+		Args:
+			name (str): Name of job, usually the embryo name.
+			
+		Keyword Args:
+			debug (bool): Print debugging messages.
+			
+		Returns:
+			dict: Job dictionary.
+		
+		"""
+		
+		geometry=self.simulation.embryo.geometry
+		
+		#Update .geo file with parameters of this embryo
+		if hasattr(geometry,'updateGeoFile'):
+			geometry.updateGeoFile(debug=debug)
+		self.updateGeoFile(debug=debug)
+		
+		tag="".join([c if c.isalnum() or c in "-_" else "_" for c in name])
+		fnBase=os.path.splitext(geometry.fnGeo)[0]+"_"+tag
+		fnGeo=fnBase+".geo"
+		fnMsh=pyfrp_misc_module.fixPath(fnBase+".msh")
+		
+		dim=geometry.getDim()
+		key=pyfrp_gmsh_module.getGeoCacheKey(geometry.fnGeo,volSizeMax=self.volSizePx,dim=dim)
+		
+		if self.getUseCache():
+			if self.loadFromCache(key,fnOut=fnMsh):
+				self.fnMesh=fnMsh
+				return None
+		
+		shutil.copyfile(geometry.fnGeo,fnGeo)
+		
+		return {'fn':fnGeo,'fnOut':fnMsh,'volSizeMax':self.volSizePx,'dim':dim,'name':name,'key':key}
+		
+	def finishMeshJob(self,job):
+		
+		"""Imports mesh generated by job returned from :py:func:`getMeshJob` and 
+		removes temporary .geo file.
+		
+		.. note:: If ``useCache=True``, stores mesh in mesh cache.
+		
+		Args:
+			job (dict): Job dictionary.
+			
+		Returns:
+			fipy.GmshImporter3D: Gmsh mesh object.
+		
+		"""
+		
+		if os.path.isfile(job['fn']):
+			os.remove(job['fn'])
+		
+		self.fnMesh=job['fnOut']
+		self.importMeshFromFile(self.fnMesh,useCache=False)
+		
+		if self.getUseCache():
+			pyfrp_gmsh_module.storeMeshCache(job['key'],self.mesh,fnMsh=self.fnMesh)
+		
+		return self.mesh
+	
 	def runFiPyMeshGenerator(self,typ):
 		
 		"""Runs gmsh on the via FiPy internally defined meshes.
@@ -228,17 +334,27 @@ class mesh(object):
 		
 		return self.mesh
 		
-	def importMeshFromFile(self,fn):
+	def importMeshFromFile(self,fn,useCache=None,sidecar=False):
 		
 		"""Imports mesh from a Gmsh .msh file.
 		
 		See also http://www.ctcms.nist.gov/fipy/fipy/generated/fipy.meshes.html. 
 		
+		.. note:: If ``useCache=None``, will use ``useCache`` attribute. If cache is used, 
+		   a mesh previously imported from a .msh file with the same content is loaded
+		   from the mesh cache instead of running the importer.
+		
+		.. note:: Meshes are read using :py:func:`pyfrp.modules.pyfrp_gmsh_IO_module.readMshFile`. 
+		   Only if the mesh is not supported by it, ``fipy.GmshImporter3D`` is used. If ``sidecar=True``,
+		   the parsed mesh is also stored in a .npz file next to ``fn``, see also 
+		   :py:func:`pyfrp.modules.pyfrp_gmsh_IO_module.saveMshSidecar`.
+		
 		Args:
 			fn (str): Filepath to meshfile.
 		
 		Keyword Args:
-			dim (int): Dimension of mesh.
+			useCache (bool): Use mesh cache.
+			sidecar (bool): Use .npz sidecar of meshfile.
 		
 		Returns:
 			fipy.GmshImporter3D: Gmsh mesh object.
@@ -250,15 +366,92 @@ class mesh(object):
 		except AttributeError:
 			printWarning("Was not able to receive geometry's dimension. Will assume dim=3.")
 			dim=3 
-			
-		if dim==3:
+		
+		if useCache==None:
+			useCache=self.getUseCache()
+		
+		if useCache:
+			key=pyfrp_gmsh_module.getMeshCacheKey(fn,"msh",dim)
+			if self.loadFromCache(key):
+				self.fnMesh=fn
+				return self.mesh
+		
+		mesh=None
+		if dim in [2,3]:
+			mesh=pyfrp_gmsh_IO_module.readMshFile(fn,dim=dim,sidecar=sidecar)
+		
+		if mesh!=None:
+			self.mesh=mesh
+		elif dim==3:
 			self.mesh=fipy.GmshImporter3D(fn)
 		elif dim==2:
 			self.mesh=fipy.GmshImporter2D(fn)
 		else:
 			printError("Unknown dimensionality dim = "+str(dim))
 		self.fnMesh=fn
+		
+		if useCache and self.mesh!=None:
+			pyfrp_gmsh_module.storeMeshCache(key,self.mesh)
+		
 		return self.mesh
+	
+	def loadFromCache(self,key,fnOut=None):
+		
+		"""Loads mesh from mesh cache.
+		
+		Also sets up the cell center index from the cached cell centers, see 
+		:py:func:`buildCellCenterIndex`.
+		
+		See also :py:func:`pyfrp.modules.pyfrp_gmsh_module.loadMeshCache`.
+		
+		Args:
+			key (str): Cache key.
+		
+		Keyword Args:
+			fnOut (str): Output filepath for meshfile.
+		
+		Returns:
+			bool: True if mesh was found in cache.
+			
+		"""
+		
+		m,cellCenters,cellVolumes=pyfrp_gmsh_module.loadMeshCache(key,fnOut=fnOut)
+		
+		if m is None:
+			return False
+		
+		self.mesh=m
+		
+		if len(cellCenters)==3:
+			self.buildCellCenterIndex(cellCenters=cellCenters)
+		
+		return True
+	
+	def getUseCache(self):
+		
+		"""Returns flag if mesh cache is used.
+		
+		Returns:
+			bool: Flag value.
+		
+		"""
+		
+		return getattr(self,'useCache',False)
+	
+	def setUseCache(self,v):
+		
+		"""Sets flag if mesh cache is used.
+		
+		Args:
+			v (bool): New flag value.
+				
+		Returns:
+			bool: New flag value.
+		
+		"""
+		
+		self.useCache=v
+		return self.useCache
 		
 	def setMesh(self,m):
 		
@@ -357,7 +550,7 @@ class mesh(object):
 		self.importMeshFromFile(self.fnMesh)
 		return self.fnMesh
 	
-	def forceMinMeshDensityInROI(self,ROI,density,stepPercentage=0.1,debug=False,findIdxs=True,method='refine',maxCells=100000):
+	def forceMinMeshDensityInROI(self,ROI,density,stepPercentage=0.1,debug=False,findIdxs=True,method='refine',maxCells=100000,tol=0.1,maxIter=10):
 		
 		"""Forces global mensh density such that a certain density is reached in a
 		given ROI.
@@ -367,22 +560,30 @@ class mesh(object):
 		by using Gmsh's ``-refine`` option (``method=refine``). If maximum number of cells is 
 		exceeded, will use the last mesh that did not exceed ``maxCells``.
 		
+		If ``method=search``, will predict the required ``volSizePx`` from the measured densities
+		instead, see :py:func:`searchMinMeshDensityInROI`.
+		
 		Args:
 			ROI (pyfrp.subclasses.pyfrp_ROI.ROI): ROI object.
 			density (float): Desired density.
 			
 		Keyword Args:
 			stepPercentage (float): If method is ``volSize``, percentage of ``volSize`` decrease.
-			method (str): Refinement method (``refine``/``volSize``).
+			method (str): Refinement method (``refine``/``volSize``/``search``).
 			maxCells (int): Total maximum number of mesh cells allowed.
 			findIdxs (bool): Find ROI indices after refinement.
 			debug (bool): Print debugging messages.
+			tol (float): If method is ``search``, relative tolerance above ``density``.
+			maxIter (int): If method is ``search``, maximum number of meshing runs.
 		
 		Returns:
 			float: New ``volSizePx``
 		
 		"""
 		
+		if method=='search':
+			return self.searchMinMeshDensityInROI(ROI,density,tol=tol,maxIter=maxIter,maxCells=maxCells,findIdxs=findIdxs,debug=debug)
+		
 		#Set counter to 0
 		j=0
 		
@@ -403,7 +604,7 @@ class mesh(object):
 				return
 			
 			#Recompute Idxs
-			ROI.computeMeshIdx(self.mesh)
+			ROI.computeMeshIdx(self)
 			
 			#Debugging output
 			if debug:
@@ -436,6 +637,67 @@ class mesh(object):
 					
 		return self.getVolSizePx()	
 	
+	def searchMinMeshDensityInROI(self,ROI,density,tol=0.1,maxIter=10,maxCells=100000,findIdxs=True,debug=False):
+		
+		"""Searches the largest ``volSizePx`` such that a certain mesh density is reached in a 
+		given ROI.
+		
+		Since the number of mesh nodes scales approximately with :math:`volSizePx^{-d}`, the required 
+		``volSizePx`` is predicted from the measured densities, see also 
+		:py:func:`pyfrp.modules.pyfrp_misc_module.searchPowerLaw`. Between meshing runs, only the indices 
+		of ``ROI`` are recomputed. 
+		
+		Search stops as soon as the density lies between ``density`` and ``(1+tol)*density``. Meshes 
+		with more than ``maxCells`` cells are rejected.
+		
+		.. note:: If the mesh already has the desired density, will not change ``volSizePx``.
+		
+		Args:
+			ROI (pyfrp.subclasses.pyfrp_ROI.ROI): ROI object.
+			density (float): Desired density.
+			
+		Keyword Args:
+			tol (float): Relative tolerance above ``density``.
+			maxIter (int): Maximum number of meshing runs.
+			maxCells (int): Total maximum number of mesh cells allowed.
+			findIdxs (bool): Find ROI indices after refinement.
+			debug (bool): Print debugging messages.
+		
+		Returns:
+			float: New ``volSizePx``
+		
+		"""
+		
+		def getDensity(volSizePx):
+			self.setVolSizePx(volSizePx)
+			if self.getNNodes()>maxCells:
+				return None
+			ROI.computeMeshIdx(self)
+			return ROI.getMeshDensity()
+		
+		#Current density
+		density0=None
+		if self.mesh!=None:
+			ROI.computeMeshIdx(self)
+			density0=ROI.getMeshDensity()
+			
+		volSizePx,densityFinal=pyfrp_misc_module.searchPowerLaw(getDensity,density,self.getVolSizePx(),-self.simulation.embryo.geometry.getDim(),
+			y0=density0,tol=tol,maxIter=maxIter,debug=debug)
+		
+		#Make sure mesh belongs to best volSize
+		if self.getVolSizePx()!=volSizePx:
+			self.setVolSizePx(volSizePx)
+			ROI.computeMeshIdx(self)
+		
+		if debug:
+			print "volSizePx = ", volSizePx, " gives density ", densityFinal, " desired density ", density
+		
+		#Recompute idxs for all ROIs
+		if findIdxs:
+			self.simulation.embryo.computeROIIdxs()
+		
+		return self.getVolSizePx()
+	
 	def getNNodes(self):
 		
 		"""Returns number of nodes in mesh. 
@@ -1079,6 +1341,118 @@ class mesh(object):
 		
 		return max(distances[0]),max(distances[1]),max(distances[2])
 		
+	def buildCellCenterIndex(self,cellCenters=None):
+		
+		"""Builds spatial index of cell centers of mesh.
+		
+		Stores cell centers as contiguous arrays in ``cellCenters`` and a z-sorted
+		permutation of all cells in ``zOrder``, such that cells inside a z-slab can be found
+		via binary search. 
+		
+		.. note:: The index is automatically rebuilt by :py:func:`getCellCenterArrays` and 
+		   :py:func:`getSlabIdx` if the mesh changes.
+		
+		Keyword Args:
+			cellCenters (numpy.ndarray): Precomputed cell centers, for example from the mesh cache.
+		
+		Returns:
+			tuple: Tuple containing:
+			
+				* x (numpy.ndarray): x-coordinates of cells.
+				* y (numpy.ndarray): y-coordinates of cells.
+				* z (numpy.ndarray): z-coordinates of cells.
+		
+		"""
+		
+		if cellCenters is None:
+			cellCenters=self.getCellCenters()
+		x,y,z=cellCenters
+		
+		self.cellCenters=tuple(np.ascontiguousarray(c,dtype=float) for c in [x,y,z])
+		self.zOrder=np.argsort(self.cellCenters[2],kind='mergesort')
+		self.zSorted=self.cellCenters[2][self.zOrder]
+		self.indexedMesh=self.mesh
+		
+		return self.cellCenters
+	
+	def getCellCenterArrays(self):
+		
+		"""Returns cell centers of mesh as contiguous arrays.
+		
+		Only calls :py:func:`buildCellCenterIndex` if the mesh has changed since the
+		index was last built.
+		
+		Returns:
+			tuple: Tuple containing:
+			
+				* x (numpy.ndarray): x-coordinates of cells.
+				* y (numpy.ndarray): y-coordinates of cells.
+				* z (numpy.ndarray): z-coordinates of cells.
+				
+		"""
+		
+		if getattr(self,'indexedMesh',None) is not self.mesh or getattr(self,'cellCenters',None) is None:
+			self.buildCellCenterIndex()
+			
+		return self.cellCenters
+	
+	def getFingerprint(self):
+		
+		"""Returns fingerprint of mesh.
+		
+		Fingerprint is computed from the cell centers of the mesh, see also :py:func:`getCellCenterArrays`
+		and :py:func:`pyfrp.modules.pyfrp_misc_module.getFingerprint`.
+		
+		Returns:
+			str: Fingerprint.
+		
+		"""
+		
+		if self.mesh==None:
+			return pyfrp_misc_module.getFingerprint(None)
+		
+		return pyfrp_misc_module.getFingerprint(self.getCellCenterArrays())
+	
+	def getSlabIdx(self,zmin,zmax):
+		
+		"""Returns indices of all cells with ``zmin < z < zmax``.
+		
+		Uses the z-sorted index built by :py:func:`buildCellCenterIndex`.
+		
+		Args:
+			zmin (float): Minimal z-coordinate.
+			zmax (float): Maximal z-coordinate.
+		
+		Returns:
+			numpy.ndarray: Sorted array of cell indices.
+			
+		"""
+		
+		self.getCellCenterArrays()
+		
+		lower=np.searchsorted(self.zSorted,zmin,side='right')
+		upper=np.searchsorted(self.zSorted,zmax,side='left')
+		
+		return np.sort(self.zOrder[lower:max(lower,upper)])
+	
+	def getSlabMask(self,zmin,zmax):
+		
+		"""Returns mask of all cells with ``zmin < z < zmax``.
+		
+		Args:
+			zmin (float): Minimal z-coordinate.
+			zmax (float): Maximal z-coordinate.
+		
+		Returns:
+			numpy.ndarray: Boolean mask.
+			
+		"""
+		
+		mask=np.zeros(len(self.getCellCenterArrays()[0]),dtype=bool)
+		mask[self.getSlabIdx(zmin,zmax)]=True
+		
+		return mask
+	
 	def getCellCenters(self):
 		
 		"""Returns cell centers of mesh.
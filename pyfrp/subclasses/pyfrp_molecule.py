@@ -37,12 +37,18 @@ import numpy as np
 from pyfrp.modules import pyfrp_misc_module
 from pyfrp.modules import pyfrp_IO_module
 from pyfrp.modules import pyfrp_stats_module
+from pyfrp.modules import pyfrp_fit_module
+from pyfrp.modules import pyfrp_gmsh_module
+from pyfrp.modules.pyfrp_term_module import *
 
 #PyFRAP Classes
 import pyfrp_embryo
 
 #Standard packages
 import os
+import shutil
+import copy
+import itertools
 
 
 #---------------------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -85,7 +91,17 @@ class molecule:
 		self.degrStErr=None
 		
 		self.crucialParameters=["equOn","fitPinned","fitProd","fitDegr","LBD","LBProd","LBDegr","UBD","UBProd","UBDegr"]
+		
+		#Maximum number of embryo proxies keeping their embryo in memory
+		self.maxLoadedEmbryos=5
 					
+	def __getattr__(self,name):
+		
+		"""Loads attribute ``name`` if it has not been loaded yet from container file, 
+		see :py:func:`pyfrp.modules.pyfrp_IO_module.getLazyAttr`."""
+		
+		return pyfrp_IO_module.getLazyAttr(self,name)
+	
 	def addEmbryo(self,embryo):
 		
 		"""Appends embryo object to ``embryos`` list.
@@ -164,14 +180,20 @@ class molecule:
 		self.embryos.remove(embryo)
 		return self.embryos		
 	
-	def save(self,fn=None):
+	def save(self,fn=None,container=True):
 		
-		"""Saves molecule to pickle file.
+		"""Saves molecule to container file or pickle file.
 		
 		.. note:: If ``fn`` is not specified, will assume ``fn=self.name``.
 		
+		Loaded embryos of :py:class:`embryoProxy` objects are saved to their embryo file first if they have been 
+		changed, see :py:class:`embryoProxy`.
+		
+		See also :py:func:`pyfrp.modules.pyfrp_IO_module.saveToContainer`.
+		
 		Keyword Args:
 			fn (str): Molecule file name.
+			container (bool): Save to container file instead of pickle file.
 		
 		Returns:
 			str: Filename of molecule file.
@@ -181,19 +203,28 @@ class molecule:
 		if fn==None:
 			fn=self.name+".mol"
 		
-		pyfrp_IO_module.saveToPickle(self,fn=fn)	
+		for emb in self.getLoadedEmbryos():
+			if emb.dirty:
+				emb.save()
+		
+		if container:
+			pyfrp_IO_module.saveToContainer(self,fn=fn)
+		else:
+			pyfrp_IO_module.saveToPickle(self,fn=fn)
 		
 		return fn
 	
 	def saveExtract(self,fn=None,copyMeshFiles=True,debug=False):
 		
-		"""Saves molecule to pickle file in compressed version by doing:
+		"""Saves molecule to file in compressed version by doing:
 		
-			* Extracts embryos in ``embryos`` list into seperate pickled files.
-			* Clears all attributes of embryo objects
+			* Extracts embryos in ``embryos`` list into seperate embryo files.
+			* Replaces embryos by :py:class:`embryoProxy` objects referring to the embryo files.
 			* Saves molecule file
 			
-		This function is really useful if molecule file size gets out-of-hand.	
+		This function is really useful if molecule file size gets out-of-hand. Since the molecule file
+		then only contains names and fits of embryos, it loads fast, while embryos are 
+		loaded from their files once needed.
 		
 		.. note:: Embryo files will be saved in path/to/moculefile/moleculename/ .
 		
@@ -223,7 +254,7 @@ class molecule:
 			printError("Something went wrong extracting embryos, will not continue saving.")
 			return False
 		
-		self.clearAllEmbryos()
+		self.proxyEmbryos(fn=fn.replace('.mol','')+"_embryos")
 		self.save(fn=fn)
 		
 		return True
@@ -264,6 +295,8 @@ class molecule:
 		
 		print "in mol.extract:", fn
 		
+		fn=pyfrp_misc_module.slashToFn(fn)
+		
 		for embryo in self.embryos:
 			embryo.save(fn=fn+embryo.getName()+".emb",copyMeshFiles=copyMeshFiles,debug=debug)
 		
@@ -289,6 +322,89 @@ class molecule:
 		
 		return b
 	
+	def proxyEmbryos(self,fn=""):
+		
+		"""Replaces embryos in ``embryos`` list by :py:class:`embryoProxy` objects referring to 
+		the embryo files in folder ``fn``, as written by :py:func:`extractEmbryos2Files`.
+		
+		Also works for embryos cleared by :py:func:`clearAllEmbryos`. Embryos without 
+		embryo file in ``fn`` are kept as they are.
+		
+		.. note:: If ``fn`` is not specified, will assume ``fn='embryoFiles/'`` .
+		
+		Keyword Args:
+			fn (str): Path of folder with embryo files.
+			
+		Returns:
+			list: Updated ``embryos`` list.
+		
+		"""
+		
+		if fn=="":
+			fn="embryoFiles/"
+		fn=pyfrp_misc_module.slashToFn(fn)
+		
+		for i,emb in enumerate(self.embryos):
+			
+			fnEmb=fn+emb.name+".emb"
+			
+			if isinstance(emb,embryoProxy):
+				emb.fn=os.path.abspath(fnEmb)
+			elif os.path.isfile(fnEmb):
+				if emb.fits==None:
+					emb=None
+				self.embryos[i]=embryoProxy(self,fnEmb,embryo=emb)
+			else:
+				printWarning("Cannot find embryo file " + fnEmb + ", will keep embryo "+ emb.name + " as it is.")
+				
+		return self.embryos
+	
+	def getLoadedEmbryos(self):
+		
+		"""Returns all :py:class:`embryoProxy` objects in ``embryos`` list that currently hold their embryo in memory, 
+		sorted from least to most recently used.
+		
+		Returns:
+			list: List of embryo proxies.
+		
+		"""
+		
+		loaded=[emb for emb in self.embryos if isinstance(emb,embryoProxy) and emb.isLoaded()]
+		loaded.sort(key=lambda emb: emb.lastAccess)
+		
+		return loaded
+	
+	def releaseEmbryos(self,n=None,save=None):
+		
+		"""Releases embryos of least recently used :py:class:`embryoProxy` objects until only
+		``n`` of them hold their embryo in memory.
+		
+		.. note:: If ``n=None``, will use ``maxLoadedEmbryos``. If ``maxLoadedEmbryos`` is also ``None``, 
+		   will not release anything.
+		
+		Keyword Args:
+			n (int): Number of embryos to keep in memory.
+			save (bool): Save embryos to their file before releasing them. If ``None``, only saves 
+				embryos that have been changed, see :py:func:`embryoProxy.release`.
+			
+		Returns:
+			list: List of released embryo proxies.
+		
+		"""
+		
+		if n==None:
+			n=self.maxLoadedEmbryos
+		if n==None:
+			return []
+		
+		loaded=self.getLoadedEmbryos()
+		released=loaded[:max(len(loaded)-n,0)]
+		
+		for emb in released:
+			emb.release(save=save)
+			
+		return released
+		
 	def checkEmbryoNames(self):
 		
 		"""Check if all embryos in ``embryos`` list have different names.
@@ -330,6 +446,10 @@ class molecule:
 		#Update all embryos and fits
 		for emb in self.embryos:
 			
+			#Embryo proxies are updated when loading their embryo
+			if isinstance(emb,embryoProxy):
+				continue
+			
 			emb.updateVersion()
 			
 			for fit in emb.fits:
@@ -375,6 +495,216 @@ class molecule:
 	
 	
 	
+	def getAllFits(self):
+		
+		"""Returns list of all fits of all embryos in molecule.
+		
+		.. note:: For :py:class:`embryoProxy` objects not holding their embryo, these are fit summaries.
+		
+		Returns:
+			list: List of fit objects.
+			
+		"""
+		
+		fits=[]
+		for emb in self.embryos:
+			fits=fits+emb.fits
+		return fits
+	
+	def runAllFits(self,workers=None,fits=None,debug=False):
+		
+		"""Runs all fits of all embryos in molecule in parallel.
+		
+		Fits are distributed over a pool of worker processes via
+		:py:func:`pyfrp.modules.pyfrp_fit_module.runFitsParallel`. Each worker
+		only receives the fit settings and the ROI data and simulation vectors, 
+		not the whole embryo. Results are merged back into the fit objects.
+		
+		Keyword Args:
+			workers (int): Number of worker processes. If ``None``, uses the number of CPUs.
+			fits (list): List of fits to run. If ``None``, runs all fits returned by :py:func:`getAllFits`.
+			debug (bool): Print debugging messages.
+		
+		.. note:: If ``fits=None``, embryos are fitted in batches of ``maxLoadedEmbryos`` embryos. Embryos of 
+		   :py:class:`embryoProxy` objects are loaded for their batch and saved and released once it is done.
+		   Then, the fits of these embryos returned are fit summaries.
+		
+		Returns:
+			list: List of fit objects.
+			
+		"""
+		
+		maxLoaded=self.maxLoadedEmbryos
+		self.maxLoadedEmbryos=None
+		
+		try:
+			if fits!=None:
+				fits=pyfrp_fit_module.runFitsParallel(fits,workers=workers,debug=debug)
+				
+				for emb in self.getLoadedEmbryos():
+					if any(fit in emb.fits for fit in fits):
+						emb.dirty=True
+				
+				return fits
+			
+			nBatch=maxLoaded
+			if nBatch==None or nBatch<1:
+				nBatch=max(len(self.embryos),1)
+			
+			for i in range(0,len(self.embryos),nBatch):
+				
+				batch=self.embryos[i:i+nBatch]
+				
+				fits=[]
+				for emb in batch:
+					if isinstance(emb,embryoProxy):
+						emb.load()
+					fits=fits+emb.fits
+				
+				pyfrp_fit_module.runFitsParallel(fits,workers=workers,debug=debug)
+				
+				for emb in batch:
+					if isinstance(emb,embryoProxy):
+						emb.dirty=True
+						emb.release()
+			
+			return self.getAllFits()
+		
+		finally:
+			self.maxLoadedEmbryos=maxLoaded
+			self.releaseEmbryos()
+		
+	def genMeshes(self,embryos=None,nProcs=None,memPerProc=None,debug=False,callback=None):
+		
+		"""Generates meshes of multiple embryos in parallel Gmsh processes.
+		
+		Does this by:
+		
+			* Preparing a mesh job for each embryo via :py:func:`pyfrp.subclasses.pyfrp_mesh.mesh.getMeshJob`. 
+			  Meshes found in the mesh cache are loaded directly.
+			* Running all jobs via :py:func:`pyfrp.modules.pyfrp_gmsh_module.runGmshQueue`. Embryos whose 
+			  jobs would produce the same mesh share a single Gmsh run.
+			* Importing the resulting meshes via :py:func:`pyfrp.subclasses.pyfrp_mesh.mesh.finishMeshJob`.
+		
+		Gmsh output of each embryo is logged into ``meshfiles/gmshLogs/embryoName.stout`` and ``embryoName.sterr``.
+		
+		If given, ``callback`` is called as ``callback(embryo,returnCode,nDone,nJobs)`` every time 
+		Gmsh has finished meshing an embryo. Otherwise progress is printed.
+		
+		.. note:: Embryos whose mesh is not generated from file (``mesh.fromFile=False``) are meshed 
+		   one after the other via :py:func:`pyfrp.subclasses.pyfrp_mesh.mesh.genMesh`.
+		
+		.. note:: Embryos of :py:class:`embryoProxy` objects stay loaded until all meshes are imported, then
+		   ``maxLoadedEmbryos`` is enforced again.
+		
+		Keyword Args:
+			embryos (list): List of embryos. If ``None``, uses all embryos of molecule.
+			nProcs (int): Maximum number of Gmsh processes. If ``None``, limited by CPUs and memory.
+			memPerProc (int): Expected memory needed per Gmsh process in bytes.
+			debug (bool): Print debugging messages.
+			callback (function): Function called when embryo has been meshed.
+		
+		Returns:
+			list: List of embryos whose mesh could not be generated.
+			
+		"""
+		
+		if embryos==None:
+			embryos=self.embryos
+		
+		maxLoaded=self.maxLoadedEmbryos
+		self.maxLoadedEmbryos=None
+		
+		try:
+			return self.runMeshJobs(embryos,nProcs=nProcs,memPerProc=memPerProc,debug=debug,callback=callback)
+		finally:
+			self.maxLoadedEmbryos=maxLoaded
+			self.releaseEmbryos()
+	
+	def runMeshJobs(self,embryos,nProcs=None,memPerProc=None,debug=False,callback=None):
+		
+		"""Generates meshes of multiple embryos, see :py:func:`genMeshes`.
+		
+		Embryos of :py:class:`embryoProxy` objects that got a new mesh are marked as changed.
+		
+		Args:
+			embryos (list): List of embryos.
+		
+		Keyword Args:
+			nProcs (int): Maximum number of Gmsh processes.
+			memPerProc (int): Expected memory needed per Gmsh process in bytes.
+			debug (bool): Print debugging messages.
+			callback (function): Function called when embryo has been meshed.
+		
+		Returns:
+			list: List of embryos whose mesh could not be generated.
+			
+		"""
+		
+		jobs=[]
+		jobEmbryos=[]
+		duplicates=[]
+		keys={}
+		
+		for emb in embryos:
+			
+			m=emb.simulation.mesh
+			if not m.fromFile:
+				m.genMesh()
+				if isinstance(emb,embryoProxy):
+					emb.dirty=True
+				continue
+			
+			job=m.getMeshJob(emb.name,debug=debug)
+			if job==None:
+				if isinstance(emb,embryoProxy):
+					emb.dirty=True
+				if debug:
+					print "Loaded mesh of embryo " + emb.name + " from mesh cache."
+				continue
+			
+			#Only run Gmsh once for identical meshes
+			if job['key'] in keys:
+				duplicates.append((emb,job,keys[job['key']]))
+				continue
+			
+			keys[job['key']]=job
+			jobs.append(job)
+			jobEmbryos.append(emb)
+		
+		def embryoCallback(job,returnCode,nDone,nJobs):
+			emb=jobEmbryos[jobs.index(job)]
+			if callback!=None:
+				callback(emb,returnCode,nDone,nJobs)
+			else:
+				print "Finished meshing embryo " + emb.name + " (" + str(nDone) + "/" + str(nJobs) + ")."
+		
+		returnCodes=pyfrp_gmsh_module.runGmshQueue(jobs,nProcs=nProcs,memPerProc=memPerProc,debug=debug,callback=embryoCallback)
+		
+		failed=[]
+		
+		for emb,job,returnCode in zip(jobEmbryos,jobs,returnCodes):
+			if returnCode!=0:
+				printWarning("Gmsh failed for embryo " + emb.name + ", see log files in meshfiles/gmshLogs/.")
+				failed.append(emb)
+				os.remove(job['fn'])
+				continue
+			emb.simulation.mesh.finishMeshJob(job)
+			if isinstance(emb,embryoProxy):
+				emb.dirty=True
+		
+		for emb,job,primary in duplicates:
+			if jobEmbryos[jobs.index(primary)] in failed:
+				failed.append(emb)
+				os.remove(job['fn'])
+				continue
+			shutil.copyfile(primary['fnOut'],job['fnOut'])
+			emb.simulation.mesh.finishMeshJob(job)
+			if isinstance(emb,embryoProxy):
+				emb.dirty=True
+		
+		return failed
+		
 	def sumUpResults(self,sameSettings=False):
 		
 		"""Sums up results from all fits in ``selFits`` list.
@@ -473,4 +803,233 @@ class molecule:
 		
 		return self.getFitParm("DOptMu")
 	
-	
\ No newline at end of file
+#Counter ordering accesses to embryo proxies
+embryoAccesses=itertools.count()
+	
+class embryoProxy(object):
+	
+	"""Proxy of an embryo saved in a separate embryo file, as written by :py:func:`molecule.extractEmbryos2Files`.
+	
+	Only keeps the embryo's name and summaries of its fits, that is copies of the fit objects without 
+	``ROIsFitted``, holding all fit settings and results such as ``DOptMu``. This way, results of all embryos of 
+	a molecule are available without loading ROIs, simulation and mesh of any embryo.
+	
+	Accessing any other attribute loads the embryo from ``fn`` and passes the attribute on to it. 
+	While loaded, ``fits`` are the fits of the embryo. Once more than ``molecule.maxLoadedEmbryos`` proxies 
+	hold their embryo, the least recently used one is released again, see :py:func:`molecule.releaseEmbryos`.
+	
+	Setting attributes of the embryo through the proxy marks it as changed (``dirty``). Only changed embryos 
+	are saved to ``fn`` when being released.
+	
+	.. note:: Changes to objects of the embryo, such as ``proxy.simulation.D=10.``, are not tracked. 
+	   Set ``dirty=True`` or call :py:func:`save` to keep them.
+	
+	.. note:: Keep references to the proxy, not to the embryo returned by :py:func:`load`, otherwise 
+	   memory cannot be released and changes made after releasing are lost.
+	
+	Args:
+		molecule (pyfrp.subclasses.pyfrp_molecule.molecule): Molecule the embryo belongs to.
+		fn (str): Path to embryo file.
+		
+	Keyword Args:
+		embryo (pyfrp.subclasses.pyfrp_embryo.embryo): Embryo saved in ``fn``, used to create summary.
+	
+	"""
+	
+	#Attributes of proxy itself, all others are attributes of the embryo
+	proxyAttrs=['molecule','fn','embryo','name','fits','lastAccess','dirty','lazyAttrs']
+	
+	def __init__(self,molecule,fn,embryo=None):
+		
+		self.molecule=molecule
+		self.fn=os.path.abspath(fn)
+		self.embryo=None
+		self.lastAccess=next(embryoAccesses)
+		self.dirty=False
+		
+		self.name=os.path.splitext(os.path.basename(fn))[0]
+		self.fits=[]
+		
+		if embryo!=None:
+			self.updateSummary(embryo)
+		
+	def __getattr__(self,name):
+		
+		"""Loads attribute ``name`` if it has not been loaded yet from container file, 
+		otherwise returns attribute of embryo, loading the embryo if necessary."""
+		
+		try:
+			return pyfrp_IO_module.getLazyAttr(self,name)
+		except AttributeError:
+			if name.startswith('__') or name in embryoProxy.proxyAttrs:
+				raise
+		
+		return getattr(self.load(),name)
+	
+	def __setattr__(self,name,val):
+		
+		"""Sets attributes of embryo, except for attributes of the proxy itself, and marks embryo as changed."""
+		
+		if name not in embryoProxy.proxyAttrs:
+			setattr(self.load(),name,val)
+			object.__setattr__(self,'dirty',True)
+			return
+		
+		object.__setattr__(self,name,val)
+		
+		if name in ['name','fits'] and self.isLoaded():
+			setattr(self.embryo,name,val)
+			object.__setattr__(self,'dirty',True)
+	
+	def __getstate__(self):
+		
+		"""Returns attributes without embryo, keeping only the summary."""
+		
+		state=dict(self.__dict__)
+		
+		if self.isLoaded():
+			state['fits']=self.getFitSummaries(self.embryo)
+			state['embryo']=None
+		
+		state['dirty']=False
+		
+		return state
+	
+	def __setstate__(self,state):
+		
+		"""Restores attributes, proxies saved before changes were tracked are not changed."""
+		
+		state.setdefault('dirty',False)
+		self.__dict__.update(state)
+	
+	def isLoaded(self):
+		
+		"""Returns True if proxy currently holds its embryo in memory."""
+		
+		return self.embryo!=None
+		
+	def load(self):
+		
+		"""Returns embryo, loading it from ``fn`` if necessary.
+		
+		After loading, the least recently used embryo proxies of the molecule are released 
+		if necessary, see :py:func:`molecule.releaseEmbryos`.
+		
+		Returns:
+			pyfrp.subclasses.pyfrp_embryo.embryo: Embryo.
+		
+		"""
+		
+		self.lastAccess=next(embryoAccesses)
+		
+		if self.isLoaded():
+			return self.embryo
+		
+		emb=pyfrp_IO_module.loadEmbryo(self.fn)
+		
+		object.__setattr__(self,'embryo',emb)
+		object.__setattr__(self,'fits',emb.fits)
+		object.__setattr__(self,'dirty',False)
+		
+		self.molecule.releaseEmbryos()
+		
+		return emb
+	
+	def release(self,save=None):
+		
+		"""Releases embryo from memory, keeping only its summary.
+		
+		.. note:: If ``save=None``, will only save embryo if it has been changed, that is if ``dirty=True``.
+		
+		Keyword Args:
+			save (bool): Save embryo to ``fn`` before releasing it.
+			
+		Returns:
+			bool: True if embryo was released, False if proxy did not hold embryo.
+		
+		"""
+		
+		if not self.isLoaded():
+			return False
+		
+		if save==None:
+			save=self.dirty
+		
+		if save:
+			self.save()
+		
+		emb=self.embryo
+		object.__setattr__(self,'embryo',None)
+		self.updateSummary(emb)
+		
+		pyfrp_IO_module.cleanUp()
+		
+		return True
+	
+	def save(self,fn=None,copyMeshFiles=False,debug=False,container=True):
+		
+		"""Saves embryo to ``fn`` and updates summary. 
+		
+		.. note:: If ``fn`` is given, proxy will refer to ``fn`` from now on.
+		
+		Keyword Args:
+			fn (str): Output filename.
+			copyMeshFiles (bool): Copy meshfiles to embryo file destination.
+			debug (bool): Print out debugging messages.
+			container (bool): Save to container file instead of pickle file.
+			
+		Returns:
+			str: Output filename.
+		
+		"""
+		
+		if fn!=None:
+			self.fn=os.path.abspath(fn)
+		
+		emb=self.load()
+		emb.save(fn=self.fn,copyMeshFiles=copyMeshFiles,debug=debug,container=container)
+		
+		object.__setattr__(self,'dirty',False)
+		self.updateSummary(emb)
+		
+		return self.fn
+	
+	def updateSummary(self,embryo):
+		
+		"""Updates name and fit summaries from embryo.
+		
+		Args:
+			embryo (pyfrp.subclasses.pyfrp_embryo.embryo): Embryo.
+		
+		"""
+		
+		object.__setattr__(self,'name',embryo.name)
+		
+		if not self.isLoaded():
+			object.__setattr__(self,'fits',self.getFitSummaries(embryo))
+		
+	def getFitSummaries(self,embryo):
+		
+		"""Returns summaries of all fits of embryo.
+		
+		Summaries are shallow copies of the fits referring to the proxy instead of the embryo
+		and without ``ROIsFitted``.
+		
+		Args:
+			embryo (pyfrp.subclasses.pyfrp_embryo.embryo): Embryo.
+		
+		Returns:
+			list: List of fit summaries.
+		
+		"""
+		
+		summaries=[]
+		
+		for fit in embryo.fits:
+			pyfrp_IO_module.loadLazyAttrs(fit)
+			summary=copy.copy(fit)
+			summary.embryo=self
+			summary.ROIsFitted=[]
+			summaries.append(summary)
+		
+		return summaries
@@ -32,6 +32,9 @@
 #Importing necessary modules
 #===========================================================================================================================================================================
 
+#Lazy imports, only importing modules when first used
+from pyfrp.modules.pyfrp_lazy_module import lazyImport
+
 #Numpy/Scipy
 import numpy as np
 import scipy.interpolate as interp 
@@ -45,14 +48,22 @@ from pyfrp.modules import pyfrp_sim_module
 from pyfrp.modules import pyfrp_img_module
 from pyfrp.modules import pyfrp_idx_module
 from pyfrp.modules import pyfrp_misc_module
+from pyfrp.modules import pyfrp_IO_module
+from pyfrp.modules import pyfrp_integration_module
 from pyfrp.modules.pyfrp_term_module import *
 
 #Plotting
-import matplotlib.pyplot as plt
+plt=lazyImport("matplotlib.pyplot")
 
 #itertools 
 import itertools
 
+#OS
+import os
+import shutil
+import tempfile
+import hashlib
+
 #===========================================================================================================================================================================
 #Class definitions
 #===========================================================================================================================================================================
@@ -74,8 +85,19 @@ class simulation(object):
 		#IC image
 		self.ICimg=None
 		
+		#ROI averaging matrix and the mesh/ROI state it was computed for
+		self.avgMatrix=None
+		self.avgMatrixKey=None
+		
 		self.restoreDefaults()
 		
+	def __getattr__(self,name):
+		
+		"""Loads attribute ``name`` if it has not been loaded yet from container file, 
+		see :py:func:`pyfrp.modules.pyfrp_IO_module.getLazyAttr`."""
+		
+		return pyfrp_IO_module.getLazyAttr(self,name)
+	
 	def restoreDefaults(self):
 		
 		"""Restores default parameters for simulations."""
@@ -103,11 +125,18 @@ class simulation(object):
 		#Save simulation
 		self.saveSim=False
 		self.vals=[]
+		self.fnVals=""
+		self.valsDtype="float64"
+		self.valsChunkSize=50
 		
 		#Solver details
 		self.solver="PCG"
 		self.iterations=1000
 		self.tolerance=1E-10
+		
+		#Checkpointing
+		self.checkpointInterval=0
+		self.fnCheckpoint=""
 	
 	def setSolver(self,solver):
 		
@@ -117,6 +146,9 @@ class simulation(object):
 		
 			* PCG
 			* LU
+			* cachedPCG, see :py:func:`pyfrp.modules.pyfrp_sim_module.getCachedStepSolver`.
+			* cachedLU, see :py:func:`pyfrp.modules.pyfrp_sim_module.getCachedStepSolver`.
+			* expm, see :py:func:`pyfrp.modules.pyfrp_sim_module.expmSolutionIter`.
 			
 		Args:
 			solver (str): Solver to use.
@@ -126,7 +158,7 @@ class simulation(object):
 		
 		"""
 		
-		if solver not in ["PCG","LU"]:
+		if solver not in ["PCG","LU","cachedPCG","cachedLU","expm"]:
 			printWarning("Unknown solver " + solver +". This might lead to problems later")
 		
 		self.solver=solver
@@ -196,6 +228,161 @@ class simulation(object):
 		
 		return self.iterations
 	
+	def setValsStore(self,fn,dtype="float64",chunkSize=50):
+		
+		"""Sets path of on-disk store the solution history is written to if ``saveSim`` is on.
+		
+		Instead of keeping the solution of every timepoint in memory, it is then written in compressed 
+		chunks to ``fn`` while simulating and ``vals`` becomes a :py:class:`pyfrp.modules.pyfrp_IO_module.solutionStore`,
+		which reads solutions lazily from disk. Relative paths are resolved relative to the folder of the embryo file. 
+		Set ``fn=""`` to use the default store, see :py:func:`getValsStoreFn`.
+		
+		Args:
+			fn (str): Path to folder of store.
+			
+		Keyword Args:
+			dtype (str): Datatype values are stored with, for example ``float32``.
+			chunkSize (int): Number of timepoints per chunk.
+		
+		Returns:
+			str: Current path of store.
+		
+		"""
+		
+		self.fnVals=fn
+		self.valsDtype=dtype
+		self.valsChunkSize=chunkSize
+		return self.fnVals
+	
+	def getValsStoreFn(self):
+		
+		"""Returns path of on-disk store of solution history.
+		
+		If no path has been set via :py:func:`setValsStore` and ``saveSim`` is on, the store is 
+		placed next to the embryo file, that is ``path/to/embryo_vals/`` for ``path/to/embryo.emb``. 
+		Returns ``""`` if embryo has not been saved yet, in which case values are kept in memory.
+		
+		Returns:
+			str: Path of store.
+		
+		"""
+		
+		fnEmbryo=self.embryo.getFnSave()
+		
+		if self.fnVals:
+			if fnEmbryo and not os.path.isabs(self.fnVals):
+				return os.path.join(os.path.dirname(fnEmbryo),self.fnVals)
+			return self.fnVals
+		
+		if self.saveSim and fnEmbryo:
+			return os.path.splitext(fnEmbryo)[0]+"_vals"
+		
+		return ""
+	
+	def relocateValsStore(self,copy=True):
+		
+		"""Makes sure the solution store in ``vals`` is located at :py:func:`getValsStoreFn`.
+		
+		This is needed whenever the embryo file moves, since the store is placed relative to it.
+		If ``copy=True``, copies the store to its new location. Otherwise only points ``vals`` to 
+		the new location if a store exists there, for example after moving embryo file and store together.
+		
+		Keyword Args:
+			copy (bool): Copy store to new location.
+		
+		Returns:
+			str: Path of store.
+		
+		"""
+		
+		#Do not load values just to check where they are stored
+		store=self.__dict__.get('vals')
+		if not isinstance(store,pyfrp_IO_module.solutionStore):
+			return ""
+		
+		fn=self.getValsStoreFn()
+		if not fn or os.path.abspath(fn)==store.fn:
+			return store.fn
+		fn=os.path.abspath(fn)
+		
+		if copy:
+			store.flush()
+			if os.path.isdir(fn):
+				shutil.rmtree(fn)
+			shutil.copytree(store.fn,fn)
+		elif not os.path.isdir(fn):
+			return store.fn
+		
+		store.fn=fn
+		store.cache=(None,None)
+		
+		return store.fn
+	
+	def setCheckpointInterval(self,n):
+		
+		"""Sets number of steps between two checkpoints written by 
+		:py:func:`pyfrp.modules.pyfrp_sim_module.simulateReactDiff`.
+		
+		Set to ``0`` to turn off checkpointing.
+			
+		Args:
+			n (int): New checkpoint interval.
+		
+		Returns:
+			int: Current checkpoint interval.
+		
+		"""
+		
+		self.checkpointInterval=max(int(n),0)
+		return self.checkpointInterval
+	
+	def getCheckpointInterval(self):
+		
+		"""Returns number of steps between two checkpoints.
+		
+		Returns:
+			int: Current checkpoint interval.
+		
+		"""
+		
+		return self.checkpointInterval
+	
+	def setCheckpointFn(self,fn):
+		
+		"""Sets path of checkpoint file.
+		
+		Args:
+			fn (str): Path to checkpoint file.
+		
+		Returns:
+			str: Current checkpoint file path.
+		
+		"""
+		
+		self.fnCheckpoint=fn
+		return self.fnCheckpoint
+	
+	def getCheckpointFn(self):
+		
+		"""Returns path of checkpoint file.
+		
+		If ``fnCheckpoint`` is not set, returns ``pyfrp_<embryo name>_<key>.ckpt.npz`` in 
+		the temporary directory of the system, where ``key`` is a hash of 
+		:py:func:`pyfrp.modules.pyfrp_sim_module.getCheckpointKey`. This way, simulations of different
+		embryos with the same name do not share checkpoints.
+		
+		Returns:
+			str: Path to checkpoint file.
+		
+		"""
+		
+		if self.fnCheckpoint:
+			return self.fnCheckpoint
+		
+		name="".join(x if x.isalnum() else "_" for x in str(self.embryo.name))
+		key=hashlib.md5(pyfrp_sim_module.getCheckpointKey(self)).hexdigest()[:12]
+		return os.path.join(tempfile.gettempdir(),"pyfrp_"+name+"_"+key+".ckpt.npz")
+	
 	def setICMode(self,m):
 		
 		"""Sets the mode of initial conditions.
@@ -269,18 +456,22 @@ class simulation(object):
 		
 		return self.valOut
 	
-	def run(self,signal=None,embCount=None,showProgress=True,debug=False):
+	def run(self,signal=None,embCount=None,showProgress=True,debug=False,resume=False):
 		
 		"""Runs simulation.
 		
 		Checks if ROI indices are computed, if not, computes them. Then passes simulation
 		object to :py:func:`pyfrp.modules.pyfrp_sim_module.simulateReactDiff`.
 		
+		If ``resume=True``, continues from the last checkpoint written, see also 
+		:py:func:`setCheckpointInterval`.
+		
 		Keyword Args:
 			signal (PyQt4.QtCore.pyqtSignal): PyQT signal to send progress to GUI.
 			embCount (int): Counter of counter process if multiple datasets are simulated. 
 			debug (bool): Print debugging messages and show debugging plots.
 			showProgress (bool): Print out progress.
+			resume (bool): Resume from last checkpoint.
 		
 		Returns:
 			bool: True if success, False otherwise.
@@ -296,14 +487,77 @@ class simulation(object):
 		if not isinstance(self.ICimg,np.ndarray) and self.ICmode in [2,3]:
 			printWarning("No ICimg was specified, but it is required for selected ICmode="+str(self.ICmode)+". Will grab first image in "+self.embryo.fnDatafolder)
 			try:
-				self.setICimgByFn(self.embryo.getDataFolder()+'/'+self.embryo.getFileList()[0])
+				if self.embryo.usesDataStack():
+					self.setICimg(pyfrp_img_module.convImg(self.embryo.getDataStack()[0],self.embryo.dataEnc))
+				else:
+					self.setICimgByFn(self.embryo.getDataFolder()+'/'+self.embryo.getFileList()[0])
 			except:
 				printError("Was not able to set new ICimg. Will abort.")
 				return False
 			
-		pyfrp_sim_module.simulateReactDiff(self,signal=signal,embCount=embCount,showProgress=showProgress,debug=debug)
+		pyfrp_sim_module.simulateReactDiff(self,signal=signal,embCount=embCount,showProgress=showProgress,debug=debug,resume=resume)
 		return True
 	
+	def getROIAvgMatrixKey(self):
+		
+		"""Returns key describing current mesh and ROI mesh index state.
+		
+		Key consists of a fingerprint of the cell centers and cell volumes of the mesh, see 
+		:py:func:`pyfrp.subclasses.pyfrp_mesh.mesh.getFingerprint`, and the Id, size and checksum of
+		the mesh indices of each ROI in ``embryo.ROIs``. Thus remeshing always invalidates the key, 
+		even if the number of cells stays the same.
+		
+		Returns:
+			tuple: Key.
+		
+		"""
+		
+		key=[pyfrp_misc_module.getFingerprint(self.mesh,np.asarray(self.mesh.mesh.getCellVolumes(),dtype=np.float64))]
+		for r in self.embryo.ROIs:
+			idx=np.asarray(r.meshIdx,dtype=int)
+			key.append((r.Id,len(idx),hashlib.md5(idx.tostring()).hexdigest()))
+		
+		return tuple(key)
+	
+	def getFingerprint(self):
+		
+		"""Returns fingerprint of simulation settings.
+		
+		Fingerprint covers the PDE parameters, initial condition settings including ``ICimg``, 
+		the time vector, the solver settings and the mesh, see :py:func:`pyfrp.subclasses.pyfrp_mesh.mesh.getFingerprint`.
+		See also :py:func:`pyfrp.modules.pyfrp_misc_module.getFingerprint`.
+		
+		Returns:
+			str: Fingerprint.
+		
+		"""
+		
+		return pyfrp_misc_module.getFingerprint(self.D,self.prod,self.degr,self.ICmode,self.bleachedROI,self.valOut,self.ICimg,
+			np.asarray(self.tvecSim,dtype=np.float64),self.solver,self.iterations,self.tolerance,self.mesh)
+	
+	def getROIAvgMatrix(self):
+		
+		"""Returns sparse volume-weighted averaging matrix of all ROIs.
+		
+		Row ``i`` of the matrix computes the simulated concentration of ``embryo.ROIs[i]``.
+		The matrix is only recomputed if mesh or ROI mesh indices have changed since
+		its last computation. See also 
+		:py:func:`pyfrp.modules.pyfrp_integration_module.computeAvgConcMatrix`.
+		
+		Returns:
+			scipy.sparse.csr_matrix: Averaging matrix.
+		
+		"""
+		
+		key=self.getROIAvgMatrixKey()
+		
+		if self.avgMatrix is None or self.avgMatrixKey!=key:
+			cvs=self.mesh.mesh.getCellVolumes()
+			self.avgMatrix=pyfrp_integration_module.computeAvgConcMatrix(cvs,[r.meshIdx for r in self.embryo.ROIs])
+			self.avgMatrixKey=key
+			
+		return self.avgMatrix
+	
 	def setMesh(self,m):
 		
 		"""Sets mesh to a new mesh object.
@@ -1009,8 +1263,11 @@ class simulation(object):
 		If ``vmin=None`` or ``vmax=None``, will compute overall maximum and minimum values
 		over all ROIs.
 		
+		If ``phi`` is an integer, plots the saved solution at timepoint ``phi``, only reading
+		this timepoint from ``vals``.
+		
 		Args:
-			phi (fipy.CellVariable): Simulation solution variable (or numpy array).
+			phi (fipy.CellVariable): Simulation solution variable (or numpy array or timepoint index).
 			ROIs (list): List of :py:class:`pyfrp.subclasses.pyfrp_ROI.ROI` objects.
 			
 		Keyword Args:
@@ -1026,6 +1283,9 @@ class simulation(object):
 		"""
 			
 			
+		if isinstance(phi,(int,np.integer)):
+			phi=np.asarray(self.vals[phi])
+		
 		if ax==None:
 			fig,axes = pyfrp_plot_module.makeSubplot([1,1],titles=["Simulation IC stack"],proj=['3d'])
 			ax=axes[0]
@@ -1148,10 +1408,12 @@ class simulation(object):
 		
 		return pyfrp_img_module.getImgSmoothness(self.ICimg)
 		
-	def rerun(self,signal=None,embCount=None,showProgress=True,debug=False):
+	def rerun(self,signal=None,embCount=None,showProgress=True,debug=False,ROIs=None):
 		
 		"""Reruns simulation.
 		
+		If ``ROIs`` are given, only their simulation vectors are recomputed.
+		
 		.. note:: Only works if simulation has been run before with ``saveSim`` enabled.
 		
 		See also :py:func:`pyfrp.modules.pyfrp_sim_module.rerunReactDiff`.
@@ -1161,6 +1423,7 @@ class simulation(object):
 			embCount (int): Counter of counter process if multiple datasets are simulated. 
 			debug (bool): Print debugging messages and show debugging plots.
 			showProgress (bool): Print out progress.
+			ROIs (list): List of ROIs to recompute. If ``None``, recomputes all ROIs.
 		
 		Returns:
 			pyfrp.subclasses.pyfrp_simulation.simulation: Updated simulation instance.
@@ -1168,10 +1431,12 @@ class simulation(object):
 		
 		"""
 		
+		self.updateVersion()
+		
 		if not self.embryo.checkROIIdxs()[1]:
 			self.embryo.computeROIIdxs()
 		
-		pyfrp_sim_module.rerunReactDiff(self,signal=signal,embCount=embCount,showProgress=showProgress,debug=debug)
+		pyfrp_sim_module.rerunReactDiff(self,signal=signal,embCount=embCount,showProgress=showProgress,debug=debug,ROIs=ROIs)
 		return True
 		
 	def updateVersion(self):
@@ -1205,7 +1470,8 @@ class simulation(object):
 		
 		See also :py:func:`computeInterpolatedSolutionToImg`.
 		
-		.. note:: Only works if simulation has been run before and saved via ``saveSim``.
+		.. note:: Only works if simulation has been run before and saved via ``saveSim``. If ``vals`` is
+		   stored on disk (see :py:func:`setValsStore`), only the timepoints mapped are read.
 		
 		For more details about interpolation methods, check out 
 		https://docs.scipy.org/doc/scipy-0.14.0/reference/generated/scipy.interpolate.griddata.html .
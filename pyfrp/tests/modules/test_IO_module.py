@@ -0,0 +1,111 @@
+"""This module imports all tests/unittests for the
+pyfrp_IO_module."""
+
+from pyfrp.modules import pyfrp_IO_module
+
+import numpy as np
+import pickle
+
+def test_solutionStore(tmpdir):
+	
+	"""Test function for solutionStore. 
+	
+	Appends solutions to store, reads them back after pickling and truncates store."""
+	
+	vals=np.random.RandomState(0).rand(11,7)
+	fn=str(tmpdir.join("vals"))
+	
+	store=pyfrp_IO_module.solutionStore(fn,7,chunkSize=3,dtype="float32")
+	for val in vals:
+		store.append(val)
+	
+	store=pickle.loads(pickle.dumps(store))
+	
+	assert len(store) == 11
+	assert np.allclose(store[-1],vals[-1],atol=1e-6)
+	assert np.allclose(store.toArray(),vals,atol=1e-6)
+	assert store[4].dtype == np.float32
+	
+	store.truncate(5)
+	store.append(vals[0])
+	
+	assert len(store) == 6
+	assert np.allclose(list(store),np.concatenate([vals[:5],vals[:1]]),atol=1e-6)
+	assert len(tmpdir.join("vals").listdir()) == 2
+	
+def test_saveToContainer(tmpdir):
+	
+	"""Test function for saveToContainer and loadFromContainer. 
+	
+	Saves embryo with ROI indices and solution history into container, loads it lazily
+	and checks that arrays are only loaded on access and references are kept."""
+	
+	from pyfrp.subclasses import pyfrp_embryo
+	
+	emb=pyfrp_embryo.embryo("test")
+	sim=emb.newSimulation()
+	r=emb.newRadialROI("bleached",0,[256,256],100)
+	r.imgIdxX=range(500)
+	r.dataVec=list(np.linspace(0,1,100))
+	sim.bleachedROI=r
+	sim.vals=[np.random.RandomState(0).rand(50) for i in range(3)]
+	
+	fn=pyfrp_IO_module.saveToContainer(emb,fn=str(tmpdir.join("test.emb")))
+	
+	assert pyfrp_IO_module.isContainerFile(fn)
+	assert not pyfrp_IO_module.isContainerFile(pyfrp_IO_module.saveToPickle(emb,fn=str(tmpdir.join("test_pk.emb"))))
+	
+	emb2=pyfrp_IO_module.loadEmbryo(fn)
+	r2=emb2.ROIs[0]
+	
+	assert 'imgIdxX' not in vars(r2) and 'imgIdxX' in pyfrp_IO_module.getAttrNames(r2)
+	assert r2.imgIdxX == r.imgIdxX
+	assert 'imgIdxX' in vars(r2)
+	assert isinstance(r2.dataVec,list) and np.allclose(r2.dataVec,r.dataVec)
+	assert np.allclose(emb2.simulation.vals,sim.vals)
+	assert emb2.simulation.bleachedROI is r2 and r2.embryo is emb2
+	
+def test_saveToContainerOverwrite(tmpdir,monkeypatch):
+	
+	"""Test function for saveToContainer overwriting a container that still has attributes left to load.
+	
+	Checks that meshes are saved as arrays, that the container is not opened anymore when it is removed
+	and that attributes left to load are still read correctly, both for objects written into the new file
+	and for objects that were not."""
+	
+	import os
+	
+	from pyfrp.modules import pyfrp_gmsh_IO_module
+	from pyfrp.modules import pyfrp_misc_module
+	from pyfrp.subclasses import pyfrp_embryo
+	
+	emb=pyfrp_embryo.embryo("test")
+	sim=emb.newSimulation()
+	r=emb.newRadialROI("bleached",0,[256,256],100)
+	r.imgIdxX=range(500)
+	sim.mesh.mesh=pyfrp_gmsh_IO_module.readMshFile(os.path.join(pyfrp_misc_module.getMeshfilesDir(),"tests","nonContiguousNodes.msh"))
+	
+	fn=pyfrp_IO_module.saveToContainer(emb,fn=str(tmpdir.join("test.emb")))
+	
+	emb2=pyfrp_IO_module.loadEmbryo(fn)
+	emb3=pyfrp_IO_module.loadEmbryo(fn)
+	
+	assert not any(name.endswith(".pk") for name in pyfrp_IO_module.zipfile.ZipFile(fn).namelist())
+	assert emb2.ROIs[0].imgIdxX == r.imgIdxX
+	
+	remove=os.remove
+	def removeClosed(f):
+		assert all(reader.zf==None for reader in pyfrp_IO_module.containerReaders if reader.fn==os.path.abspath(f))
+		remove(f)
+	monkeypatch.setattr(pyfrp_IO_module.os,"remove",removeClosed)
+	
+	emb2.ROIs[0].imgIdxX=range(10)
+	pyfrp_IO_module.saveToContainer(emb2,fn=fn)
+	
+	for e in [emb2,emb3]:
+		assert 'mesh' not in vars(e.simulation.mesh)
+		assert np.allclose(e.simulation.mesh.mesh.cellCenters,sim.mesh.mesh.cellCenters)
+		assert np.allclose(e.simulation.mesh.mesh._orderedCellVertexIDs,sim.mesh.mesh._orderedCellVertexIDs)
+	
+	assert emb3.ROIs[0].imgIdxX == r.imgIdxX
+	assert pyfrp_IO_module.loadEmbryo(fn).ROIs[0].imgIdxX == range(10)
@@ -0,0 +1,76 @@
+"""This module imports all tests/unittests for the
+pyfrp_batch_module."""
+
+from pyfrp.modules import pyfrp_batch_module
+from pyfrp.subclasses import pyfrp_embryo
+from pyfrp.subclasses import pyfrp_ROI
+from pyfrp.subclasses import pyfrp_fit
+
+import numpy as np
+import json
+
+def test_runEmbryoStages(tmpdir):
+	
+	"""Test function for runEmbryoStages. 
+	
+	Runs pinning and fitting stages on a synthetic, already pinned embryo and checks 
+	that only outdated stages and ROIs are recomputed after adding a ROI and changing fit bounds. 
+	Then writes results to a JSON and CSV summary."""
+	
+	emb=pyfrp_embryo.embryo("embryo")
+	emb.simulation=emb.newSimulation()
+	emb.simulation.stepsSim=300
+	emb.simulation.tvecSim=np.linspace(emb.tStart,emb.tEnd,emb.simulation.stepsSim)
+	
+	r=pyfrp_ROI.ROI(emb,"ROI",0)
+	r.simVec=list(1-0.8*np.exp(-emb.simulation.tvecSim/200.))
+	r.dataVec=list(1-0.8*np.exp(-emb.tvecData*10./emb.simulation.D/200.))
+	r.simVecPinned=r.simVec
+	r.dataVecPinned=r.dataVec
+	emb.ROIs.append(r)
+	
+	fit=pyfrp_fit.fit(emb,"fit")
+	fit.equOn=False
+	fit.ROIsFitted=[r]
+	emb.fits.append(fit)
+	
+	status,timings=pyfrp_batch_module.runEmbryoStages(emb,runStages=["pin","fit"])
+	
+	assert status == {"idxs":"off","analysis":"off","simulation":"off","pin":"ran","fit":"ran"}
+	assert fit.isFitted()
+	
+	status,timings=pyfrp_batch_module.runEmbryoStages(emb,runStages=["pin","fit"])
+	assert status["pin"] == "skipped"
+	assert status["fit"] == "skipped"
+	
+	#New ROI only needs to be pinned itself, fit does not use it
+	r2=pyfrp_ROI.ROI(emb,"ROI2",1,zmin=-10.,zmax=10.)
+	r2.simVec=list(r.simVec)
+	r2.dataVec=list(r.dataVec)
+	emb.ROIs.append(r2)
+	
+	status,timings=pyfrp_batch_module.runEmbryoStages(emb,runStages=["pin","fit"])
+	assert status["pin"] == "partial"
+	assert status["fit"] == "skipped"
+	assert r2.isPinned()
+	
+	#Changing fit bounds only reruns fit
+	fit.UBD=200.
+	status,timings=pyfrp_batch_module.runEmbryoStages(emb,runStages=["pin","fit"])
+	assert status["pin"] == "skipped"
+	assert status["fit"] == "ran"
+	
+	res=fit.resultsToDict()
+	res['fit']=fit.name
+	results=[{'name':emb.name,'input':"embryo.emb",'output':"embryo.emb",'status':status,'timings':timings,'fits':[res],'error':""}]
+	
+	fnJSON=pyfrp_batch_module.writeBatchSummary(results,str(tmpdir.join("summary.json")))
+	with open(fnJSON) as f:
+		assert np.isclose(json.load(f)[0]['fits'][0]['DOptMu'],fit.DOptMu)
+	
+	fnCSV=pyfrp_batch_module.writeBatchSummary(results,str(tmpdir.join("summary.csv")))
+	with open(fnCSV) as f:
+		lines=f.read().splitlines()
+	
+	assert len(lines) == 2
+	assert "DOptMu" in lines[0].split(",")
@@ -0,0 +1,182 @@
+"""This module imports all tests/unittests for the
+pyfrp_fit_module."""
+
+from pyfrp.modules import pyfrp_fit_module
+from pyfrp.subclasses import pyfrp_embryo
+from pyfrp.subclasses import pyfrp_ROI
+from pyfrp.subclasses import pyfrp_fit
+
+import numpy as np
+import subprocess
+import sys
+import os
+
+#Budget for importing pyfrp_fit_module in a fresh interpreter in seconds.
+#Measured 0.11 s with lazy imports, while eagerly importing FiPy, matplotlib,
+#scikit-image and the GUI took more than 0.3 s (and failed without PyQT/VTK).
+importTimeBudget=0.5
+
+def makeFit(name,D):
+	
+	"""Creates a fit on a synthetic embryo whose data is the simulation
+	recovering with diffusion coefficient D."""
+	
+	emb=pyfrp_embryo.embryo(name)
+	emb.simulation=emb.newSimulation()
+	emb.simulation.stepsSim=300
+	emb.simulation.tvecSim=np.linspace(emb.tStart,emb.tEnd,emb.simulation.stepsSim)
+	
+	for i,tau in enumerate([200.,600.]):
+		r=pyfrp_ROI.ROI(emb,"ROI"+str(i),i)
+		r.simVec=list(1-0.8*np.exp(-emb.simulation.tvecSim/tau))
+		r.dataVec=list(1-0.8*np.exp(-emb.tvecData*D/emb.simulation.D/tau))
+		r.simVecPinned=r.simVec
+		r.dataVecPinned=r.dataVec
+		emb.ROIs.append(r)
+	
+	fit=pyfrp_fit.fit(emb,"fit")
+	fit.equOn=False
+	fit.ROIsFitted=list(emb.ROIs)
+	emb.fits.append(fit)
+	
+	return fit
+
+def test_runFitsParallel():
+
+	"""Test function for runFitsParallel. 
+
+	Runs fits once serially and once in a process pool and checks
+	that both give the same results."""
+	
+	fitsSerial=[makeFit("embryo"+str(i),D) for i,D in enumerate([10.,30.])]
+	fitsParallel=[makeFit("embryo"+str(i),D) for i,D in enumerate([10.,30.])]
+	
+	pyfrp_fit_module.runFitsParallel(fitsSerial,workers=1)
+	pyfrp_fit_module.runFitsParallel(fitsParallel,workers=2)
+	
+	for fitS,fitP in zip(fitsSerial,fitsParallel):
+		assert np.allclose([fitS.DOptPx,fitS.SSD,fitS.Rsq],[fitP.DOptPx,fitP.SSD,fitP.Rsq])
+		assert np.allclose(fitS.fittedVecs,fitP.fittedVecs)
+		assert fitP.ROIsFitted[0].embryo is fitP.embryo
+	
+	assert np.allclose([fit.DOptPx for fit in fitsParallel],[10.,30.],rtol=1e-3)
+	
+def test_interpolateSolutions():
+
+	"""Test function for interpolateSolutions. 
+
+	Interpolates stacked simulation vectors and compares them with
+	interpolating each vector with interpolateSolution."""
+	
+	tvecScaled=np.linspace(0,100,57)**1.2
+	tvecData=np.linspace(0,tvecScaled[-1],31)
+	yvecs=np.vstack([np.sin(tvecScaled/50.),np.sqrt(tvecScaled)])
+	
+	scaled=pyfrp_fit_module.interpolateSolutions(tvecData,tvecScaled,yvecs)
+	
+	for i in range(len(yvecs)):
+		assert np.allclose(scaled[i],pyfrp_fit_module.interpolateSolution(tvecData,tvecScaled,yvecs[i]))
+	
+	try:
+		pyfrp_fit_module.interpolateSolutions(tvecData+1.,tvecScaled,yvecs)
+		assert False
+	except ValueError:
+		pass
+
+def test_computeSSDGrid():
+
+	"""Test function for computeSSDGrid. 
+
+	Computes SSD surface over diffusion, production and degradation rates
+	and compares it with evaluating FRAPObjFunc at each grid point."""
+	
+	fit=makeFit("embryo",20.)
+	fit.fitProd=True
+	fit.fitDegr=True
+	
+	Ds=np.linspace(-5.,60.,12)
+	prods=[0.,0.01]
+	degrs=[-0.001,0.,0.002,0.01]
+	
+	SSDs=pyfrp_fit_module.computeSSDGrid(fit,Ds,prods=prods,degrs=degrs,chunkSize=5)
+	
+	assert SSDs.shape == (len(Ds),len(prods),len(degrs))
+	assert np.array_equal(SSDs,pyfrp_fit_module.computeSSDGrid(fit,Ds,prods=prods,degrs=degrs,chunkSize=5,workers=2))
+	
+	SSD0=fit.SSD
+	assert np.all(SSDs[0]==2*SSD0) and np.all(SSDs[:,:,0]==2*SSD0)
+	
+	pyfrp_fit_module.iterations=0
+	for i,D in enumerate(Ds):
+		for j,prod in enumerate(prods):
+			for k,degr in enumerate(degrs):
+				fit.SSD=SSD0
+				SSD=pyfrp_fit_module.FRAPObjFunc([D,prod,degr],fit,False,None,False)
+				if SSD==100000000:
+					assert SSDs[i,j,k]==np.inf
+				else:
+					assert np.isclose(SSDs[i,j,k],SSD)
+
+def test_FRAPFittingBrute():
+	
+	"""Test function for FRAPFitting with ``optMeth='brute'``. 
+	
+	Fits via the SSD grid and checks that the diffusion rate is recovered."""
+	
+	fit=makeFit("embryo",20.)
+	fit.fitDegr=True
+	fit.optMeth='brute'
+	fit.run()
+	
+	assert fit.success
+	assert np.isclose(fit.DOptPx,20.,rtol=1e-2)
+	assert fit.fcalls > 300
+	
+def test_computeFitLikelihoodProfiles():
+
+	"""Test function for computeFitLikelihoodProfiles. 
+
+	Computes profiles serially, in a process pool and from the SSD grid,
+	and checks that they agree and leave the fit untouched."""
+	
+	fit=makeFit("embryo",20.)
+	fit.fitDegr=True
+	fit.run()
+	
+	SSD=fit.SSD
+	fittedVecs=list(fit.fittedVecs)
+	
+	names,xvaryVec,SSDsVec=pyfrp_fit_module.computeFitLikelihoodProfiles(fit,steps=20)
+	
+	assert len(names)==len(xvaryVec)==len(SSDsVec)==2
+	assert fit.SSD==SSD
+	assert fit.fittedVecs[0] is fittedVecs[0]
+	
+	for workers,fromGrid in [(2,False),(2,True)]:
+		profiles=pyfrp_fit_module.computeFitLikelihoodProfiles(fit,steps=20,workers=workers,fromGrid=fromGrid)
+		for i in range(len(names)):
+			assert np.allclose(profiles[2][i],SSDsVec[i])
+	
+	xvary,SSDs=pyfrp_fit_module.computeLikelihoodProfile(fit.resultsToVec(),fit,0,steps=20)
+	assert np.allclose(SSDs,SSDsVec[0])
+
+def test_importTime():
+	
+	"""Test that importing pyfrp_fit_module in a fresh interpreter stays within ``importTimeBudget``
+	and neither imports FiPy, pyplot, scikit-image nor the GUI."""
+	
+	code=("import time,sys;t=time.time();import pyfrp.modules.pyfrp_fit_module;t=time.time()-t;"
+		"print t;print [m for m in ['fipy','matplotlib.pyplot','skimage','pyfrp.gui'] if m in sys.modules]")
+	
+	env=dict(os.environ)
+	root=os.path.dirname(os.path.dirname(os.path.abspath(pyfrp_fit_module.__file__)))
+	env['PYTHONPATH']=os.pathsep.join([os.path.dirname(root)]+[p for p in [env.get('PYTHONPATH')] if p])
+	
+	#Take best of three to be robust against a busy machine
+	times=[]
+	for i in range(3):
+		out=subprocess.check_output([sys.executable,"-W","ignore","-c",code],env=env).strip().splitlines()
+		times.append(float(out[-2]))
+		assert out[-1] == "[]"
+	
+	assert min(times) < importTimeBudget
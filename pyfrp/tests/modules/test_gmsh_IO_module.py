@@ -16,4 +16,86 @@ def test_readStlFile():
 	
 	assert len(d.vertices) == 5
 	
-	
\ No newline at end of file
+		
+def test_readStlFileLoops():
+
+	"""Test function for readStlFile. 
+
+	Reads in .stl and checks if vertices are shared between triangles
+	and if all line loops are closed."""
+
+	d=pyfrp_gmsh_IO_module.readStlFile(pyfrp_misc_module.fixPath(pyfrp_misc_module.getMeshfilesDir()+"tests/surfaceFuse.stl"))
+	
+	assert len(d.ruledSurfaces) == len(d.lineLoops)
+	assert len(d.edges) < 3*len(d.lineLoops)
+	
+	for loop in d.lineLoops:
+		for i,e in enumerate(loop.edges):
+			eNext=loop.edges[pyfrp_misc_module.modIdx(i+1,loop.edges)]
+			oNext=loop.orientations[pyfrp_misc_module.modIdx(i+1,loop.edges)]
+			assert e.getLastVertex(loop.orientations[i]) is eNext.getFirstVertex(oNext)
+			
+def test_readMshFile(tmpdir):
+	
+	"""Test function for readMshFile. 
+	
+	Writes two tetrahedra sharing one face into an ASCII and
+	a binary .msh file, reads them in and checks faces and volumes.
+	Then checks if mesh is loaded from sidecar."""
+	
+	import struct
+	
+	nodes=[[1,0.,0.,0.],[2,1.,0.,0.],[3,0.,1.,0.],[4,0.,0.,1.],[5,1.,1.,1.]]
+	
+	fnASCII=str(tmpdir.join("ascii.msh"))
+	with open(fnASCII,'w') as f:
+		f.write("$MeshFormat\n2.2 0 8\n$EndMeshFormat\n$Nodes\n5\n")
+		for node in nodes:
+			f.write("%d %f %f %f\n"%tuple(node))
+		f.write("$EndNodes\n$Elements\n3\n1 2 2 1 1 1 2 3\n2 4 2 1 1 1 2 3 4\n3 4 2 1 1 2 3 4 5\n$EndElements\n")
+	
+	fnBinary=str(tmpdir.join("binary.msh"))
+	with open(fnBinary,'wb') as f:
+		f.write("$MeshFormat\n2.2 1 8\n"+struct.pack('<i',1)+"\n$EndMeshFormat\n$Nodes\n5\n")
+		for node in nodes:
+			f.write(struct.pack('<i3d',*node))
+		f.write("\n$EndNodes\n$Elements\n3\n")
+		f.write(struct.pack('<3i',2,1,2)+struct.pack('<6i',1,1,1,1,2,3))
+		f.write(struct.pack('<3i',4,2,2)+struct.pack('<7i',2,1,1,1,2,3,4)+struct.pack('<7i',3,1,1,2,3,4,5))
+		f.write("\n$EndElements\n")
+	
+	for fn in [fnASCII,fnBinary]:
+		mesh=pyfrp_gmsh_IO_module.readMshFile(fn,sidecar=True)
+		
+		assert mesh.numberOfCells == 2
+		assert mesh.numberOfFaces == 7
+		assert abs(mesh.cellVolumes[0]-1/6.) < 1e-10
+		assert abs(mesh.cellVolumes[1]-1/3.) < 1e-10
+		
+		assert pyfrp_gmsh_IO_module.loadMshSidecar(fn)['cellFaceIDs'].shape == (4,2)
+
+def test_readMshFileFiPy(monkeypatch):
+	
+	"""Test function for readMshFile. 
+	
+	Reads in .msh file in Gmsh's output layout with shuffled, non-contiguous node IDs
+	and additional point, line and triangle elements, both via readMshFile and 
+	``fipy.GmshImporter3D``, and checks that both give the same mesh.
+	
+	FiPy's check of the Gmsh version is patched, so the test runs without Gmsh."""
+	
+	import fipy
+	import fipy.meshes.gmshMesh
+	import numpy as np
+	
+	monkeypatch.setattr(fipy.meshes.gmshMesh,"_gmshVersion",lambda communicator=None: 2.8)
+	
+	fn=pyfrp_misc_module.fixPath(pyfrp_misc_module.getMeshfilesDir()+"tests/nonContiguousNodes.msh")
+	
+	mesh=pyfrp_gmsh_IO_module.readMshFile(fn)
+	meshFiPy=fipy.GmshImporter3D(fn)
+	
+	assert mesh.numberOfCells == meshFiPy.numberOfCells == 48
+	assert np.allclose(mesh.cellVolumes,meshFiPy.cellVolumes)
+	assert np.allclose(mesh.cellCenters,meshFiPy.cellCenters)
+	assert np.array_equal(np.ma.filled(mesh.faceCellIDs,-1),np.ma.filled(meshFiPy.faceCellIDs,-1))
@@ -56,4 +56,72 @@ def test_getAllSubElements():
 	# Add Cuboid
 	d.addCuboidByParameters([0,0,0],100,150,50,30.,plane="z",genLoops=True,genSurfaces=True,genVol=True)
 
-	assert len(d.ruledSurfaces[0].getAllSubElements())==13
\ No newline at end of file
+	assert len(d.ruledSurfaces[0].getAllSubElements())==13
+
+def test_domainLookupIndices():
+	
+	"""Test domain's lookup indices.
+	
+	Creates cuboid domain, looks up elements by ID, coordinate and vertex pair
+	and checks that lookups stay consistent after changing IDs, merging, deleting and
+	pickling, and after changing elements directly instead of through setters.
+	"""
+	
+	import copy
+	
+	# Create domain
+	d=pyfrp_gmsh_geometry.domain()
+	d.addCuboidByParameters([0,0,0],100,150,50,30.,plane="z",genLoops=True,genSurfaces=True,genVol=True)
+	
+	v1,v2=d.vertices[0],d.vertices[1]
+	e=d.getEdgeByVertices(v2,v1)[0]
+	
+	assert d.getVertexById(v2.Id)==(v2,1)
+	assert d.getVertexByX(v2.x+1e-12)[0] is v2
+	assert d.addVertex(v2.x,checkExist=True) is v2
+	assert e.Id==d.edges[0].Id
+	
+	# Change IDs
+	d.incrementAllIDs(10)
+	assert d.getVertexById(v2.Id)[0] is v2
+	assert d.getVertexById(1)==(False,False)
+	assert d.getEdgeByVertices(v1,v2)[0] is e
+	v1.setID(d.getNewId(d.vertices))
+	assert d.getEdgeByVertices(v2,v1)[0] is e
+	
+	# Merge
+	d2=pyfrp_gmsh_geometry.domain()
+	d2.addCuboidByParameters([0,0,0],10,10,10,30.,plane="z",genLoops=True,genSurfaces=True,genVol=True)
+	d.merge(d2)
+	assert d.getVertexById(d2.vertices[0].Id)[0] is d2.vertices[0]
+	assert d.getNewId(d.vertices)==max(pyfrp_misc_module.objAttrToList(d.vertices,'Id'))+1
+	
+	# Delete edge
+	d.lineLoops=[]
+	e.delete()
+	assert d.getEdgeByVertices(v1,v2)==(False,False)
+	assert d.getEdgeById(e.Id)==(False,False)
+	
+	# Move vertex
+	v2.setX(np.array([1000.,0,0]))
+	assert d.getVertexByX([1000.,0,0])[0] is v2
+	
+	# Change coordinates, IDs and element lists directly
+	v2.x=np.array([2000.,0,0])
+	assert d.getVertexByX([1000.,0,0])==(False,False)
+	assert d.addVertex(np.array([2000.,0,0]),checkExist=True) is v2
+	
+	v1.Id=d.getNewId(d.vertices)
+	assert d.getVertexById(v1.Id)[0] is v1
+	
+	vNew=copy.copy(d.vertices[-1])
+	vNew.Id=d.getNewId(d.vertices)
+	vNew.x=np.array([3000.,0,0])
+	d.vertices[-1]=vNew
+	assert d.getVertexById(vNew.Id)[0] is vNew
+	assert d.getVertexByX([3000.,0,0])[0] is vNew
+	
+	# Copies rebuild their own indices
+	dc=copy.deepcopy(d)
+	assert d.getVertexByX([2000.,0,0])[0] is v2
+	assert dc.getVertexByX([2000.,0,0])[0] is dc.vertices[1]
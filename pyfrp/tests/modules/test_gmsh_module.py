@@ -0,0 +1,65 @@
+"""This module imports all tests/unittests for the
+pyfrp_gmsh_module."""
+
+from pyfrp.modules import pyfrp_gmsh_module
+
+import numpy as np
+import os
+import time
+
+def test_meshCache(tmpdir):
+
+	"""Test mesh cache. 
+
+	Stores a few meshes in a cache, loads them back and checks that 
+	least recently used entries are evicted first."""
+	
+	import fipy
+	
+	fnCache=str(tmpdir.mkdir("cache"))
+	
+	keys=[]
+	for i in range(3):
+		
+		# Dummy .msh file
+		fnMsh=str(tmpdir.join("mesh"+str(i)+".msh"))
+		with open(fnMsh,'w') as f:
+			f.write("mesh "+str(i))
+		
+		key=pyfrp_gmsh_module.getMeshCacheKey(fnMsh,"msh",3)
+		pyfrp_gmsh_module.storeMeshCache(key,fipy.Grid3D(nx=i+2,ny=2,nz=2),fnMsh=fnMsh,fnCache=fnCache,maxSize=10**9)
+		keys.append(key)
+		
+		# Make sure entries have distinct timestamps
+		os.utime(os.path.join(fnCache,key),(time.time()-100+i,time.time()-100+i))
+	
+	assert len(set(keys))==3
+	
+	# Load first entry, marking it as recently used
+	fnOut=str(tmpdir.join("out.msh"))
+	mesh,cellCenters,cellVolumes=pyfrp_gmsh_module.loadMeshCache(keys[0],fnOut=fnOut,fnCache=fnCache)
+	
+	assert open(fnOut).read()=="mesh 0"
+	assert np.allclose(cellCenters,np.asarray(fipy.Grid3D(nx=2,ny=2,nz=2).cellCenters))
+	assert np.allclose(np.asarray(mesh.cellVolumes),cellVolumes)
+	
+	# Evict down to two entries
+	sizes=[sum([os.path.getsize(os.path.join(fnCache,k,f)) for f in os.listdir(os.path.join(fnCache,k))]) for k in keys]
+	removed=pyfrp_gmsh_module.evictMeshCache(fnCache=fnCache,maxSize=sum(sizes)-1)
+	
+	assert removed==[keys[1]]
+	assert pyfrp_gmsh_module.loadMeshCache(keys[1],fnCache=fnCache)==(None,None,None)
+	
+def test_getMaxGmshProcs():
+
+	"""Test function for getMaxGmshProcs. 
+
+	Checks that number of processes is limited by CPUs and 
+	by memory."""
+	
+	import multiprocessing
+	
+	assert pyfrp_gmsh_module.getMaxGmshProcs() == multiprocessing.cpu_count()
+	
+	if pyfrp_gmsh_module.getAvailableMemory()!=None:
+		assert pyfrp_gmsh_module.getMaxGmshProcs(memPerProc=2**60) == 1
@@ -0,0 +1,78 @@
+"""This module imports all tests/unittests for the
+pyfrp_idx_module."""
+
+from pyfrp.modules import pyfrp_idx_module
+
+import numpy as np
+
+def test_getCircleIdxImg():
+
+	"""Test function for getCircleIdxImg. 
+
+	Computes indices of circle and compares them with
+	a pixel-by-pixel check of checkInsideCircle."""
+	
+	res=32
+	center=[14.5,17.]
+	radius=9.
+	
+	indX,indY=pyfrp_idx_module.getCircleIdxImg(center,radius,res)
+	
+	ref=[(i,j) for i in range(res) for j in range(res) if pyfrp_idx_module.checkInsideCircle(i+1,j+1,center,radius)]
+	
+	assert list(zip(indX,indY)) == ref
+	
+def test_checkInsidePolyVec():
+
+	"""Test function for checkInsidePolyVec. 
+
+	Checks a set of points against a non-convex polygon and compares
+	results with the scalar checkInsidePoly."""
+	
+	poly=[[2.,2.],[20.,3.],[11.,10.],[20.,20.],[3.,18.]]
+	
+	x=np.linspace(0,22,45)
+	y=np.linspace(0,22,45)
+	X,Y=np.meshgrid(x,y)
+	
+	ins=pyfrp_idx_module.checkInsidePolyVec(X,Y,poly)
+	ref=np.array([pyfrp_idx_module.checkInsidePoly(xi,yi,poly) for xi,yi in zip(X.flatten(),Y.flatten())])
+	
+	assert ins.shape == X.shape
+	assert (ins.flatten() == ref).all()
+	assert pyfrp_idx_module.checkInsidePolyVec(5.,5.,poly) == True
+	
+def test_getPolyIdxImg():
+
+	"""Test function for getPolyIdxImg. 
+
+	Computes indices of rectangular polygon and compares them with
+	the indices of the corresponding rectangle."""
+	
+	indX,indY=pyfrp_idx_module.getPolyIdxImg([[4.5,6.5],[20.5,6.5],[20.5,12.5],[4.5,12.5]],32)
+	refX,refY=pyfrp_idx_module.getRectangleIdxImg([4.5,6.5],16,6,32)
+	
+	assert len(indX) == 16*6
+	assert (indX == refX).all() and (indY == refY).all()
+	
+def test_getSlabIdxMesh():
+
+	"""Test function for getSlabIdxMesh. 
+
+	Creates grid mesh and checks that the z-sorted slab index of the mesh 
+	returns the same indices as getSliceIdxMesh, also after the mesh changed."""
+	
+	from pyfrp.subclasses import pyfrp_embryo
+	import fipy
+	
+	emb=pyfrp_embryo.embryo("test")
+	sim=emb.newSimulation()
+	
+	for nz in [7,12]:
+		sim.mesh.setMesh(fipy.Grid3D(nx=5,ny=4,nz=nz,dx=1.,dy=1.,dz=0.5))
+		
+		z=np.asarray(sim.mesh.getCellCenters()[2])
+		
+		for zmin,zmax in [["-inf","inf"],[1.,2.5],[0.25,0.75],[3.,1.]]:
+			ref=pyfrp_idx_module.getSliceIdxMesh(z,float(zmin),float(zmax))
+			assert list(pyfrp_idx_module.getSlabIdxMesh(sim.mesh,zmin=zmin,zmax=zmax)) == list(ref)
@@ -0,0 +1,172 @@
+"""This module imports all tests/unittests for the
+pyfrp_img_module."""
+
+from pyfrp.modules import pyfrp_img_module
+from pyfrp.subclasses import pyfrp_embryo
+
+import numpy as np
+import skimage.io
+
+def test_iterDatasetImgs(tmpdir):
+
+	"""Test function for iterDatasetImgs. 
+
+	Writes a small dataset and checks that prefetched images arrive in
+	order and equal the ones loaded synchronously."""
+	
+	for i in range(7):
+		skimage.io.imsave(str(tmpdir.join("img_%02d.tif"%i)),np.full((8,8),100*i,dtype=np.uint16))
+	
+	emb=pyfrp_embryo.embryo("embryo")
+	emb.setDataFolder(str(tmpdir))
+	ana=emb.newAnalysis()
+	
+	imgs=list(pyfrp_img_module.iterDatasetImgs(ana,prefetch=2))
+	
+	assert len(imgs)==7
+	for i,img in enumerate(imgs):
+		assert np.array_equal(img,pyfrp_img_module.loadDatasetImg(ana,i))
+		assert img[0,0]==100*i
+
+def test_loadImgStack(tmpdir):
+
+	"""Test function for loadImgStack. 
+
+	Saves a stack as .npy and multi-page TIFF and checks that both are
+	memory mapped and give back the original frames."""
+	
+	stack=np.arange(5*6*7,dtype=np.uint16).reshape(5,6,7)
+	
+	np.save(str(tmpdir.join("stack.npy")),stack)
+	pyfrp_img_module.tifffile.imsave(str(tmpdir.join("stack.tif")),stack)
+	
+	for fn in ["stack.npy","stack.tif"]:
+		loaded=pyfrp_img_module.loadImgStack(str(tmpdir.join(fn)))
+		
+		assert isinstance(loaded,np.memmap)
+		assert loaded.dtype==stack.dtype
+		assert np.array_equal(loaded,stack)
+
+def test_readoutImgs():
+
+	"""Test function for readoutImgs. 
+
+	Reads out a block of random images via the readout matrix and compares
+	results with getRimConc and meanExtConc."""
+	
+	from pyfrp.subclasses import pyfrp_ROI
+	
+	imgs=np.random.RandomState(0).rand(4,20,30)
+	
+	ROIs=[]
+	for i,(idxX,idxY,numExt) in enumerate([([1,2,3,3],[4,5,6,6],3),([3,10,19],[6,29,0],0),(range(5),range(5),7)]):
+		r=pyfrp_ROI.ROI(None,"ROI"+str(i),i)
+		r.imgIdxX,r.imgIdxY,r.numExt=idxX,idxY,numExt
+		r.useForRim=i<2
+		ROIs.append(r)
+	
+	readout=pyfrp_img_module.computeReadoutMatrix(ROIs,imgs.shape[1:])
+	
+	for addRimImg in [True,False]:
+		concRims,concs=pyfrp_img_module.readoutImgs(imgs,readout,ROIs,addRimImg)
+		
+		for i,img in enumerate(imgs):
+			concRim=pyfrp_img_module.getRimConc(ROIs,img)
+			assert np.isclose(concRims[i],concRim)
+			assert np.allclose(concs[i],[pyfrp_img_module.meanExtConc(r.imgIdxX,r.imgIdxY,img,concRim,r.numExt,addRimImg) for r in ROIs])
+	
+def test_analyzeDataset(tmpdir):
+	
+	"""Test function for analyzeDataset. 
+	
+	Analyzes a small synthetic dataset via the readout pipeline with one and two workers and
+	compares data vectors and rim concentration with the ones of the per-image path via analyzeImg."""
+	
+	rng=np.random.RandomState(0)
+	for i in range(6):
+		skimage.io.imsave(str(tmpdir.join("img_%02d.tif"%i)),(rng.rand(32,32)*1000+100*i).astype(np.uint16))
+	
+	emb=pyfrp_embryo.embryo("embryo")
+	emb.setDataFolder(str(tmpdir))
+	emb.dataResPx=32
+	ana=emb.newAnalysis()
+	
+	for i,(idxX,idxY,numExt,useForRim) in enumerate([(range(10),range(10),3,True),([3,10,19,31],[6,29,0,31],0,True),(range(20,30),range(5,15),0,False)]):
+		r=emb.newSquareROI("ROI"+str(i),i,[0,0],1)
+		r.imgIdxX,r.imgIdxY,r.numExt,r.useForRim=idxX,idxY,numExt,useForRim
+	
+	concRims=[]
+	concs=[]
+	for img in pyfrp_img_module.iterDatasetImgs(ana,prefetch=0):
+		img,concRim,conc=pyfrp_img_module.analyzeImg(img,ana.process,None,None,None,ana.dataOffset,emb.ROIs,ana.addRimImg)
+		concRims.append(concRim)
+		concs.append(conc)
+	
+	results=[(map(list,zip(*concs)),concRims[0])]
+	for workers in [1,2]:
+		pyfrp_img_module.analyzeDataset(ana,workers=workers,blockSize=4,showProgress=False)
+		results.append(([list(r.dataVec) for r in emb.ROIs],ana.concRim))
+	
+	for dataVecs,concRim in results[1:]:
+		assert np.allclose(dataVecs,results[0][0])
+		assert np.isclose(concRim,results[0][1])
+	assert len(results[0][0][0]) == 6
+	
+def test_analyzeDatasetStack(tmpdir):
+	
+	"""Test function for analyzeDataset with image stacks. 
+	
+	Analyzes the same images once as single files and once as ``.npy`` stack stored with a wider dtype 
+	and checks that stack frames are read as views in their stored dtype, while both give the 
+	same data vectors and initial image, with and without processing."""
+	
+	rng=np.random.RandomState(1)
+	stack=(rng.rand(5,16,16)*1000).astype(np.uint16)
+	for i,img in enumerate(stack):
+		skimage.io.imsave(str(tmpdir.join("img_%02d.tif"%i)),img)
+	np.save(str(tmpdir.join("stack.npy")),stack.astype(np.uint32))
+	
+	emb=pyfrp_embryo.embryo("embryo")
+	emb.setDataFolder(str(tmpdir))
+	emb.dataResPx=16
+	ana=emb.newAnalysis()
+	
+	r=emb.newSquareROI("ROI",0,[0,0],1)
+	r.imgIdxX,r.imgIdxY,r.numExt,r.useForRim=range(8),range(8),0,True
+	
+	emb.newSimulation()
+	
+	results=[]
+	for process in [{},{'median':1}]:
+		ana.process=process
+		for fnStack in ["",str(tmpdir.join("stack.npy"))]:
+			emb.setDataStack(fnStack)
+			
+			assert emb.getNDataImgs()==5
+			assert np.array_equal(pyfrp_img_module.loadDatasetImg(ana,2),stack[2])
+			
+			pyfrp_img_module.analyzeDataset(ana,workers=1,blockSize=2,showProgress=False)
+			results.append((list(r.dataVec),emb.simulation.ICimg))
+		
+		assert np.allclose(results[-2][0],results[-1][0])
+		assert np.allclose(results[-2][1],results[-1][1])
+	
+	stack=pyfrp_img_module.loadImgStack(str(tmpdir.join("stack.npy")))
+	assert pyfrp_img_module.loadDatasetImg(ana,2,stack=stack).dtype==np.uint32
+	assert isinstance(pyfrp_img_module.loadDatasetImg(ana,2,stack=stack),np.memmap)
+	
+def test_analyzeDatasetEmpty(tmpdir):
+	
+	"""Test function for analyzeDataset with a dataset without images. 
+	
+	Checks that nothing is analyzed and data vectors stay empty."""
+	
+	emb=pyfrp_embryo.embryo("embryo")
+	emb.setDataFolder(str(tmpdir))
+	ana=emb.newAnalysis()
+	
+	r=emb.newSquareROI("ROI",0,[0,0],1)
+	r.imgIdxX,r.imgIdxY=range(8),range(8)
+	
+	assert pyfrp_img_module.analyzeDataset(ana,showProgress=False) is ana
+	assert list(r.dataVec) == []
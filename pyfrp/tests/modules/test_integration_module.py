@@ -0,0 +1,23 @@
+"""This module imports all tests/unittests for the
+pyfrp_integration_module."""
+
+from pyfrp.modules import pyfrp_integration_module
+
+import numpy as np
+
+def test_computeAvgConcMatrix():
+
+	"""Test function for computeAvgConcMatrix. 
+
+	Builds averaging matrix for a few index sets and checks that
+	it gives the same results as getAvgConc."""
+	
+	cvs=np.array([1.,2.,3.,4.,5.,6.])
+	val=np.array([6.,1.,4.,2.,0.5,3.])
+	inds=[[0,1,2],[],[5,3,3],range(6)]
+	
+	A=pyfrp_integration_module.computeAvgConcMatrix(cvs,inds)
+	concs=pyfrp_integration_module.getAvgConcs(val,A)
+	
+	assert A.shape == (len(inds),len(cvs))
+	assert np.allclose(concs,[pyfrp_integration_module.getAvgConc(val,cvs,ind) for ind in inds])
@@ -0,0 +1,20 @@
+"""This module imports all tests/unittests for the
+pyfrp_lazy_module."""
+
+from pyfrp.modules import pyfrp_lazy_module
+
+def test_lazyImport():
+	
+	"""Test function for lazyImport. 
+	
+	Checks that module is only imported on first attribute access, that fallbacks
+	are used and that submodules are imported when accessed."""
+	
+	mod=pyfrp_lazy_module.lazyImport("pyfrp_nonExistingModule","json")
+	
+	assert not pyfrp_lazy_module.isLoaded(mod)
+	assert mod.dumps([1]) == "[1]"
+	assert pyfrp_lazy_module.isLoaded(mod)
+	
+	xml=pyfrp_lazy_module.lazyImport("xml")
+	assert xml.dom.__name__ == "xml.dom"
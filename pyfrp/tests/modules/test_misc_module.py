@@ -0,0 +1,52 @@
+"""This module imports all tests/unittests for the
+pyfrp_misc_module."""
+
+from pyfrp.modules import pyfrp_misc_module
+
+def test_searchPowerLaw():
+
+	"""Test function for searchPowerLaw. 
+
+	Searches for the volSize giving a certain number of nodes
+	of a mocked mesh and checks that only a few evaluations are needed
+	and that inadmissible values are avoided."""
+	
+	xs=[]
+	
+	def nNodes(volSize):
+		xs.append(volSize)
+		n=int(2e5*volSize**-2.7)
+		if n>50000:
+			return None
+		return n
+	
+	x,n=pyfrp_misc_module.searchPowerLaw(nNodes,2000,20.,-3.,tol=0.1)
+	
+	assert 2000 <= n <= 2200
+	assert n == nNodes(x)
+	assert len(xs) <= 7
+	
+	x,n=pyfrp_misc_module.searchPowerLaw(nNodes,1e6,20.,-3.,tol=0.1,maxIter=20)
+	
+	assert n <= 50000
+
+def test_getFingerprint():
+	
+	"""Test function for getFingerprint. 
+	
+	Checks that fingerprints only depend on the content of objects, 
+	including nested lists, dictionaries and numpy arrays."""
+	
+	import numpy as np
+	
+	a={'x':[1,2.5,"b"],'y':np.arange(5.)}
+	b={'y':np.arange(5.),'x':[1,2.5,"b"]}
+	
+	assert pyfrp_misc_module.getFingerprint(a) == pyfrp_misc_module.getFingerprint(b)
+	
+	b['y'][2]=0.
+	assert pyfrp_misc_module.getFingerprint(a) != pyfrp_misc_module.getFingerprint(b)
+	
+	assert pyfrp_misc_module.getFingerprint([1]) != pyfrp_misc_module.getFingerprint((1,))
+	assert pyfrp_misc_module.getFingerprint(1) != pyfrp_misc_module.getFingerprint(1.)
+	assert pyfrp_misc_module.getFingerprint(np.zeros(2)) != pyfrp_misc_module.getFingerprint(np.zeros(2,dtype=int))
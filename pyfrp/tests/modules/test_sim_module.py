@@ -0,0 +1,245 @@
+"""This module imports all tests/unittests for the
+pyfrp_sim_module."""
+
+from pyfrp.modules import pyfrp_sim_module
+
+import numpy as np
+
+def test_solveCachedStep():
+
+	"""Test function for solveCachedStep. 
+
+	Performs a few timesteps with varying timestep length using cached solvers 
+	and compares the result with FiPy's solution."""
+	
+	import fipy
+	
+	class simulation(object):
+		D=2.
+		prod=0.1
+		degr=0.2
+		tolerance=1e-12
+		iterations=1000
+	
+	mesh=fipy.Grid2D(nx=6,ny=5,dx=1.,dy=2.)
+	c0=np.random.RandomState(0).rand(mesh.numberOfCells)
+	dts=[0.5,0.5,0.25,0.5]
+	
+	phi=fipy.CellVariable(mesh=mesh,value=c0)
+	eq=fipy.TransientTerm()==fipy.DiffusionTerm(coeff=simulation.D)+simulation.prod-simulation.degr*phi
+	for dt in dts:
+		eq.solve(var=phi,dt=dt,solver=fipy.LinearPCGSolver(tolerance=1e-12,iterations=1000))
+	
+	diffMatrix=pyfrp_sim_module.getDiffusionMatrix(mesh,simulation.D)
+	cellVolumes=np.asarray(mesh.cellVolumes)
+	
+	for solver in ["cachedLU","cachedPCG"]:
+		simulation.solver=solver
+		stepSolvers={}
+		c=c0.copy()
+		for dt in dts:
+			c=pyfrp_sim_module.solveCachedStep(stepSolvers,diffMatrix,cellVolumes,c,dt,simulation)
+		
+		assert len(stepSolvers) == 2
+		assert np.allclose(c,np.asarray(phi.value),atol=1e-8)
+
+def test_expmSolutionIter():
+	
+	"""Test function for expmSolutionIter. 
+	
+	Computes solution at log-spaced timepoints and compares it with the 
+	solution obtained from the dense matrix exponential."""
+	
+	import fipy
+	import scipy.linalg
+	
+	mesh=fipy.Grid2D(nx=6,ny=5,dx=1.,dy=2.)
+	c0=np.random.RandomState(0).rand(mesh.numberOfCells)
+	tvec=np.concatenate([[0],np.logspace(-2,1,7),np.linspace(11,15,5)])
+	prod=0.1
+	degr=0.2
+	
+	diffMatrix=pyfrp_sim_module.getDiffusionMatrix(mesh,2.)
+	cellVolumes=np.asarray(mesh.cellVolumes)
+	A=-diffMatrix.toarray()/cellVolumes[:,None]
+	
+	sols=list(pyfrp_sim_module.expmSolutionIter(diffMatrix,cellVolumes,c0,tvec,prod=prod,degr=degr))
+	
+	assert len(sols) == len(tvec)-1
+	
+	for t,c in zip(tvec[1:],sols):
+		cExact=np.exp(-degr*t)*scipy.linalg.expm(t*A).dot(c0)+prod/degr*(1-np.exp(-degr*t))
+		assert np.allclose(c,cExact,atol=1e-8)
+
+def test_saveCheckpoint(tmpdir):
+	
+	"""Test function for saveCheckpoint/loadCheckpoint. 
+	
+	Writes checkpoint and reads it back, then checks that checkpoint is rejected 
+	once simulation settings changed."""
+	
+	class ROI(object):
+		def __init__(self,Id,simVec):
+			self.Id=Id
+			self.simVec=simVec
+	
+	class embryo(object):
+		ROIs=[ROI(0,[1.,0.5,0.4]),ROI(1,[0.,0.2,0.3])]
+	
+	class simulation(object):
+		D=2.
+		prod=0.
+		degr=0.
+		solver="PCG"
+		saveSim=True
+		IC=np.arange(5.)
+		tvecSim=np.linspace(0,10,11)
+		def getValsStoreFn(self):
+			return ""
+		def getROIAvgMatrixKey(self):
+			return (5,)
+	
+	sim=simulation()
+	sim.embryo=embryo()
+	fn=str(tmpdir.join("sim.ckpt.npz"))
+	vals=[np.arange(5.)*i for i in range(3)]
+	
+	assert pyfrp_sim_module.loadCheckpoint(sim,fn) is None
+	
+	pyfrp_sim_module.saveCheckpoint(sim,fn,2,vals[-1],vals=vals)
+	checkpoint=pyfrp_sim_module.loadCheckpoint(sim,fn)
+	
+	assert checkpoint['step'] == 2
+	assert np.allclose(checkpoint['c'],vals[-1])
+	assert np.allclose(checkpoint['vals'],vals)
+	assert np.allclose(checkpoint['simVecs'],[r.simVec for r in sim.embryo.ROIs])
+	
+	sim.D=3.
+	assert pyfrp_sim_module.loadCheckpoint(sim,fn) is None
+	
+def test_getROIAvgMatrixKey():
+	
+	"""Test function for simulation.getROIAvgMatrixKey.
+	
+	Checks that remeshing with the same number of cells invalidates the averaging matrix."""
+	
+	import fipy
+	from pyfrp.subclasses import pyfrp_embryo
+	
+	emb=pyfrp_embryo.embryo("test")
+	sim=emb.newSimulation()
+	r=emb.newRadialROI("ROI",0,[2.,2.],1.5)
+	r.meshIdx=[0,1,4,5]
+	
+	sim.mesh.mesh=fipy.Grid2D(nx=4,ny=4,dx=1.,dy=1.)
+	m1=sim.getROIAvgMatrix()
+	
+	assert sim.getROIAvgMatrix() is m1
+	
+	sim.mesh.mesh=fipy.Grid2D(nx=4,ny=4,dx=1.,dy=2.)
+	
+	assert sim.getROIAvgMatrix() is not m1
+	
+def test_getROIAvgMatrixKeyStable():
+	
+	"""Test function for simulation.getROIAvgMatrixKey.
+	
+	Computes the key in two interpreters with hash randomization and different seeds and checks
+	that they agree, so checkpoints can be found again by later runs."""
+	
+	import os
+	import subprocess
+	import sys
+	
+	script="""
+import fipy
+from pyfrp.subclasses import pyfrp_embryo
+emb=pyfrp_embryo.embryo("test")
+sim=emb.newSimulation()
+r=emb.newRadialROI("ROI",0,[2.,2.],1.5)
+r.meshIdx=[0,1,4,5]
+sim.mesh.mesh=fipy.Grid2D(nx=4,ny=4,dx=1.,dy=1.)
+print(repr(sim.getROIAvgMatrixKey()))
+"""
+	
+	keys=[]
+	for seed in ["1","2"]:
+		env=dict(os.environ,PYTHONHASHSEED=seed)
+		out=subprocess.check_output([sys.executable,"-R","-c",script],env=env)
+		keys.append(out.strip().splitlines()[-1])
+	
+	assert keys[0] == keys[1]
+	
+def test_simulateReactDiffCheckpoints(tmpdir,monkeypatch):
+	
+	"""Test function for checkpointing in simulateReactDiff.
+	
+	Interrupts a simulation with ``saveSim`` on after its second checkpoint and resumes it. Checks that 
+	checkpoints only store the length of the solution history instead of the history itself, that
+	the resumed simulation gives the same result as an uninterrupted one and that only checkpoints
+	written or resumed from by the run itself are removed."""
+	
+	import fipy
+	import os
+	import tempfile
+	from pyfrp.subclasses import pyfrp_embryo
+	
+	# Default checkpoints go into temporary directory
+	monkeypatch.setattr(tempfile,"tempdir",str(tmpdir))
+	
+	def newSimulation():
+		emb=pyfrp_embryo.embryo("embryo")
+		sim=emb.newSimulation()
+		r=emb.newRadialROI("ROI",0,[2.,2.],1.5)
+		r.meshIdx=[0,1,6,7]
+		r.dataVec=[1.]
+		sim.mesh.mesh=fipy.Grid2D(nx=6,ny=6,dx=1.,dy=1.)
+		sim.ICmode=4
+		sim.bleachedROI=r
+		sim.valOut=2.
+		sim.saveSim=True
+		sim.solver="cachedPCG"
+		sim.stepsSim=10
+		sim.tvecSim=np.linspace(0,1,10)
+		sim.prod=0.1
+		return sim
+	
+	sim=pyfrp_sim_module.simulateReactDiff(newSimulation(),showProgress=False)
+	vals=np.array(sim.vals)
+	
+	# Checkpoint of another run with the same settings is left alone
+	fnCheckpoint=sim.getCheckpointFn()
+	open(fnCheckpoint,'w').close()
+	pyfrp_sim_module.simulateReactDiff(sim,showProgress=False)
+	assert os.path.isfile(fnCheckpoint)
+	os.remove(fnCheckpoint)
+	
+	# Interrupt after second checkpoint
+	saveCheckpoint=pyfrp_sim_module.saveCheckpoint
+	written=[]
+	def interruptingSaveCheckpoint(simulation,fn,step,c,vals=None,debug=False):
+		saveCheckpoint(simulation,fn,step,c,vals=vals,debug=debug)
+		with np.load(fn) as data:
+			written.append(sorted(data.files))
+		if len(written)==2:
+			raise KeyboardInterrupt
+	
+	monkeypatch.setattr(pyfrp_sim_module,"saveCheckpoint",interruptingSaveCheckpoint)
+	
+	sim=newSimulation()
+	sim.setCheckpointInterval(3)
+	try:
+		pyfrp_sim_module.simulateReactDiff(sim,showProgress=False)
+	except KeyboardInterrupt:
+		pass
+	
+	assert written==[['c','key','nVals','simVecs','step']]*2
+	assert os.path.isfile(fnCheckpoint)
+	
+	monkeypatch.setattr(pyfrp_sim_module,"saveCheckpoint",saveCheckpoint)
+	pyfrp_sim_module.simulateReactDiff(sim,showProgress=False,resume=True)
+	
+	assert isinstance(sim.vals,list)
+	assert np.allclose(sim.vals,vals)
+	assert not os.path.isfile(fnCheckpoint)
+	assert os.listdir(str(tmpdir))==[]
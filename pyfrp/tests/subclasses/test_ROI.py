@@ -0,0 +1,51 @@
+"""This module imports all tests/unittests for the
+pyfrp_ROI subclass."""
+
+from pyfrp.subclasses import pyfrp_embryo
+
+import fipy
+
+def test_searchRefineInMeshByField():
+	
+	"""Test function for searchRefineInMeshByField. 
+	
+	Replaces refinement by a square grid refined by ``factor`` and checks that
+	the number of nodes is reached and that only the indices of the ROI referred 
+	to by ``nNodesReq`` are recomputed between meshing runs."""
+	
+	emb=pyfrp_embryo.embryo("embryo")
+	emb.dataResPx=64
+	emb.setGeometry2Custom([32,32],dim=2)
+	mesh=emb.newSimulation().mesh
+	mesh.mesh=fipy.Grid2D(nx=8,ny=8,dx=8.,dy=8.)
+	
+	sq=emb.newSquareROI("Square",0,[16,16],32)
+	emb.newRadialROI("Master",1,[32,32],40,asMaster=True)
+	circ=emb.newRadialROI("Circle",2,[32,32],10)
+	
+	def refineInMeshByField(factor=3.,addZ=15.,findIdxs=True,debug=False,run=True,fnOut=None):
+		n=int(round(8*factor))
+		mesh.mesh=fipy.Grid2D(nx=n,ny=n,dx=64./n,dy=64./n)
+	
+	sq.refineInMeshByField=refineInMeshByField
+	
+	calls=[]
+	for r in emb.ROIs:
+		def computeMeshIdx(m,r=r,compute=r.computeMeshIdx):
+			calls.append(r.name)
+			return compute(m)
+		r.computeMeshIdx=computeMeshIdx
+	
+	nNodes=sq.searchRefineInMeshByField(1000,factor=2.)
+	
+	assert 1000 <= nNodes <= 1100
+	assert nNodes==len(sq.meshIdx)
+	assert set(calls)==set(["Square"])
+	
+	calls=[]
+	nNodes=sq.searchRefineInMeshByField(100,factor=2.,ROIReq=circ)
+	
+	assert 100 <= nNodes
+	assert nNodes==len(circ.meshIdx)
+	assert set(calls[:-1])==set(["Circle"])
+	assert calls[-1]=="Square"
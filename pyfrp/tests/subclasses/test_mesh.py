@@ -0,0 +1,110 @@
+"""This module imports all tests/unittests for the
+pyfrp_mesh subclass."""
+
+from pyfrp.subclasses import pyfrp_embryo
+from pyfrp.modules import pyfrp_gmsh_module
+from pyfrp.modules import pyfrp_gmsh_IO_module
+
+import fipy
+import os
+
+def test_searchMinMeshDensityInROI():
+	
+	"""Test function for searchMinMeshDensityInROI. 
+	
+	Replaces meshing by a square grid with cell size ``volSizePx`` and checks that
+	the density is reached and that only the target ROI's indices are recomputed
+	between meshing runs."""
+	
+	emb=pyfrp_embryo.embryo("embryo")
+	emb.dataResPx=64
+	emb.setGeometry2Custom([32,32],dim=2)
+	mesh=emb.newSimulation().mesh
+	
+	sq=emb.newSquareROI("Square",0,[16,16],32)
+	emb.newRadialROI("Master",1,[32,32],40,asMaster=True)
+	emb.newRadialROI("Circle",2,[32,32],20)
+	sq.getVolume=lambda: 32.*32.
+	
+	def setVolSizePx(v,remesh=True,fnOut=None):
+		mesh.volSizePx=v
+		n=int(round(64./v))
+		mesh.mesh=fipy.Grid2D(nx=n,ny=n,dx=64./n,dy=64./n)
+		return v
+	
+	mesh.setVolSizePx=setVolSizePx
+	mesh.setVolSizePx(8.)
+	
+	calls=[]
+	for r in emb.ROIs:
+		def computeMeshIdx(m,r=r,compute=r.computeMeshIdx):
+			calls.append(r.name)
+			return compute(m)
+		r.computeMeshIdx=computeMeshIdx
+	
+	mesh.searchMinMeshDensityInROI(sq,0.2,findIdxs=False)
+	
+	assert 0.2 <= sq.getMeshDensity() <= 0.22
+	assert set(calls)==set(["Square"])
+	
+	calls=[]
+	mesh.searchMinMeshDensityInROI(sq,0.5,findIdxs=True)
+	
+	assert 0.5 <= sq.getMeshDensity() <= 0.55
+	
+	#Other ROIs only get recomputed once search is done
+	i=calls.index("Master")
+	assert set(calls[:i])==set(["Square"])
+	assert calls.count("Circle")==1
+	
+def test_importMeshFromFileCache(tmpdir,monkeypatch):
+	
+	"""Test function for importMeshFromFile with mesh cache. 
+	
+	Imports a .msh file twice with the cache enabled and checks that the second import
+	is served from the cache. Then checks that unreadable entries and a cache directory 
+	that cannot be created are treated like an empty cache."""
+	
+	fnMsh=str(tmpdir.join("mesh.msh"))
+	with open(fnMsh,'w') as f:
+		f.write("$MeshFormat\n2.2 0 8\n$EndMeshFormat\n$Nodes\n5\n")
+		for node in [[1,0.,0.,0.],[2,1.,0.,0.],[3,0.,1.,0.],[4,0.,0.,1.],[5,1.,1.,1.]]:
+			f.write("%d %f %f %f\n"%tuple(node))
+		f.write("$EndNodes\n$Elements\n2\n1 4 2 1 1 1 2 3 4\n2 4 2 1 1 2 3 4 5\n$EndElements\n")
+	
+	fnCache=str(tmpdir.join("cache"))
+	monkeypatch.setattr(pyfrp_gmsh_module,"meshCacheDir",fnCache)
+	
+	reads=[]
+	readMshFile=pyfrp_gmsh_IO_module.readMshFile
+	def countingReadMshFile(*args,**kwargs):
+		reads.append(args[0])
+		return readMshFile(*args,**kwargs)
+	monkeypatch.setattr(pyfrp_gmsh_IO_module,"readMshFile",countingReadMshFile)
+	
+	def importMesh():
+		emb=pyfrp_embryo.embryo("embryo")
+		emb.setGeometry2Custom([0,0,0])
+		mesh=emb.newSimulation().mesh
+		assert not mesh.getUseCache()
+		mesh.setUseCache(True)
+		return mesh.importMeshFromFile(fnMsh)
+	
+	assert importMesh().numberOfCells==2
+	assert importMesh().numberOfCells==2
+	assert len(reads)==1
+	assert len(os.listdir(fnCache))==1
+	
+	# Corrupt entry
+	key=os.listdir(fnCache)[0]
+	with open(os.path.join(fnCache,key,"mesh.pk"),'w') as f:
+		f.write("corrupt")
+	
+	assert importMesh().numberOfCells==2
+	assert len(reads)==2
+	
+	# Cache directory cannot be created
+	monkeypatch.setattr(pyfrp_gmsh_module,"meshCacheDir",os.path.join(fnMsh,"cache"))
+	
+	assert importMesh().numberOfCells==2
+	assert len(reads)==3
@@ -0,0 +1,130 @@
+"""This module imports all tests/unittests for the
+pyfrp_molecule subclass."""
+
+from pyfrp.subclasses import pyfrp_molecule
+from pyfrp.subclasses import pyfrp_embryo
+from pyfrp.modules import pyfrp_gmsh_module
+from pyfrp.modules import pyfrp_misc_module
+from pyfrp.modules import pyfrp_IO_module
+
+import os
+import sys
+
+def test_genMeshes(tmpdir,monkeypatch):
+	
+	"""Test function for genMeshes. 
+	
+	Replaces Gmsh by a Python one-liner that copies a two-tetrahedra .msh file and fails for 
+	one embryo. Checks that all jobs are run, that each Gmsh run has its own log files,
+	that embryos with identical meshes share a run and that failed jobs are cleaned up."""
+	
+	fnTemplate=str(tmpdir.join("template.msh"))
+	with open(fnTemplate,'w') as f:
+		f.write("$MeshFormat\n2.2 0 8\n$EndMeshFormat\n$Nodes\n5\n")
+		for node in [[1,0.,0.,0.],[2,1.,0.,0.],[3,0.,1.,0.],[4,0.,0.,1.],[5,1.,1.,1.]]:
+			f.write("%d %f %f %f\n"%tuple(node))
+		f.write("$EndNodes\n$Elements\n2\n1 4 2 1 1 1 2 3 4\n2 4 2 1 1 2 3 4 5\n$EndElements\n")
+	
+	#Folder name containing ".geo" must not be touched
+	fnGeo=str(tmpdir.mkdir("shapes.geometry").join("geometry.geo"))
+	with open(fnGeo,'w') as f:
+		f.write("volSize_px=10;\nPoint(1)={0,0,0,volSize_px};\n")
+	
+	script=("import shutil,sys\nprint('meshing '+sys.argv[1])\n"
+		"sys.exit(1) if 'fail' in sys.argv[1] else shutil.copyfile(%r,sys.argv[1])"%fnTemplate)
+	
+	runs=[]
+	def getGmshArgs(fn,fnOut=None,debug=False,volSizeMax=None,dim=3):
+		runs.append(fn)
+		return [sys.executable,"-c",script,fnOut],fnOut
+	
+	monkeypatch.setattr(pyfrp_gmsh_module,"getGmshArgs",getGmshArgs)
+	monkeypatch.setattr(pyfrp_misc_module,"getMeshfilesDir",lambda: str(tmpdir)+"/")
+	
+	mol=pyfrp_molecule.molecule("molecule")
+	for name,volSize in [("first",10.),("second",10.),("third",20.),("fail",30.)]:
+		emb=pyfrp_embryo.embryo(name)
+		emb.setGeometry2Custom([0,0],fnGeo=fnGeo)
+		emb.newSimulation().mesh.setUseCache(False)
+		emb.simulation.mesh.volSizePx=volSize
+		mol.addEmbryo(emb)
+	
+	failed=mol.genMeshes(nProcs=2)
+	
+	assert [emb.name for emb in failed]==["fail"]
+	assert len(runs)==3
+	
+	for emb in mol.embryos[:3]:
+		assert emb.simulation.mesh.mesh.numberOfCells==2
+		assert os.path.basename(emb.simulation.mesh.fnMesh)=="geometry_"+emb.name+".msh"
+	
+	fnStout,fnSterr=pyfrp_gmsh_module.getGmshLogFns("fail",fnOut="geometry_fail.msh")
+	assert "geometry_fail.msh" in open(fnStout).read()
+	assert not os.path.isfile(pyfrp_gmsh_module.getGmshLogFns("second",fnOut="geometry_second.msh")[0])
+	assert len(os.listdir(str(tmpdir)+"/gmshLogs/"))==6
+	
+	assert sorted(os.listdir(os.path.dirname(fnGeo)))==sorted(["geometry.geo","geometry_first.msh",
+		"geometry_second.msh","geometry_third.msh"])
+	
+def test_embryoProxy(tmpdir,monkeypatch):
+	
+	"""Test function for embryo proxies created by molecule.saveExtract. 
+	
+	Extracts embryos of molecule, reloads molecule and checks that fit results are available
+	without loading embryos, that only ``maxLoadedEmbryos`` embryos are kept in memory and that
+	only changed embryos are saved when being released."""
+	
+	mol=pyfrp_molecule.molecule("test")
+	for i in range(3):
+		emb=mol.newEmbryo("emb"+str(i))
+		emb.newSimulation()
+		emb.newFit("fit").DOptMu=float(i)
+	
+	mol.maxLoadedEmbryos=1
+	assert mol.saveExtract(fn=str(tmpdir.join("test.mol")),copyMeshFiles=False)
+	
+	mol2=pyfrp_IO_module.loadMolecule(str(tmpdir.join("test.mol")))
+	
+	assert [fit.DOptMu for fit in mol2.getAllFits()] == [0.,1.,2.]
+	assert not any(emb.isLoaded() for emb in mol2.embryos)
+	
+	saved=[]
+	save=pyfrp_embryo.embryo.save
+	def countSave(self,*args,**kwargs):
+		saved.append(self.name)
+		return save(self,*args,**kwargs)
+	monkeypatch.setattr(pyfrp_embryo.embryo,"save",countSave)
+	
+	#Unchanged embryos are not written when being released
+	assert mol2.embryos[0].simulation.D == mol.embryos[0].simulation.D
+	mol2.embryos[1].dataFT="png"
+	
+	assert [emb.isLoaded() for emb in mol2.embryos] == [False,True,False]
+	assert saved == []
+	assert mol2.embryos[1].dirty
+	
+	#Changed embryos are
+	mol2.embryos[2].simulation.D=20.
+	
+	assert saved == ["emb1"]
+	assert not mol2.embryos[1].dirty and not mol2.embryos[2].dirty
+	
+	mol2.embryos[2].dirty=True
+	mol2.releaseEmbryos(n=0)
+	
+	assert saved == ["emb1","emb2"]
+	assert mol2.embryos[1].dataFT == "png"
+	assert mol2.embryos[2].simulation.D == 20.
+	assert mol2.embryos[0].fits[0].embryo.name == "emb0"
+	
+	#Saving molecule only writes back changed embryos
+	del saved[:]
+	mol2.save(fn=str(tmpdir.join("test2.mol")))
+	
+	assert saved == []
+	
+	mol2.embryos[0].dataFT="png"
+	mol2.save(fn=str(tmpdir.join("test2.mol")))
+	
+	assert saved == ["emb0"]
+	assert not mol2.embryos[0].dirty
@@ -0,0 +1,61 @@
+"""This module imports all tests/unittests for the
+pyfrp_simulation subclass."""
+
+from pyfrp.subclasses import pyfrp_embryo
+from pyfrp.modules import pyfrp_sim_module
+from pyfrp.modules import pyfrp_IO_module
+
+import numpy as np
+import fipy
+import os
+import shutil
+
+def test_valsStore(tmpdir):
+	
+	"""Test function for the default solution store. 
+	
+	Simulates a saved embryo with ``saveSim`` on and checks that values are written to a
+	store next to the embryo file. Then checks that saving the embryo somewhere else copies the
+	store and that the store is found again after moving embryo file and store."""
+	
+	emb=pyfrp_embryo.embryo("embryo")
+	sim=emb.newSimulation()
+	r=emb.newRadialROI("ROI",0,[2.,2.],1.5)
+	r.meshIdx=[0,1,6,7]
+	r.dataVec=[1.]
+	sim.mesh.mesh=fipy.Grid2D(nx=6,ny=6,dx=1.,dy=1.)
+	sim.ICmode=4
+	sim.bleachedROI=r
+	sim.valOut=2.
+	sim.saveSim=True
+	sim.solver="cachedPCG"
+	sim.stepsSim=10
+	sim.tvecSim=np.linspace(0,1,10)
+	
+	# Values are kept in memory as long as embryo has no file
+	assert sim.getValsStoreFn()==""
+	
+	fn=str(tmpdir.mkdir("a").join("embryo.emb"))
+	emb.save(fn=fn,copyMeshFiles=False)
+	
+	pyfrp_sim_module.simulateReactDiff(sim,showProgress=False)
+	vals=sim.vals.toArray()
+	
+	assert isinstance(sim.vals,pyfrp_IO_module.solutionStore)
+	assert sim.vals.fn==str(tmpdir.join("a","embryo_vals"))
+	
+	emb.save(fn=fn,copyMeshFiles=False)
+	
+	# Saving somewhere else copies store
+	fnNew=str(tmpdir.mkdir("b").join("copy.emb"))
+	emb.save(fn=fnNew,copyMeshFiles=False)
+	
+	assert sim.vals.fn==str(tmpdir.join("b","copy_vals"))
+	assert pyfrp_IO_module.loadEmbryo(fn).simulation.vals.fn==str(tmpdir.join("a","embryo_vals"))
+	
+	# Move embryo file together with its store
+	shutil.move(str(tmpdir.join("b")),str(tmpdir.join("c")))
+	embMoved=pyfrp_IO_module.loadEmbryo(str(tmpdir.join("c","copy.emb")))
+	
+	assert embMoved.simulation.vals.fn==str(tmpdir.join("c","copy_vals"))
+	assert np.allclose(embMoved.simulation.vals.toArray(),vals)